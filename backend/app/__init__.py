@@ -6,6 +6,7 @@ from flask_jwt_extended import JWTManager
 from flask_socketio import SocketIO
 from flask_mail import Mail
 from flask_bcrypt import Bcrypt
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 from datetime import timedelta
 
@@ -17,7 +18,7 @@ socketio = SocketIO()
 mail = Mail()
 bcrypt = Bcrypt()
 
-def create_app(config_name='development'):
+def create_app(config_name='development', config_overrides=None):
     app = Flask(__name__)
     app.url_map.strict_slashes = False
     
@@ -28,12 +29,30 @@ def create_app(config_name='development'):
         app.config.from_object('config.ProductionConfig')
     elif config_name == 'testing':
         app.config.from_object('config.TestingConfig')
+    # e.g. scripts that must run background work inline, applied before any service reads the config
+    if config_overrides:
+        app.config.update(config_overrides)
+    
+    # Behind a load balancer, take the client address and scheme from the
+    # X-Forwarded-* headers its trusted proxies append, for rate limits and audit logs
+    trusted_proxies = app.config.get('TRUSTED_PROXY_COUNT', 0)
+    if trusted_proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies)
     
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
-    socketio.init_app(app, cors_allowed_origins="*")
+    # Socket.IO event handlers are collected on import and attached to the
+    # server init_app creates, so they must be imported before it
+    from app.routes import socket_events
+    # With a message queue, emits from any worker process reach clients on all of them
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'),
+        channel=app.config.get('SOCKETIO_CHANNEL', 'flask-socketio')
+    )
     mail.init_app(app)
     bcrypt.init_app(app)
     CORS(app)
@@ -66,6 +85,67 @@ def create_app(config_name='development'):
     app.register_blueprint(reporting_bp, url_prefix='/api/reporting')
     app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
     
+    # Configure services
+    from app.services.geolocation.geocoding_service import geocoding_service
+    from app.services.geolocation.distance_matrix_service import distance_matrix_service
+    from app.services.geolocation.mileage_service import mileage_service
+    from app.services.geolocation.geofence_index_service import geofence_index_service
+    from app.services.geolocation.geofence_geojson_service import geofence_geojson_service
+    from app.services.geolocation.client_geocoding_service import client_geocoding_service
+    from app.services.geolocation.batch_geocoder import batch_geocoder
+    from app.services.client.client_import_service import client_import_service
+    from app.services.geolocation.coordinate_backfill_service import coordinate_backfill_service
+    from app.services.client.client_search_service import client_search_service
+    from app.services.client.client_overview_service import client_overview_service
+    from app.services.client.caregiver_access_service import caregiver_access_service
+    from app.services.task.visit_scheduling_service import visit_scheduling_service
+    from app.services.task.caregiver_workload_service import caregiver_workload_service
+    from app.services.auth.password_hashing_service import password_hashing_service
+    from app.services.auth.caregiver_provisioning_service import caregiver_provisioning_service
+    from app.services.auth.authorization_service import authorization_service
+    from app.services.auth.identity_service import identity_service
+    from app.services.auth.token_blocklist_service import token_blocklist_service
+    from app.services.auth.rate_limit_service import rate_limit_service
+    from app.services.communication.inbox_service import inbox_service
+    from app.services.communication.conversation_membership_service import conversation_membership_service
+    from app.services.communication.socket_session_service import socket_session_service
+    geocoding_service.init_app(app)
+    distance_matrix_service.init_app(app)
+    mileage_service.init_app(app)
+    geofence_index_service.init_app(app)
+    geofence_geojson_service.init_app(app)
+    client_geocoding_service.init_app(app)
+    batch_geocoder.init_app(app)
+    client_import_service.init_app(app)
+    coordinate_backfill_service.init_app(app)
+    client_search_service.init_app(app)
+    client_overview_service.init_app(app)
+    caregiver_access_service.init_app(app)
+    visit_scheduling_service.init_app(app)
+    caregiver_workload_service.init_app(app)
+    password_hashing_service.init_app(app)
+    caregiver_provisioning_service.init_app(app)
+    authorization_service.init_app(app)
+    identity_service.init_app(app)
+    token_blocklist_service.init_app(app)
+    rate_limit_service.init_app(app)
+    inbox_service.init_app(app)
+    conversation_membership_service.init_app(app)
+    socket_session_service.init_app(app)
+    
+    @app.cli.command('requeue-geocoding')
+    def requeue_geocoding():
+        """Geocode clients whose background job was lost, inline"""
+        # This process exits when done, so the jobs cannot go to background tasks
+        client_geocoding_service.run_async = False
+        print(f"Requeued geocoding for {client_geocoding_service.requeue_stale()} clients")
+    
+    @app.cli.command('retry-invites')
+    def retry_invites():
+        """Send caregiver invites left unsent by a mail failure or restart, inline"""
+        caregiver_provisioning_service.invites_async = False
+        print(f"Retried {caregiver_provisioning_service.retry_unsent()} caregiver invites")
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
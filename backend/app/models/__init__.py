@@ -1,9 +1,11 @@
 from .auth.user import User
 from .auth.role import Role
+from .auth.user_invite import UserInvite
 from .timesheet.timesheet import Timesheet
 from .timesheet.break_time import BreakTime
 from .geolocation.location import Location
 from .geolocation.geofence import Geofence
+from .geolocation.daily_mileage import DailyMileage
 from .communication.message import Message
 from .communication.conversation import Conversation
 from .client.client import Client
@@ -11,11 +13,12 @@ from .client.care_plan import CarePlan
 from .client.caregiver_assignment import CaregiverAssignment
 from .task.task import Task
 from .task.task_assignment import TaskAssignment
+from .task.caregiver_daily_workload import CaregiverDailyWorkload
 from .reporting.report import Report
 from .reporting.audit_log import AuditLog
 
 __all__ = [
-    'User', 'Role', 'Timesheet', 'BreakTime', 'Location', 'Geofence',
+    'User', 'Role', 'UserInvite', 'Timesheet', 'BreakTime', 'Location', 'Geofence', 'DailyMileage',
     'Message', 'Conversation', 'Client', 'CarePlan', 'CaregiverAssignment',
-    'Task', 'TaskAssignment', 'Report', 'AuditLog'
+    'Task', 'TaskAssignment', 'CaregiverDailyWorkload', 'Report', 'AuditLog'
 ]
@@ -40,7 +40,7 @@ class Role(db.Model):
                 'reports': ['create', 'read'],
                 'analytics': ['read']
             }
-        elif self.name == 'health_aid':
+        elif self.name in ('health_aid', 'caregiver'):
             return {
                 'users': ['read'],
                 'timesheets': ['create', 'read', 'update'],
@@ -16,6 +16,8 @@ class User(db.Model):
     role_id = db.Column(db.String(36), db.ForeignKey('roles.id'), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     is_verified = db.Column(db.Boolean, default=False)
+    # Bumped whenever the claims in this user's access tokens stop being valid
+    authz_version = db.Column(db.Integer, nullable=False, default=0)
     last_login = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -38,8 +40,16 @@ class User(db.Model):
     def check_password(self, password):
         return bcrypt.check_password_hash(self.password_hash, password)
     
+    def token_claims(self):
+        """Role claims carried in access tokens, so routes can authorize without loading the user"""
+        return {
+            'role': self.role.name if self.role else None,
+            'permissions': (self.role.permissions if self.role else None) or {},
+            'authz_version': self.authz_version or 0
+        }
+    
     def generate_tokens(self):
-        access_token = create_access_token(identity=self.id)
+        access_token = create_access_token(identity=self.id, additional_claims=self.token_claims())
         refresh_token = create_refresh_token(identity=self.id)
         return access_token, refresh_token
     
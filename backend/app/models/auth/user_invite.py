@@ -0,0 +1,44 @@
+from app import db
+from datetime import datetime
+import hashlib
+import uuid
+
+def hash_invite_token(token):
+    """Invite tokens are stored as SHA-256 digests, like a password they only ever travel in the email"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+class UserInvite(db.Model):
+    __tablename__ = 'user_invites'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), unique=True, nullable=False)
+    # Digest of the single-use token in the last email sent; replaced on every resend
+    token_hash = db.Column(db.String(64), unique=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, failed, accepted
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(255))
+    sent_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+    accepted_at = db.Column(db.DateTime)
+    created_by = db.Column(db.String(36), db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    user = db.relationship('User', foreign_keys=[user_id])
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'accepted_at': self.accepted_at.isoformat() if self.accepted_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<UserInvite {self.user_id} - {self.status}>'
@@ -22,7 +22,9 @@ class CarePlan(db.Model):
     creator = db.relationship('User', backref='created_care_plans')
     tasks = db.relationship('Task', backref='care_plan', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
+    def to_dict(self, tasks=None):
+        if tasks is None:
+            tasks = self.tasks
         return {
             'id': self.id,
             'client_id': self.client_id,
@@ -36,7 +38,7 @@ class CarePlan(db.Model):
             'created_by': self.created_by,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'tasks': [task.to_dict() for task in self.tasks]
+            'tasks': [task.to_dict() for task in tasks]
         }
     
     def __repr__(self):
@@ -4,6 +4,9 @@ import uuid
 
 class CaregiverAssignment(db.Model):
     __tablename__ = 'caregiver_assignments'
+    __table_args__ = (
+        db.Index('ix_caregiver_assignments_current', 'caregiver_id', 'is_active', 'start_date', 'end_date', 'client_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     caregiver_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -36,6 +39,16 @@ class CaregiverAssignment(db.Model):
             (self.end_date is None or self.end_date >= today)
         )
     
+    @classmethod
+    def current_filter(cls, today=None):
+        """SQL equivalent of is_current(), for filtering in the database"""
+        today = today or datetime.utcnow().date()
+        return db.and_(
+            cls.is_active == True,
+            cls.start_date <= today,
+            db.or_(cls.end_date.is_(None), cls.end_date >= today)
+        )
+    
     def to_dict(self):
         return {
             'id': self.id,
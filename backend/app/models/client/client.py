@@ -2,8 +2,21 @@ from app import db
 from datetime import datetime
 import uuid
 
+# Keys of Client.to_dict, selectable with ?fields= on list endpoints
+CLIENT_FIELDS = [
+    'id', 'first_name', 'last_name', 'full_name', 'date_of_birth', 'gender', 'phone', 'email',
+    'address', 'latitude', 'longitude', 'geocoding_status', 'emergency_contact_name',
+    'emergency_contact_phone', 'emergency_contact_relationship', 'insurance_provider',
+    'insurance_policy_number', 'medical_conditions', 'allergies', 'medications',
+    'special_instructions', 'is_active', 'created_by', 'created_at', 'updated_at'
+]
+
 class Client(db.Model):
     __tablename__ = 'clients'
+    __table_args__ = (
+        db.Index('ix_clients_active_last_name', 'is_active', 'last_name', 'id'),
+        db.Index('ix_clients_active_updated_at', 'is_active', 'updated_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     first_name = db.Column(db.String(50), nullable=False)
@@ -15,6 +28,8 @@ class Client(db.Model):
     address = db.Column(db.Text)
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
+    geocoding_status = db.Column(db.String(20), default='not_required')  # not_required, pending, in_progress, completed, failed, deferred (left for the backfill)
+    geocoding_error = db.Column(db.String(255))
     emergency_contact_name = db.Column(db.String(100))
     emergency_contact_phone = db.Column(db.String(20))
     emergency_contact_relationship = db.Column(db.String(50))
@@ -50,6 +65,7 @@ class Client(db.Model):
             'address': self.address,
             'latitude': self.latitude,
             'longitude': self.longitude,
+            'geocoding_status': self.geocoding_status,
             'emergency_contact_name': self.emergency_contact_name,
             'emergency_contact_phone': self.emergency_contact_phone,
             'emergency_contact_relationship': self.emergency_contact_relationship,
@@ -65,5 +81,36 @@ class Client(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
     
+    @classmethod
+    def columns_for_fields(cls, fields):
+        """
+        Columns needed to serialize the given to_dict fields from a row
+
+        Args:
+            fields (list): Subset of the to_dict keys
+
+        Returns:
+            list: Column attributes, always including id
+        """
+        names = ['id']
+        for field in fields:
+            needed = ['first_name', 'last_name'] if field == 'full_name' else [field]
+            names.extend(name for name in needed if name not in names)
+        return [getattr(cls, name) for name in names]
+    
+    @staticmethod
+    def row_to_dict(row, fields):
+        """Serialize a row selected with columns_for_fields like to_dict, limited to fields"""
+        result = {}
+        for field in fields:
+            if field == 'full_name':
+                value = f"{row.first_name} {row.last_name}"
+            else:
+                value = getattr(row, field)
+                if field in ('date_of_birth', 'created_at', 'updated_at') and value is not None:
+                    value = value.isoformat()
+            result[field] = value
+        return result
+    
     def __repr__(self):
         return f'<Client {self.full_name}>'
@@ -39,6 +39,7 @@ class Conversation(db.Model):
         return [p.user for p in self.participants]
     
     def to_dict(self):
+        from app.models.communication.message import Message
         return {
             'id': self.id,
             'name': self.name,
@@ -11,6 +11,10 @@ class ConversationParticipant(db.Model):
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
     left_at = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True)
+    # Read watermark: every message up to and including this one, in
+    # (created_at, id) order, has been read by this participant
+    last_read_message_id = db.Column(db.String(36))
+    last_read_at = db.Column(db.DateTime)
     
     # Relationships
     user = db.relationship('User', backref='conversation_participations')
@@ -20,6 +24,34 @@ class ConversationParticipant(db.Model):
         self.left_at = datetime.utcnow()
         self.is_active = False
     
+    def mark_read(self, message):
+        """
+        Move the read watermark up to a message; it never moves back
+        
+        Returns:
+            bool: Whether the watermark moved
+        """
+        if self.last_read_at is not None and \
+                (message.created_at, message.id) <= (self.last_read_at, self.last_read_message_id or ''):
+            return False
+        self.last_read_message_id = message.id
+        self.last_read_at = message.created_at
+        return True
+    
+    def unread_messages(self):
+        """Query for messages from others after the read watermark"""
+        from app.models.communication.message import Message
+        query = Message.query.filter(
+            Message.conversation_id == self.conversation_id,
+            Message.sender_id != self.user_id
+        )
+        if self.last_read_at is not None:
+            query = query.filter(db.or_(
+                Message.created_at > self.last_read_at,
+                db.and_(Message.created_at == self.last_read_at, Message.id > self.last_read_message_id)
+            ))
+        return query
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -28,6 +60,8 @@ class ConversationParticipant(db.Model):
             'joined_at': self.joined_at.isoformat(),
             'left_at': self.left_at.isoformat() if self.left_at else None,
             'is_active': self.is_active,
+            'last_read_message_id': self.last_read_message_id,
+            'last_read_at': self.last_read_at.isoformat() if self.last_read_at else None,
             'user': self.user.to_dict() if self.user else None
         }
     
@@ -0,0 +1,53 @@
+from app import db
+from datetime import datetime
+import uuid
+
+METERS_PER_MILE = 1609.344
+
+class DailyMileage(db.Model):
+    __tablename__ = 'daily_mileage'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'date', name='uq_daily_mileage_user_date'),
+    )
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    distance_meters = db.Column(db.Float, default=0.0)
+    point_count = db.Column(db.Integer, default=0)  # accepted fixes
+    dropped_point_count = db.Column(db.Integer, default=0)  # inaccurate fixes and teleport outliers
+    # Last accepted fix, used to extend the rollup incrementally
+    last_latitude = db.Column(db.Float)
+    last_longitude = db.Column(db.Float)
+    last_timestamp = db.Column(db.DateTime)
+    last_accuracy = db.Column(db.Float)
+    # Last rejected teleport candidate, used to re-anchor after a stale fix
+    pending_latitude = db.Column(db.Float)
+    pending_longitude = db.Column(db.Float)
+    pending_timestamp = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    user = db.relationship('User', backref=db.backref('daily_mileage', lazy='dynamic'))
+    
+    @property
+    def distance_miles(self):
+        return (self.distance_meters or 0.0) / METERS_PER_MILE
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'date': self.date.isoformat(),
+            'distance_meters': self.distance_meters,
+            'distance_miles': round(self.distance_miles, 2),
+            'point_count': self.point_count,
+            'dropped_point_count': self.dropped_point_count,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+    
+    def __repr__(self):
+        return f'<DailyMileage {self.user_id} - {self.date} - {self.distance_meters}m>'
@@ -4,6 +4,9 @@ import uuid
 
 class Location(db.Model):
     __tablename__ = 'locations'
+    __table_args__ = (
+        db.Index('ix_locations_user_timestamp', 'user_id', 'timestamp'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -0,0 +1,55 @@
+from app import db
+from datetime import datetime
+import uuid
+
+class CaregiverDailyWorkload(db.Model):
+    """Precomputed per-caregiver per-day workload, maintained by caregiver_workload_service"""
+    __tablename__ = 'caregiver_daily_workload'
+    __table_args__ = (
+        db.UniqueConstraint('caregiver_id', 'date', name='uq_caregiver_daily_workload_caregiver_date'),
+        db.Index('ix_caregiver_daily_workload_date_available', 'date', 'available_minutes'),
+    )
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    caregiver_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    assigned_clients = db.Column(db.Integer, default=0)  # current caregiver assignments on the day
+    assigned_tasks = db.Column(db.Integer, default=0)
+    completed_tasks = db.Column(db.Integer, default=0)
+    # Estimated task minutes by start time; tasks without a time are flexible
+    scheduled_minutes = db.Column(db.Integer, default=0)
+    morning_minutes = db.Column(db.Integer, default=0)  # before 12:00
+    afternoon_minutes = db.Column(db.Integer, default=0)  # 12:00 to 17:00
+    evening_minutes = db.Column(db.Integer, default=0)  # from 17:00
+    flexible_minutes = db.Column(db.Integer, default=0)
+    worked_minutes = db.Column(db.Integer, default=0)  # clocked-out timesheet hours
+    is_clocked_in = db.Column(db.Boolean, default=False)
+    capacity_minutes = db.Column(db.Integer, default=0)
+    available_minutes = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    caregiver = db.relationship('User')
+    
+    def to_dict(self):
+        return {
+            'caregiver_id': self.caregiver_id,
+            'date': self.date.isoformat(),
+            'assigned_clients': self.assigned_clients,
+            'assigned_tasks': self.assigned_tasks,
+            'completed_tasks': self.completed_tasks,
+            'scheduled_minutes': self.scheduled_minutes,
+            'morning_minutes': self.morning_minutes,
+            'afternoon_minutes': self.afternoon_minutes,
+            'evening_minutes': self.evening_minutes,
+            'flexible_minutes': self.flexible_minutes,
+            'worked_minutes': self.worked_minutes,
+            'is_clocked_in': self.is_clocked_in,
+            'capacity_minutes': self.capacity_minutes,
+            'available_minutes': self.available_minutes,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<CaregiverDailyWorkload {self.caregiver_id} - {self.date} - {self.available_minutes}min free>'
@@ -58,7 +58,9 @@ class Task(db.Model):
         if reason:
             self.completion_notes = f"Cancelled: {reason}"
     
-    def to_dict(self):
+    def to_dict(self, assignments=None):
+        if assignments is None:
+            assignments = self.assignments
         return {
             'id': self.id,
             'title': self.title,
@@ -78,7 +80,7 @@ class Task(db.Model):
             'created_by': self.created_by,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'assignments': [assignment.to_dict() for assignment in self.assignments]
+            'assignments': [assignment.to_dict() for assignment in assignments]
         }
     
     def __repr__(self):
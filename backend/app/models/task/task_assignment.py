@@ -4,6 +4,9 @@ import uuid
 
 class TaskAssignment(db.Model):
     __tablename__ = 'task_assignments'
+    __table_args__ = (
+        db.Index('ix_task_assignments_assigned_user_id', 'assigned_user_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     task_id = db.Column(db.String(36), db.ForeignKey('tasks.id'), nullable=False)
@@ -71,7 +71,9 @@ class Timesheet(db.Model):
         if reason:
             self.notes = f"Rejected: {reason}"
     
-    def to_dict(self):
+    def to_dict(self, break_times=None):
+        if break_times is None:
+            break_times = self.break_times
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -89,7 +91,7 @@ class Timesheet(db.Model):
             'approved_at': self.approved_at.isoformat() if self.approved_at else None,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'break_times': [bt.to_dict() for bt in self.break_times]
+            'break_times': [bt.to_dict() for bt in break_times]
         }
     
     def __repr__(self):
@@ -6,6 +6,7 @@ from app.models.timesheet.timesheet import Timesheet
 from app.models.geolocation.location import Location
 from app.models.task.task_assignment import TaskAssignment
 from app.models.client.client import Client
+from app.services.auth.authorization_service import require_roles
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
@@ -13,14 +14,9 @@ analytics_bp = Blueprint('analytics', __name__)
 
 @analytics_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_dashboard_analytics():
     """Get dashboard analytics"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     # Get date range
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=30)
@@ -92,14 +88,9 @@ def get_dashboard_analytics():
 
 @analytics_bp.route('/timesheet-analytics', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_timesheet_analytics():
     """Get timesheet analytics"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     # Get date range
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=30)
@@ -158,14 +149,9 @@ def get_timesheet_analytics():
 
 @analytics_bp.route('/location-analytics', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_location_analytics():
     """Get location analytics"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     # Get date range
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=7)
@@ -215,14 +201,9 @@ def get_location_analytics():
 
 @analytics_bp.route('/task-analytics', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_task_analytics():
     """Get task analytics"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     # Get date range
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=30)
@@ -1,9 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_current_user, get_jwt, decode_token
 from app import db, bcrypt
 from app.models.auth.user import User
 from app.models.auth.role import Role
 from app.models.reporting.audit_log import AuditLog
+from app.services.auth.caregiver_provisioning_service import caregiver_provisioning_service
+from app.services.auth.password_hashing_service import password_hashing_service
+from app.services.auth.token_blocklist_service import token_blocklist_service
+from sqlalchemy import update
 from datetime import datetime
 import uuid
 
@@ -60,8 +64,7 @@ def register():
     db.session.commit()
     
     # Generate tokens
-    access_token = create_access_token(identity=user.id)
-    refresh_token = create_refresh_token(identity=user.id)
+    access_token, refresh_token = user.generate_tokens()
     
     return jsonify({
         'message': 'User registered successfully',
@@ -83,8 +86,7 @@ def login_dev():
         return jsonify({'error': 'Admin user not found'}), 500
     
     # Generate tokens
-    access_token = create_access_token(identity=admin_user.id)
-    refresh_token = create_refresh_token(identity=admin_user.id)
+    access_token, refresh_token = admin_user.generate_tokens()
     
     return jsonify({
         'message': 'Development login successful',
@@ -102,8 +104,7 @@ def login_dev_user(user_email):
         return jsonify({'error': 'User not found'}), 404
     
     # Generate tokens
-    access_token = create_access_token(identity=user.id)
-    refresh_token = create_refresh_token(identity=user.id)
+    access_token, refresh_token = user.generate_tokens()
     
     return jsonify({
         'message': 'Development login successful',
@@ -122,19 +123,35 @@ def login():
     
     user = User.query.filter_by(email=data['email']).first()
     
-    if not user or not user.check_password(data['password']):
+    # bcrypt is slow by design, so the check runs on the password pool
+    try:
+        valid = user is not None and password_hashing_service.verify(user.password_hash, data['password'])
+    except TimeoutError:
+        return jsonify({'error': 'Too many logins in progress, please try again'}), 503
+    
+    if not valid:
         return jsonify({'error': 'Invalid email or password'}), 401
     
     if not user.is_active:
         return jsonify({'error': 'Account is deactivated'}), 401
     
+    # Rehash at the configured cost; a bulk update, since it is not a password
+    # change and must not make the user's other tokens stale
+    if password_hashing_service.needs_rehash(user.password_hash):
+        try:
+            db.session.execute(
+                update(User).where(User.id == user.id)
+                .values(password_hash=password_hashing_service.hash(data['password']))
+            )
+        except TimeoutError:
+            pass
+    
     # Update last login
     user.last_login = datetime.utcnow()
     db.session.commit()
     
     # Generate tokens
-    access_token = create_access_token(identity=user.id)
-    refresh_token = create_refresh_token(identity=user.id)
+    access_token, refresh_token = user.generate_tokens()
     
     # Log audit
     audit_log = AuditLog(
@@ -161,7 +178,14 @@ def login():
 def refresh():
     """Refresh access token"""
     current_user_id = get_jwt_identity()
-    new_access_token = create_access_token(identity=current_user_id)
+    # Load fresh rather than through the identity cache, the new claims must match the database
+    user = User.query.get(current_user_id)
+    
+    if not user or not user.is_active:
+        return jsonify({'error': 'Account is deactivated'}), 401
+    
+    # Reissue the role claims, which may have changed since login
+    new_access_token = create_access_token(identity=current_user_id, additional_claims=user.token_claims())
     
     return jsonify({
         'access_token': new_access_token
@@ -171,11 +195,7 @@ def refresh():
 @jwt_required()
 def get_profile():
     """Get current user profile"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = get_current_user()
     
     return jsonify({
         'user': user.to_dict()
@@ -185,11 +205,7 @@ def get_profile():
 @jwt_required()
 def update_profile():
     """Update current user profile"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = get_current_user()
     
     data = request.get_json()
     
@@ -225,18 +241,19 @@ def update_profile():
 @jwt_required()
 def change_password():
     """Change user password"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = get_current_user()
     
     data = request.get_json()
     
     if not data.get('current_password') or not data.get('new_password'):
         return jsonify({'error': 'Current password and new password are required'}), 400
     
-    if not user.check_password(data['current_password']):
+    try:
+        valid = password_hashing_service.verify(user.password_hash, data['current_password'])
+    except TimeoutError:
+        return jsonify({'error': 'Too many password checks in progress, please try again'}), 503
+    
+    if not valid:
         return jsonify({'error': 'Current password is incorrect'}), 400
     
     user.set_password(data['new_password'])
@@ -254,15 +271,65 @@ def change_password():
     db.session.add(audit_log)
     db.session.commit()
     
+    # The password change makes existing access tokens stale, including this one
+    access_token = create_access_token(identity=user.id, additional_claims=user.token_claims())
+    
     return jsonify({
-        'message': 'Password changed successfully'
+        'message': 'Password changed successfully',
+        'access_token': access_token
+    })
+
+@auth_bp.route('/accept-invite', methods=['POST'])
+def accept_invite():
+    """Set a new account's password from the single-use token in its invite email"""
+    data = request.get_json() or {}
+    
+    token = data.get('token')
+    password = data.get('password')
+    if not isinstance(token, str) or not token or not isinstance(password, str) or not password:
+        return jsonify({'error': 'Token and password are required'}), 400
+    
+    try:
+        user = caregiver_provisioning_service.accept_invite(token, password)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except TimeoutError:
+        return jsonify({'error': 'Too many password checks in progress, please try again'}), 503
+    
+    # Log audit
+    audit_log = AuditLog(
+        user_id=user.id,
+        action='invite_accepted',
+        resource_type='user',
+        resource_id=user.id,
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent')
+    )
+    db.session.add(audit_log)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Password set successfully, you can now sign in',
+        'user': user.to_dict()
     })
 
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    """Logout user"""
+    """Logout user, revoking the access token and, if sent, the refresh token"""
     current_user_id = get_jwt_identity()
+    claims = get_jwt()
+    token_blocklist_service.revoke(claims['jti'], claims['exp'])
+    
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            refresh_claims = decode_token(refresh_token)
+        except Exception:
+            return jsonify({'error': 'Invalid refresh token'}), 400
+        if refresh_claims.get('sub') != current_user_id or refresh_claims.get('type') != 'refresh':
+            return jsonify({'error': 'Invalid refresh token'}), 400
+        token_blocklist_service.revoke(refresh_claims['jti'], refresh_claims['exp'])
     
     # Log audit
     audit_log = AuditLog(
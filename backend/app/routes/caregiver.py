@@ -1,10 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_current_user
 from app import db
 from app.models.auth.user import User
 from app.models.auth.role import Role
 from app.models.client.caregiver_assignment import CaregiverAssignment
 from app.models.reporting.audit_log import AuditLog
+from app.services.task.caregiver_workload_service import caregiver_workload_service
+from app.services.auth.caregiver_provisioning_service import caregiver_provisioning_service
+from app.services.auth.authorization_service import require_roles, current_role
 from datetime import datetime
 import uuid
 
@@ -12,14 +15,9 @@ caregiver_bp = Blueprint('caregiver', __name__)
 
 @caregiver_bp.route('/', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_caregivers():
     """Get all caregivers (users with caregiver role)"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     # Get caregiver role
     caregiver_role = Role.query.filter_by(name='caregiver').first()
     if not caregiver_role:
@@ -34,13 +32,11 @@ def get_caregivers():
 
 @caregiver_bp.route('/', methods=['POST'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def create_caregiver():
     """Create new caregiver"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
+    user = get_current_user()
     
     data = request.get_json()
     
@@ -106,16 +102,90 @@ def create_caregiver():
         print(f"Error creating caregiver: {str(e)}")
         return jsonify({'error': 'Failed to create caregiver'}), 500
 
-@caregiver_bp.route('/<caregiver_id>', methods=['GET'])
+@caregiver_bp.route('/bulk', methods=['POST'])
 @jwt_required()
-def get_caregiver(caregiver_id):
-    """Get specific caregiver details"""
+@require_roles('admin', 'manager')
+def bulk_create_caregivers():
+    """Create many caregivers at once from JSON or a CSV upload"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
     
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
+    upload = request.files.get('file')
+    if upload:
+        rows = caregiver_provisioning_service.read_csv(upload.stream)
+        options = request.form
+    else:
+        options = request.get_json() or {}
+        rows = options.get('caregivers')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return jsonify({'error': 'caregivers must be a list of objects'}), 400
+    
+    send_invites = str(options.get('send_invites', 'true')).lower() == 'true'
+    dry_run = str(options.get('dry_run', 'false')).lower() == 'true'
+    
+    try:
+        result = caregiver_provisioning_service.provision(
+            rows,
+            current_user_id,
+            send_invites=send_invites,
+            dry_run=dry_run,
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result), 201 if result['summary']['created'] else 200
+
+@caregiver_bp.route('/invites/retry', methods=['POST'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def retry_caregiver_invites():
+    """Send again the invites a mail failure or restart left unsent"""
+    queued = caregiver_provisioning_service.retry_unsent()
+    
+    return jsonify({
+        'message': f'{queued} invites queued',
+        'queued': queued
+    })
+
+@caregiver_bp.route('/<caregiver_id>/invite', methods=['POST'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def resend_caregiver_invite(caregiver_id):
+    """Email a caregiver a new link to set their password, e.g. after the last one expired"""
+    current_user_id = get_jwt_identity()
     
+    caregiver = User.query.get(caregiver_id)
+    if not caregiver or not caregiver.role or caregiver.role.name != 'caregiver':
+        return jsonify({'error': 'Caregiver not found'}), 404
+    
+    invite = caregiver_provisioning_service.resend_invite(caregiver_id, current_user_id)
+    if invite is None:
+        return jsonify({'error': 'Caregiver has already accepted their invite'}), 409
+    
+    # Log audit
+    audit_log = AuditLog(
+        user_id=current_user_id,
+        action='caregiver_invite_resent',
+        resource_type='user',
+        resource_id=caregiver_id,
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent')
+    )
+    db.session.add(audit_log)
+    db.session.commit()
+    
+    db.session.refresh(invite)
+    return jsonify({
+        'message': 'Invite queued',
+        'invite': invite.to_dict()
+    }), 202
+
+@caregiver_bp.route('/<caregiver_id>', methods=['GET'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def get_caregiver(caregiver_id):
+    """Get specific caregiver details"""
     caregiver = User.query.get(caregiver_id)
     if not caregiver:
         return jsonify({'error': 'Caregiver not found'}), 404
@@ -136,13 +206,11 @@ def get_caregiver(caregiver_id):
 
 @caregiver_bp.route('/<caregiver_id>', methods=['PUT'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def update_caregiver(caregiver_id):
     """Update caregiver details"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
+    user = get_current_user()
     
     caregiver = User.query.get(caregiver_id)
     if not caregiver:
@@ -202,13 +270,11 @@ def update_caregiver(caregiver_id):
 
 @caregiver_bp.route('/<caregiver_id>', methods=['DELETE'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def delete_caregiver(caregiver_id):
     """Soft delete caregiver"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
+    user = get_current_user()
     
     caregiver = User.query.get(caregiver_id)
     if not caregiver:
@@ -260,14 +326,9 @@ def delete_caregiver(caregiver_id):
 
 @caregiver_bp.route('/<caregiver_id>/assignments', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_caregiver_assignments(caregiver_id):
     """Get all assignments for a specific caregiver"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     caregiver = User.query.get(caregiver_id)
     if not caregiver:
         return jsonify({'error': 'Caregiver not found'}), 404
@@ -280,4 +341,49 @@ def get_caregiver_assignments(caregiver_id):
     
     return jsonify({
         'assignments': [assignment.to_dict() for assignment in assignments]
-    }) 
\ No newline at end of file
+    }) 
+@caregiver_bp.route('/availability', methods=['GET'])
+@jwt_required()
+def get_caregiver_availability():
+    """Get caregiver workload and free time per day over a date range"""
+    current_user_id = get_jwt_identity()
+    role = current_role()
+    
+    if role in ['admin', 'manager']:
+        caregiver_ids = [
+            caregiver_id for value in request.args.getlist('caregiver_id')
+            for caregiver_id in value.split(',') if caregiver_id
+        ]
+    elif role == 'caregiver':
+        # Caregivers can only see their own availability
+        caregiver_ids = [current_user_id]
+    else:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() \
+            if request.args.get('start_date') else datetime.utcnow().date()
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() \
+            if request.args.get('end_date') else start_date
+    except ValueError:
+        return jsonify({'error': 'Invalid date format, use YYYY-MM-DD'}), 400
+    
+    min_available_minutes = request.args.get('min_available_minutes', type=int)
+    period = request.args.get('period')
+    
+    try:
+        caregivers = caregiver_workload_service.get_availability(
+            start_date, end_date,
+            caregiver_ids=caregiver_ids or None,
+            period=period,
+            min_available_minutes=min_available_minutes
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'period': period,
+        'caregivers': caregivers
+    })
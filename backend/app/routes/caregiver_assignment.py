@@ -5,6 +5,8 @@ from app.models.client.caregiver_assignment import CaregiverAssignment
 from app.models.auth.user import User
 from app.models.client.client import Client
 from app.models.reporting.audit_log import AuditLog
+from app.services.auth.authorization_service import require_roles, current_role
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import uuid
 
@@ -15,7 +17,7 @@ caregiver_assignment_bp = Blueprint('caregiver_assignment', __name__)
 def get_caregiver_assignments():
     """Get caregiver assignments"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    role = current_role()
     
     # Get query parameters
     caregiver_id = request.args.get('caregiver_id')
@@ -25,12 +27,12 @@ def get_caregiver_assignments():
     query = CaregiverAssignment.query
     
     # Filter by user role
-    if user.role.name in ['admin', 'manager']:
+    if role in ['admin', 'manager']:
         if caregiver_id:
             query = query.filter_by(caregiver_id=caregiver_id)
         if client_id:
             query = query.filter_by(client_id=client_id)
-    elif user.role.name == 'caregiver':
+    elif role == 'caregiver':
         # Caregivers can only see their own assignments
         query = query.filter_by(caregiver_id=current_user_id)
         if client_id:
@@ -49,13 +51,10 @@ def get_caregiver_assignments():
 
 @caregiver_assignment_bp.route('/', methods=['POST'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def create_caregiver_assignment():
     """Create new caregiver assignment"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     data = request.get_json()
     
@@ -121,13 +120,10 @@ def create_caregiver_assignment():
 
 @caregiver_assignment_bp.route('/<assignment_id>', methods=['PUT'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def update_caregiver_assignment(assignment_id):
     """Update caregiver assignment"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     assignment = CaregiverAssignment.query.get(assignment_id)
     if not assignment:
@@ -169,13 +165,10 @@ def update_caregiver_assignment(assignment_id):
 
 @caregiver_assignment_bp.route('/<assignment_id>', methods=['DELETE'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def delete_caregiver_assignment(assignment_id):
     """Delete caregiver assignment"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     assignment = CaregiverAssignment.query.get(assignment_id)
     if not assignment:
@@ -202,36 +195,28 @@ def delete_caregiver_assignment(assignment_id):
 
 @caregiver_assignment_bp.route('/my-assignments', methods=['GET'])
 @jwt_required()
+@require_roles('caregiver')
 def get_my_assignments():
     """Get current user's caregiver assignments"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name != 'caregiver':
-        return jsonify({'error': 'Access denied'}), 403
     
-    assignments = CaregiverAssignment.query.filter_by(
-        caregiver_id=current_user_id,
-        is_active=True
+    current_assignments = CaregiverAssignment.query.options(
+        joinedload(CaregiverAssignment.caregiver),
+        joinedload(CaregiverAssignment.client)
+    ).filter(
+        CaregiverAssignment.caregiver_id == current_user_id,
+        CaregiverAssignment.current_filter()
     ).all()
     
-    # Filter to only current assignments
-    current_assignments = [assignment for assignment in assignments if assignment.is_current()]
-    
     return jsonify({
         'assignments': [assignment.to_dict() for assignment in current_assignments]
     })
 
 @caregiver_assignment_bp.route('/client/<client_id>', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_client_assignments(client_id):
     """Get all assignments for a specific client"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     assignments = CaregiverAssignment.query.filter_by(client_id=client_id).all()
     
     return jsonify({
@@ -1,105 +1,166 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models.client.client import Client
+from app.models.client.client import Client, CLIENT_FIELDS
 from app.models.client.care_plan import CarePlan
-from app.models.auth.user import User
 from app.models.reporting.audit_log import AuditLog
 from app.models.geolocation.geofence import Geofence
 from app.services.geolocation.geocoding_service import geocoding_service
+from app.services.geolocation.client_geocoding_service import client_geocoding_service
+from app.services.client.client_import_service import client_import_service
+from app.services.client.client_search_service import client_search_service
+from app.services.client.client_overview_service import client_overview_service
+from app.services.client.caregiver_access_service import caregiver_access_service
+from app.services.auth.authorization_service import require_roles, require_permission, current_role
+from sqlalchemy import func, and_, or_
 from datetime import datetime
+import base64
+import hashlib
+import json
 import uuid
 
 client_bp = Blueprint('client', __name__)
 
+# Sort keys accepted by ?sort= (prefix with '-' for descending)
+CLIENT_SORT_COLUMNS = {
+    'last_name': Client.last_name,
+    'first_name': Client.first_name,
+    'created_at': Client.created_at,
+    'updated_at': Client.updated_at
+}
+
+def _encode_cursor(sort_value, client_id):
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, client_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def _decode_cursor(cursor, sort_name):
+    """Return (sort_value, client_id) from a cursor, raising ValueError if malformed"""
+    try:
+        sort_value, client_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(sort_value, str) or not isinstance(client_id, str):
+            raise TypeError('Cursor values must be strings')
+        if sort_name in ('created_at', 'updated_at'):
+            sort_value = datetime.fromisoformat(sort_value)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    return sort_value, client_id
+
 def create_client_geofence(client, current_user_id):
-    """Create a geofence for a client's home address"""
+    """Geocode a client if needed and create its home geofence in a single commit"""
     try:
-        # If client already has coordinates, use them
-        if client.latitude and client.longitude:
-            latitude = client.latitude
-            longitude = client.longitude
-        elif client.address:
-            # Geocode the address to get coordinates
+        if not (client.latitude and client.longitude):
+            if not client.address:
+                # No address or coordinates available
+                return None
             geocode_result = geocoding_service.address_to_coordinates(client.address)
-            if geocode_result:
-                latitude = geocode_result['latitude']
-                longitude = geocode_result['longitude']
-                # Update client with geocoded coordinates
-                client.latitude = latitude
-                client.longitude = longitude
-                db.session.commit()
-            else:
+            if not geocode_result:
                 # If geocoding fails, skip geofence creation
                 return None
-        else:
-            # No address or coordinates available
-            return None
+            client.latitude = geocode_result['latitude']
+            client.longitude = geocode_result['longitude']
         
-        # Create geofence for client's home
-        geofence = Geofence(
-            name=f"{client.first_name} {client.last_name} Residence",
-            description=f"Home address: {client.address}",
-            client_id=client.id,
-            center_latitude=latitude,
-            center_longitude=longitude,
-            radius_meters=100,  # Default 100m radius
-            geofence_type='circle',
-            created_by=current_user_id
-        )
-        
-        db.session.add(geofence)
-        db.session.commit()
-        
-        # Log audit for geofence creation
-        audit_log = AuditLog(
-            user_id=current_user_id,
-            action='geofence_created_for_client',
-            resource_type='geofence',
-            resource_id=geofence.id,
-            details={
-                'client_id': client.id,
-                'client_name': f"{client.first_name} {client.last_name}",
-                'address': client.address,
-                'coordinates': f"{latitude}, {longitude}"
-            },
+        client.geocoding_status = 'completed'
+        client.geocoding_error = None
+        geofence = client_geocoding_service.build_home_geofence(
+            client,
+            current_user_id,
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
         )
-        db.session.add(audit_log)
         db.session.commit()
         
         return geofence
         
     except Exception as e:
+        db.session.rollback()
         print(f"Error creating geofence for client {client.id}: {str(e)}")
         return None
 
 @client_bp.route('/', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_clients():
-    """Get all clients"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
+    """Get active clients, optionally paginated, sorted and limited to some fields"""
+    # Sparse fieldset, e.g. ?fields=first_name,last_name,address,latitude,longitude
+    fields = CLIENT_FIELDS
+    if request.args.get('fields'):
+        fields = [f.strip() for f in request.args['fields'].split(',') if f.strip()]
+        unknown = set(fields) - set(CLIENT_FIELDS)
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(sorted(unknown))}"}), 400
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+    
+    sort = request.args.get('sort', 'last_name')
+    sort_name = sort.lstrip('-')
+    descending = sort.startswith('-')
+    if sort_name not in CLIENT_SORT_COLUMNS:
+        return jsonify({'error': f"sort must be one of: {', '.join(CLIENT_SORT_COLUMNS)}"}), 400
+    
+    # Without a limit every active client is returned, as before
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(1, min(limit, current_app.config['CLIENT_LIST_MAX_LIMIT']))
+    cursor = request.args.get('cursor')
+    
+    # The ETag comes from a cheap aggregate, so unchanged lists are answered without loading rows
+    count, last_updated = db.session.query(
+        func.count(Client.id), func.max(Client.updated_at)
+    ).filter(Client.is_active == True).one()
+    etag = hashlib.sha1(
+        f"{count}:{last_updated}:{','.join(fields)}:{sort}:{limit}:{cursor}".encode()
+    ).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    sort_column = CLIENT_SORT_COLUMNS[sort_name]
+    query = db.session.query(
+        *Client.columns_for_fields(fields + [sort_name])
+    ).filter(Client.is_active == True)
+    
+    if cursor:
+        try:
+            sort_value, last_id = _decode_cursor(cursor, sort_name)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        if descending:
+            query = query.filter(or_(sort_column < sort_value, and_(sort_column == sort_value, Client.id < last_id)))
+        else:
+            query = query.filter(or_(sort_column > sort_value, and_(sort_column == sort_value, Client.id > last_id)))
     
-    clients = Client.query.filter_by(is_active=True).all()
+    if descending:
+        query = query.order_by(sort_column.desc(), Client.id.desc())
+    else:
+        query = query.order_by(sort_column, Client.id)
     
-    return jsonify({
-        'clients': [client.to_dict() for client in clients]
+    if limit is not None:
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        rows = query.all()
+        has_more = False
+    
+    response = jsonify({
+        'clients': [Client.row_to_dict(row, fields) for row in rows],
+        'next_cursor': _encode_cursor(getattr(rows[-1], sort_name), rows[-1].id) if has_more else None,
+        'has_more': has_more,
+        'total': count
     })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @client_bp.route('/', methods=['POST'])
 @jwt_required()
+@require_permission('clients', 'create')
 def create_client():
     """Create new client"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     data = request.get_json()
     
@@ -129,11 +190,26 @@ def create_client():
         created_by=current_user_id
     )
     
+    # Coordinates supplied: the home geofence is cheap to create in the same commit.
+    # An address alone is geocoded by a background job so the request returns immediately.
+    if client.latitude is not None and client.longitude is not None:
+        client.geocoding_status = 'completed'
+    elif client.address:
+        client.geocoding_status = 'pending'
+    else:
+        client.geocoding_status = 'not_required'
+    
     db.session.add(client)
-    db.session.commit()
+    db.session.flush()
     
-    # Create geofence for client's home address
-    geofence = create_client_geofence(client, current_user_id)
+    geofence = None
+    if client.geocoding_status == 'completed':
+        geofence = client_geocoding_service.build_home_geofence(
+            client,
+            current_user_id,
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
     
     # Log audit
     audit_log = AuditLog(
@@ -150,19 +226,112 @@ def create_client():
     
     response_data = {
         'message': 'Client created successfully',
-        'client': client.to_dict()
+        'client': client.to_dict(),
+        'geocoding_status': client.geocoding_status
     }
     
     if geofence:
         response_data['geofence_created'] = True
         response_data['geofence'] = geofence.to_dict()
         response_data['message'] += ' and home geofence created'
+    elif client.geocoding_status == 'pending':
+        response_data['geofence_created'] = False
+        response_data['message'] += ' (home geofence will be created once the address is geocoded)'
+        client_geocoding_service.enqueue(
+            client.id,
+            current_user_id,
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
     else:
         response_data['geofence_created'] = False
         response_data['message'] += ' (no geofence created - address required)'
     
     return jsonify(response_data), 201
 
+@client_bp.route('/search', methods=['GET'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def search_clients():
+    """Typeahead search over client name, phone and address"""
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', type=int)
+    
+    if len(query) > 100:
+        return jsonify({'error': 'Search query is too long'}), 400
+    
+    return jsonify({
+        'query': query,
+        'clients': client_search_service.search(query, limit)
+    })
+
+@client_bp.route('/import', methods=['POST'])
+@jwt_required()
+@require_permission('clients', 'create')
+def import_clients():
+    """Bulk import clients from a CSV or XLSX upload"""
+    current_user_id = get_jwt_identity()
+    
+    upload = request.files.get('file')
+    if not upload:
+        return jsonify({'error': 'A CSV or XLSX file is required'}), 400
+    
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+    geocode = request.args.get('geocode', 'true').lower() == 'true'
+    stream_progress = request.args.get('stream', 'false').lower() == 'true'
+    ip_address = request.remote_addr
+    user_agent = request.headers.get('User-Agent')
+    
+    def log_import(summary):
+        if dry_run or not summary['imported']:
+            return
+        audit_log = AuditLog(
+            user_id=current_user_id,
+            action='clients_imported',
+            resource_type='client',
+            details={
+                **{k: v for k, v in summary.items() if k != 'errors'},
+                'filename': upload.filename,
+                'errors': summary['errors'][:100]
+            },
+            ip_address=ip_address,
+            user_agent=user_agent
+        )
+        db.session.add(audit_log)
+        db.session.commit()
+    
+    progress = client_import_service.iter_import(
+        upload.stream, upload.filename or '', current_user_id, dry_run=dry_run, geocode=geocode
+    )
+    
+    if stream_progress:
+        # One JSON line per chunk so large imports can report progress
+        def generate():
+            try:
+                for summary in progress:
+                    if summary['done']:
+                        log_import(summary)
+                        yield json.dumps(summary) + '\n'
+                    else:
+                        yield json.dumps({k: v for k, v in summary.items() if k != 'errors'}) + '\n'
+            except ValueError as e:
+                yield json.dumps({'done': True, 'error': str(e)}) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    try:
+        summary = None
+        for summary in progress:
+            pass
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    log_import(summary)
+    errors = summary.pop('errors')
+    summary.pop('done')
+    
+    return jsonify({'summary': summary, 'errors': errors}), 200 if dry_run else 201
+
 @client_bp.route('/<client_id>', methods=['GET'])
 @jwt_required()
 def get_client(client_id):
@@ -177,15 +346,36 @@ def get_client(client_id):
         'client': client.to_dict()
     })
 
+@client_bp.route('/<client_id>/overview', methods=['GET'])
+@jwt_required()
+def get_client_overview(client_id):
+    """Get a client with care plans, geofences, caregivers, upcoming tasks and recent timesheets"""
+    current_user_id = get_jwt_identity()
+    
+    if current_role() not in ['admin', 'manager']:
+        # Caregivers may view clients they are currently assigned to
+        if not caregiver_access_service.is_assigned(current_user_id, client_id):
+            return jsonify({'error': 'Access denied'}), 403
+    
+    etag = client_overview_service.etag(client_id)
+    if etag is None:
+        return jsonify({'error': 'Client not found'}), 404
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        client = Client.query.get(client_id)
+        response = jsonify(client_overview_service.build(client))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @client_bp.route('/<client_id>', methods=['PUT'])
 @jwt_required()
+@require_permission('clients', 'update')
 def update_client(client_id):
     """Update client"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     client = Client.query.get(client_id)
     if not client:
@@ -255,13 +445,10 @@ def update_client(client_id):
 
 @client_bp.route('/<client_id>', methods=['DELETE'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def delete_client(client_id):
     """Delete client (soft delete)"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     client = Client.query.get(client_id)
     if not client:
@@ -287,15 +474,69 @@ def delete_client(client_id):
         'message': 'Client deleted successfully'
     })
 
+@client_bp.route('/<client_id>/geocoding-status', methods=['GET'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def get_client_geocoding_status(client_id):
+    """Get the geocoding status of a client for polling after create"""
+    client = db.session.query(
+        Client.id, Client.latitude, Client.longitude,
+        Client.geocoding_status, Client.geocoding_error
+    ).filter(Client.id == client_id).first()
+    if not client:
+        return jsonify({'error': 'Client not found'}), 404
+    
+    geofence = None
+    if client.geocoding_status == 'completed':
+        geofence = Geofence.query.filter_by(client_id=client_id, is_active=True).first()
+    
+    return jsonify({
+        'client_id': client.id,
+        'geocoding_status': client.geocoding_status,
+        'geocoding_error': client.geocoding_error,
+        'latitude': client.latitude,
+        'longitude': client.longitude,
+        'geofence': geofence.to_dict() if geofence else None
+    })
+
+@client_bp.route('/<client_id>/geocoding-status/retry', methods=['POST'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def retry_client_geocoding(client_id):
+    """Geocode a client again after a failure, or after its job was lost to a restart"""
+    current_user_id = get_jwt_identity()
+    
+    client = db.session.query(Client.id, Client.address, Client.geocoding_status, Client.updated_at) \
+        .filter(Client.id == client_id).first()
+    if not client:
+        return jsonify({'error': 'Client not found'}), 404
+    if not client.address:
+        return jsonify({'error': 'Client must have an address to be geocoded'}), 400
+    if client.geocoding_status in ('pending', 'in_progress') and not client_geocoding_service.is_stale(client):
+        return jsonify({'error': 'Geocoding is already in progress'}), 409
+    
+    retried = client_geocoding_service.retry(
+        client_id,
+        current_user_id,
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent')
+    )
+    if not retried:
+        return jsonify({'error': f'Geocoding is {client.geocoding_status} and cannot be retried'}), 409
+    
+    status = db.session.query(Client.geocoding_status).filter(Client.id == client_id).scalar()
+    return jsonify({
+        'message': 'Geocoding retry scheduled',
+        'client_id': client_id,
+        'geocoding_status': status
+    }), 202
+
 @client_bp.route('/<client_id>/geofence', methods=['POST'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def create_client_geofence_endpoint(client_id):
     """Create a geofence for an existing client"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     client = Client.query.get(client_id)
     if not client:
@@ -340,13 +581,10 @@ def get_client_care_plans(client_id):
 
 @client_bp.route('/<client_id>/care-plans', methods=['POST'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def create_care_plan(client_id):
     """Create care plan for client"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     client = Client.query.get(client_id)
     if not client:
@@ -392,31 +630,20 @@ def create_care_plan(client_id):
 
 @client_bp.route('/assigned', methods=['GET'])
 @jwt_required()
+@require_roles('caregiver')
 def get_assigned_clients():
     """Get clients assigned to current caregiver"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name != 'caregiver':
-        return jsonify({'error': 'Access denied'}), 403
-    
-    # Get caregiver assignments
-    from app.models.client.caregiver_assignment import CaregiverAssignment
-    
-    assignments = CaregiverAssignment.query.filter_by(
-        caregiver_id=current_user_id,
-        is_active=True
-    ).all()
     
-    # Get assigned client IDs
-    assigned_client_ids = [assignment.client_id for assignment in assignments if assignment.is_current()]
+    # Get currently assigned client IDs
+    assigned_client_ids = caregiver_access_service.assigned_client_ids(current_user_id)
     
     if not assigned_client_ids:
         return jsonify({'clients': []})
     
     # Get assigned clients
     clients = Client.query.filter(
-        Client.id.in_(assigned_client_ids),
+        Client.id.in_(list(assigned_client_ids)),
         Client.is_active == True
     ).all()
     
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db, socketio
 from app.models.communication.conversation import Conversation
@@ -6,6 +6,11 @@ from app.models.communication.conversation_participant import ConversationPartic
 from app.models.communication.message import Message
 from app.models.auth.user import User
 from app.models.reporting.audit_log import AuditLog
+from app.services.communication.inbox_service import inbox_service, encode_cursor, decode_cursor
+from app.services.communication.conversation_membership_service import conversation_membership_service
+from app.routes.socket_events import leave_conversation_room
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import uuid
 
@@ -33,6 +38,23 @@ def get_conversations():
         'conversations': conversations
     })
 
+@communication_bp.route('/inbox', methods=['GET'])
+@jwt_required()
+def get_inbox():
+    """Get the current user's conversations, most recent activity first, with previews and unread counts"""
+    current_user_id = get_jwt_identity()
+    
+    try:
+        inbox = inbox_service.build(
+            current_user_id,
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(inbox)
+
 @communication_bp.route('/conversations', methods=['POST'])
 @jwt_required()
 def create_conversation():
@@ -89,16 +111,10 @@ def get_conversation(conversation_id):
     current_user_id = get_jwt_identity()
     
     # Check if user is participant
-    participant = ConversationParticipant.query.filter_by(
-        conversation_id=conversation_id,
-        user_id=current_user_id,
-        is_active=True
-    ).first()
-    
-    if not participant:
+    if not conversation_membership_service.is_member(current_user_id, conversation_id):
         return jsonify({'error': 'Access denied'}), 403
     
-    conversation = participant.conversation
+    conversation = Conversation.query.get(conversation_id)
     if not conversation or not conversation.is_active:
         return jsonify({'error': 'Conversation not found'}), 404
     
@@ -113,31 +129,69 @@ def get_messages(conversation_id):
     current_user_id = get_jwt_identity()
     
     # Check if user is participant
-    participant = ConversationParticipant.query.filter_by(
-        conversation_id=conversation_id,
-        user_id=current_user_id,
-        is_active=True
-    ).first()
-    
-    if not participant:
+    if not conversation_membership_service.is_member(current_user_id, conversation_id):
         return jsonify({'error': 'Access denied'}), 403
     
-    # Get query parameters
-    limit = int(request.args.get('limit', 50))
-    before_id = request.args.get('before_id')
-    
-    query = Message.query.filter_by(conversation_id=conversation_id)
-    
-    if before_id:
-        before_message = Message.query.get(before_id)
+    # Keyset pagination on (created_at, id): ?before= pages back through
+    # history, ?after= catches up after a reconnect
+    limit = max(1, min(request.args.get('limit', 50, type=int), current_app.config['MESSAGE_PAGE_MAX_LIMIT']))
+    before = request.args.get('before')
+    after = request.args.get('after')
+    if before and after:
+        return jsonify({'error': 'Use either before or after, not both'}), 400
+    
+    try:
+        before = decode_cursor(before) if before else None
+        after = decode_cursor(after) if after else None
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    # Older clients page with the id of the oldest message they have
+    if not before and not after and request.args.get('before_id'):
+        before_message = Message.query.filter_by(
+            id=request.args['before_id'], conversation_id=conversation_id
+        ).first()
         if before_message:
-            query = query.filter(Message.created_at < before_message.created_at)
-    
-    messages = query.order_by(Message.created_at.desc()).limit(limit).all()
-    messages.reverse()  # Show oldest first
+            before = (before_message.created_at, before_message.id)
+    
+    query = Message.query.options(
+        joinedload(Message.sender).joinedload(User.role),
+        joinedload(Message.recipient).joinedload(User.role)
+    ).filter(Message.conversation_id == conversation_id)
+    
+    if after:
+        query = query.filter(or_(
+            Message.created_at > after[0],
+            and_(Message.created_at == after[0], Message.id > after[1])
+        )).order_by(Message.created_at, Message.id)
+    else:
+        if before:
+            query = query.filter(or_(
+                Message.created_at < before[0],
+                and_(Message.created_at == before[0], Message.id < before[1])
+            ))
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+    
+    messages = query.limit(limit + 1).all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if not after:
+        messages.reverse()  # Show oldest first
+    
+    # Oldest and newest message on the page, for paging back and catching up;
+    # an empty page keeps the position the client asked from
+    if messages:
+        before_cursor = encode_cursor(messages[0].created_at, messages[0].id)
+        after_cursor = encode_cursor(messages[-1].created_at, messages[-1].id)
+    else:
+        before_cursor = request.args.get('before')
+        after_cursor = request.args.get('after')
     
     return jsonify({
-        'messages': [msg.to_dict() for msg in messages]
+        'messages': [msg.to_dict() for msg in messages],
+        'has_more': has_more,
+        'before_cursor': before_cursor,
+        'after_cursor': after_cursor
     })
 
 @communication_bp.route('/conversations/<conversation_id>/messages', methods=['POST'])
@@ -147,14 +201,7 @@ def send_message(conversation_id):
     current_user_id = get_jwt_identity()
     data = request.get_json()
     
-    # Check if user is participant
-    participant = ConversationParticipant.query.filter_by(
-        conversation_id=conversation_id,
-        user_id=current_user_id,
-        is_active=True
-    ).first()
-    
-    if not participant:
+    if not conversation_membership_service.is_member(current_user_id, conversation_id):
         return jsonify({'error': 'Access denied'}), 403
     
     # Validate required fields
@@ -224,13 +271,59 @@ def mark_message_read(message_id):
     if not participant:
         return jsonify({'error': 'Access denied'}), 403
     
+    # The global flag is kept for older clients; the watermark is per participant
     message.mark_as_read()
+    participant.mark_read(message)
     db.session.commit()
     
     return jsonify({
         'message': 'Message marked as read'
     })
 
+@communication_bp.route('/conversations/<conversation_id>/read', methods=['POST'])
+@jwt_required()
+def mark_conversation_read(conversation_id):
+    """Mark a conversation read up to a message, or up to its latest message"""
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    # Check if user is participant
+    participant = ConversationParticipant.query.filter_by(
+        conversation_id=conversation_id,
+        user_id=current_user_id,
+        is_active=True
+    ).first()
+    
+    if not participant:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    if data.get('message_id'):
+        message = Message.query.filter_by(id=data['message_id'], conversation_id=conversation_id).first()
+        if not message:
+            return jsonify({'error': 'Message not found'}), 404
+    else:
+        message = Message.query.filter_by(conversation_id=conversation_id).order_by(
+            Message.created_at.desc(), Message.id.desc()
+        ).first()
+    
+    if message and participant.mark_read(message):
+        db.session.commit()
+        
+        # Read receipts for the other participants
+        socketio.emit('conversation_read', {
+            'conversation_id': conversation_id,
+            'user_id': current_user_id,
+            'last_read_message_id': participant.last_read_message_id,
+            'last_read_at': participant.last_read_at.isoformat()
+        }, room=conversation_id)
+    
+    return jsonify({
+        'message': 'Conversation marked as read',
+        'last_read_message_id': participant.last_read_message_id,
+        'last_read_at': participant.last_read_at.isoformat() if participant.last_read_at else None,
+        'unread_count': participant.unread_messages().count()
+    })
+
 @communication_bp.route('/conversations/<conversation_id>/participants', methods=['POST'])
 @jwt_required()
 def add_participant(conversation_id):
@@ -242,17 +335,11 @@ def add_participant(conversation_id):
         return jsonify({'error': 'User ID is required'}), 400
     
     # Check if current user is participant
-    participant = ConversationParticipant.query.filter_by(
-        conversation_id=conversation_id,
-        user_id=current_user_id,
-        is_active=True
-    ).first()
-    
-    if not participant:
+    if not conversation_membership_service.is_member(current_user_id, conversation_id, cached=False):
         return jsonify({'error': 'Access denied'}), 403
     
     # Add new participant
-    conversation = participant.conversation
+    conversation = Conversation.query.get(conversation_id)
     new_participant = conversation.add_participant(data['user_id'])
     db.session.commit()
     
@@ -268,19 +355,14 @@ def remove_participant(conversation_id, user_id):
     current_user_id = get_jwt_identity()
     
     # Check if current user is participant
-    participant = ConversationParticipant.query.filter_by(
-        conversation_id=conversation_id,
-        user_id=current_user_id,
-        is_active=True
-    ).first()
-    
-    if not participant:
+    if not conversation_membership_service.is_member(current_user_id, conversation_id, cached=False):
         return jsonify({'error': 'Access denied'}), 403
     
     # Remove participant
-    conversation = participant.conversation
+    conversation = Conversation.query.get(conversation_id)
     conversation.remove_participant(user_id)
     db.session.commit()
+    leave_conversation_room(user_id, conversation_id)
     
     return jsonify({
         'message': 'Participant removed successfully'
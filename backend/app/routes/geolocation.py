@@ -1,11 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.geolocation.location import Location
 from app.models.geolocation.geofence import Geofence
-from app.models.auth.user import User
 from app.models.reporting.audit_log import AuditLog
 from app.services.geolocation.geocoding_service import geocoding_service
+from app.services.geolocation.distance_matrix_service import distance_matrix_service
+from app.services.geolocation.mileage_service import mileage_service
+from app.services.geolocation.geofence_index_service import geofence_index_service
+from app.services.geolocation.geofence_geojson_service import geofence_geojson_service
+from app.services.client.caregiver_access_service import caregiver_access_service
+from app.models.geolocation.daily_mileage import DailyMileage
+from app.models.client.client import Client
+from app.services.auth.authorization_service import require_roles, current_role
+from sqlalchemy import insert
 from datetime import datetime, timedelta
 import uuid
 
@@ -40,18 +48,18 @@ def update_location():
     db.session.add(location)
     db.session.commit()
     
+    # Extend the daily mileage rollup (committed with the audit log below)
+    mileage_service.record_location(location)
+    
     # Check geofences
     geofence_alerts = []
-    geofences = Geofence.query.filter_by(is_active=True).all()
-    
-    for geofence in geofences:
-        if geofence.is_point_inside(location.latitude, location.longitude):
-            geofence_alerts.append({
-                'geofence_id': geofence.id,
-                'geofence_name': geofence.name,
-                'client_id': geofence.client_id,
-                'alert_type': 'entered'
-            })
+    for geofence in geofence_index_service.find_containing(location.latitude, location.longitude):
+        geofence_alerts.append({
+            'geofence_id': geofence['id'],
+            'geofence_name': geofence['name'],
+            'client_id': geofence['client_id'],
+            'alert_type': 'entered'
+        })
     
     # Log audit
     audit_log = AuditLog(
@@ -96,7 +104,6 @@ def get_current_location():
 def get_location_history():
     """Get location history for current user or all users for managers"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
     
     # Get query parameters
     user_id = request.args.get('user_id')
@@ -107,7 +114,7 @@ def get_location_history():
     query = Location.query
     
     # Filter by user role
-    if user.role.name in ['admin', 'manager']:
+    if current_role() in ['admin', 'manager']:
         if user_id:
             query = query.filter_by(user_id=user_id)
     else:
@@ -127,31 +134,91 @@ def get_location_history():
         'locations': [loc.to_dict() for loc in locations]
     })
 
+@geolocation_bp.route('/mileage', methods=['GET'])
+@jwt_required()
+def get_mileage():
+    """Get daily mileage rollups for current user or all users for managers"""
+    current_user_id = get_jwt_identity()
+    
+    # Get query parameters
+    user_id = request.args.get('user_id')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    query = DailyMileage.query
+    
+    # Filter by user role
+    if current_role() in ['admin', 'manager']:
+        if user_id:
+            query = query.filter_by(user_id=user_id)
+    else:
+        query = query.filter_by(user_id=current_user_id)
+    
+    # Apply date filters
+    if start_date:
+        query = query.filter(DailyMileage.date >= datetime.fromisoformat(start_date).date())
+    if end_date:
+        query = query.filter(DailyMileage.date <= datetime.fromisoformat(end_date).date())
+    
+    rollups = query.order_by(DailyMileage.date.desc(), DailyMileage.user_id).all()
+    
+    return jsonify({
+        'mileage': [rollup.to_dict() for rollup in rollups],
+        'total_miles': round(sum(rollup.distance_miles for rollup in rollups), 2)
+    })
+
+@geolocation_bp.route('/mileage/rebuild', methods=['POST'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def rebuild_mileage():
+    """Recompute a user's daily mileage from the stored location trail"""
+    current_user_id = get_jwt_identity()
+    
+    data = request.get_json()
+    
+    # Validate required fields
+    required_fields = ['user_id', 'date']
+    for field in required_fields:
+        if not data.get(field):
+            return jsonify({'error': f'{field} is required'}), 400
+    
+    rollup = mileage_service.rebuild_day(data['user_id'], datetime.fromisoformat(data['date']).date())
+    db.session.commit()
+    
+    # Log audit
+    audit_log = AuditLog(
+        user_id=current_user_id,
+        action='mileage_rebuilt',
+        resource_type='daily_mileage',
+        resource_id=rollup.id,
+        details=data,
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent')
+    )
+    db.session.add(audit_log)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Mileage rebuilt successfully',
+        'mileage': rollup.to_dict()
+    })
+
 @geolocation_bp.route('/geofences', methods=['GET'])
 @jwt_required()
 def get_geofences():
     """Get geofences based on user role"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    role = current_role()
     
-    if user.role.name == 'admin':
+    if role == 'admin':
         # Admins can see all geofences
         geofences = Geofence.query.filter_by(is_active=True).all()
-    elif user.role.name == 'manager':
+    elif role == 'manager':
         # Managers can see all geofences
         geofences = Geofence.query.filter_by(is_active=True).all()
-    elif user.role.name == 'caregiver':
+    elif role == 'caregiver':
         # Caregivers can only see geofences for their assigned clients
-        from app.models.client.caregiver_assignment import CaregiverAssignment
-        
-        # Get current caregiver assignments
-        assignments = CaregiverAssignment.query.filter_by(
-            caregiver_id=current_user_id,
-            is_active=True
-        ).all()
-        
-        # Get client IDs that this caregiver is assigned to
-        assigned_client_ids = [assignment.client_id for assignment in assignments if assignment.is_current()]
+        assigned_client_ids = caregiver_access_service.assigned_client_ids(current_user_id)
         
         if not assigned_client_ids:
             # No assignments, return empty list
@@ -160,7 +227,7 @@ def get_geofences():
         # Get geofences for assigned clients only
         geofences = Geofence.query.filter(
             Geofence.is_active == True,
-            Geofence.client_id.in_(assigned_client_ids)
+            Geofence.client_id.in_(list(assigned_client_ids))
         ).all()
     else:
         return jsonify({'error': 'Access denied'}), 403
@@ -171,13 +238,10 @@ def get_geofences():
 
 @geolocation_bp.route('/geofences', methods=['POST'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def create_geofence():
     """Create new geofence"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     data = request.get_json()
     
@@ -220,16 +284,124 @@ def create_geofence():
         'geofence': geofence.to_dict()
     }), 201
 
-@geolocation_bp.route('/geofences/<geofence_id>', methods=['GET'])
+@geolocation_bp.route('/geofences/export', methods=['GET'])
 @jwt_required()
-def get_geofence(geofence_id):
-    """Get specific geofence"""
+@require_roles('admin', 'manager')
+def export_geofences():
+    """Stream geofences as a GeoJSON FeatureCollection"""
+    # Get query parameters
+    client_id = request.args.get('client_id')
+    include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
+    
+    query = db.session.query(
+        Geofence.id, Geofence.name, Geofence.description, Geofence.client_id,
+        Geofence.center_latitude, Geofence.center_longitude, Geofence.radius_meters,
+        Geofence.geofence_type, Geofence.polygon_coordinates, Geofence.is_active
+    )
+    if client_id:
+        query = query.filter(Geofence.client_id == client_id)
+    if not include_inactive:
+        query = query.filter(Geofence.is_active == True)
+    
+    rows = query.order_by(Geofence.id).yield_per(current_app.config['GEOFENCE_IMPORT_BATCH_SIZE'])
+    
+    return Response(
+        stream_with_context(geofence_geojson_service.iter_feature_collection(rows)),
+        mimetype='application/geo+json',
+        headers={'Content-Disposition': 'attachment; filename=geofences.geojson'}
+    )
+
+@geolocation_bp.route('/geofences/import', methods=['POST'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def import_geofences():
+    """Bulk import geofences from a GeoJSON FeatureCollection or GeoJSON text sequence"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
     
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+    batch_size = current_app.config['GEOFENCE_IMPORT_BATCH_SIZE']
+    
+    # Accept a multipart upload or a raw request body
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    filename = (upload.filename if upload else '') or ''
+    line_delimited = (
+        request.mimetype in ('application/geo+json-seq', 'application/x-ndjson') or
+        filename.endswith(('.geojsonl', '.geojsons', '.ndjson'))
+    )
+    
+    valid = 0
+    client_ids = set()
+    errors = []
+    total = 0
+    
+    def import_batch(batch, offset):
+        nonlocal valid
+        requested_ids = geofence_geojson_service.referenced_client_ids(batch)
+        known_ids = {
+            row.id for row in db.session.query(Client.id).filter(Client.id.in_(requested_ids))
+        } if requested_ids else set()
+        batch_rows, batch_errors = geofence_geojson_service.validate_features(batch, known_ids)
+        for row in batch_rows:
+            row['created_by'] = current_user_id
+            client_ids.add(row['client_id'])
+        valid += len(batch_rows)
+        errors.extend({'index': e['index'] + offset, 'error': e['error']} for e in batch_errors)
+        # Inserted batch by batch, all in one transaction, so only one batch is held in memory
+        if batch_rows and not dry_run:
+            db.session.execute(insert(Geofence), batch_rows)
+    
+    try:
+        batch = []
+        for feature in geofence_geojson_service.iter_features(stream, line_delimited):
+            batch.append(feature)
+            total += 1
+            if len(batch) >= batch_size:
+                import_batch(batch, total - len(batch))
+                batch = []
+        if batch:
+            import_batch(batch, total - len(batch))
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': f'Invalid GeoJSON: {str(e)}'}), 400
+    
+    summary = {
+        'total_features': total,
+        'imported': 0 if dry_run else valid,
+        'valid': valid,
+        'failed': len(errors),
+        'dry_run': dry_run
+    }
+    
+    if dry_run or not valid:
+        return jsonify({'summary': summary, 'errors': errors})
+    
+    # A single summarized audit entry, committed with the inserts
+    audit_log = AuditLog(
+        user_id=current_user_id,
+        action='geofences_imported',
+        resource_type='geofence',
+        details={
+            **summary,
+            'client_ids': sorted(client_ids),
+            'errors': errors[:100]
+        },
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent')
+    )
+    db.session.add(audit_log)
+    db.session.commit()
     
+    # Bulk inserts bypass ORM events, so rebuild the spatial index once here
+    geofence_index_service.rebuild()
+    
+    return jsonify({'summary': summary, 'errors': errors}), 201
+
+@geolocation_bp.route('/geofences/<geofence_id>', methods=['GET'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def get_geofence(geofence_id):
+    """Get specific geofence"""
     geofence = Geofence.query.get(geofence_id)
     if not geofence:
         return jsonify({'error': 'Geofence not found'}), 404
@@ -240,13 +412,10 @@ def get_geofence(geofence_id):
 
 @geolocation_bp.route('/geofences/<geofence_id>', methods=['PUT'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def update_geofence(geofence_id):
     """Update geofence"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     geofence = Geofence.query.get(geofence_id)
     if not geofence:
@@ -292,13 +461,10 @@ def update_geofence(geofence_id):
 
 @geolocation_bp.route('/geofences/<geofence_id>', methods=['DELETE'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def delete_geofence(geofence_id):
     """Delete geofence"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     geofence = Geofence.query.get(geofence_id)
     if not geofence:
@@ -325,14 +491,9 @@ def delete_geofence(geofence_id):
 
 @geolocation_bp.route('/tracking/active', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_active_tracking():
     """Get all users with active location tracking"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     # Get users with active locations in the last 5 minutes
     five_minutes_ago = datetime.utcnow() - timedelta(minutes=5)
     active_locations = Location.query.filter(
@@ -444,3 +605,115 @@ def calculate_distance():
             'success': False,
             'error': 'Could not calculate distance between the provided points'
         }), 400
+
+
+def _parse_matrix_points(points):
+    """Parse a list of {latitude, longitude[, id]} dicts into coordinates and labels"""
+    coordinates = []
+    labels = []
+    for index, point in enumerate(points):
+        if not isinstance(point, dict):
+            return None, None, f'Point {index} must be an object'
+        latitude = point.get('latitude')
+        longitude = point.get('longitude')
+        if not geocoding_service.validate_coordinates(latitude, longitude):
+            return None, None, f'Point {index} has invalid coordinates'
+        coordinates.append((float(latitude), float(longitude)))
+        labels.append(point.get('id', index))
+    return coordinates, labels, None
+
+@geolocation_bp.route('/geocode/distance-matrix', methods=['POST'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def calculate_distance_matrix():
+    """Calculate travel distance/time matrix between clients and/or arbitrary points"""
+    data = request.get_json() or {}
+    
+    origin_client_ids = data.get('client_ids')
+    destination_client_ids = data.get('destination_client_ids')
+    origin_points = data.get('origins')
+    destination_points = data.get('destinations')
+    
+    if not origin_client_ids and not origin_points:
+        return jsonify({'error': 'client_ids or origins is required'}), 400
+    
+    for field, value in (('client_ids', origin_client_ids), ('destination_client_ids', destination_client_ids)):
+        if value is not None and (not isinstance(value, list) or
+                                  not all(isinstance(client_id, str) for client_id in value)):
+            return jsonify({'error': f'{field} must be a list of client IDs'}), 400
+    for field, value in (('origins', origin_points), ('destinations', destination_points)):
+        if value is not None and not isinstance(value, list):
+            return jsonify({'error': f'{field} must be a list of points'}), 400
+    
+    road_factor = data.get('road_factor', current_app.config['DISTANCE_MATRIX_ROAD_FACTOR'])
+    average_speed_kmh = data.get('average_speed_kmh', current_app.config['DISTANCE_MATRIX_AVERAGE_SPEED_KMH'])
+    max_cells = current_app.config['DISTANCE_MATRIX_MAX_CELLS']
+    
+    # The response carries three N x M arrays, so the cap is on their size
+    origin_count = len(origin_client_ids or origin_points)
+    destination_count = len(destination_client_ids or destination_points or origin_client_ids or origin_points)
+    if origin_count * destination_count > max_cells:
+        return jsonify({
+            'error': f'At most {max_cells} origin-destination pairs are supported, '
+                     f'got {origin_count} x {destination_count}'
+        }), 400
+    
+    try:
+        if origin_client_ids and not origin_points and not destination_points:
+            # Client-to-client matrices are cached by client set
+            result = distance_matrix_service.build_client_matrix(
+                origin_client_ids,
+                destination_client_ids,
+                road_factor=road_factor,
+                average_speed_kmh=average_speed_kmh
+            )
+            origin_labels = result['origin_ids']
+            destination_labels = result['destination_ids']
+            missing_client_ids = result['missing_client_ids']
+        else:
+            # Mixed requests, e.g. caregiver home bases to client homes
+            client_coordinates = distance_matrix_service.get_client_coordinates(
+                (origin_client_ids or []) + (destination_client_ids or [])
+            )
+            missing_client_ids = sorted(
+                (set(origin_client_ids or []) | set(destination_client_ids or [])) - set(client_coordinates)
+            )
+            
+            if origin_points:
+                origins, origin_labels, error = _parse_matrix_points(origin_points)
+                if error:
+                    return jsonify({'error': error}), 400
+            else:
+                origin_labels = [cid for cid in origin_client_ids if cid in client_coordinates]
+                origins = [client_coordinates[cid] for cid in origin_labels]
+            
+            if destination_points:
+                destinations, destination_labels, error = _parse_matrix_points(destination_points)
+                if error:
+                    return jsonify({'error': error}), 400
+            elif destination_client_ids:
+                destination_labels = [cid for cid in destination_client_ids if cid in client_coordinates]
+                destinations = [client_coordinates[cid] for cid in destination_labels]
+            else:
+                destinations, destination_labels = origins, origin_labels
+            
+            result = distance_matrix_service.build_matrix(
+                origins,
+                destinations,
+                road_factor=road_factor,
+                average_speed_kmh=average_speed_kmh
+            )
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'origins': origin_labels,
+        'destinations': destination_labels,
+        'missing_client_ids': missing_client_ids,
+        'road_factor': result['road_factor'],
+        'average_speed_kmh': result['average_speed_kmh'],
+        'distance_meters': result['distance_meters'].round(1).tolist(),
+        'road_distance_meters': result['road_distance_meters'].round(1).tolist(),
+        'duration_seconds': result['duration_seconds'].round(0).tolist()
+    })
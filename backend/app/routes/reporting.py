@@ -3,7 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.reporting.report import Report
 from app.models.reporting.audit_log import AuditLog
-from app.models.auth.user import User
+from app.services.auth.authorization_service import require_roles, require_permission, current_role
 from datetime import datetime, timedelta
 import uuid
 
@@ -11,13 +11,10 @@ reporting_bp = Blueprint('reporting', __name__)
 
 @reporting_bp.route('/reports', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_reports():
     """Get reports for current user"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     reports = Report.query.filter_by(generated_by=current_user_id).order_by(Report.created_at.desc()).all()
     
@@ -27,13 +24,10 @@ def get_reports():
 
 @reporting_bp.route('/reports', methods=['POST'])
 @jwt_required()
+@require_permission('reports', 'create')
 def create_report():
     """Create new report"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     data = request.get_json()
     
@@ -82,8 +76,7 @@ def get_report(report_id):
         return jsonify({'error': 'Report not found'}), 404
     
     # Check permissions
-    user = User.query.get(current_user_id)
-    if user.role.name not in ['admin', 'manager'] and report.generated_by != current_user_id:
+    if current_role() not in ['admin', 'manager'] and report.generated_by != current_user_id:
         return jsonify({'error': 'Access denied'}), 403
     
     return jsonify({
@@ -92,14 +85,9 @@ def get_report(report_id):
 
 @reporting_bp.route('/audit-logs', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_audit_logs():
     """Get audit logs"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     # Get query parameters
     user_id = request.args.get('user_id')
     action = request.args.get('action')
@@ -132,14 +120,9 @@ def get_audit_logs():
 
 @reporting_bp.route('/compliance', methods=['GET'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def get_compliance_report():
     """Get compliance report"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
-    
     # Get date range
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=30)
@@ -0,0 +1,80 @@
+from flask import request, session
+from flask_jwt_extended import decode_token
+from flask_socketio import join_room
+from app import socketio
+from app.services.auth.authorization_service import authorization_service
+from app.services.auth.token_blocklist_service import token_blocklist_service
+from app.services.communication.conversation_membership_service import conversation_membership_service
+from app.services.communication.socket_session_service import socket_session_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _token_from_handshake(auth):
+    """Read the access token from the Socket.IO auth payload or the query string"""
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+    return request.args.get('token')
+
+@socketio.on('connect')
+def handle_connect(auth=None):
+    """Authenticate the socket and join the user's personal, agency, role and conversation rooms"""
+    token = _token_from_handshake(auth)
+    if not token:
+        return False
+    
+    try:
+        claims = decode_token(token)
+    except Exception as e:
+        logger.info(f"Rejected socket connection: {str(e)}")
+        return False
+    
+    # decode_token only checks the signature and expiry; apply the same checks as jwt_required()
+    if claims.get('type') != 'access' or token_blocklist_service.is_revoked(claims['jti']) \
+            or not authorization_service.is_current(claims):
+        logger.info("Rejected socket connection: token is not a current access token")
+        return False
+    identity = claims['sub']
+    
+    # Server-side pushes (e.g. client_geocoding_updated) are addressed to this room
+    join_room(f"user_{identity}")
+    
+    # Agency-wide announcements, and ones for a role such as role_manager
+    join_room('agency')
+    if claims.get('role'):
+        join_room(f"role_{claims['role']}")
+    
+    # new_message and conversation_read are emitted to the conversation's room
+    for conversation_id in conversation_membership_service.conversation_ids(identity):
+        join_room(conversation_id)
+    session['user_id'] = identity
+    # Shared with the other workers, so a removal there can take this socket out of a room
+    socket_session_service.add(identity, request.sid)
+
+@socketio.on('disconnect')
+def handle_disconnect(reason=None):
+    """Forget the socket's session id"""
+    user_id = session.get('user_id')
+    if user_id:
+        socket_session_service.remove(user_id, request.sid)
+
+@socketio.on('join_conversation')
+def handle_join_conversation(data):
+    """Join a conversation's room, e.g. one created after this socket connected"""
+    conversation_id = (data or {}).get('conversation_id')
+    user_id = session.get('user_id')
+    if not user_id or not conversation_id or \
+            not conversation_membership_service.is_member(user_id, conversation_id, cached=False):
+        return {'error': 'Access denied'}
+    join_room(conversation_id)
+    return {'conversation_id': conversation_id}
+
+def leave_conversation_room(user_id, conversation_id):
+    """
+    Take a removed participant's sockets out of the conversation's room
+
+    Sockets on this process leave directly; for ones on other workers the
+    message queue manager publishes the leave to the process that has them.
+    """
+    for sid in socket_session_service.sids(user_id):
+        socketio.server.leave_room(sid, conversation_id, namespace='/')
@@ -3,9 +3,11 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.task.task import Task
 from app.models.task.task_assignment import TaskAssignment
-from app.models.auth.user import User
 from app.models.reporting.audit_log import AuditLog
+from app.services.task.visit_scheduling_service import visit_scheduling_service
+from app.services.auth.authorization_service import require_roles, require_permission, current_role
 from datetime import datetime
+import math
 import uuid
 
 task_bp = Blueprint('task', __name__)
@@ -15,7 +17,6 @@ task_bp = Blueprint('task', __name__)
 def get_tasks():
     """Get tasks for current user or all tasks for managers"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
     
     # Get query parameters
     status = request.args.get('status')
@@ -25,7 +26,7 @@ def get_tasks():
     query = Task.query
     
     # Filter by user role
-    if user.role.name in ['admin', 'manager']:
+    if current_role() in ['admin', 'manager']:
         if client_id:
             query = query.filter_by(client_id=client_id)
     else:
@@ -48,13 +49,10 @@ def get_tasks():
 
 @task_bp.route('/', methods=['POST'])
 @jwt_required()
+@require_permission('tasks', 'create')
 def create_task():
     """Create new task"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     data = request.get_json()
     
@@ -108,14 +106,13 @@ def create_task():
 def get_task(task_id):
     """Get specific task"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
     
     task = Task.query.get(task_id)
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
     # Check permissions
-    if user.role.name not in ['admin', 'manager']:
+    if current_role() not in ['admin', 'manager']:
         assignment = TaskAssignment.query.filter_by(
             task_id=task_id,
             assigned_user_id=current_user_id
@@ -129,13 +126,10 @@ def get_task(task_id):
 
 @task_bp.route('/<task_id>', methods=['PUT'])
 @jwt_required()
+@require_roles('admin', 'manager')
 def update_task(task_id):
     """Update task"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     task = Task.query.get(task_id)
     if not task:
@@ -187,13 +181,10 @@ def update_task(task_id):
 
 @task_bp.route('/<task_id>/assign', methods=['POST'])
 @jwt_required()
+@require_permission('tasks', 'assign')
 def assign_task(task_id):
     """Assign task to user"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     task = Task.query.get(task_id)
     if not task:
@@ -278,3 +269,81 @@ def decline_task(task_id):
         'message': 'Task declined successfully',
         'assignment': assignment.to_dict()
     })
+
+@task_bp.route('/schedule', methods=['POST'])
+@jwt_required()
+@require_permission('tasks', 'assign')
+def schedule_visits():
+    """Plan a day's visits across caregivers, optionally assigning them"""
+    current_user_id = get_jwt_identity()
+    
+    data = request.get_json() or {}
+    
+    if not data.get('date'):
+        return jsonify({'error': 'Date is required'}), 400
+    try:
+        day = datetime.strptime(data['date'], '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format, use YYYY-MM-DD'}), 400
+    
+    caregiver_ids = data.get('caregiver_ids')
+    if caregiver_ids is not None and (not isinstance(caregiver_ids, list) or
+                                      not all(isinstance(caregiver_id, str) for caregiver_id in caregiver_ids)):
+        return jsonify({'error': 'caregiver_ids must be a list of caregiver IDs'}), 400
+    shifts = data.get('shifts')
+    if shifts is not None and (not isinstance(shifts, dict) or
+                               not all(isinstance(shift, dict) for shift in shifts.values())):
+        return jsonify({'error': 'shifts must map caregiver IDs to {"start": "HH:MM", "end": "HH:MM"}'}), 400
+    
+    options = {
+        'caregiver_ids': caregiver_ids,
+        'shifts': shifts
+    }
+    if data.get('time_limit_seconds') is not None:
+        try:
+            time_limit_seconds = float(data['time_limit_seconds'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'time_limit_seconds must be a number'}), 400
+        if not math.isfinite(time_limit_seconds) or time_limit_seconds <= 0:
+            return jsonify({'error': 'time_limit_seconds must be a positive number'}), 400
+        options['time_limit_seconds'] = min(time_limit_seconds, 60.0)
+    apply = bool(data.get('apply', False))
+    
+    if data.get('background'):
+        job = visit_scheduling_service.enqueue(
+            day, current_user_id, apply=apply,
+            ip_address=request.remote_addr, user_agent=request.headers.get('User-Agent'),
+            **options
+        )
+        return jsonify({
+            'message': 'Scheduling job queued',
+            'job': {key: value for key, value in job.items() if key != 'result'}
+        }), 202
+    
+    try:
+        schedule = visit_scheduling_service.build_schedule(day, **options)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if apply:
+        try:
+            schedule['assignments_created'] = visit_scheduling_service.apply_schedule(
+                schedule, current_user_id, request.remote_addr, request.headers.get('User-Agent')
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': f'Failed to apply schedule: {str(e)}'}), 500
+    
+    return jsonify(schedule)
+
+@task_bp.route('/schedule/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+@require_roles('admin', 'manager')
+def get_schedule_job(job_id):
+    """Get the status and result of a background scheduling job"""
+    job = visit_scheduling_service.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Scheduling job not found'}), 404
+    
+    return jsonify({'job': job})
@@ -3,10 +3,11 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.timesheet.timesheet import Timesheet
 from app.models.timesheet.break_time import BreakTime
-from app.models.auth.user import User
 from app.models.reporting.audit_log import AuditLog
 from app.models.geolocation.geofence import Geofence
 from app.models.client.client import Client
+from app.services.client.caregiver_access_service import caregiver_access_service
+from app.services.auth.authorization_service import require_permission, current_role
 from datetime import datetime, date
 import uuid
 
@@ -17,10 +18,6 @@ timesheet_bp = Blueprint('timesheet', __name__)
 def get_timesheets():
     """Get timesheets for current user or all timesheets for managers"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
     
     # Get query parameters
     start_date = request.args.get('start_date')
@@ -31,7 +28,7 @@ def get_timesheets():
     query = Timesheet.query
     
     # Filter by user role
-    if user.role.name in ['admin', 'manager']:
+    if current_role() in ['admin', 'manager']:
         if user_id:
             query = query.filter_by(user_id=user_id)
     else:
@@ -56,14 +53,13 @@ def get_timesheets():
 def get_timesheet(timesheet_id):
     """Get specific timesheet"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
     
     timesheet = Timesheet.query.get(timesheet_id)
     if not timesheet:
         return jsonify({'error': 'Timesheet not found'}), 404
     
     # Check permissions
-    if user.role.name not in ['admin', 'manager'] and timesheet.user_id != current_user_id:
+    if current_role() not in ['admin', 'manager'] and timesheet.user_id != current_user_id:
         return jsonify({'error': 'Access denied'}), 403
     
     return jsonify({
@@ -296,13 +292,10 @@ def end_break(timesheet_id, break_id):
 
 @timesheet_bp.route('/<timesheet_id>/approve', methods=['POST'])
 @jwt_required()
+@require_permission('timesheets', 'approve')
 def approve_timesheet(timesheet_id):
     """Approve timesheet (managers only)"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     timesheet = Timesheet.query.get(timesheet_id)
     if not timesheet:
@@ -332,13 +325,10 @@ def approve_timesheet(timesheet_id):
 
 @timesheet_bp.route('/<timesheet_id>/reject', methods=['POST'])
 @jwt_required()
+@require_permission('timesheets', 'approve')
 def reject_timesheet(timesheet_id):
     """Reject timesheet (managers only)"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if user.role.name not in ['admin', 'manager']:
-        return jsonify({'error': 'Access denied'}), 403
     
     timesheet = Timesheet.query.get(timesheet_id)
     if not timesheet:
@@ -372,7 +362,6 @@ def reject_timesheet(timesheet_id):
 def auto_clock_in():
     """Automatically create timesheet and clock in for a client"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
     
     data = request.get_json()
     
@@ -384,16 +373,8 @@ def auto_clock_in():
     location = data.get('location')
     
     # Validate that user is assigned to this client (for caregivers)
-    if user.role.name == 'caregiver':
-        from app.models.client.caregiver_assignment import CaregiverAssignment
-        
-        assignment = CaregiverAssignment.query.filter_by(
-            caregiver_id=current_user_id,
-            client_id=client_id,
-            is_active=True
-        ).first()
-        
-        if not assignment or not assignment.is_current():
+    if current_role() == 'caregiver':
+        if not caregiver_access_service.is_assigned(current_user_id, client_id):
             return jsonify({'error': 'You are not assigned to this client'}), 403
     
     # Check if client exists
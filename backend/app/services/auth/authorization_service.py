@@ -0,0 +1,177 @@
+from app import db, jwt
+from app.models.auth.role import Role
+from app.models.auth.user import User
+from flask import jsonify
+from flask_jwt_extended import get_current_user, get_jwt
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session, object_session
+from collections import OrderedDict
+from functools import wraps
+import threading
+import time
+
+class AuthorizationService:
+    """Checks that the role claims in access tokens are still current"""
+
+    def __init__(self, max_age_seconds=30, cache_size=4096):
+        # Other worker processes can change users, so versions are also
+        # reloaded once they are older than this
+        self.max_age_seconds = max_age_seconds
+        self.cache_size = cache_size
+        self.identity_claim = 'sub'
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_age_seconds = app.config.get('AUTHZ_CACHE_MAX_AGE_SECONDS', self.max_age_seconds)
+        self.cache_size = app.config.get('AUTHZ_CACHE_SIZE', self.cache_size)
+        self.identity_claim = app.config.get('JWT_IDENTITY_CLAIM', self.identity_claim)
+        jwt.token_verification_loader(self._verify_token)
+        jwt.token_verification_failed_loader(self._stale_token)
+
+    def current_version(self, user_id):
+        """
+        Get the authorization version a user's access tokens must carry
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            int: Current version, or None if the user is gone or deactivated
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and now - entry[0] < self.max_age_seconds:
+                self._cache.move_to_end(user_id)
+                return entry[1]
+
+        row = db.session.query(User.authz_version, User.is_active).filter(User.id == user_id).first()
+        version = row.authz_version if row and row.is_active else None
+
+        with self._lock:
+            self._cache[user_id] = (now, version)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return version
+
+    def is_current(self, claims):
+        """Check that a token's role claims still match the user"""
+        if 'authz_version' not in claims:
+            # Refresh tokens, and access tokens issued before role claims
+            return True
+        version = self.current_version(claims[self.identity_claim])
+        return version is not None and version == claims['authz_version']
+
+    def invalidate(self, user_id=None):
+        """Drop one user's cached version, or everyone's if no id is given"""
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def _verify_token(self, jwt_header, jwt_data):
+        return self.is_current(jwt_data)
+
+    def _stale_token(self, jwt_header, jwt_data):
+        return jsonify({'error': 'Token is out of date, please refresh it'}), 401
+
+# Global instance for easy access
+authorization_service = AuthorizationService()
+
+def current_role():
+    """Role name of the current user, from the access token"""
+    claims = get_jwt()
+    if 'role' in claims:
+        return claims['role']
+    # Tokens issued before role claims
+    user = get_current_user()
+    return user.role.name if user.role else None
+
+def has_permission(resource, action):
+    """
+    Check a permission from the access token's claims
+
+    Admins may do everything; other roles need the action listed under the
+    resource in their role's permissions.
+    """
+    claims = get_jwt()
+    if 'permissions' in claims:
+        role, permissions = claims['role'], claims['permissions']
+    else:
+        user = get_current_user()
+        role = user.role.name if user.role else None
+        permissions = (user.role.permissions if user.role else None) or {}
+    return role == 'admin' or action in permissions.get(resource, [])
+
+def require_roles(*roles):
+    """Only let users with one of the given roles through; use below @jwt_required()"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_role() not in roles:
+                return jsonify({'error': 'Access denied'}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def require_permission(resource, action):
+    """Only let users whose role grants the permission through; use below @jwt_required()"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not has_permission(resource, action):
+                return jsonify({'error': 'Access denied'}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@event.listens_for(User.role_id, 'set', active_history=True)
+@event.listens_for(User.is_active, 'set', active_history=True)
+@event.listens_for(User.password_hash, 'set', active_history=True)
+def _bump_authz_version(target, value, oldvalue, initiator):
+    """Make existing access tokens stale when a user's role, status or password changes"""
+    if inspect(target).persistent and value != oldvalue:
+        target.authz_version = User.authz_version + 1
+        _user_changed(target)
+
+@event.listens_for(User, 'after_delete')
+def _invalidate_deleted_user(mapper, connection, target):
+    _user_changed(target)
+
+def _user_changed(target):
+    authorization_service.invalidate(target.id)
+    # Invalidate again on commit, in case another request reloaded the old row in between
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('authz_changed', set()).add(target.id)
+
+@event.listens_for(Role, 'after_update')
+def _bump_role_members(mapper, connection, target):
+    """Changing a role's name or permissions makes all its members' tokens stale"""
+    attrs = inspect(target).attrs
+    if not (attrs.name.history.has_changes() or attrs.permissions.history.has_changes()):
+        return
+    connection.execute(
+        update(User.__table__)
+        .where(User.__table__.c.role_id == target.id)
+        .values(authz_version=User.__table__.c.authz_version + 1)
+    )
+    authorization_service.invalidate()
+    session = object_session(target)
+    if session is not None:
+        session.info['authz_changed_all'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_versions(session):
+    if session.info.pop('authz_changed_all', False):
+        authorization_service.invalidate()
+    for user_id in session.info.pop('authz_changed', ()):
+        authorization_service.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_version_changes(session):
+    session.info.pop('authz_changed', None)
+    session.info.pop('authz_changed_all', None)
@@ -0,0 +1,482 @@
+from app import db, mail, socketio
+from app.models.auth.role import Role
+from app.models.auth.user import User
+from app.models.auth.user_invite import UserInvite, hash_invite_token
+from app.models.client.caregiver_assignment import CaregiverAssignment
+from app.models.client.client import Client
+from app.models.reporting.audit_log import AuditLog
+from app.services.auth.password_hashing_service import password_hashing_service
+from app.services.client.client_import_service import EMAIL_PATTERN, normalize_header
+from flask_mail import Message
+from sqlalchemy import func, insert, or_, update
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+import csv
+import io
+import logging
+import queue
+import re
+import secrets
+import uuid
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ['first_name', 'last_name', 'email', 'phone']
+ASSIGNMENT_TYPES = ('primary', 'backup', 'temporary')
+
+# Lengths of the bounded User string columns
+MAX_LENGTHS = {'first_name': 50, 'last_name': 50, 'phone': 20, 'email': 80}
+
+# bcrypt only looks at the first 72 bytes of a password
+MAX_PASSWORD_BYTES = 72
+
+def split_ids(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = re.split(r'[;|,\s]+', value)
+    return [str(v).strip() for v in value if str(v).strip()]
+
+class CaregiverProvisioningService:
+    """Service for creating caregiver accounts in bulk"""
+
+    def __init__(self, max_rows=2000, invites_async=True, invite_ttl_hours=72, invite_max_attempts=5,
+                 invite_stale_seconds=600, invite_url='http://localhost:3000/accept-invite'):
+        self.max_rows = max_rows
+        # Disabled in tests so invites are sent inline
+        self.invites_async = invites_async
+        self.invite_ttl_hours = invite_ttl_hours
+        # Failed sends are retried by retry_unsent until they have been tried this often
+        self.invite_max_attempts = invite_max_attempts
+        # A send claimed this long ago without finishing was lost to a restart
+        self.invite_stale_seconds = invite_stale_seconds
+        self.invite_url = invite_url
+        # Holds invite ids only; the invites themselves are rows in user_invites
+        self._invites = queue.Queue()
+        self._invite_worker_started = False
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+        self.max_rows = app.config.get('CAREGIVER_PROVISIONING_MAX_ROWS', self.max_rows)
+        self.invites_async = app.config.get('CAREGIVER_INVITES_ASYNC', self.invites_async)
+        self.invite_ttl_hours = app.config.get('CAREGIVER_INVITE_TTL_HOURS', self.invite_ttl_hours)
+        self.invite_max_attempts = app.config.get('CAREGIVER_INVITE_MAX_ATTEMPTS', self.invite_max_attempts)
+        self.invite_stale_seconds = app.config.get('CAREGIVER_INVITE_STALE_SECONDS', self.invite_stale_seconds)
+        self.invite_url = app.config.get('CAREGIVER_INVITE_URL', self.invite_url)
+
+    def start_sweep(self):
+        """
+        Send invites left unsent when the previous server process stopped, in the background
+
+        Only the server entrypoint calls this; create_app also runs for
+        migrations and scripts, which must not send mail.
+        """
+        if self.invites_async:
+            socketio.start_background_task(self._sweep_in_app_context)
+
+    def read_csv(self, stream):
+        """
+        Read caregiver rows from a CSV upload
+
+        Args:
+            stream: Binary file-like object; client_ids may hold several IDs separated by ";"
+
+        Returns:
+            list: Row dicts keyed by normalized column name
+        """
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        reader = csv.reader(text)
+        headers = [normalize_header(h) for h in next(reader, [])]
+        return [dict(zip(headers, row)) for row in reader if any(cell.strip() for cell in row)]
+
+    def validate_row(self, row, send_invites=True):
+        """
+        Validate and normalize one caregiver row
+
+        Returns:
+            tuple: (values, error) where exactly one is None
+        """
+        values = {k: str(row.get(k) or '').strip() for k in REQUIRED_FIELDS}
+        for field in REQUIRED_FIELDS:
+            if not values[field]:
+                return None, f'{field.replace("_", " ").title()} is required'
+        for field, length in MAX_LENGTHS.items():
+            if len(values[field]) > length:
+                return None, f'{field.replace("_", " ").title()} must be at most {length} characters'
+        if not EMAIL_PATTERN.match(values['email']):
+            return None, 'Invalid email address'
+
+        password = row.get('password') or None
+        if password is None and not send_invites:
+            # Without a password the invite is the only way to sign in
+            return None, 'Password is required when invites are not sent'
+        if password is not None and len(str(password).encode('utf-8')) > MAX_PASSWORD_BYTES:
+            return None, f'Password must be at most {MAX_PASSWORD_BYTES} bytes'
+        values['password'] = str(password) if password is not None else None
+
+        values['assignment_type'] = str(row.get('assignment_type') or 'primary').strip().lower()
+        if values['assignment_type'] not in ASSIGNMENT_TYPES:
+            return None, f'Assignment type must be one of {", ".join(ASSIGNMENT_TYPES)}'
+        values['client_ids'] = list(dict.fromkeys(split_ids(row.get('client_ids'))))
+        return values, None
+
+    def provision(self, rows, created_by, send_invites=True, dry_run=False, ip_address=None, user_agent=None):
+        """
+        Create caregiver accounts and their client assignments
+
+        Invalid rows are reported and skipped; every valid row is inserted in a
+        single transaction, so either all of them are created or none are.
+
+        Args:
+            rows (list): Dicts with first_name, last_name, email, phone and
+                optionally password, client_ids and assignment_type
+            created_by (str): ID of the user doing the provisioning
+            send_invites (bool): Email each new caregiver a link to set their password
+            dry_run (bool): Validate only
+
+        Returns:
+            dict: summary and per-row results
+
+        Raises:
+            ValueError: If there are no rows or too many
+        """
+        if not rows:
+            raise ValueError('No caregivers to create')
+        if len(rows) > self.max_rows:
+            raise ValueError(f'At most {self.max_rows} caregivers can be created at once')
+
+        caregiver_role = Role.query.filter_by(name='caregiver').first()
+        if not caregiver_role:
+            raise ValueError('Caregiver role not found')
+
+        results = []
+        valid = []
+        seen = set()
+        for index, row in enumerate(rows, start=1):
+            values, error = self.validate_row(row, send_invites)
+            result = {'row': index, 'email': (row.get('email') or None)}
+            if not error:
+                key = values['email'].lower()
+                if key in seen:
+                    error = 'Duplicate email in this batch'
+                seen.add(key)
+            if error:
+                result.update(status='failed', error=error)
+            else:
+                valid.append((result, values))
+            results.append(result)
+
+        # One query each for emails already taken and unknown clients
+        if valid:
+            emails = [values['email'].lower() for _, values in valid]
+            taken = {
+                email for (email,) in db.session.query(func.lower(User.email))
+                .filter(func.lower(User.email).in_(emails)).all()
+            }
+            taken |= {
+                username for (username,) in db.session.query(func.lower(User.username))
+                .filter(func.lower(User.username).in_(emails)).all()
+            }
+            client_ids = {cid for _, values in valid for cid in values['client_ids']}
+            known_clients = {
+                cid for (cid,) in db.session.query(Client.id)
+                .filter(Client.id.in_(client_ids), Client.is_active == True).all()
+            } if client_ids else set()
+
+            remaining = []
+            for result, values in valid:
+                missing = [cid for cid in values['client_ids'] if cid not in known_clients]
+                if values['email'].lower() in taken:
+                    result.update(status='failed', error='Email already exists')
+                elif missing:
+                    result.update(status='failed', error=f'Unknown or inactive client: {missing[0]}')
+                else:
+                    remaining.append((result, values))
+            valid = remaining
+
+        if dry_run or not valid:
+            for result, values in valid:
+                result.update(status='valid', assignments=len(values['client_ids']))
+            return self._summary(results, dry_run)
+
+        for _, values in valid:
+            if values['password'] is None:
+                # Never sent or stored; the caregiver sets a password from the invite
+                values['password'] = secrets.token_urlsafe(32)
+        # bcrypt is slow by design, so hundreds of hashes go to the process pool
+        hashes = password_hashing_service.hash_many([values['password'] for _, values in valid])
+
+        now = datetime.utcnow()
+        today = now.date()
+        user_rows = []
+        assignment_rows = []
+        invite_rows = []
+        for (result, values), password_hash in zip(valid, hashes):
+            caregiver_id = str(uuid.uuid4())
+            user_rows.append({
+                'id': caregiver_id,
+                'email': values['email'],
+                'username': values['email'],  # Use email as username
+                'password_hash': password_hash,
+                'first_name': values['first_name'],
+                'last_name': values['last_name'],
+                'phone': values['phone'],
+                'role_id': caregiver_role.id,
+                'is_active': True,
+                'is_verified': False,
+                'created_at': now,
+                'updated_at': now
+            })
+            for client_id in values['client_ids']:
+                assignment_rows.append({
+                    'id': str(uuid.uuid4()),
+                    'caregiver_id': caregiver_id,
+                    'client_id': client_id,
+                    'assignment_type': values['assignment_type'],
+                    'start_date': today,
+                    'is_active': True,
+                    'assigned_by': created_by,
+                    'created_at': now,
+                    'updated_at': now
+                })
+            if send_invites:
+                invite_rows.append({
+                    'id': str(uuid.uuid4()),
+                    'user_id': caregiver_id,
+                    'status': 'pending',
+                    'attempts': 0,
+                    'created_by': created_by,
+                    'created_at': now,
+                    'updated_at': now
+                })
+            result.update(caregiver_id=caregiver_id, assignments=len(values['client_ids']))
+
+        # Bulk inserts skip the mapper events, which is fine here: brand new
+        # caregivers have no cached client access or workload rows yet
+        try:
+            db.session.execute(insert(User), user_rows)
+            if assignment_rows:
+                db.session.execute(insert(CaregiverAssignment), assignment_rows)
+            if invite_rows:
+                # Recorded with the accounts, so an invite lost before it is sent can be retried
+                db.session.execute(insert(UserInvite), invite_rows)
+            db.session.add(AuditLog(
+                user_id=created_by,
+                action='caregivers_bulk_created',
+                resource_type='user',
+                details={
+                    'created': len(user_rows),
+                    'assignments': len(assignment_rows),
+                    'failed': len(results) - len(user_rows),
+                    'caregiver_ids': [r['id'] for r in user_rows],
+                    'invites_sent': send_invites
+                },
+                ip_address=ip_address,
+                user_agent=user_agent
+            ))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            # Most likely an email registered since validation; nothing was created
+            db.session.rollback()
+            logger.warning('Bulk caregiver insert failed: %s', e)
+            for result, _ in valid:
+                result.pop('caregiver_id', None)
+                result.pop('assignments', None)
+                result.update(status='failed', error='Failed to create caregiver')
+            return self._summary(results, dry_run)
+
+        for result, _ in valid:
+            result['status'] = 'created'
+
+        if invite_rows:
+            self.queue_invites([row['id'] for row in invite_rows])
+
+        return self._summary(results, dry_run)
+
+    def queue_invites(self, invite_ids):
+        """
+        Email invites to new caregivers
+
+        Invites go on an in-process queue drained by one background task, so
+        the caller does not wait on the mail server. The queue only holds ids:
+        each invite's status is kept in user_invites, and retry_unsent picks up
+        the ones a restart or mail failure left unsent.
+        """
+        if not self.invites_async:
+            for invite_id in invite_ids:
+                self.send_invite(invite_id)
+            return
+
+        for invite_id in invite_ids:
+            self._invites.put(invite_id)
+        if not self._invite_worker_started:
+            self._invite_worker_started = True
+            socketio.start_background_task(self._drain_invites)
+
+    def send_invite(self, invite_id):
+        """
+        Email a caregiver a fresh single-use link to set their password
+
+        The send is claimed with a conditional update, so an invite queued by
+        several processes is only emailed once. The new token replaces the
+        previous one, which stops working.
+
+        Returns:
+            bool: True if the email was sent
+        """
+        now = datetime.utcnow()
+        token = secrets.token_urlsafe(32)
+        claimed = db.session.execute(
+            update(UserInvite)
+            .where(UserInvite.id == invite_id, self._unsent_filter(now))
+            .values(status='sending', token_hash=hash_invite_token(token),
+                    attempts=UserInvite.attempts + 1, updated_at=now)
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return False
+
+        invite = db.session.get(UserInvite, invite_id)
+        user = invite.user
+        try:
+            mail.send(Message(
+                subject='Your caregiver account',
+                recipients=[user.email],
+                sender=self._app.config.get('MAIL_DEFAULT_SENDER') or self._app.config.get('MAIL_USERNAME'),
+                body=(
+                    f"Hi {user.first_name},\n\n"
+                    f"An account has been created for you in the Home Health Aid app.\n\n"
+                    f"Username: {user.email}\n\n"
+                    f"Set your password here within {self.invite_ttl_hours} hours:\n"
+                    f"{self.invite_url}?{urlencode({'token': token})}\n\n"
+                    f"The link can only be used once."
+                )
+            ))
+        except Exception as e:
+            logger.warning('Could not send caregiver invite to %s: %s', user.email, e)
+            invite.status = 'failed'
+            invite.token_hash = None
+            invite.last_error = str(e)[:255]
+            db.session.commit()
+            return False
+
+        sent_at = datetime.utcnow()
+        invite.status = 'sent'
+        invite.last_error = None
+        invite.sent_at = sent_at
+        invite.expires_at = sent_at + timedelta(hours=self.invite_ttl_hours)
+        db.session.commit()
+        return True
+
+    def resend_invite(self, user_id, created_by=None):
+        """
+        Send a caregiver a new invite, e.g. after the last one expired
+
+        Returns:
+            UserInvite: The invite, or None if the caregiver already accepted one
+        """
+        invite = UserInvite.query.filter_by(user_id=user_id).first()
+        if invite is None:
+            invite = UserInvite(user_id=user_id, created_by=created_by)
+            db.session.add(invite)
+        elif invite.status == 'accepted':
+            return None
+        invite.status = 'pending'
+        invite.attempts = 0
+        invite.token_hash = None
+        invite.last_error = None
+        db.session.commit()
+        self.queue_invites([invite.id])
+        return invite
+
+    def retry_unsent(self, limit=500):
+        """
+        Queue invites that are pending, failed or lost mid-send, up to the attempt limit
+
+        Returns:
+            int: Number of invites queued
+        """
+        rows = db.session.query(UserInvite.id).filter(
+            self._unsent_filter(datetime.utcnow())
+        ).order_by(UserInvite.updated_at).limit(limit).all()
+        invite_ids = [row.id for row in rows]
+        if invite_ids:
+            logger.info('Retrying %s unsent caregiver invites', len(invite_ids))
+            self.queue_invites(invite_ids)
+        return len(invite_ids)
+
+    def accept_invite(self, token, password):
+        """
+        Set a caregiver's password from an invite token and use the token up
+
+        Returns:
+            User: The caregiver
+
+        Raises:
+            ValueError: If the token is unknown, used or expired, or the password is too long
+        """
+        if len(password.encode('utf-8')) > MAX_PASSWORD_BYTES:
+            raise ValueError(f'Password must be at most {MAX_PASSWORD_BYTES} bytes')
+        now = datetime.utcnow()
+        token_hash = hash_invite_token(token)
+        invite = UserInvite.query.filter_by(token_hash=token_hash).first()
+        # Conditional, so two requests with the same token cannot both succeed
+        accepted = invite is not None and db.session.execute(
+            update(UserInvite)
+            .where(UserInvite.id == invite.id, UserInvite.token_hash == token_hash,
+                   UserInvite.status == 'sent', UserInvite.expires_at > now)
+            .values(status='accepted', token_hash=None, accepted_at=now, updated_at=now)
+        ).rowcount
+        if not accepted:
+            db.session.rollback()
+            raise ValueError('Invite link is invalid or has expired')
+
+        user = db.session.get(User, invite.user_id)
+        user.password_hash = password_hashing_service.hash(password)
+        user.is_verified = True
+        db.session.commit()
+        return user
+
+    def _unsent_filter(self, now):
+        stale = now - timedelta(seconds=self.invite_stale_seconds)
+        return or_(
+            UserInvite.status == 'pending',
+            (UserInvite.status == 'failed') & (UserInvite.attempts < self.invite_max_attempts),
+            (UserInvite.status == 'sending') & (UserInvite.updated_at < stale)
+        )
+
+    def _drain_invites(self):
+        while True:
+            invite_id = self._invites.get()
+            try:
+                with self._app.app_context():
+                    try:
+                        self.send_invite(invite_id)
+                    except Exception as e:
+                        # Left unsent in the database, for retry_unsent
+                        logger.error('Caregiver invite %s failed: %s', invite_id, e)
+                    finally:
+                        db.session.remove()
+            finally:
+                self._invites.task_done()
+
+    def _sweep_in_app_context(self):
+        with self._app.app_context():
+            try:
+                self.retry_unsent()
+            except Exception as e:
+                # e.g. the tables do not exist yet while running migrations
+                logger.warning('Could not retry unsent caregiver invites: %s', e)
+            finally:
+                db.session.remove()
+
+    def _summary(self, results, dry_run):
+        counts = {'total_rows': len(results), 'created': 0, 'valid': 0, 'failed': 0}
+        for result in results:
+            counts[result['status']] += 1
+        return {'summary': {**counts, 'dry_run': dry_run}, 'results': results}
+
+# Global instance for easy access
+caregiver_provisioning_service = CaregiverProvisioningService()
@@ -0,0 +1,127 @@
+from app import db, jwt
+from app.models.auth.role import Role
+from app.models.auth.user import User
+from flask import jsonify
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, joinedload, object_session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
+from collections import OrderedDict
+import threading
+import time
+
+def detached_copy(instance):
+    """Copy an instance's loaded columns into a new detached instance"""
+    mapper = inspect(instance).mapper
+    copy = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        set_committed_value(copy, attr.key, getattr(instance, attr.key))
+    make_transient_to_detached(copy)
+    return copy
+
+class IdentityService:
+    """Process-level cache of users with their role, behind flask_jwt_extended's current_user"""
+
+    def __init__(self, max_age_seconds=30, cache_size=4096):
+        # Other worker processes can change users, so entries are also
+        # reloaded once they are older than this
+        self.max_age_seconds = max_age_seconds
+        self.cache_size = cache_size
+        self.identity_claim = 'sub'
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_age_seconds = app.config.get('IDENTITY_CACHE_MAX_AGE_SECONDS', self.max_age_seconds)
+        self.cache_size = app.config.get('IDENTITY_CACHE_SIZE', self.cache_size)
+        self.identity_claim = app.config.get('JWT_IDENTITY_CLAIM', self.identity_claim)
+        jwt.user_lookup_loader(self._load_user)
+        jwt.user_lookup_error_loader(self._user_not_found)
+
+    def get_user(self, user_id, authz_version=None):
+        """
+        Get a user, with their role, attached to the current session
+
+        Cached copies are merged into the session without a query, so the
+        result can be used like any loaded user, including lazy relationships.
+
+        Args:
+            user_id (str): User ID
+            authz_version (int): Version from the access token; a cached copy
+                with a different version is reloaded
+
+        Returns:
+            User: The user, or None if they do not exist
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and now - entry[0] < self.max_age_seconds and \
+                    (authz_version is None or entry[1].authz_version == authz_version):
+                self._cache.move_to_end(user_id)
+                cached = entry[1]
+            else:
+                cached = None
+
+        if cached is not None:
+            return db.session.merge(cached, load=False)
+
+        user = User.query.options(joinedload(User.role)).filter(User.id == user_id).first()
+        if user is None:
+            return None
+
+        cached = detached_copy(user)
+        set_committed_value(cached, 'role', detached_copy(user.role) if user.role else None)
+        with self._lock:
+            self._cache[user_id] = (now, cached)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id=None):
+        """Drop one cached user, or everyone if no id is given"""
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def _load_user(self, jwt_header, jwt_data):
+        return self.get_user(jwt_data[self.identity_claim], jwt_data.get('authz_version'))
+
+    def _user_not_found(self, jwt_header, jwt_data):
+        return jsonify({'error': 'User not found'}), 401
+
+# Global instance for easy access
+identity_service = IdentityService()
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_cached_user(mapper, connection, target):
+    """Reload a user after any ORM change, such as a profile edit, password change or deactivation"""
+    identity_service.invalidate(target.id)
+    # Invalidate again on commit, in case another request reloaded the old row in between
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('identity_changed', set()).add(target.id)
+
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def _invalidate_cached_role(mapper, connection, target):
+    identity_service.invalidate()
+    session = object_session(target)
+    if session is not None:
+        session.info['identity_changed_all'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    if session.info.pop('identity_changed_all', False):
+        identity_service.invalidate()
+    for user_id in session.info.pop('identity_changed', ()):
+        identity_service.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop('identity_changed', None)
+    session.info.pop('identity_changed_all', None)
@@ -0,0 +1,140 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import atexit
+import bcrypt as bcrypt_lib
+import os
+import threading
+
+def hash_password(password, rounds=12):
+    """
+    Hash a password the way User.set_password does
+
+    Module level so it can be pickled into a process pool worker.
+    """
+    salt = bcrypt_lib.gensalt(rounds=rounds, prefix=b'2b')
+    return bcrypt_lib.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def check_password(password_hash, password):
+    """Check a password against a hash the way User.check_password does"""
+    try:
+        return bcrypt_lib.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        # Malformed hash, or a password bcrypt refuses
+        return False
+
+def hash_rounds(password_hash):
+    """Read the cost factor out of a bcrypt hash such as $2b$12$..."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+class PasswordHashingService:
+    """Runs bcrypt off the request worker on a bounded pool"""
+
+    def __init__(self, rounds=12, executor='process', workers=None, max_pending=64, wait_seconds=10,
+                 parallel_threshold=4):
+        self.rounds = rounds
+        # 'process', 'thread' or 'inline'; bcrypt releases the GIL, so threads
+        # also scale with CPUs as long as they are real OS threads
+        self.executor = executor
+        # None uses one worker per CPU
+        self.workers = workers
+        # Hashes queued or running at once; beyond that callers wait up to
+        # wait_seconds for a slot and then get TimeoutError
+        self.max_pending = max_pending
+        self.wait_seconds = wait_seconds
+        # Smaller batches are hashed inline rather than paying for the pool
+        self.parallel_threshold = parallel_threshold
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', self.rounds)
+        self.executor = app.config.get('PASSWORD_HASH_EXECUTOR', self.executor)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.max_pending)
+        self.wait_seconds = app.config.get('PASSWORD_HASH_WAIT_SECONDS', self.wait_seconds)
+        self.parallel_threshold = app.config.get('PASSWORD_HASH_PARALLEL_THRESHOLD', self.parallel_threshold)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def verify(self, password_hash, password):
+        """
+        Check a password against a stored hash on the pool
+
+        Args:
+            password_hash (str): Stored bcrypt hash
+            password (str): Password to check
+
+        Returns:
+            bool: Whether the password matches
+
+        Raises:
+            TimeoutError: If no pool slot frees up in time
+        """
+        if not password_hash or not password:
+            return False
+        return self._run(check_password, password_hash, password)
+
+    def hash(self, password):
+        """Hash a password at the configured cost on the pool"""
+        return self._run(hash_password, password, self.rounds)
+
+    def hash_many(self, passwords):
+        """
+        Hash passwords at the configured cost, in parallel when there are enough of them
+
+        Args:
+            passwords (list): Plain text passwords
+
+        Returns:
+            list: Hashes in the same order
+        """
+        if self.executor == 'inline' or len(passwords) < self.parallel_threshold:
+            return [hash_password(p, self.rounds) for p in passwords]
+
+        workers = self._worker_count()
+        chunksize = max(1, len(passwords) // (workers * 4))
+        rounds = [self.rounds] * len(passwords)
+        return list(self._get_pool().map(hash_password, passwords, rounds, chunksize=chunksize))
+
+    def needs_rehash(self, password_hash):
+        """Check whether a hash was made at a different cost than the configured one"""
+        return hash_rounds(password_hash) != self.rounds
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _run(self, fn, *args):
+        if self.executor == 'inline':
+            return fn(*args)
+
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            raise TimeoutError('Too many password checks in progress')
+        try:
+            return self._get_pool().submit(fn, *args).result(timeout=self.wait_seconds)
+        except FutureTimeoutError:
+            raise TimeoutError('Password check timed out')
+        finally:
+            self._slots.release()
+
+    def _worker_count(self):
+        return self.workers or os.cpu_count() or 1
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                if self.executor == 'thread':
+                    self._pool = ThreadPoolExecutor(max_workers=self._worker_count(),
+                                                    thread_name_prefix='password-hash')
+                else:
+                    self._pool = ProcessPoolExecutor(max_workers=self._worker_count())
+                atexit.register(self.shutdown)
+            return self._pool
+
+# Global instance for easy access
+password_hashing_service = PasswordHashingService()
@@ -0,0 +1,206 @@
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Increment only if the request fits, so rejected requests do not extend the block
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[1]) + current + 1 > tonumber(ARGV[2]) then
+    return {0, current, previous}
+end
+current = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {1, current, previous}
+"""
+
+def retry_after(limit, period, elapsed, current, previous):
+    """
+    Seconds until a sliding window counter lets one more request through
+
+    The estimate is previous * (1 - elapsed / period) + current, so the
+    previous window's weight has to fall far enough, and if the current
+    window alone is full, the window has to roll over first.
+    """
+    if current + 1 > limit:
+        # The current window alone is full: wait for it to become the previous one
+        wait, elapsed, previous, current = period - elapsed, 0, current, 0
+    else:
+        wait = 0
+    if previous > 0:
+        # Then for the previous window's weight to drop far enough
+        wait += max(0, period * (1 - (limit - 1 - current) / previous) - elapsed)
+    return max(1, math.ceil(wait))
+
+class MemoryWindowStore:
+    """Sliding window counters in this process"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, period, now):
+        """Count a request if it fits; returns (allowed, elapsed, current, previous)"""
+        window = int(now // period)
+        elapsed = now - window * period
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                if len(self._counters) >= self.max_keys:
+                    self._prune(window)
+                counter = self._counters[key] = [window, 0, 0]
+            elif counter[0] != window:
+                # Roll over; a gap of more than one window forgets everything
+                counter[2] = counter[1] if counter[0] == window - 1 else 0
+                counter[0], counter[1] = window, 0
+
+            current, previous = counter[1], counter[2]
+            if previous * (1 - elapsed / period) + current + 1 > limit:
+                return False, elapsed, current, previous
+            counter[1] = current + 1
+            return True, elapsed, current + 1, previous
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+    def _prune(self, window):
+        stale = [key for key, counter in self._counters.items() if counter[0] < window - 1]
+        for key in stale:
+            del self._counters[key]
+        if len(self._counters) >= self.max_keys:
+            self._counters.clear()
+
+class RedisWindowStore:
+    """Sliding window counters shared by all processes through Redis"""
+
+    def __init__(self, client, prefix='rate_limit:'):
+        self.prefix = prefix
+        self._script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def hit(self, key, limit, period, now):
+        window = int(now // period)
+        elapsed = now - window * period
+        allowed, current, previous = self._script(
+            keys=[f'{self.prefix}{key}:{window}', f'{self.prefix}{key}:{window - 1}'],
+            args=[1 - elapsed / period, limit, period * 2]
+        )
+        return bool(allowed), elapsed, int(current), int(previous)
+
+class RateLimitService:
+    """Per-endpoint and per-blueprint request limits using sliding window counters"""
+
+    def __init__(self, enabled=True, redis_url=None, policies=None, retry_redis_seconds=30):
+        self.enabled = enabled
+        # None counts in each process only
+        self.redis_url = redis_url
+        self.policies = policies or {}
+        # After a Redis error, count in memory for this long before trying again
+        self.retry_redis_seconds = retry_redis_seconds
+        self.memory = MemoryWindowStore()
+        self._redis = None
+        self._redis_failed_at = None
+        self._matches = {}
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', self.enabled)
+        self.redis_url = app.config.get('RATE_LIMIT_REDIS_URL', self.redis_url)
+        self.policies = app.config.get('RATE_LIMIT_POLICIES', self.policies)
+        self.retry_redis_seconds = app.config.get('RATE_LIMIT_RETRY_REDIS_SECONDS', self.retry_redis_seconds)
+        self.memory.clear()
+        self._redis = None
+        self._redis_failed_at = None
+
+        # Endpoint and blueprint name -> policies, so a request costs two dict lookups
+        self._matches = {}
+        for name, policy in self.policies.items():
+            for target in policy['match']:
+                self._matches.setdefault(target, []).append((name, policy))
+        app.before_request(self._limit_request)
+
+    def check(self, name, policy):
+        """
+        Count the current request against a policy
+
+        Args:
+            name (str): Policy name, part of the counter key
+            policy (dict): limit, period (seconds) and key, a list of
+                'ip', 'user' and 'endpoint'
+
+        Returns:
+            int: Seconds to wait before retrying, or None if the request is allowed
+        """
+        key = self._request_key(name, policy.get('key', ['ip']))
+        limit, period = policy['limit'], policy['period']
+        now = time.time()
+
+        store = self._store()
+        try:
+            allowed, elapsed, current, previous = store.hit(key, limit, period, now)
+        except Exception as e:
+            logger.warning('Rate limit store failed, counting in memory: %s', e)
+            self._redis_failed_at = time.monotonic()
+            allowed, elapsed, current, previous = self.memory.hit(key, limit, period, now)
+
+        if allowed:
+            return None
+        return retry_after(limit, period, elapsed, current, previous)
+
+    def _limit_request(self):
+        if not self.enabled or request.method == 'OPTIONS':
+            return None
+        policies = self._matches.get(request.endpoint, []) + self._matches.get(request.blueprint, [])
+        for name, policy in policies:
+            wait = self.check(name, policy)
+            if wait is not None:
+                response = jsonify({'error': 'Too many requests, please try again later'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(wait)
+                return response
+        return None
+
+    def _request_key(self, name, parts):
+        values = [name]
+        for part in parts:
+            if part == 'ip':
+                values.append(request.remote_addr or '-')
+            elif part == 'user':
+                values.append(self._user_id() or f'ip:{request.remote_addr}')
+            elif part == 'endpoint':
+                values.append(request.endpoint or '-')
+        return ':'.join(values)
+
+    def _user_id(self):
+        # Verified, so nobody can spend another user's allowance; invalid
+        # tokens fall back to the IP and are rejected by the route itself
+        try:
+            verify_jwt_in_request(optional=True)
+            return get_jwt_identity()
+        except Exception:
+            return None
+
+    def _store(self):
+        if not self.redis_url:
+            return self.memory
+        if self._redis_failed_at is not None and \
+                time.monotonic() - self._redis_failed_at < self.retry_redis_seconds:
+            return self.memory
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                logger.warning('redis is not installed; rate limits are counted in each process')
+                self.redis_url = None
+                return self.memory
+            client = redis.Redis.from_url(self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            self._redis = RedisWindowStore(client)
+        return self._redis
+
+# Global instance for easy access
+rate_limit_service = RateLimitService()
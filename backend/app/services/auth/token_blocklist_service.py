@@ -0,0 +1,215 @@
+from app import jwt
+from flask import jsonify
+import hashlib
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings; no false negatives, rare false positives"""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+class TokenBlocklistService:
+    """Revoked JWT IDs, checked on every request behind an in-process Bloom filter"""
+
+    def __init__(self, redis_url=None, capacity=100000, error_rate=0.001, sync_seconds=5,
+                 key_prefix='revoked_jti:', retry_redis_seconds=30):
+        # None keeps revocations in this process only
+        self.redis_url = redis_url
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Revocations made by other processes reach this one's filter within this long
+        self.sync_seconds = sync_seconds
+        self.key_prefix = key_prefix
+        # After a Redis error, skip Redis for this long before trying again
+        self.retry_redis_seconds = retry_redis_seconds
+        self._redis = None
+        self._redis_failed_at = None
+        self._local = {}
+        # Revocations Redis has not stored yet, written on the next successful sync
+        self._unstored = {}
+        self._filter = BloomFilter(capacity, error_rate)
+        self._synced_at = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.redis_url = app.config.get('TOKEN_BLOCKLIST_REDIS_URL', self.redis_url)
+        self.capacity = app.config.get('TOKEN_BLOCKLIST_CAPACITY', self.capacity)
+        self.error_rate = app.config.get('TOKEN_BLOCKLIST_ERROR_RATE', self.error_rate)
+        self.sync_seconds = app.config.get('TOKEN_BLOCKLIST_SYNC_SECONDS', self.sync_seconds)
+        self.retry_redis_seconds = app.config.get('TOKEN_BLOCKLIST_RETRY_REDIS_SECONDS', self.retry_redis_seconds)
+        self._redis = None
+        self._redis_failed_at = None
+        self._local = {}
+        self._unstored = {}
+        self._filter = BloomFilter(self.capacity, self.error_rate)
+        self._synced_at = None
+        jwt.token_in_blocklist_loader(self._token_revoked)
+        jwt.revoked_token_loader(self._revoked_response)
+
+    def revoke(self, jti, expires_at):
+        """
+        Revoke a token until it expires
+
+        Args:
+            jti (str): The token's JWT ID
+            expires_at (int): The token's exp claim, as a Unix timestamp
+        """
+        ttl = int(expires_at - time.time()) + 1
+        if ttl <= 0:
+            return
+
+        # Kept locally as well, so the revocation holds even if Redis is down
+        with self._lock:
+            self._local[jti] = expires_at
+            self._filter.add(jti)
+
+        client = self._client()
+        if client is None:
+            if self._backing_off():
+                with self._lock:
+                    self._unstored[jti] = expires_at
+            return
+        try:
+            pipe = client.pipeline()
+            self._store(pipe, jti, expires_at, ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning('Could not store revoked token in Redis: %s', e)
+            self._redis_failed_at = time.monotonic()
+            with self._lock:
+                self._unstored[jti] = expires_at
+
+    def is_revoked(self, jti):
+        """
+        Check whether a token was revoked
+
+        Tokens the Bloom filter has never seen are answered without a network
+        hop; possible matches are confirmed against the authoritative store.
+        """
+        self._maybe_sync()
+        if jti not in self._filter:
+            return False
+
+        with self._lock:
+            expires_at = self._local.get(jti)
+        if expires_at is not None:
+            return expires_at > time.time()
+
+        # The filter only holds tokens someone revoked, so while Redis is
+        # unreachable a match is far more likely revoked than a false positive
+        client = self._client()
+        if client is None:
+            return self._backing_off()
+        try:
+            return bool(client.exists(self.key_prefix + jti))
+        except Exception as e:
+            logger.warning('Could not check revoked token in Redis: %s', e)
+            self._redis_failed_at = time.monotonic()
+            return True
+
+    def sync(self):
+        """Rebuild the Bloom filter from unexpired revocations, dropping expired ones"""
+        now = time.time()
+        jtis = []
+        client = self._client()
+        if client is None and self._backing_off():
+            # Keep the current filter, which also holds other processes' revocations
+            self._synced_at = time.monotonic()
+            return
+        if client is not None:
+            with self._lock:
+                unstored = dict(self._unstored)
+            try:
+                pipe = client.pipeline()
+                for jti, expires_at in unstored.items():
+                    if expires_at > now:
+                        self._store(pipe, jti, expires_at, int(expires_at - now) + 1)
+                pipe.zremrangebyscore(self.key_prefix + 'index', '-inf', now)
+                pipe.zrangebyscore(self.key_prefix + 'index', now, '+inf')
+                jtis = [j.decode('utf-8') if isinstance(j, bytes) else j for j in pipe.execute()[-1]]
+            except Exception as e:
+                logger.warning('Could not load revoked tokens from Redis: %s', e)
+                self._redis_failed_at = time.monotonic()
+                # Keep the current filter and try again after the next interval
+                self._synced_at = time.monotonic()
+                return
+            with self._lock:
+                for jti in unstored:
+                    self._unstored.pop(jti, None)
+
+        with self._lock:
+            self._local = {jti: exp for jti, exp in self._local.items() if exp > now}
+            self._unstored = {jti: exp for jti, exp in self._unstored.items() if exp > now}
+            rebuilt = BloomFilter(max(self.capacity, len(jtis) + len(self._local)), self.error_rate)
+            for jti in jtis:
+                rebuilt.add(jti)
+            for jti in self._local:
+                rebuilt.add(jti)
+            self._filter = rebuilt
+            self._synced_at = time.monotonic()
+
+    def _maybe_sync(self):
+        synced_at = self._synced_at
+        if synced_at is not None and time.monotonic() - synced_at < self.sync_seconds:
+            return
+        # One request resyncs; the others keep using the current filter
+        if self._sync_lock.acquire(blocking=False):
+            try:
+                self.sync()
+            finally:
+                self._sync_lock.release()
+
+    def _store(self, pipe, jti, expires_at, ttl):
+        pipe.set(self.key_prefix + jti, 1, ex=ttl)
+        pipe.zadd(self.key_prefix + 'index', {jti: expires_at})
+
+    def _backing_off(self):
+        failed_at = self._redis_failed_at
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_redis_seconds
+
+    def _client(self):
+        """The Redis client, or None if there is none or it failed within the last retry_redis_seconds"""
+        if not self.redis_url or self._backing_off():
+            return None
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                logger.warning('redis is not installed; revoked tokens are kept in this process only')
+                self.redis_url = None
+                return None
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._redis
+
+    def _token_revoked(self, jwt_header, jwt_data):
+        return self.is_revoked(jwt_data['jti'])
+
+    def _revoked_response(self, jwt_header, jwt_data):
+        return jsonify({'error': 'Token has been revoked'}), 401
+
+# Global instance for easy access
+token_blocklist_service = TokenBlocklistService()
@@ -0,0 +1,94 @@
+from app import db
+from app.models.client.caregiver_assignment import CaregiverAssignment
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from collections import OrderedDict
+from datetime import datetime
+import threading
+import time
+
+class CaregiverAccessService:
+    """Per-caregiver cache of the client ids they are currently assigned to"""
+
+    def __init__(self, max_age_seconds=60, cache_size=1024):
+        # Other worker processes can change assignments, so entries are also
+        # reloaded once they are older than this
+        self.max_age_seconds = max_age_seconds
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_age_seconds = app.config.get('CAREGIVER_ACCESS_CACHE_MAX_AGE_SECONDS', self.max_age_seconds)
+        self.cache_size = app.config.get('CAREGIVER_ACCESS_CACHE_SIZE', self.cache_size)
+
+    def assigned_client_ids(self, caregiver_id):
+        """
+        Get the clients a caregiver is currently assigned to
+
+        Args:
+            caregiver_id (str): Caregiver user ID
+
+        Returns:
+            frozenset: Client IDs with a current assignment
+        """
+        today = datetime.utcnow().date()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(caregiver_id)
+            # Entries from a previous day are stale because assignments start and end by date
+            if entry is not None and entry[0] == today and now - entry[1] < self.max_age_seconds:
+                self._cache.move_to_end(caregiver_id)
+                return entry[2]
+
+        client_ids = frozenset(
+            client_id for client_id, in db.session.query(CaregiverAssignment.client_id).filter(
+                CaregiverAssignment.caregiver_id == caregiver_id,
+                CaregiverAssignment.current_filter(today)
+            )
+        )
+
+        with self._lock:
+            self._cache[caregiver_id] = (today, now, client_ids)
+            self._cache.move_to_end(caregiver_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return client_ids
+
+    def is_assigned(self, caregiver_id, client_id):
+        """Check whether a caregiver is currently assigned to a client"""
+        return client_id in self.assigned_client_ids(caregiver_id)
+
+    def invalidate(self, caregiver_id=None):
+        """Drop one caregiver's cached clients, or everyone's if no id is given"""
+        with self._lock:
+            if caregiver_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(caregiver_id, None)
+
+# Global instance for easy access
+caregiver_access_service = CaregiverAccessService()
+
+@event.listens_for(CaregiverAssignment, 'after_insert')
+@event.listens_for(CaregiverAssignment, 'after_update')
+@event.listens_for(CaregiverAssignment, 'after_delete')
+def _invalidate_caregiver_access(mapper, connection, target):
+    """Reload a caregiver's clients after any ORM assignment change"""
+    # A reassigned row also changes the previous caregiver's clients
+    caregiver_ids = {target.caregiver_id, *inspect(target).attrs.caregiver_id.history.deleted}
+    for caregiver_id in caregiver_ids:
+        caregiver_access_service.invalidate(caregiver_id)
+    # Invalidate again on commit, in case another request reloaded the old rows in between
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('caregiver_access_changed', set()).update(caregiver_ids)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_caregiver_access(session):
+    for caregiver_id in session.info.pop('caregiver_access_changed', ()):
+        caregiver_access_service.invalidate(caregiver_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_caregiver_access_changes(session):
+    session.info.pop('caregiver_access_changed', None)
@@ -0,0 +1,304 @@
+from app import db
+from app.models.client.client import Client
+from app.models.geolocation.geofence import Geofence
+from app.services.geolocation.batch_geocoder import batch_geocoder
+from app.services.geolocation.geofence_index_service import geofence_index_service
+from app.services.geolocation.client_geocoding_service import home_geofence_row
+from sqlalchemy import insert
+from datetime import datetime
+import csv
+import io
+import logging
+import re
+import uuid
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FIELDS = [
+    'first_name', 'last_name', 'date_of_birth', 'gender', 'phone', 'email', 'address',
+    'latitude', 'longitude', 'emergency_contact_name', 'emergency_contact_phone',
+    'emergency_contact_relationship', 'insurance_provider', 'insurance_policy_number',
+    'medical_conditions', 'allergies', 'medications', 'special_instructions'
+]
+
+# Column headers commonly found in agency exports
+HEADER_ALIASES = {
+    'first': 'first_name', 'firstname': 'first_name', 'given_name': 'first_name',
+    'last': 'last_name', 'lastname': 'last_name', 'surname': 'last_name', 'family_name': 'last_name',
+    'dob': 'date_of_birth', 'birth_date': 'date_of_birth', 'birthdate': 'date_of_birth',
+    'sex': 'gender', 'phone_number': 'phone', 'email_address': 'email',
+    'street_address': 'address', 'home_address': 'address',
+    'lat': 'latitude', 'lng': 'longitude', 'lon': 'longitude', 'long': 'longitude'
+}
+
+# Lengths of the bounded Client string columns
+MAX_LENGTHS = {
+    'first_name': 50, 'last_name': 50, 'gender': 10, 'phone': 20, 'email': 120,
+    'emergency_contact_name': 100, 'emergency_contact_phone': 20,
+    'emergency_contact_relationship': 50, 'insurance_provider': 100, 'insurance_policy_number': 50
+}
+
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%d-%b-%Y']
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+def normalize_header(header):
+    key = re.sub(r'[^a-z0-9]+', '_', str(header or '').strip().lower()).strip('_')
+    return HEADER_ALIASES.get(key, key)
+
+class ClientImportService:
+    """Service for bulk importing clients from CSV or XLSX spreadsheets"""
+
+    def __init__(self, chunk_size=500, max_errors=1000, default_radius_meters=100, geocoder=None):
+        self.chunk_size = chunk_size
+        # Per-row errors beyond this are counted but not returned
+        self.max_errors = max_errors
+        self.default_radius_meters = default_radius_meters
+        self.geocoder = geocoder or batch_geocoder
+
+    def init_app(self, app):
+        self.chunk_size = app.config.get('CLIENT_IMPORT_CHUNK_SIZE', self.chunk_size)
+        self.max_errors = app.config.get('CLIENT_IMPORT_MAX_ERRORS', self.max_errors)
+        self.default_radius_meters = app.config.get('DEFAULT_GEOFENCE_RADIUS', self.default_radius_meters)
+
+    def iter_rows(self, stream, filename=''):
+        """
+        Iterate over spreadsheet rows as dicts keyed by normalized column name
+
+        Args:
+            stream: Binary file-like object
+            filename (str): Used to detect XLSX uploads; anything else is read as CSV
+
+        Yields:
+            tuple: (row_number, row_dict) where row_number matches the spreadsheet
+        """
+        if filename.lower().endswith(('.xlsx', '.xlsm')):
+            yield from self._iter_xlsx_rows(stream)
+            return
+
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        reader = csv.reader(text)
+        headers = [normalize_header(h) for h in next(reader, [])]
+        for row_number, values in enumerate(reader, start=2):
+            if not any(value.strip() for value in values):
+                continue
+            yield row_number, dict(zip(headers, values))
+
+    def _iter_xlsx_rows(self, stream):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError('XLSX import requires openpyxl; upload a CSV instead')
+
+        # Read-only mode streams rows instead of loading the whole sheet
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [normalize_header(h) for h in next(rows, ())]
+            for row_number, values in enumerate(rows, start=2):
+                if not any(value not in (None, '') for value in values):
+                    continue
+                yield row_number, dict(zip(headers, values))
+        finally:
+            workbook.close()
+
+    def validate_row(self, row):
+        """
+        Validate a spreadsheet row and convert it to Client column values
+
+        Returns:
+            tuple: (values, error) where exactly one is None
+        """
+        values = {}
+        for field in IMPORT_FIELDS:
+            value = row.get(field)
+            if isinstance(value, str):
+                value = value.strip()
+            values[field] = value if value not in ('', None) else None
+
+        if not values['first_name'] or not values['last_name']:
+            return None, 'First name and last name are required'
+
+        for field, limit in MAX_LENGTHS.items():
+            if values[field] is not None:
+                values[field] = str(values[field])
+                if len(values[field]) > limit:
+                    return None, f'{field} is longer than {limit} characters'
+
+        dob = values['date_of_birth']
+        if dob is not None and not isinstance(dob, datetime):
+            for date_format in DATE_FORMATS:
+                try:
+                    dob = datetime.strptime(str(dob), date_format)
+                    break
+                except ValueError:
+                    continue
+            else:
+                return None, f'Unrecognized date_of_birth: {values["date_of_birth"]}'
+        values['date_of_birth'] = dob.date() if dob is not None else None
+
+        if values['email'] and not EMAIL_PATTERN.match(values['email']):
+            return None, f'Invalid email: {values["email"]}'
+
+        if (values['latitude'] is None) != (values['longitude'] is None):
+            return None, 'latitude and longitude must be given together'
+        if values['latitude'] is not None:
+            try:
+                values['latitude'] = float(values['latitude'])
+                values['longitude'] = float(values['longitude'])
+            except (TypeError, ValueError):
+                return None, 'latitude and longitude must be numbers'
+            if abs(values['latitude']) > 90 or abs(values['longitude']) > 180:
+                return None, 'latitude or longitude out of range'
+
+        return values, None
+
+    def iter_import(self, stream, filename, created_by, dry_run=False, geocode=True):
+        """
+        Import clients chunk by chunk, yielding progress after each chunk
+
+        Each chunk is validated, geocoded through the batch geocoder, bulk
+        inserted with its home geofences and committed before the next chunk
+        is read, so memory use is bounded by the chunk size.
+
+        Args:
+            stream: Binary file-like object
+            filename (str): Original file name, used to detect XLSX
+            created_by (str): User ID recorded as the creator
+            dry_run (bool): Validate only, without geocoding or inserting
+            geocode (bool): Geocode addresses without coordinates; otherwise they
+                are marked 'deferred' for the backfill job
+
+        Yields:
+            dict: Running summary; the last one yielded is final and has 'done' set
+        """
+        summary = {
+            'total_rows': 0,
+            'valid': 0,
+            'imported': 0,
+            'failed': 0,
+            'geocoded': 0,
+            'geocode_failed': 0,
+            'geofences_created': 0,
+            'chunks': 0,
+            'dry_run': dry_run,
+            'done': False,
+            'errors': []
+        }
+
+        chunk = []
+        for row_number, row in self.iter_rows(stream, filename):
+            chunk.append((row_number, row))
+            if len(chunk) >= self.chunk_size:
+                self._process_chunk(chunk, summary, created_by, dry_run, geocode)
+                chunk = []
+                yield summary
+        if chunk:
+            self._process_chunk(chunk, summary, created_by, dry_run, geocode)
+
+        summary['errors'].sort(key=lambda error: error['row'])
+        summary['done'] = True
+        yield summary
+
+    def import_clients(self, stream, filename, created_by, dry_run=False, geocode=True, progress=None):
+        """
+        Import clients and return the final summary
+
+        Args:
+            progress: Optional callable invoked with the running summary after each chunk
+        """
+        summary = None
+        for summary in self.iter_import(stream, filename, created_by, dry_run, geocode):
+            if progress:
+                progress(summary)
+        return summary
+
+    def _process_chunk(self, chunk, summary, created_by, dry_run, geocode):
+        summary['chunks'] += 1
+        summary['total_rows'] += len(chunk)
+
+        valid = []
+        for row_number, row in chunk:
+            values, error = self.validate_row(row)
+            if error:
+                self._record_error(summary, row_number, error)
+            else:
+                valid.append((row_number, values))
+        summary['valid'] += len(valid)
+
+        if dry_run or not valid:
+            return
+
+        if geocode:
+            pending = [v['address'] for _, v in valid if v['latitude'] is None and v['address']]
+            results = self.geocoder.geocode_many(pending) if pending else {}
+        else:
+            results = {}
+
+        now = datetime.utcnow()
+        client_rows = []
+        geofence_rows = []
+        for row_number, values in valid:
+            client_id = str(uuid.uuid4())
+            status = 'completed' if values['latitude'] is not None else 'not_required'
+            error = None
+            if values['latitude'] is None and values['address']:
+                result = results.get(values['address'])
+                if result:
+                    values['latitude'] = result['latitude']
+                    values['longitude'] = result['longitude']
+                    status = 'completed'
+                    summary['geocoded'] += 1
+                elif geocode:
+                    status = 'failed'
+                    error = 'Address could not be geocoded'
+                    summary['geocode_failed'] += 1
+                    self._record_error(summary, row_number, error, imported=True)
+                else:
+                    # Not 'pending', which the lost-job sweep would geocode one by one
+                    status = 'deferred'
+
+            client_rows.append({
+                **values,
+                'id': client_id,
+                'geocoding_status': status,
+                'geocoding_error': error,
+                'is_active': True,
+                'created_by': created_by,
+                'created_at': now,
+                'updated_at': now
+            })
+
+            if values['latitude'] is not None:
+                geofence_rows.append(home_geofence_row(
+                    client_id, values['first_name'], values['last_name'], values['address'],
+                    values['latitude'], values['longitude'], self.default_radius_meters,
+                    created_by, now
+                ))
+
+        try:
+            db.session.execute(insert(Client), client_rows)
+            if geofence_rows:
+                db.session.execute(insert(Geofence), geofence_rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Client import chunk {summary['chunks']} failed: {str(e)}")
+            for row_number, _ in valid:
+                self._record_error(summary, row_number, f'Chunk insert failed: {str(e)}')
+            return
+
+        summary['imported'] += len(client_rows)
+        summary['geofences_created'] += len(geofence_rows)
+        if geofence_rows:
+            # Bulk inserts bypass ORM events
+            geofence_index_service.invalidate()
+
+    def _record_error(self, summary, row_number, error, imported=False):
+        # Geocoding misses are reported per row but the client is still imported
+        if not imported:
+            summary['failed'] += 1
+        if len(summary['errors']) < self.max_errors:
+            summary['errors'].append({'row': row_number, 'error': error})
+
+# Global instance for easy access
+client_import_service = ClientImportService()
@@ -0,0 +1,151 @@
+from app import db
+from app.models.auth.user import User
+from app.models.client.care_plan import CarePlan
+from app.models.client.caregiver_assignment import CaregiverAssignment
+from app.models.client.client import Client
+from app.models.geolocation.geofence import Geofence
+from app.models.task.task import Task
+from app.models.task.task_assignment import TaskAssignment
+from app.models.timesheet.break_time import BreakTime
+from app.models.timesheet.timesheet import Timesheet
+from sqlalchemy import func, literal, or_, select, union_all
+from sqlalchemy.orm import joinedload
+from collections import defaultdict
+from datetime import datetime, timedelta
+import hashlib
+
+class ClientOverviewService:
+    """Builds everything the client detail screen needs with a fixed number of queries"""
+
+    def __init__(self, upcoming_days=14, max_upcoming_tasks=50, recent_timesheets=10):
+        self.upcoming_days = upcoming_days
+        self.max_upcoming_tasks = max_upcoming_tasks
+        self.recent_timesheets = recent_timesheets
+
+    def init_app(self, app):
+        self.upcoming_days = app.config.get('CLIENT_OVERVIEW_UPCOMING_DAYS', self.upcoming_days)
+        self.max_upcoming_tasks = app.config.get('CLIENT_OVERVIEW_MAX_UPCOMING_TASKS', self.max_upcoming_tasks)
+        self.recent_timesheets = app.config.get('CLIENT_OVERVIEW_RECENT_TIMESHEETS', self.recent_timesheets)
+
+    def etag(self, client_id):
+        """
+        Fingerprint of everything in the overview, from one aggregate query
+
+        Combines count and max(updated_at) per table, so edits, inserts and
+        deletes all change it. Today's date is included because the upcoming
+        and current windows move with it.
+
+        Returns:
+            str: Hex digest, or None if the client does not exist
+        """
+        parts = [
+            select(literal(name).label('source'), func.count(model.id), func.max(model.updated_at))
+            .where(column == client_id)
+            for name, model, column in [
+                ('client', Client, Client.id),
+                ('care_plans', CarePlan, CarePlan.client_id),
+                ('geofences', Geofence, Geofence.client_id),
+                ('assignments', CaregiverAssignment, CaregiverAssignment.client_id),
+                ('tasks', Task, Task.client_id),
+                ('timesheets', Timesheet, Timesheet.client_id)
+            ]
+        ]
+        # Task assignments have no updated_at; their latest status timestamp stands in
+        parts.append(
+            select(literal('task_assignments'), func.count(TaskAssignment.id), func.max(func.coalesce(
+                TaskAssignment.completed_at, TaskAssignment.started_at, TaskAssignment.assigned_at
+            ))).join(Task, Task.id == TaskAssignment.task_id).where(Task.client_id == client_id)
+        )
+        parts.append(
+            select(literal('break_times'), func.count(BreakTime.id), func.max(BreakTime.updated_at))
+            .join(Timesheet, Timesheet.id == BreakTime.timesheet_id).where(Timesheet.client_id == client_id)
+        )
+        rows = db.session.execute(union_all(*parts)).all()
+        if not any(row[0] == 'client' and row[1] for row in rows):
+            return None
+
+        fingerprint = datetime.utcnow().date().isoformat() + '|' + '|'.join(
+            f"{row[0]}:{row[1]}:{row[2]}" for row in sorted(rows, key=lambda row: row[0])
+        )
+        return hashlib.sha1(fingerprint.encode()).hexdigest()
+
+    def build(self, client):
+        """
+        Assemble the client overview
+
+        Args:
+            client (Client): The client to describe
+
+        Returns:
+            dict: client, care_plans, geofences, caregiver_assignments,
+                  upcoming_tasks and recent_timesheets
+        """
+        today = datetime.utcnow().date()
+
+        care_plans = CarePlan.query.filter_by(client_id=client.id, is_active=True) \
+            .order_by(CarePlan.start_date.desc()).all()
+
+        geofences = Geofence.query.filter_by(client_id=client.id, is_active=True) \
+            .order_by(Geofence.created_at).all()
+
+        assignments = CaregiverAssignment.query.options(
+            joinedload(CaregiverAssignment.caregiver),
+            joinedload(CaregiverAssignment.assigner)
+        ).filter(
+            CaregiverAssignment.client_id == client.id,
+            CaregiverAssignment.current_filter(today)
+        ).order_by(CaregiverAssignment.start_date).all()
+
+        # Care plan tasks and upcoming tasks in one query
+        plan_ids = {plan.id for plan in care_plans}
+        window_end = today + timedelta(days=self.upcoming_days)
+        upcoming = (Task.client_id == client.id) & \
+            Task.scheduled_date.between(today, window_end) & \
+            Task.status.in_(['pending', 'in_progress'])
+        tasks = Task.query.filter(
+            or_(upcoming, Task.care_plan_id.in_(plan_ids)) if plan_ids else upcoming
+        ).order_by(Task.scheduled_date, Task.scheduled_time).all()
+
+        task_assignments = defaultdict(list)
+        if tasks:
+            for assignment in TaskAssignment.query.options(
+                joinedload(TaskAssignment.assigned_user).joinedload(User.role),
+                joinedload(TaskAssignment.assigner).joinedload(User.role)
+            ).filter(TaskAssignment.task_id.in_([task.id for task in tasks])):
+                task_assignments[assignment.task_id].append(assignment)
+
+        plan_tasks = defaultdict(list)
+        upcoming_tasks = []
+        for task in tasks:
+            serialized = task.to_dict(assignments=task_assignments[task.id])
+            if task.care_plan_id in plan_ids:
+                plan_tasks[task.care_plan_id].append(serialized)
+            if (task.status in ('pending', 'in_progress') and task.scheduled_date is not None
+                    and today <= task.scheduled_date <= window_end):
+                upcoming_tasks.append(serialized)
+
+        timesheets = Timesheet.query.filter_by(client_id=client.id) \
+            .order_by(Timesheet.date.desc(), Timesheet.clock_in_time.desc()) \
+            .limit(self.recent_timesheets).all()
+        break_times = defaultdict(list)
+        if timesheets:
+            for break_time in BreakTime.query.filter(
+                BreakTime.timesheet_id.in_([timesheet.id for timesheet in timesheets])
+            ).order_by(BreakTime.start_time):
+                break_times[break_time.timesheet_id].append(break_time)
+
+        return {
+            'client': client.to_dict(),
+            'care_plans': [
+                {**plan.to_dict(tasks=[]), 'tasks': plan_tasks[plan.id]} for plan in care_plans
+            ],
+            'geofences': [geofence.to_dict() for geofence in geofences],
+            'caregiver_assignments': [assignment.to_dict() for assignment in assignments],
+            'upcoming_tasks': upcoming_tasks[:self.max_upcoming_tasks],
+            'recent_timesheets': [
+                timesheet.to_dict(break_times=break_times[timesheet.id]) for timesheet in timesheets
+            ]
+        }
+
+# Global instance for easy access
+client_overview_service = ClientOverviewService()
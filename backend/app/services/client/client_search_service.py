@@ -0,0 +1,236 @@
+from app import db
+from sqlalchemy import text
+import logging
+import re
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# SQLite (development): FTS5 trigram table kept in sync by triggers
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS client_search USING fts5(
+        client_id UNINDEXED, name, phone, address, tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clients_search_insert AFTER INSERT ON clients BEGIN
+        INSERT INTO client_search (client_id, name, phone, address) VALUES (
+            new.id, new.first_name || ' ' || new.last_name,
+            replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '.', ''), '+', ''),
+            coalesce(new.address, '')
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clients_search_update AFTER UPDATE OF first_name, last_name, phone, address ON clients BEGIN
+        DELETE FROM client_search WHERE client_id = old.id;
+        INSERT INTO client_search (client_id, name, phone, address) VALUES (
+            new.id, new.first_name || ' ' || new.last_name,
+            replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '.', ''), '+', ''),
+            coalesce(new.address, '')
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clients_search_delete AFTER DELETE ON clients BEGIN
+        DELETE FROM client_search WHERE client_id = old.id;
+    END
+    """
+]
+
+SQLITE_REBUILD = """
+    INSERT INTO client_search (client_id, name, phone, address)
+    SELECT id, first_name || ' ' || last_name,
+        replace(replace(replace(replace(replace(replace(coalesce(phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '.', ''), '+', ''),
+        coalesce(address, '')
+    FROM clients
+"""
+
+# PostgreSQL: pg_trgm GIN indexes over the same expressions the query uses
+POSTGRES_SEARCH = """
+    SELECT c.id, c.first_name, c.last_name, c.phone, c.address, c.latitude, c.longitude,
+        GREATEST(
+            similarity(lower(c.first_name || ' ' || c.last_name), :q)
+                + CASE WHEN lower(c.first_name || ' ' || c.last_name) LIKE :prefix
+                         OR lower(c.last_name) LIKE :prefix THEN 1 ELSE 0 END,
+            word_similarity(:q, lower(coalesce(c.address, ''))) * 0.8,
+            CASE WHEN :digits <> '' AND regexp_replace(coalesce(c.phone, ''), '\\D', '', 'g') LIKE :digits_contains
+                 THEN 1 ELSE 0 END
+        ) AS score
+    FROM clients c
+    WHERE c.is_active = true AND (
+        lower(c.first_name || ' ' || c.last_name) LIKE :contains
+        OR lower(c.first_name || ' ' || c.last_name) % :q
+        OR lower(coalesce(c.address, '')) LIKE :contains
+        OR :q <% lower(coalesce(c.address, ''))
+        OR (:digits <> '' AND regexp_replace(coalesce(c.phone, ''), '\\D', '', 'g') LIKE :digits_contains)
+    )
+    ORDER BY score DESC, c.last_name, c.first_name
+    LIMIT :limit
+"""
+
+PHONE_TERM = re.compile(r'^[\d().+-]+$')
+
+def phone_digits(value):
+    """Strip everything but digits from a phone number or query"""
+    return re.sub(r'\D', '', value or '')
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def fts_phrase(term):
+    """Quote a term for an FTS5 MATCH expression"""
+    return '"' + term.replace('"', '""') + '"'
+
+def build_fts_queries(query):
+    """
+    Build FTS5 MATCH expressions for a trigram-tokenized table
+
+    Args:
+        query (str): Raw search text
+
+    Returns:
+        tuple: (exact, fuzzy) MATCH expressions, either may be None. The exact
+            expression requires every term as a substring; the fuzzy one matches
+            any trigram of the terms, for misspellings.
+    """
+    terms = [term for term in re.split(r'\s+', query.lower().strip()) if len(term) >= 3]
+    if not terms:
+        return None, None
+
+    # Phone-like terms such as "555-0123" or "(555)" match the digits-only phone column
+    phone_terms = {term for term in terms if PHONE_TERM.match(term) and len(phone_digits(term)) >= 3}
+
+    exact = ' AND '.join(
+        f"phone : {fts_phrase(phone_digits(term))}" if term in phone_terms else fts_phrase(term)
+        for term in terms
+    )
+
+    trigrams = []
+    for term in terms:
+        if len(term) >= 4 and term not in phone_terms:
+            trigrams.extend(term[i:i + 3] for i in range(len(term) - 2))
+    fuzzy = ' OR '.join(fts_phrase(trigram) for trigram in dict.fromkeys(trigrams)) or None
+
+    return exact, fuzzy
+
+class ClientSearchService:
+    """Typeahead search over client name, phone digits and address"""
+
+    def __init__(self, default_limit=10, max_limit=50):
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        # Engines whose FTS table is known to exist; weak, so a new engine never
+        # inherits a disposed one's entry (in-memory test databases come and go)
+        self._sqlite_ready = weakref.WeakSet()
+
+    def init_app(self, app):
+        self.default_limit = app.config.get('CLIENT_SEARCH_DEFAULT_LIMIT', self.default_limit)
+        self.max_limit = app.config.get('CLIENT_SEARCH_MAX_LIMIT', self.max_limit)
+
+    def search(self, query, limit=None):
+        """
+        Find active clients matching a search string, best matches first
+
+        Args:
+            query (str): Name, phone number or address fragment
+            limit (int): Maximum results (capped at max_limit)
+
+        Returns:
+            list: Client dicts with a relevance 'score'
+        """
+        query = (query or '').strip()
+        if not query:
+            return []
+        limit = max(1, min(limit or self.default_limit, self.max_limit))
+
+        if db.engine.dialect.name == 'postgresql':
+            return self._search_postgres(query, limit)
+        return self._search_sqlite(query, limit)
+
+    def ensure_sqlite_index(self):
+        """Create and populate the FTS5 table if it does not exist yet (SQLite only)"""
+        if db.engine in self._sqlite_ready:
+            return
+        exists = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'client_search'"
+        )).first()
+        if not exists:
+            for statement in SQLITE_SCHEMA:
+                db.session.execute(text(statement))
+            db.session.execute(text(SQLITE_REBUILD))
+            db.session.commit()
+            logger.info("Built client search index")
+        self._sqlite_ready.add(db.engine)
+
+    def rebuild(self):
+        """Repopulate the SQLite search table from the clients table"""
+        if db.engine.dialect.name != 'sqlite':
+            return
+        self.ensure_sqlite_index()
+        db.session.execute(text('DELETE FROM client_search'))
+        db.session.execute(text(SQLITE_REBUILD))
+        db.session.commit()
+
+    def _search_postgres(self, query, limit):
+        q = query.lower()
+        digits = phone_digits(query) if len(phone_digits(query)) >= 3 else ''
+        rows = db.session.execute(text(POSTGRES_SEARCH), {
+            'q': q,
+            'prefix': f"{escape_like(q)}%",
+            'contains': f"%{escape_like(q)}%",
+            'digits': digits,
+            'digits_contains': f"%{digits}%",
+            'limit': limit
+        }).mappings().all()
+        return [self._serialize(row, float(row['score'])) for row in rows]
+
+    def _search_sqlite(self, query, limit):
+        self.ensure_sqlite_index()
+        exact, fuzzy = build_fts_queries(query)
+
+        if exact is None:
+            # Too short for trigrams: name prefix scan, fine for development data sizes
+            prefix = f"{escape_like(query.lower())}%"
+            rows = db.session.execute(text(
+                "SELECT c.id, c.first_name, c.last_name, c.phone, c.address, c.latitude, c.longitude, "
+                "1.0 AS score FROM clients c WHERE c.is_active = 1 AND "
+                "(lower(c.first_name) LIKE :prefix ESCAPE '\\' OR lower(c.last_name) LIKE :prefix ESCAPE '\\') "
+                "ORDER BY c.last_name, c.first_name LIMIT :limit"
+            ), {'prefix': prefix, 'limit': limit}).mappings().all()
+            return [self._serialize(row, 1.0) for row in rows]
+
+        results = self._sqlite_match(exact, limit, boost=1.0)
+        if not results and fuzzy:
+            # Nothing contains the terms as typed; fall back to trigram overlap for misspellings
+            results = self._sqlite_match(fuzzy, limit, boost=0.0)
+        return results
+
+    def _sqlite_match(self, expression, limit, boost):
+        # bm25 is lower for better matches; weight name over phone over address
+        rows = db.session.execute(text(
+            "SELECT c.id, c.first_name, c.last_name, c.phone, c.address, c.latitude, c.longitude, "
+            "bm25(client_search, 0.0, 10.0, 5.0, 1.0) AS rank "
+            "FROM client_search JOIN clients c ON c.id = client_search.client_id "
+            "WHERE client_search MATCH :expression AND c.is_active = 1 "
+            "ORDER BY rank LIMIT :limit"
+        ), {'expression': expression, 'limit': limit}).mappings().all()
+        return [self._serialize(row, boost - float(row['rank']) / (1.0 - float(row['rank']))) for row in rows]
+
+    @staticmethod
+    def _serialize(row, score):
+        return {
+            'id': row['id'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'full_name': f"{row['first_name']} {row['last_name']}",
+            'phone': row['phone'],
+            'address': row['address'],
+            'latitude': row['latitude'],
+            'longitude': row['longitude'],
+            'score': round(score, 4)
+        }
+
+# Global instance for easy access
+client_search_service = ClientSearchService()
@@ -0,0 +1,210 @@
+from app import db
+from app.models.communication.conversation import Conversation
+from app.models.communication.conversation_participant import ConversationParticipant
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from collections import OrderedDict
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class ConversationMembershipService:
+    """Per-user cache of the conversations they are an active participant in"""
+
+    def __init__(self, max_age_seconds=30, cache_size=4096, redis_url=None,
+                 key_prefix='conversation_membership:', version_ttl_seconds=86400, retry_redis_seconds=30):
+        # Entries are reloaded once they are older than this, which bounds how long a
+        # change made on another worker goes unseen while Redis is unavailable
+        self.max_age_seconds = max_age_seconds
+        self.cache_size = cache_size
+        # Where each user's membership version is shared, so a change committed on one
+        # worker reloads the entry on the others; None keeps the cache per process
+        self.redis_url = redis_url
+        self.key_prefix = key_prefix
+        self.version_ttl_seconds = version_ttl_seconds
+        # After a Redis error, skip Redis for this long before trying again
+        self.retry_redis_seconds = retry_redis_seconds
+        self._redis = None
+        self._redis_failed_at = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_age_seconds = app.config.get('CONVERSATION_MEMBERSHIP_CACHE_MAX_AGE_SECONDS', self.max_age_seconds)
+        self.cache_size = app.config.get('CONVERSATION_MEMBERSHIP_CACHE_SIZE', self.cache_size)
+        self.redis_url = app.config.get('CONVERSATION_MEMBERSHIP_REDIS_URL', self.redis_url)
+        self.retry_redis_seconds = app.config.get('CONVERSATION_MEMBERSHIP_RETRY_REDIS_SECONDS',
+                                                  self.retry_redis_seconds)
+        self._redis = None
+        self._redis_failed_at = None
+        self.invalidate()
+
+    def conversation_ids(self, user_id):
+        """
+        Get the active conversations a user currently takes part in
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            frozenset: Conversation IDs
+        """
+        now = time.monotonic()
+        # Read before loading, so a change committed during the load still reloads next time
+        version = self._version(user_id)
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and now - entry[0] < self.max_age_seconds and \
+                    (version is None or entry[1] == version):
+                self._cache.move_to_end(user_id)
+                return entry[2]
+
+        conversation_ids = frozenset(
+            conversation_id for conversation_id, in db.session.query(ConversationParticipant.conversation_id)
+            .join(Conversation, Conversation.id == ConversationParticipant.conversation_id)
+            .filter(
+                ConversationParticipant.user_id == user_id,
+                ConversationParticipant.is_active == True,
+                Conversation.is_active == True
+            )
+        )
+
+        with self._lock:
+            self._cache[user_id] = (now, version, conversation_ids)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return conversation_ids
+
+    def is_member(self, user_id, conversation_id, cached=True):
+        """
+        Check whether a user is an active participant in an active conversation
+
+        Changes committed on other workers are seen through the shared versions;
+        without Redis, a removed user can still pass for up to max_age_seconds.
+        Participant changes pass cached=False to check the participant row itself.
+        """
+        if cached:
+            return conversation_id in self.conversation_ids(user_id)
+        return db.session.query(
+            db.session.query(ConversationParticipant.id)
+            .join(Conversation, Conversation.id == ConversationParticipant.conversation_id)
+            .filter(
+                ConversationParticipant.conversation_id == conversation_id,
+                ConversationParticipant.user_id == user_id,
+                ConversationParticipant.is_active == True,
+                Conversation.is_active == True
+            ).exists()
+        ).scalar()
+
+    def invalidate(self, user_id=None):
+        """Drop one user's cached conversations, or everyone's if no id is given"""
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def publish(self, user_ids=(), everyone=False):
+        """
+        Tell other worker processes that committed changes made their entries stale
+
+        Each user (or the shared everyone key) gets a new random version; random
+        rather than counted, so an expired key never comes back with an old value.
+        """
+        keys = [self.key_prefix + user_id for user_id in user_ids]
+        if everyone:
+            keys.append(self.key_prefix + '*')
+        client = self._client()
+        if client is None or not keys:
+            return
+        try:
+            pipe = client.pipeline()
+            for key in keys:
+                pipe.set(key, uuid.uuid4().hex, ex=self.version_ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning('Could not publish conversation membership changes to Redis: %s', e)
+            self._redis_failed_at = time.monotonic()
+
+    def _version(self, user_id):
+        """The user's and everyone's shared versions, or None when Redis is not in use"""
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            return tuple(client.mget([self.key_prefix + user_id, self.key_prefix + '*']))
+        except Exception as e:
+            logger.warning('Could not load conversation membership versions from Redis: %s', e)
+            self._redis_failed_at = time.monotonic()
+            return None
+
+    def _client(self):
+        if not self.redis_url:
+            return None
+        if self._redis_failed_at is not None and \
+                time.monotonic() - self._redis_failed_at < self.retry_redis_seconds:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                logger.warning('redis is not installed; conversation memberships are cached per process')
+                self.redis_url = None
+                return None
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._redis
+
+# Global instance for easy access
+conversation_membership_service = ConversationMembershipService()
+
+def _membership_changed(session, user_ids):
+    for user_id in user_ids:
+        conversation_membership_service.invalidate(user_id)
+    # Invalidate again on commit, in case another request reloaded the old rows in between
+    if session is not None:
+        session.info.setdefault('conversation_membership_changed', set()).update(user_ids)
+
+@event.listens_for(ConversationParticipant, 'after_insert')
+@event.listens_for(ConversationParticipant, 'after_delete')
+def _invalidate_participant(mapper, connection, target):
+    """Reload a user's conversations when they are added or removed"""
+    _membership_changed(object_session(target), {target.user_id})
+
+@event.listens_for(ConversationParticipant, 'after_update')
+def _invalidate_updated_participant(mapper, connection, target):
+    """Reload a user's conversations when they leave; read watermark moves are ignored"""
+    attrs = inspect(target).attrs
+    if not (attrs.is_active.history.has_changes() or attrs.user_id.history.has_changes()
+            or attrs.conversation_id.history.has_changes()):
+        return
+    _membership_changed(object_session(target), {target.user_id, *attrs.user_id.history.deleted})
+
+@event.listens_for(Conversation, 'after_update')
+def _invalidate_conversation(mapper, connection, target):
+    """Archiving or restoring a conversation changes every participant's list"""
+    if not inspect(target).attrs.is_active.history.has_changes():
+        return
+    conversation_membership_service.invalidate()
+    session = object_session(target)
+    if session is not None:
+        session.info['conversation_membership_changed_all'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_memberships(session):
+    everyone = session.info.pop('conversation_membership_changed_all', False)
+    user_ids = session.info.pop('conversation_membership_changed', ())
+    if everyone:
+        conversation_membership_service.invalidate()
+    for user_id in user_ids:
+        conversation_membership_service.invalidate(user_id)
+    if everyone or user_ids:
+        conversation_membership_service.publish(user_ids, everyone)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_membership_changes(session):
+    session.info.pop('conversation_membership_changed', None)
+    session.info.pop('conversation_membership_changed_all', None)
@@ -0,0 +1,194 @@
+from app import db
+from app.models.auth.role import Role
+from app.models.auth.user import User
+from app.models.communication.conversation import Conversation
+from app.models.communication.conversation_participant import ConversationParticipant
+from app.models.communication.message import Message
+from sqlalchemy import and_, func, or_, select
+from collections import defaultdict
+from datetime import datetime
+import base64
+import json
+
+def encode_cursor(timestamp, row_id):
+    """Opaque cursor for a (timestamp, id) keyset position"""
+    payload = json.dumps([timestamp.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Return (timestamp, id) from a cursor, raising ValueError if malformed"""
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(timestamp), str(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+class InboxService:
+    """Builds a user's conversation list, most recent activity first, with a fixed number of queries"""
+
+    def __init__(self, default_limit=20, max_limit=100, participant_preview=5, preview_length=200):
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        # Participants listed per conversation; participant_count has the total
+        self.participant_preview = participant_preview
+        self.preview_length = preview_length
+
+    def init_app(self, app):
+        self.default_limit = app.config.get('INBOX_DEFAULT_LIMIT', self.default_limit)
+        self.max_limit = app.config.get('INBOX_MAX_LIMIT', self.max_limit)
+        self.participant_preview = app.config.get('INBOX_PARTICIPANT_PREVIEW', self.participant_preview)
+        self.preview_length = app.config.get('INBOX_PREVIEW_LENGTH', self.preview_length)
+
+    def build(self, user_id, limit=None, cursor=None):
+        """
+        Get one page of a user's inbox
+
+        Three queries whatever the page size: the page itself with unread
+        counts and last message ids, the last messages, and the participants.
+
+        Args:
+            user_id (str): User whose active conversations are listed
+            limit (int): Page size, capped at max_limit
+            cursor (str): next_cursor from the previous page
+
+        Returns:
+            dict: conversations, next_cursor and has_more
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(limit or self.default_limit, self.max_limit))
+
+        # Each correlated subquery is a seek on ix_messages_conversation_created_id
+        last_message_at = select(func.max(Message.created_at)) \
+            .where(Message.conversation_id == Conversation.id).scalar_subquery()
+        memberships = select(
+            Conversation.id,
+            Conversation.name,
+            Conversation.conversation_type,
+            Conversation.created_by,
+            Conversation.created_at,
+            Conversation.updated_at,
+            func.coalesce(last_message_at, Conversation.created_at).label('last_activity_at'),
+            ConversationParticipant.last_read_at,
+            ConversationParticipant.last_read_message_id
+        ).join(
+            ConversationParticipant, ConversationParticipant.conversation_id == Conversation.id
+        ).where(
+            ConversationParticipant.user_id == user_id,
+            ConversationParticipant.is_active == True,
+            Conversation.is_active == True
+        ).subquery()
+
+        # Only computed for the rows on the page
+        unread_count = select(func.count(Message.id)).where(
+            Message.conversation_id == memberships.c.id,
+            Message.sender_id != user_id,
+            or_(
+                memberships.c.last_read_at.is_(None),
+                Message.created_at > memberships.c.last_read_at,
+                and_(Message.created_at == memberships.c.last_read_at,
+                     Message.id > memberships.c.last_read_message_id)
+            )
+        ).scalar_subquery()
+        last_message_id = select(Message.id).where(Message.conversation_id == memberships.c.id) \
+            .order_by(Message.created_at.desc(), Message.id.desc()).limit(1).scalar_subquery()
+
+        query = select(memberships, unread_count.label('unread_count'), last_message_id.label('last_message_id'))
+        if cursor:
+            activity, last_id = decode_cursor(cursor)
+            query = query.where(or_(
+                memberships.c.last_activity_at < activity,
+                and_(memberships.c.last_activity_at == activity, memberships.c.id < last_id)
+            ))
+        rows = db.session.execute(
+            query.order_by(memberships.c.last_activity_at.desc(), memberships.c.id.desc()).limit(limit + 1)
+        ).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        conversation_ids = [row.id for row in rows]
+        last_messages = self._last_messages([row.last_message_id for row in rows if row.last_message_id])
+        participants, participant_counts = self._participants(conversation_ids, user_id)
+
+        conversations = [{
+            'id': row.id,
+            'name': row.name,
+            'conversation_type': row.conversation_type,
+            'created_by': row.created_by,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+            'last_activity_at': row.last_activity_at.isoformat() if row.last_activity_at else None,
+            'unread_count': row.unread_count,
+            'last_read_message_id': row.last_read_message_id,
+            'last_message': last_messages.get(row.last_message_id),
+            'participants': participants[row.id],
+            'participant_count': participant_counts.get(row.id, 0)
+        } for row in rows]
+
+        return {
+            'conversations': conversations,
+            'next_cursor': encode_cursor(rows[-1].last_activity_at, rows[-1].id) if has_more else None,
+            'has_more': has_more
+        }
+
+    def _last_messages(self, message_ids):
+        if not message_ids:
+            return {}
+        rows = db.session.execute(
+            select(
+                Message.id, Message.sender_id, Message.message_type, Message.content,
+                Message.is_urgent, Message.created_at, User.first_name, User.last_name
+            ).outerjoin(User, User.id == Message.sender_id).where(Message.id.in_(message_ids))
+        ).all()
+        return {row.id: {
+            'id': row.id,
+            'sender_id': row.sender_id,
+            'sender_name': f"{row.first_name} {row.last_name}" if row.first_name else None,
+            'message_type': row.message_type,
+            'content': (row.content or '')[:self.preview_length],
+            'is_urgent': row.is_urgent,
+            'created_at': row.created_at.isoformat() if row.created_at else None
+        } for row in rows}
+
+    def _participants(self, conversation_ids, user_id):
+        participants = defaultdict(list)
+        counts = {}
+        if not conversation_ids:
+            return participants, counts
+
+        # The first few participants of each conversation, others before the user
+        partition = ConversationParticipant.conversation_id
+        ranked = select(
+            ConversationParticipant.conversation_id,
+            ConversationParticipant.user_id,
+            func.row_number().over(partition_by=partition, order_by=(
+                (ConversationParticipant.user_id == user_id),
+                ConversationParticipant.joined_at,
+                ConversationParticipant.id
+            )).label('position'),
+            func.count().over(partition_by=partition).label('total')
+        ).where(
+            ConversationParticipant.conversation_id.in_(conversation_ids),
+            ConversationParticipant.is_active == True
+        ).subquery()
+        rows = db.session.execute(
+            select(
+                ranked.c.conversation_id, ranked.c.total,
+                User.id, User.first_name, User.last_name, Role.name.label('role')
+            ).join(User, User.id == ranked.c.user_id).outerjoin(Role, Role.id == User.role_id)
+            .where(ranked.c.position <= self.participant_preview)
+            .order_by(ranked.c.conversation_id, ranked.c.position)
+        ).all()
+        for row in rows:
+            counts[row.conversation_id] = row.total
+            participants[row.conversation_id].append({
+                'id': row.id,
+                'first_name': row.first_name,
+                'last_name': row.last_name,
+                'role': row.role
+            })
+        return participants, counts
+
+# Global instance for easy access
+inbox_service = InboxService()
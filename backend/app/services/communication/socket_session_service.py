@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class SocketSessionService:
+    """Each user's connected Socket.IO session ids, shared across worker processes through Redis"""
+
+    def __init__(self, redis_url=None, key_prefix='socket_sids:', ttl_seconds=86400, retry_redis_seconds=30):
+        # None keeps the ids in this process only, which is enough without a message queue
+        self.redis_url = redis_url
+        self.key_prefix = key_prefix
+        # Ids of sockets whose worker died without a disconnect expire with the user's key
+        self.ttl_seconds = ttl_seconds
+        # After a Redis error, skip Redis for this long before trying again
+        self.retry_redis_seconds = retry_redis_seconds
+        self._redis = None
+        self._redis_failed_at = None
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.redis_url = app.config.get('SOCKET_SESSION_REDIS_URL', self.redis_url)
+        self.ttl_seconds = app.config.get('SOCKET_SESSION_TTL_SECONDS', self.ttl_seconds)
+        self.retry_redis_seconds = app.config.get('SOCKET_SESSION_RETRY_REDIS_SECONDS', self.retry_redis_seconds)
+        self._redis = None
+        self._redis_failed_at = None
+        self._local = {}
+
+    def add(self, user_id, sid):
+        """Record a socket connected to this process"""
+        with self._lock:
+            self._local.setdefault(user_id, set()).add(sid)
+        self._call('record socket', lambda client: client.pipeline()
+                   .sadd(self.key_prefix + user_id, sid)
+                   .expire(self.key_prefix + user_id, self.ttl_seconds)
+                   .execute())
+
+    def remove(self, user_id, sid):
+        """Forget a disconnected socket"""
+        with self._lock:
+            sids = self._local.get(user_id)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self._local[user_id]
+        self._call('forget socket', lambda client: client.srem(self.key_prefix + user_id, sid))
+
+    def sids(self, user_id):
+        """
+        Get a user's socket ids on every worker process
+
+        Returns:
+            set: Session ids; without Redis, only those on this process
+        """
+        with self._lock:
+            sids = set(self._local.get(user_id, ()))
+        members = self._call('load sockets', lambda client: client.smembers(self.key_prefix + user_id)) or ()
+        sids.update(m.decode('utf-8') if isinstance(m, bytes) else m for m in members)
+        return sids
+
+    def _call(self, action, fn):
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            return fn(client)
+        except Exception as e:
+            logger.warning('Could not %s in Redis: %s', action, e)
+            self._redis_failed_at = time.monotonic()
+            return None
+
+    def _client(self):
+        if not self.redis_url:
+            return None
+        if self._redis_failed_at is not None and \
+                time.monotonic() - self._redis_failed_at < self.retry_redis_seconds:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                logger.warning('redis is not installed; socket ids are kept in this process only')
+                self.redis_url = None
+                return None
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._redis
+
+# Global instance for easy access
+socket_session_service = SocketSessionService()
@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls to at most `rate` per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        """Block until the caller may make its next call"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+class BatchGeocoder:
+    """
+    Geocode many addresses concurrently under a provider rate limit
+
+    Gazetteer hits are answered immediately; only misses are sent to the
+    network providers, from a small worker pool sharing one rate limiter.
+    """
+
+    def __init__(self, service=None, max_workers=4, requests_per_second=1.0, max_retries=1):
+        self.service = service
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        # Retries per address inside the geocoding service; failures are reported, not retried here
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(requests_per_second)
+
+    def init_app(self, app):
+        self.max_workers = app.config.get('GEOCODING_BATCH_WORKERS', self.max_workers)
+        self.requests_per_second = app.config.get('GEOCODING_REQUESTS_PER_SECOND', self.requests_per_second)
+        self.limiter = RateLimiter(self.requests_per_second)
+
+    def geocode_many(self, addresses):
+        """
+        Geocode a batch of addresses
+
+        Args:
+            addresses: Iterable of address strings (duplicates are geocoded once)
+
+        Returns:
+            dict: Maps each distinct address to an address_to_coordinates result or None
+        """
+        service = self._service()
+        results = {}
+        misses = []
+        for address in dict.fromkeys(a for a in addresses if a):
+            result = service.local_lookup(address)
+            results[address] = result
+            if result is None:
+                misses.append(address)
+
+        if not misses:
+            return results
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(misses))) as executor:
+            futures = {executor.submit(self._geocode_one, service, address): address for address in misses}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        resolved = sum(1 for address in misses if results[address])
+        logger.info(f"Batch geocoded {resolved}/{len(misses)} addresses over the network "
+                    f"in {time.monotonic() - started:.1f}s ({len(results) - len(misses)} gazetteer hits)")
+        return results
+
+    def _geocode_one(self, service, address):
+        self.limiter.acquire()
+        try:
+            return service.address_to_coordinates(address, max_retries=self.max_retries)
+        except Exception as e:
+            logger.warning(f"Batch geocoding failed for address '{address}': {str(e)}")
+            return None
+
+    def _service(self):
+        if self.service is None:
+            from app.services.geolocation.geocoding_service import geocoding_service
+            self.service = geocoding_service
+        return self.service
+
+# Global instance for easy access
+batch_geocoder = BatchGeocoder()
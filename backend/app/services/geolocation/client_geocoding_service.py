@@ -0,0 +1,275 @@
+from app import db, socketio
+from app.models.client.client import Client
+from app.models.geolocation.geofence import Geofence
+from app.models.reporting.audit_log import AuditLog
+from app.services.geolocation.geocoding_service import geocoding_service
+from sqlalchemy import update
+from datetime import datetime, timedelta
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+def home_geofence_row(client_id, first_name, last_name, address, latitude, longitude,
+                      radius_meters, created_by, now=None):
+    """
+    Build column values for a client's home geofence, for bulk inserts
+
+    Matches the geofence ClientGeocodingService.build_home_geofence creates.
+    """
+    now = now or datetime.utcnow()
+    return {
+        'id': str(uuid.uuid4()),
+        'name': f"{first_name} {last_name} Residence",
+        'description': f"Home address: {address}",
+        'client_id': client_id,
+        'center_latitude': latitude,
+        'center_longitude': longitude,
+        'radius_meters': radius_meters,
+        'geofence_type': 'circle',
+        'is_active': True,
+        'created_by': created_by,
+        'created_at': now,
+        'updated_at': now
+    }
+
+class ClientGeocodingService:
+    """Service for geocoding new clients and provisioning their home geofence off the request path"""
+
+    def __init__(self, max_attempts=3, retry_backoff_seconds=5, default_radius_meters=100, run_async=True,
+                 stale_after_seconds=600):
+        self.max_attempts = max_attempts
+        # Delay before retry n is retry_backoff_seconds * 2 ** (n - 1)
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.default_radius_meters = default_radius_meters
+        # Disabled in tests so jobs run inline on the request thread
+        self.run_async = run_async
+        # Jobs are in-process, so a pending or in-progress client untouched for
+        # this long lost its job to a restart and is enqueued again
+        self.stale_after_seconds = stale_after_seconds
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+        self.max_attempts = app.config.get('CLIENT_GEOCODING_MAX_ATTEMPTS', self.max_attempts)
+        self.retry_backoff_seconds = app.config.get('CLIENT_GEOCODING_RETRY_BACKOFF_SECONDS', self.retry_backoff_seconds)
+        self.default_radius_meters = app.config.get('DEFAULT_GEOFENCE_RADIUS', self.default_radius_meters)
+        self.run_async = app.config.get('CLIENT_GEOCODING_ASYNC', self.run_async)
+        self.stale_after_seconds = app.config.get('CLIENT_GEOCODING_STALE_SECONDS', self.stale_after_seconds)
+
+    def start_sweep(self):
+        """
+        Requeue jobs lost when the previous server process stopped, in the background
+
+        Only the server entrypoint calls this; create_app also runs for
+        migrations and scripts, which must not geocode.
+        """
+        if self.run_async:
+            socketio.start_background_task(self._sweep_in_app_context)
+
+    def build_home_geofence(self, client, current_user_id, ip_address=None, user_agent=None):
+        """
+        Add a home geofence and its audit entry for a client with coordinates
+
+        The caller is responsible for committing the session.
+
+        Args:
+            client (Client): Client with latitude and longitude set
+            current_user_id (str): User the geofence is created on behalf of
+            ip_address (str): Request IP for the audit log
+            user_agent (str): Request user agent for the audit log
+
+        Returns:
+            Geofence: The pending geofence
+        """
+        geofence = Geofence(
+            name=f"{client.first_name} {client.last_name} Residence",
+            description=f"Home address: {client.address}",
+            client_id=client.id,
+            center_latitude=client.latitude,
+            center_longitude=client.longitude,
+            radius_meters=self.default_radius_meters,
+            geofence_type='circle',
+            created_by=current_user_id
+        )
+        db.session.add(geofence)
+        db.session.flush()
+
+        db.session.add(AuditLog(
+            user_id=current_user_id,
+            action='geofence_created_for_client',
+            resource_type='geofence',
+            resource_id=geofence.id,
+            details={
+                'client_id': client.id,
+                'client_name': f"{client.first_name} {client.last_name}",
+                'address': client.address,
+                'coordinates': f"{client.latitude}, {client.longitude}"
+            },
+            ip_address=ip_address,
+            user_agent=user_agent
+        ))
+        return geofence
+
+    def enqueue(self, client_id, current_user_id, ip_address=None, user_agent=None):
+        """
+        Schedule geocoding and home geofence creation for a client
+
+        The client should already be committed with geocoding_status 'pending'.
+        """
+        if self.run_async:
+            socketio.start_background_task(
+                self._run_in_app_context, client_id, current_user_id, ip_address, user_agent
+            )
+        else:
+            self.run_job(client_id, current_user_id, ip_address, user_agent)
+
+    def run_job(self, client_id, current_user_id, ip_address=None, user_agent=None):
+        """
+        Geocode a client's address with retries and create its home geofence
+
+        Coordinates, geofence, status and audit entry are saved in one commit,
+        then a 'client_geocoding_updated' event is sent to the creator's room.
+
+        Returns:
+            str: Final geocoding status, or None if the client no longer exists
+        """
+        client = Client.query.get(client_id)
+        if not client:
+            return None
+        if client.geocoding_status not in ('pending', 'in_progress'):
+            # Already finished, e.g. by a run started before a restart sweep
+            return client.geocoding_status
+
+        client.geocoding_status = 'in_progress'
+        client.geocoding_error = None
+        db.session.commit()
+
+        result = None
+        error = None
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                socketio.sleep(self.retry_backoff_seconds * 2 ** (attempt - 1))
+            try:
+                # Retries are paced here, so each attempt makes one pass over the providers
+                result = geocoding_service.address_to_coordinates(client.address, max_retries=1)
+            except Exception as e:
+                error = str(e)
+                logger.warning(f"Geocoding attempt {attempt + 1} failed for client {client_id}: {error}")
+                continue
+            if result:
+                break
+            error = 'Address could not be geocoded'
+
+        geofence = None
+        try:
+            if result:
+                client.latitude = result['latitude']
+                client.longitude = result['longitude']
+                client.geocoding_status = 'completed'
+                client.geocoding_error = None
+                geofence = self.build_home_geofence(client, current_user_id, ip_address, user_agent)
+            else:
+                client.geocoding_status = 'failed'
+                client.geocoding_error = (error or 'Address could not be geocoded')[:255]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error provisioning geofence for client {client_id}: {str(e)}")
+            client = Client.query.get(client_id)
+            client.geocoding_status = 'failed'
+            client.geocoding_error = str(e)[:255]
+            geofence = None
+            db.session.commit()
+
+        self.notify(client, current_user_id, geofence)
+        return client.geocoding_status
+
+    def is_stale(self, client):
+        """Whether a pending or in-progress client has gone too long without progress"""
+        return client.geocoding_status in ('pending', 'in_progress') and client.updated_at is not None and \
+            client.updated_at < datetime.utcnow() - timedelta(seconds=self.stale_after_seconds)
+
+    def retry(self, client_id, current_user_id, ip_address=None, user_agent=None, stale_only=False):
+        """
+        Set a client back to pending and enqueue its geocoding job
+
+        Only failed or deferred clients and stale pending or in-progress ones are retried.
+        The status change is a conditional update, so when several processes
+        retry the same client at once, only one of them enqueues it.
+
+        Args:
+            client_id (str): Client ID
+            current_user_id (str): User notified of the outcome
+            stale_only (bool): Skip failed and deferred clients
+
+        Returns:
+            bool: True if a job was enqueued
+        """
+        now = datetime.utcnow()
+        retryable = Client.geocoding_status.in_(('pending', 'in_progress')) & \
+            (Client.updated_at < now - timedelta(seconds=self.stale_after_seconds))
+        if not stale_only:
+            retryable = retryable | Client.geocoding_status.in_(('failed', 'deferred'))
+        claimed = db.session.execute(
+            update(Client)
+            .where(Client.id == client_id, Client.address.isnot(None), Client.address != '', retryable)
+            .values(geocoding_status='pending', geocoding_error=None, updated_at=now)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            self.enqueue(client_id, current_user_id, ip_address, user_agent)
+        return bool(claimed)
+
+    def requeue_stale(self, limit=500):
+        """
+        Enqueue again the stale pending and in-progress clients, on behalf of their creators
+
+        Returns:
+            int: Number of jobs enqueued
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after_seconds)
+        rows = db.session.query(Client.id, Client.created_by).filter(
+            Client.geocoding_status.in_(('pending', 'in_progress')),
+            Client.updated_at < cutoff
+        ).order_by(Client.updated_at).limit(limit).all()
+        requeued = sum(self.retry(row.id, row.created_by, stale_only=True) for row in rows)
+        if requeued:
+            logger.info(f"Requeued geocoding for {requeued} stale clients")
+        return requeued
+
+    def notify(self, client, current_user_id, geofence=None):
+        """Push the client's geocoding outcome to the creator over Socket.IO"""
+        try:
+            socketio.emit('client_geocoding_updated', {
+                'client_id': client.id,
+                'geocoding_status': client.geocoding_status,
+                'geocoding_error': client.geocoding_error,
+                'latitude': client.latitude,
+                'longitude': client.longitude,
+                'geofence': geofence.to_dict() if geofence else None
+            }, room=f"user_{current_user_id}")
+        except Exception as e:
+            logger.warning(f"Could not emit geocoding update for client {client.id}: {str(e)}")
+
+    def _run_in_app_context(self, client_id, current_user_id, ip_address, user_agent):
+        with self._app.app_context():
+            try:
+                self.run_job(client_id, current_user_id, ip_address, user_agent)
+            except Exception as e:
+                logger.error(f"Geocoding job failed for client {client_id}: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def _sweep_in_app_context(self):
+        with self._app.app_context():
+            try:
+                self.requeue_stale()
+            except Exception as e:
+                # e.g. the tables do not exist yet while running migrations
+                logger.warning(f"Could not requeue stale geocoding jobs: {str(e)}")
+            finally:
+                db.session.remove()
+
+# Global instance for easy access
+client_geocoding_service = ClientGeocodingService()
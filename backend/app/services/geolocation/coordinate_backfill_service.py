@@ -0,0 +1,185 @@
+from app import db
+from app.models.client.client import Client
+from app.models.geolocation.geofence import Geofence
+from app.services.geolocation.batch_geocoder import batch_geocoder
+from app.services.geolocation.client_geocoding_service import home_geofence_row
+from app.services.geolocation.distance_matrix_service import distance_matrix_service
+from app.services.geolocation.geofence_index_service import geofence_index_service
+from sqlalchemy import insert, update
+from datetime import datetime
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class CoordinateBackfillService:
+    """
+    Resumable job that geocodes clients missing coordinates and creates missing home geofences
+
+    Active clients are paged by id (keyset pagination), so a run can stop at
+    any batch boundary and resume from the last committed id.
+    """
+
+    def __init__(self, batch_size=200, default_radius_meters=100, geocoder=None):
+        self.batch_size = batch_size
+        self.default_radius_meters = default_radius_meters
+        self.geocoder = geocoder or batch_geocoder
+
+    def init_app(self, app):
+        self.batch_size = app.config.get('COORDINATE_BACKFILL_BATCH_SIZE', self.batch_size)
+        self.default_radius_meters = app.config.get('DEFAULT_GEOFENCE_RADIUS', self.default_radius_meters)
+
+    def candidates_query(self, retry_failed=False):
+        """
+        Active clients that need coordinates or a home geofence
+
+        Args:
+            retry_failed (bool): Also retry clients whose geocoding already failed
+        """
+        has_fence = db.session.query(Geofence.id).filter(
+            Geofence.client_id == Client.id,
+            Geofence.is_active == True
+        ).exists()
+        needs_coordinates = (Client.latitude.is_(None) | Client.longitude.is_(None)) & \
+            Client.address.isnot(None) & (Client.address != '')
+        if not retry_failed:
+            needs_coordinates = needs_coordinates & (
+                Client.geocoding_status.is_(None) | (Client.geocoding_status != 'failed')
+            )
+        needs_fence = Client.latitude.isnot(None) & Client.longitude.isnot(None) & ~has_fence
+        # Clients with a geocoding job queued or running get their fence from that job
+        no_job = Client.geocoding_status.is_(None) | Client.geocoding_status.notin_(('pending', 'in_progress'))
+
+        return db.session.query(
+            Client.id, Client.first_name, Client.last_name, Client.address,
+            Client.latitude, Client.longitude, Client.created_by
+        ).filter(Client.is_active == True, no_job, needs_coordinates | needs_fence)
+
+    def count_remaining(self, start_after=None, retry_failed=False):
+        query = self.candidates_query(retry_failed)
+        if start_after:
+            query = query.filter(Client.id > start_after)
+        return query.count()
+
+    def run(self, start_after=None, limit=None, dry_run=False, retry_failed=False, checkpoint=None):
+        """
+        Process candidates batch by batch
+
+        Each batch is geocoded through the rate-limited batch geocoder, then
+        coordinates, statuses and geofences are written in one commit.
+
+        Args:
+            start_after (str): Resume after this client id
+            limit (int): Stop after roughly this many clients
+            dry_run (bool): Geocode and report without writing anything
+            retry_failed (bool): Include clients whose geocoding previously failed
+            checkpoint: Optional callable invoked with the running metrics after
+                each committed batch; metrics['last_id'] is the resume point
+
+        Returns:
+            dict: Final metrics
+        """
+        metrics = {
+            'last_id': start_after,
+            'batches': 0,
+            'processed': 0,
+            'geocoded': 0,
+            'failed': 0,
+            'geofences_created': 0,
+            'elapsed_seconds': 0.0,
+            'clients_per_second': 0.0,
+            'dry_run': dry_run,
+            'done': False
+        }
+        started = time.monotonic()
+
+        while limit is None or metrics['processed'] < limit:
+            query = self.candidates_query(retry_failed)
+            if metrics['last_id']:
+                query = query.filter(Client.id > metrics['last_id'])
+            size = self.batch_size if limit is None else min(self.batch_size, limit - metrics['processed'])
+            batch = query.order_by(Client.id).limit(size).all()
+            if not batch:
+                metrics['done'] = True
+                break
+
+            self._process_batch(batch, metrics, dry_run)
+
+            metrics['batches'] += 1
+            metrics['processed'] += len(batch)
+            metrics['last_id'] = batch[-1].id
+            metrics['elapsed_seconds'] = round(time.monotonic() - started, 2)
+            metrics['clients_per_second'] = round(
+                metrics['processed'] / metrics['elapsed_seconds'], 2
+            ) if metrics['elapsed_seconds'] else 0.0
+
+            if checkpoint:
+                checkpoint(metrics)
+
+        logger.info(f"Coordinate backfill processed {metrics['processed']} clients: "
+                    f"{metrics['geocoded']} geocoded, {metrics['failed']} failed, "
+                    f"{metrics['geofences_created']} geofences created")
+        return metrics
+
+    def _process_batch(self, batch, metrics, dry_run):
+        missing = [row.address for row in batch if row.latitude is None or row.longitude is None]
+        results = self.geocoder.geocode_many(missing) if missing else {}
+
+        now = datetime.utcnow()
+        client_updates = []
+        geofence_rows = []
+        for row in batch:
+            latitude, longitude = row.latitude, row.longitude
+            if latitude is None or longitude is None:
+                result = results.get(row.address)
+                if not result:
+                    metrics['failed'] += 1
+                    client_updates.append({
+                        'id': row.id,
+                        'geocoding_status': 'failed',
+                        'geocoding_error': 'Address could not be geocoded',
+                        'updated_at': now
+                    })
+                    continue
+                latitude, longitude = result['latitude'], result['longitude']
+                metrics['geocoded'] += 1
+                client_updates.append({
+                    'id': row.id,
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'geocoding_status': 'completed',
+                    'geocoding_error': None,
+                    'updated_at': now
+                })
+
+            geofence_rows.append(home_geofence_row(
+                row.id, row.first_name, row.last_name, row.address, latitude, longitude,
+                self.default_radius_meters, row.created_by, now
+            ))
+
+        if dry_run:
+            metrics['geofences_created'] += len(geofence_rows)
+            return
+
+        try:
+            # Split by column set so each group is a single executemany
+            for columns in {frozenset(u) for u in client_updates}:
+                db.session.execute(update(Client), [u for u in client_updates if frozenset(u) == columns])
+            if geofence_rows:
+                db.session.execute(insert(Geofence), geofence_rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        metrics['geofences_created'] += len(geofence_rows)
+
+        # Bulk statements bypass the ORM events these caches listen to
+        for values in client_updates:
+            if 'latitude' in values:
+                distance_matrix_service.invalidate_client(values['id'])
+        if geofence_rows:
+            geofence_index_service.invalidate()
+
+# Global instance for easy access
+coordinate_backfill_service = CoordinateBackfillService()
@@ -0,0 +1,245 @@
+from app import db
+from app.models.client.client import Client
+from sqlalchemy import event, inspect
+from collections import OrderedDict
+import numpy as np
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_METERS = 6371008.8
+
+def haversine_matrix(origins, destinations):
+    """
+    Calculate great-circle distances between every origin and destination
+
+    Args:
+        origins: Sequence of (latitude, longitude) pairs, length N
+        destinations: Sequence of (latitude, longitude) pairs, length M
+
+    Returns:
+        numpy.ndarray: N x M array of distances in meters
+    """
+    origins = np.radians(np.asarray(origins, dtype=float).reshape(-1, 2))
+    destinations = np.radians(np.asarray(destinations, dtype=float).reshape(-1, 2))
+
+    lat1 = origins[:, 0][:, np.newaxis]
+    lon1 = origins[:, 1][:, np.newaxis]
+    lat2 = destinations[:, 0][np.newaxis, :]
+    lon2 = destinations[:, 1][np.newaxis, :]
+
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2)
+    return 2.0 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_pairwise(latitudes, longitudes):
+    """
+    Calculate distances between consecutive points of a trail
+
+    Args:
+        latitudes: Sequence of latitudes, length N
+        longitudes: Sequence of longitudes, length N
+
+    Returns:
+        numpy.ndarray: Array of N - 1 distances in meters
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    if lat.size < 2:
+        return np.zeros(0)
+
+    a = (np.sin(np.diff(lat) / 2.0) ** 2 +
+         np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2.0) ** 2)
+    return 2.0 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+class DistanceMatrixService:
+    """Service for travel distance/time matrices between clients and arbitrary points"""
+
+    def __init__(self, road_factor=1.3, average_speed_kmh=40.0, cache_size=256, cache_max_cells=5000000):
+        self.road_factor = road_factor
+        self.average_speed_kmh = average_speed_kmh
+        self.cache_size = cache_size
+        # Entries vary from 1 to hundreds of thousands of cells, so memory is bounded by cells too
+        self.cache_max_cells = cache_max_cells
+        self._cache = OrderedDict()
+        self._cached_cells = 0
+        self._client_keys = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.road_factor = app.config.get('DISTANCE_MATRIX_ROAD_FACTOR', self.road_factor)
+        self.average_speed_kmh = app.config.get('DISTANCE_MATRIX_AVERAGE_SPEED_KMH', self.average_speed_kmh)
+        self.cache_max_cells = app.config.get('DISTANCE_MATRIX_CACHE_MAX_CELLS', self.cache_max_cells)
+
+    def build_matrix(self, origins, destinations, road_factor=None, average_speed_kmh=None):
+        """
+        Build a travel matrix between two lists of coordinates
+
+        Args:
+            origins: Sequence of (latitude, longitude) pairs
+            destinations: Sequence of (latitude, longitude) pairs
+            road_factor (float): Multiplier applied to straight-line distance
+            average_speed_kmh (float): Average travel speed used for durations
+
+        Returns:
+            dict: 'distance_meters', 'road_distance_meters' and 'duration_seconds'
+                  as N x M numpy arrays
+        """
+        return self._apply_travel_model(
+            haversine_matrix(origins, destinations), road_factor, average_speed_kmh
+        )
+
+    def build_client_matrix(self, origin_client_ids, destination_client_ids=None,
+                            road_factor=None, average_speed_kmh=None):
+        """
+        Build a travel matrix between client homes, cached by client set
+
+        Args:
+            origin_client_ids (list): Client IDs used as matrix rows
+            destination_client_ids (list): Client IDs used as matrix columns,
+                defaults to the origin clients
+            road_factor (float): Multiplier applied to straight-line distance
+            average_speed_kmh (float): Average travel speed used for durations
+
+        Returns:
+            dict: Travel matrices plus 'origin_ids', 'destination_ids' and
+                  'missing_client_ids' (unknown clients or clients without coordinates)
+        """
+        if destination_client_ids is None:
+            destination_client_ids = origin_client_ids
+
+        key = (tuple(origin_client_ids), tuple(destination_client_ids))
+        entry = self._cache_get(key)
+
+        if entry is None:
+            entry = self._compute_client_entry(origin_client_ids, destination_client_ids)
+            self._cache_put(key, entry)
+
+        result = self._apply_travel_model(entry['distances'], road_factor, average_speed_kmh)
+        result['origin_ids'] = entry['origin_ids']
+        result['destination_ids'] = entry['destination_ids']
+        result['missing_client_ids'] = entry['missing_client_ids']
+        return result
+
+    def get_client_coordinates(self, client_ids):
+        """
+        Load coordinates for the given clients in a single query
+
+        Args:
+            client_ids (list): Client IDs to look up
+
+        Returns:
+            dict: Mapping of client ID to (latitude, longitude) for clients with coordinates
+        """
+        if not client_ids:
+            return {}
+        rows = db.session.query(Client.id, Client.latitude, Client.longitude).filter(
+            Client.id.in_(set(client_ids)),
+            Client.latitude.isnot(None),
+            Client.longitude.isnot(None)
+        ).all()
+        return {row.id: (row.latitude, row.longitude) for row in rows}
+
+    def invalidate_client(self, client_id):
+        """Drop every cached matrix that includes the given client"""
+        with self._lock:
+            for key in self._client_keys.pop(client_id, set()):
+                self._evict(key)
+
+    def clear_cache(self):
+        """Drop every cached matrix"""
+        with self._lock:
+            self._cache.clear()
+            self._cached_cells = 0
+            self._client_keys.clear()
+
+    def _compute_client_entry(self, origin_client_ids, destination_client_ids):
+        """Load client coordinates in one query and compute the haversine matrix"""
+        requested_ids = set(origin_client_ids) | set(destination_client_ids)
+        coordinates = self.get_client_coordinates(requested_ids)
+
+        origin_ids = [cid for cid in origin_client_ids if cid in coordinates]
+        destination_ids = [cid for cid in destination_client_ids if cid in coordinates]
+
+        if origin_ids and destination_ids:
+            distances = haversine_matrix(
+                [coordinates[cid] for cid in origin_ids],
+                [coordinates[cid] for cid in destination_ids]
+            )
+        else:
+            distances = np.zeros((len(origin_ids), len(destination_ids)))
+
+        return {
+            'distances': distances,
+            'origin_ids': origin_ids,
+            'destination_ids': destination_ids,
+            'missing_client_ids': sorted(requested_ids - set(coordinates)),
+            'client_ids': requested_ids
+        }
+
+    def _apply_travel_model(self, distances, road_factor=None, average_speed_kmh=None):
+        """Derive road distance and duration from straight-line distances"""
+        road_factor = self.road_factor if road_factor is None else float(road_factor)
+        average_speed_kmh = self.average_speed_kmh if average_speed_kmh is None else float(average_speed_kmh)
+
+        if road_factor <= 0 or average_speed_kmh <= 0:
+            raise ValueError('road_factor and average_speed_kmh must be positive')
+
+        road_distances = distances * road_factor
+        durations = road_distances / (average_speed_kmh * 1000.0 / 3600.0)
+
+        return {
+            'distance_meters': distances,
+            'road_distance_meters': road_distances,
+            'duration_seconds': durations,
+            'road_factor': road_factor,
+            'average_speed_kmh': average_speed_kmh
+        }
+
+    def _cache_get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _cache_put(self, key, entry):
+        if entry['distances'].size > self.cache_max_cells:
+            return
+        with self._lock:
+            self._evict(key)
+            self._cache[key] = entry
+            self._cached_cells += entry['distances'].size
+            for client_id in entry['client_ids']:
+                self._client_keys.setdefault(client_id, set()).add(key)
+            while len(self._cache) > self.cache_size or self._cached_cells > self.cache_max_cells:
+                oldest_key = next(iter(self._cache))
+                self._evict(oldest_key)
+
+    def _evict(self, key):
+        """Remove a cache entry and its reverse index (caller holds the lock)"""
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return
+        self._cached_cells -= entry['distances'].size
+        for client_id in entry['client_ids']:
+            keys = self._client_keys.get(client_id)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._client_keys[client_id]
+
+# Global instance for easy access
+distance_matrix_service = DistanceMatrixService()
+
+@event.listens_for(Client, 'after_update')
+def _invalidate_client_coordinates(mapper, connection, target):
+    """Invalidate cached matrices when a client's coordinates change"""
+    state = inspect(target)
+    if state.attrs.latitude.history.has_changes() or state.attrs.longitude.history.has_changes():
+        distance_matrix_service.invalidate_client(target.id)
+
+@event.listens_for(Client, 'after_delete')
+def _invalidate_deleted_client(mapper, connection, target):
+    distance_matrix_service.invalidate_client(target.id)
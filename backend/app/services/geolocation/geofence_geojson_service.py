@@ -0,0 +1,361 @@
+from app.services.geolocation.distance_matrix_service import haversine_matrix
+from datetime import datetime
+import numpy as np
+import shapely
+import codecs
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class JSONValueReader:
+    """Reads a JSON document from a file-like object one value at a time"""
+
+    def __init__(self, stream, chunk_size=65536):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8-sig')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def peek(self):
+        """Next non-whitespace character, or '' at the end of the document"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._read():
+                return self._buffer[self._pos:self._pos + 1]
+
+    def expect(self, character):
+        found = self.peek()
+        if found != character:
+            raise ValueError(f"Expected '{character}' at offset {self._pos}, found {found or 'end of input'!r}")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # Read at least as much again, so a large value is re-parsed a few times at most
+            self._read(max(self.chunk_size, len(self._buffer) - self._pos))
+
+    def _read(self, size=None):
+        if self._eof:
+            return False
+        chunk = self.stream.read(size or self.chunk_size)
+        if isinstance(chunk, bytes):
+            chunk = self._text.decode(chunk, final=not chunk)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop what was already consumed
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+class GeofenceGeoJSONService:
+    """Service for converting geofences to and from GeoJSON"""
+
+    def __init__(self, min_radius_meters=10, max_radius_meters=5000, read_chunk_size=65536):
+        self.min_radius_meters = min_radius_meters
+        self.max_radius_meters = max_radius_meters
+        self.read_chunk_size = read_chunk_size
+
+    def init_app(self, app):
+        self.min_radius_meters = app.config.get('GEOFENCE_MIN_RADIUS_METERS', self.min_radius_meters)
+        self.max_radius_meters = app.config.get('GEOFENCE_MAX_RADIUS_METERS', self.max_radius_meters)
+
+    def iter_features(self, stream, line_delimited=False):
+        """
+        Iterate over GeoJSON features from a file-like object
+
+        Neither format is held in memory as a whole: FeatureCollection
+        features are decoded one at a time as the array is read.
+
+        Args:
+            stream: Binary or text file-like object
+            line_delimited (bool): True for GeoJSON text sequences (one feature
+                per line)
+
+        Yields:
+            dict: GeoJSON Feature objects
+
+        Raises:
+            ValueError: If the document is not valid GeoJSON text
+        """
+        if line_delimited:
+            for line in stream:
+                if isinstance(line, bytes):
+                    line = line.decode('utf-8')
+                # RFC 8142 record separators are optional
+                line = line.strip().lstrip('\x1e')
+                if line:
+                    yield json.loads(line)
+            return
+
+        reader = JSONValueReader(stream, self.read_chunk_size)
+        document = {}
+        streamed = False
+        reader.expect('{')
+        if reader.peek() == '}':
+            reader.expect('}')
+        else:
+            while True:
+                key = reader.value()
+                reader.expect(':')
+                if key == 'features' and reader.peek() == '[' and \
+                        document.get('type', 'FeatureCollection') == 'FeatureCollection':
+                    reader.expect('[')
+                    if reader.peek() == ']':
+                        reader.expect(']')
+                    else:
+                        while True:
+                            yield reader.value()
+                            if reader.peek() != ',':
+                                break
+                            reader.expect(',')
+                        reader.expect(']')
+                    streamed = True
+                else:
+                    document[key] = reader.value()
+                if reader.peek() != ',':
+                    break
+                reader.expect(',')
+            reader.expect('}')
+        if reader.peek():
+            raise ValueError('Unexpected data after the GeoJSON document')
+
+        if document.get('type') == 'FeatureCollection':
+            if not streamed:
+                yield from document.get('features') or []
+        elif document.get('type') == 'Feature' and not streamed:
+            yield document
+        else:
+            raise ValueError('Expected a GeoJSON FeatureCollection or Feature')
+
+    def referenced_client_ids(self, features):
+        """Get the client IDs a batch of features names, ignoring malformed features"""
+        client_ids = set()
+        for feature in features:
+            properties = feature.get('properties') if isinstance(feature, dict) else None
+            client_id = properties.get('client_id') if isinstance(properties, dict) else None
+            if isinstance(client_id, str):
+                client_ids.add(client_id)
+        return client_ids
+
+    def validate_features(self, features, known_client_ids):
+        """
+        Validate a batch of features and convert valid ones to geofence rows
+
+        Coordinate ranges, radii and polygon validity are checked with array
+        operations over the whole batch.
+
+        Args:
+            features (list): GeoJSON Feature objects
+            known_client_ids (set): Client IDs that exist
+
+        Returns:
+            tuple: (rows, errors) where rows are column dicts ready for a bulk
+                   insert (without 'created_by') and errors are
+                   {'index': i, 'error': message} dicts
+        """
+        count = len(features)
+        errors = {}
+
+        names = []
+        client_ids = []
+        types = []
+        latitudes = np.full(count, np.nan)
+        longitudes = np.full(count, np.nan)
+        radii = np.full(count, np.nan)
+        active = []
+        rings = {}
+
+        # Structural pass: pull out the columns the vectorized checks need
+        for i, feature in enumerate(features):
+            if not isinstance(feature, dict):
+                errors[i] = 'Feature must be a JSON object'
+                feature = {}
+            properties = feature.get('properties') or {}
+            geometry = feature.get('geometry') or {}
+            if not isinstance(properties, dict) or not isinstance(geometry, dict):
+                errors.setdefault(i, 'properties and geometry must be JSON objects')
+                properties = properties if isinstance(properties, dict) else {}
+                geometry = geometry if isinstance(geometry, dict) else {}
+            name = properties.get('name')
+            client_id = properties.get('client_id')
+            if name is not None and not isinstance(name, str):
+                errors.setdefault(i, 'name must be a string')
+                name = None
+            if client_id is not None and not isinstance(client_id, str):
+                errors.setdefault(i, 'client_id must be a string')
+                client_id = None
+            names.append(name)
+            client_ids.append(client_id)
+            active.append(properties.get('is_active', True))
+            if not isinstance(active[i], bool):
+                errors.setdefault(i, 'is_active must be true or false')
+            geometry_type = geometry.get('type')
+            coordinates = geometry.get('coordinates')
+            try:
+                if geometry_type == 'Point':
+                    types.append('circle')
+                    longitudes[i], latitudes[i] = float(coordinates[0]), float(coordinates[1])
+                    radius = properties.get('radius_meters', properties.get('radius'))
+                    radii[i] = float(radius) if radius is not None else np.nan
+                elif geometry_type == 'Polygon':
+                    types.append('polygon')
+                    rings[i] = np.asarray(coordinates[0], dtype=float)[:, :2]
+                else:
+                    types.append(None)
+                    errors.setdefault(i, f'Unsupported geometry type: {geometry_type}')
+            except (TypeError, ValueError, IndexError, KeyError):
+                errors.setdefault(i, 'Malformed geometry coordinates')
+
+        # Polygons: vertex ranges, ring validity, then derive center and radius
+        polygon_indices = np.array([i for i in rings if i not in errors], dtype=int)
+        polygons = {}
+        if polygon_indices.size:
+            ring_list = [rings[i] for i in polygon_indices]
+            vertices = np.concatenate(ring_list)
+            owners = np.repeat(np.arange(polygon_indices.size), [len(r) for r in ring_list])
+            bad_vertex = ~((np.abs(vertices[:, 1]) <= 90) & (np.abs(vertices[:, 0]) <= 180))
+            bad_ring = np.bincount(owners, weights=bad_vertex, minlength=polygon_indices.size) > 0
+            too_short = np.array([len(r) < 4 for r in ring_list])
+
+            geometries = np.array([
+                shapely.Polygon(ring) if not (bad or short) else None
+                for ring, bad, short in zip(ring_list, bad_ring, too_short)
+            ], dtype=object)
+            valid = shapely.is_valid(geometries)
+            reasons = shapely.is_valid_reason(geometries)
+            centroids = shapely.centroid(geometries)
+            center_x = shapely.get_x(centroids)
+            center_y = shapely.get_y(centroids)
+
+            for position, i in enumerate(polygon_indices):
+                if bad_ring[position]:
+                    errors[i] = 'Polygon coordinates out of range'
+                elif too_short[position]:
+                    errors[i] = 'Polygon ring needs at least 4 positions'
+                elif not valid[position]:
+                    errors[i] = f'Invalid polygon: {reasons[position]}'
+                else:
+                    ring = ring_list[position]
+                    latitudes[i], longitudes[i] = center_y[position], center_x[position]
+                    # Radius covers the furthest vertex so the circle bounds the polygon
+                    radii[i] = float(haversine_matrix(
+                        [(center_y[position], center_x[position])], ring[:, ::-1]
+                    ).max())
+                    polygons[i] = [{'lat': float(lat), 'lng': float(lng)} for lng, lat in ring]
+
+        # Circles and centers: ranges and radius limits for the whole batch at once
+        bad_center = ~(np.isfinite(latitudes) & np.isfinite(longitudes) &
+                       (np.abs(latitudes) <= 90) & (np.abs(longitudes) <= 180))
+        bad_radius = ~(np.isfinite(radii) &
+                       (radii >= self.min_radius_meters) & (radii <= self.max_radius_meters))
+        known = np.array([cid in known_client_ids for cid in client_ids], dtype=bool)
+        missing_name = np.array([not name for name in names], dtype=bool)
+
+        for i in np.flatnonzero(bad_center | bad_radius | ~known | missing_name):
+            if i in errors:
+                continue
+            if missing_name[i]:
+                errors[i] = 'name is required'
+            elif not client_ids[i]:
+                errors[i] = 'client_id is required'
+            elif not known[i]:
+                errors[i] = f'Client not found: {client_ids[i]}'
+            elif bad_center[i]:
+                errors[i] = 'Point coordinates out of range'
+            else:
+                errors[i] = (f'radius_meters must be between {self.min_radius_meters} '
+                             f'and {self.max_radius_meters}')
+
+        now = datetime.utcnow()
+        rows = []
+        for i, feature in enumerate(features):
+            if i in errors:
+                continue
+            properties = feature.get('properties') or {}
+            rows.append({
+                'id': str(uuid.uuid4()),
+                'name': names[i],
+                'description': properties.get('description'),
+                'client_id': client_ids[i],
+                'center_latitude': float(latitudes[i]),
+                'center_longitude': float(longitudes[i]),
+                'radius_meters': float(radii[i]),
+                'geofence_type': types[i],
+                'polygon_coordinates': polygons.get(i),
+                'is_active': active[i],
+                'created_at': now,
+                'updated_at': now
+            })
+
+        return rows, [{'index': int(i), 'error': errors[i]} for i in sorted(errors)]
+
+    def to_feature(self, geofence):
+        """
+        Convert a geofence (model instance or row) to a GeoJSON Feature
+
+        Circles become Points with a radius_meters property; polygons keep their shape.
+        """
+        if geofence.geofence_type == 'polygon' and geofence.polygon_coordinates:
+            ring = [[coord['lng'], coord['lat']] for coord in geofence.polygon_coordinates]
+            if ring and ring[0] != ring[-1]:
+                ring.append(ring[0])
+            geometry = {'type': 'Polygon', 'coordinates': [ring]}
+        else:
+            geometry = {
+                'type': 'Point',
+                'coordinates': [geofence.center_longitude, geofence.center_latitude]
+            }
+
+        return {
+            'type': 'Feature',
+            'id': geofence.id,
+            'geometry': geometry,
+            'properties': {
+                'name': geofence.name,
+                'description': geofence.description,
+                'client_id': geofence.client_id,
+                'geofence_type': geofence.geofence_type,
+                'radius_meters': geofence.radius_meters,
+                'is_active': geofence.is_active
+            }
+        }
+
+    def iter_feature_collection(self, geofences):
+        """
+        Stream a FeatureCollection as JSON text chunks
+
+        Args:
+            geofences: Iterable of geofences (consumed lazily)
+
+        Yields:
+            str: JSON text chunks
+        """
+        yield '{"type": "FeatureCollection", "features": ['
+        first = True
+        for geofence in geofences:
+            if not first:
+                yield ','
+            yield json.dumps(self.to_feature(geofence))
+            first = False
+        yield ']}'
+
+# Global instance for easy access
+geofence_geojson_service = GeofenceGeoJSONService()
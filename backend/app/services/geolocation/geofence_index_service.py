@@ -0,0 +1,221 @@
+from app import db
+from app.models.geolocation.geofence import Geofence
+from shapely.geometry import Point, Polygon
+from shapely.strtree import STRtree
+from sqlalchemy import event
+import numpy as np
+import shapely
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_DEGREE_LATITUDE = 111320.0
+
+def circle_bounds(latitudes, longitudes, radii_meters):
+    """
+    Calculate bounding boxes (in degrees) for circular geofences
+
+    Args:
+        latitudes: Array of center latitudes
+        longitudes: Array of center longitudes
+        radii_meters: Array of radii in meters
+
+    Returns:
+        tuple: (min_lng, min_lat, max_lng, max_lat) arrays
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    radii_meters = np.asarray(radii_meters, dtype=float)
+
+    lat_delta = radii_meters / METERS_PER_DEGREE_LATITUDE
+    cos_lat = np.maximum(np.cos(np.radians(latitudes)), 1e-6)
+    lng_delta = radii_meters / (METERS_PER_DEGREE_LATITUDE * cos_lat)
+    return longitudes - lng_delta, latitudes - lat_delta, longitudes + lng_delta, latitudes + lat_delta
+
+def polygon_from_coordinates(polygon_coordinates):
+    """Build a shapely polygon from [{'lat': .., 'lng': ..}, ...] coordinates"""
+    return Polygon([(coord['lng'], coord['lat']) for coord in polygon_coordinates])
+
+class GeofenceIndexService:
+    """In-process R-tree over active geofences for point and overlap queries"""
+
+    def __init__(self, max_age_seconds=60):
+        # Other worker processes can change geofences, so the index is also
+        # rebuilt once it is older than this
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._tree = None
+        self._entries = []
+        self._built_at = 0.0
+        self._dirty = True
+
+    def init_app(self, app):
+        self.max_age_seconds = app.config.get('GEOFENCE_INDEX_MAX_AGE_SECONDS', self.max_age_seconds)
+
+    def invalidate(self):
+        """Mark the index stale so it is rebuilt on next use"""
+        self._dirty = True
+
+    def rebuild(self):
+        """Rebuild the index from all active geofences in a single query"""
+        rows = db.session.query(
+            Geofence.id, Geofence.name, Geofence.client_id, Geofence.geofence_type,
+            Geofence.center_latitude, Geofence.center_longitude, Geofence.radius_meters,
+            Geofence.polygon_coordinates
+        ).filter(Geofence.is_active == True).all()
+        return self.load(rows)
+
+    def load(self, rows):
+        """
+        Replace the index contents with the given geofence rows
+
+        Args:
+            rows: Objects with id, name, client_id, geofence_type, center_latitude,
+                center_longitude, radius_meters and polygon_coordinates attributes
+
+        Returns:
+            int: Number of indexed geofences
+        """
+        entries, geometries = self.build_entries(rows)
+
+        with self._lock:
+            self._entries = entries
+            self._tree = STRtree(geometries) if geometries else None
+            self._built_at = time.monotonic()
+            self._dirty = False
+
+        logger.info(f"Built geofence index with {len(entries)} geofences")
+        return len(entries)
+
+    def build_entries(self, rows):
+        """
+        Build index entries and bounding geometries for geofence rows
+
+        Circles are indexed by their bounding box and polygons by their shape.
+
+        Returns:
+            tuple: (entries, geometries) with matching positions
+        """
+        if not rows:
+            return [], []
+
+        radii = np.array([row.radius_meters or 0.0 for row in rows], dtype=float)
+        min_lng, min_lat, max_lng, max_lat = circle_bounds(
+            [row.center_latitude for row in rows],
+            [row.center_longitude for row in rows],
+            radii
+        )
+        boxes = shapely.box(min_lng, min_lat, max_lng, max_lat)
+
+        entries = []
+        geometries = []
+        for position, row in enumerate(rows):
+            polygon = None
+            if row.geofence_type == 'polygon' and row.polygon_coordinates:
+                try:
+                    polygon = polygon_from_coordinates(row.polygon_coordinates)
+                except Exception as e:
+                    logger.warning(f"Skipping invalid polygon for geofence {row.id}: {e}")
+                    continue
+            entries.append({
+                'id': row.id,
+                'name': row.name,
+                'client_id': row.client_id,
+                'geofence_type': row.geofence_type,
+                'center_latitude': row.center_latitude,
+                'center_longitude': row.center_longitude,
+                'radius_meters': row.radius_meters,
+                'polygon': polygon
+            })
+            geometries.append(polygon if polygon is not None else boxes[position])
+        return entries, geometries
+
+    def find_containing(self, latitude, longitude):
+        """
+        Find active geofences that contain a point
+
+        Args:
+            latitude (float): Point latitude
+            longitude (float): Point longitude
+
+        Returns:
+            list: Index entries for geofences containing the point
+        """
+        tree, entries = self._current()
+        if tree is None:
+            return []
+
+        point = Point(longitude, latitude)
+        matches = []
+        for position in tree.query(point):
+            entry = entries[position]
+            if self.entry_contains(entry, latitude, longitude):
+                matches.append(entry)
+        return matches
+
+    def query_overlaps(self):
+        """
+        Find pairs of active geofences whose shapes overlap
+
+        Returns:
+            list: (entry_a, entry_b, distance_meters) tuples, one per overlapping pair;
+                  the distance is between circle centers, or from a polygon to a
+                  circle center, and 0 for two polygons
+        """
+        tree, entries = self._current()
+        if tree is None:
+            return []
+
+        from app.services.geolocation.distance_matrix_service import haversine_matrix
+
+        left, right = tree.query(tree.geometries, predicate='intersects')
+        pairs = left < right
+        overlaps = []
+        for i, j in zip(left[pairs], right[pairs]):
+            a, b = entries[i], entries[j]
+            if a['polygon'] is not None and b['polygon'] is not None:
+                if a['polygon'].intersects(b['polygon']):
+                    overlaps.append((a, b, 0.0))
+            elif a['polygon'] is not None or b['polygon'] is not None:
+                polygon, circle = (a, b) if a['polygon'] is not None else (b, a)
+                center = Point(circle['center_longitude'], circle['center_latitude'])
+                # Approximate degrees-to-meters conversion; fine for diagnostics
+                gap = polygon['polygon'].distance(center) * METERS_PER_DEGREE_LATITUDE
+                if gap < (circle['radius_meters'] or 0.0):
+                    overlaps.append((a, b, gap))
+            else:
+                distance = float(haversine_matrix(
+                    [(a['center_latitude'], a['center_longitude'])],
+                    [(b['center_latitude'], b['center_longitude'])]
+                )[0][0])
+                if distance < (a['radius_meters'] or 0.0) + (b['radius_meters'] or 0.0):
+                    overlaps.append((a, b, distance))
+        return overlaps
+
+    @staticmethod
+    def entry_contains(entry, latitude, longitude):
+        """Exact containment check matching Geofence.is_point_inside"""
+        if entry['geofence_type'] == 'polygon':
+            return entry['polygon'] is not None and entry['polygon'].contains(Point(longitude, latitude))
+        from geopy.distance import geodesic
+        center = (entry['center_latitude'], entry['center_longitude'])
+        return geodesic(center, (latitude, longitude)).meters <= entry['radius_meters']
+
+    def _current(self):
+        """Return the tree and entries, rebuilding them first if stale"""
+        if self._dirty or time.monotonic() - self._built_at > self.max_age_seconds:
+            self.rebuild()
+        with self._lock:
+            return self._tree, self._entries
+
+# Global instance for easy access
+geofence_index_service = GeofenceIndexService()
+
+@event.listens_for(Geofence, 'after_insert')
+@event.listens_for(Geofence, 'after_update')
+@event.listens_for(Geofence, 'after_delete')
+def _invalidate_geofence_index(mapper, connection, target):
+    """Rebuild the index lazily after any ORM geofence change"""
+    geofence_index_service.invalidate()
@@ -0,0 +1,227 @@
+from geopy.location import Location
+from datetime import datetime
+import csv
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Word-level normalization so "123 Main Street" and "123 main st." share a key
+ABBREVIATIONS = {
+    'road': 'rd', 'street': 'st', 'avenue': 'ave', 'boulevard': 'blvd', 'drive': 'dr',
+    'lane': 'ln', 'circle': 'cir', 'court': 'ct', 'place': 'pl', 'terrace': 'ter',
+    'highway': 'hwy', 'parkway': 'pkwy', 'north': 'n', 'south': 's', 'east': 'e',
+    'west': 'w', 'northeast': 'ne', 'northwest': 'nw', 'southeast': 'se',
+    'southwest': 'sw', 'apartment': 'apt', 'suite': 'ste', 'florida': 'fl'
+}
+
+POSTCODE_PATTERN = re.compile(r'^\d{5}(?:-\d{4})?$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gazetteer (
+    normalized_address TEXT PRIMARY KEY,
+    address TEXT NOT NULL,
+    postcode TEXT,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    source TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_gazetteer_postcode ON gazetteer (postcode);
+CREATE INDEX IF NOT EXISTS ix_gazetteer_lat_lng ON gazetteer (latitude, longitude);
+"""
+
+def normalize_address(address):
+    """
+    Normalize an address into a lookup key
+
+    Args:
+        address (str): Raw address string
+
+    Returns:
+        str: Lowercased, punctuation-free, abbreviated address
+    """
+    if not address:
+        return ''
+    tokens = re.sub(r'[^\w\s-]', ' ', address.lower()).split()
+    return ' '.join(ABBREVIATIONS.get(token, token) for token in tokens)
+
+def extract_postcode(address):
+    """Return the last US ZIP code found in an address, if any"""
+    matches = re.findall(r'\b\d{5}(?:-\d{4})?\b', address or '')
+    return matches[-1][:5] if matches else None
+
+class LocalGazetteer:
+    """
+    Offline geocoder backed by an indexed SQLite table of known addresses
+
+    Exposes the same geocode/reverse interface as geopy geocoders so it can
+    sit in front of the network providers in GeocodingService.
+    """
+
+    def __init__(self, path='gazetteer.db', reverse_max_meters=100):
+        self.path = path
+        self.reverse_max_meters = reverse_max_meters
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self.path != ':memory:':
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.row_factory = sqlite3.Row
+            if self.path != ':memory:':
+                connection.execute('PRAGMA journal_mode=WAL')
+            # Per connection, so each thread's in-memory database has the table too
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def geocode(self, query, timeout=None, **kwargs):
+        """
+        Look up an address or a bare postcode
+
+        Args:
+            query (str): Address or postcode
+            timeout: Ignored, accepted for geopy compatibility
+
+        Returns:
+            geopy.location.Location or None
+        """
+        key = normalize_address(query)
+        if not key:
+            return None
+
+        row = self._connection().execute(
+            'SELECT * FROM gazetteer WHERE normalized_address = ?', (key,)
+        ).fetchone()
+
+        if row is None and POSTCODE_PATTERN.match(key):
+            # Bare postcode: answer with the centroid of known addresses in it
+            row = self._connection().execute(
+                'SELECT ? AS address, AVG(latitude) AS latitude, AVG(longitude) AS longitude, '
+                'COUNT(*) AS matches FROM gazetteer WHERE postcode = ? HAVING COUNT(*) > 0',
+                (key[:5], key[:5])
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return Location(row['address'], (row['latitude'], row['longitude']), dict(row))
+
+    def reverse(self, query, timeout=None, **kwargs):
+        """
+        Find the closest known address to a point
+
+        Args:
+            query: "lat, lng" string or (lat, lng) pair
+            timeout: Ignored, accepted for geopy compatibility
+
+        Returns:
+            geopy.location.Location or None if nothing is within reverse_max_meters
+        """
+        if isinstance(query, str):
+            latitude, longitude = (float(part) for part in query.split(','))
+        else:
+            latitude, longitude = float(query[0]), float(query[1])
+
+        lat_delta = self.reverse_max_meters / 111320.0
+        lng_delta = lat_delta / max(math.cos(math.radians(latitude)), 1e-6)
+        rows = self._connection().execute(
+            'SELECT * FROM gazetteer WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?',
+            (latitude - lat_delta, latitude + lat_delta, longitude - lng_delta, longitude + lng_delta)
+        ).fetchall()
+
+        best = None
+        best_distance = self.reverse_max_meters
+        for row in rows:
+            distance = self._haversine(latitude, longitude, row['latitude'], row['longitude'])
+            if distance <= best_distance:
+                best, best_distance = row, distance
+
+        if best is None:
+            return None
+        return Location(best['address'], (best['latitude'], best['longitude']), dict(best))
+
+    def add(self, address, latitude, longitude, formatted_address=None, source='manual'):
+        """
+        Store an address and its coordinates
+
+        Args:
+            address (str): Address as it will be queried
+            latitude (float): Latitude
+            longitude (float): Longitude
+            formatted_address (str): Display address, defaults to the address
+            source (str): Where the coordinates came from
+        """
+        key = normalize_address(address)
+        if not key:
+            return
+        display = formatted_address or address
+        with self._write_lock:
+            connection = self._connection()
+            connection.execute(
+                'INSERT OR REPLACE INTO gazetteer '
+                '(normalized_address, address, postcode, latitude, longitude, source, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, display, extract_postcode(display) or extract_postcode(address),
+                 float(latitude), float(longitude), source, datetime.utcnow().isoformat())
+            )
+            connection.commit()
+
+    def import_csv(self, path, source='import'):
+        """
+        Bulk load addresses from a CSV with address, latitude and longitude columns
+
+        Returns:
+            int: Number of rows loaded
+        """
+        count = 0
+        with open(path, newline='') as handle, self._write_lock:
+            connection = self._connection()
+            rows = []
+            for record in csv.DictReader(handle):
+                key = normalize_address(record.get('address'))
+                if not key:
+                    continue
+                rows.append((
+                    key, record['address'],
+                    record.get('postcode') or extract_postcode(record['address']),
+                    float(record['latitude']), float(record['longitude']),
+                    record.get('source') or source, datetime.utcnow().isoformat()
+                ))
+                if len(rows) >= 1000:
+                    count += self._insert_many(connection, rows)
+                    rows = []
+            if rows:
+                count += self._insert_many(connection, rows)
+            connection.commit()
+        logger.info(f"Loaded {count} gazetteer entries from {path}")
+        return count
+
+    def count(self):
+        return self._connection().execute('SELECT COUNT(*) FROM gazetteer').fetchone()[0]
+
+    @staticmethod
+    def _insert_many(connection, rows):
+        connection.executemany(
+            'INSERT OR REPLACE INTO gazetteer '
+            '(normalized_address, address, postcode, latitude, longitude, source, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+        return len(rows)
+
+    @staticmethod
+    def _haversine(lat1, lng1, lat2, lng2):
+        phi1, phi2 = math.radians(lat1), math.radians(lat2)
+        a = (math.sin((phi2 - phi1) / 2) ** 2 +
+             math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+        return 2 * 6371008.8 * math.asin(math.sqrt(min(a, 1.0)))
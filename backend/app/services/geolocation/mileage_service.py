@@ -0,0 +1,266 @@
+from app import db
+from app.models.geolocation.location import Location
+from app.models.geolocation.daily_mileage import DailyMileage
+from app.services.geolocation.distance_matrix_service import haversine_pairwise
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import numpy as np
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class MileageService:
+    """Service for computing driven distance per caregiver per day from location trails"""
+
+    def __init__(self, max_accuracy_meters=50.0, max_speed_mps=55.0, min_displacement_meters=25.0,
+                 timezone_name='UTC'):
+        # Fixes with a worse reported accuracy are ignored
+        self.max_accuracy_meters = max_accuracy_meters
+        # Legs implying a faster speed (~123 mph) are treated as GPS teleports
+        self.max_speed_mps = max_speed_mps
+        # Fixes closer than this, or than both fixes' accuracy radii combined, to
+        # the last accepted fix are GPS jitter while stationary and add no distance
+        self.min_displacement_meters = min_displacement_meters
+        # Rollups are per local calendar day, so evening driving counts on the day it happened
+        self.timezone = ZoneInfo(timezone_name)
+
+    def init_app(self, app):
+        self.max_accuracy_meters = app.config.get('MILEAGE_MAX_ACCURACY_METERS', self.max_accuracy_meters)
+        self.max_speed_mps = app.config.get('MILEAGE_MAX_SPEED_MPS', self.max_speed_mps)
+        self.min_displacement_meters = app.config.get('MILEAGE_MIN_DISPLACEMENT_METERS', self.min_displacement_meters)
+        self.timezone = ZoneInfo(app.config.get('AGENCY_TIMEZONE', self.timezone.key))
+
+    def local_date(self, timestamp):
+        """Agency-local calendar day of a naive UTC timestamp"""
+        return timestamp.replace(tzinfo=timezone.utc).astimezone(self.timezone).date()
+
+    def day_bounds(self, day):
+        """Naive UTC start and end of an agency-local calendar day"""
+        start = datetime.combine(day, datetime.min.time(), tzinfo=self.timezone)
+        end = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=self.timezone)
+        return (start.astimezone(timezone.utc).replace(tzinfo=None),
+                end.astimezone(timezone.utc).replace(tzinfo=None))
+
+    def compute_trail_distance(self, latitudes, longitudes, timestamps, accuracies=None):
+        """
+        Compute driven distance for an ordered trail of fixes
+
+        Args:
+            latitudes: Sequence of latitudes ordered by time
+            longitudes: Sequence of longitudes ordered by time
+            timestamps: Sequence of datetimes ordered by time
+            accuracies: Optional sequence of reported accuracies in meters (None allowed)
+
+        Returns:
+            dict: 'distance_meters', 'point_count', 'dropped_point_count' and
+                  'kept_indices' (indices of the fixes that were used); stationary
+                  fixes are neither used nor dropped
+        """
+        count = len(latitudes)
+        if count == 0:
+            return {'distance_meters': 0.0, 'point_count': 0, 'dropped_point_count': 0, 'kept_indices': []}
+
+        lat = np.asarray(latitudes, dtype=float)
+        lon = np.asarray(longitudes, dtype=float)
+        seconds = np.array([ts.timestamp() for ts in timestamps], dtype=float)
+        indices = np.arange(count)
+        if accuracies is None:
+            acc = np.full(count, np.nan)
+        else:
+            acc = np.array([np.nan if a is None else a for a in accuracies], dtype=float)
+
+        # Drop fixes below the accuracy threshold (missing accuracy is trusted)
+        keep = np.isnan(acc) | (acc <= self.max_accuracy_meters)
+        lat, lon, seconds, indices, acc = lat[keep], lon[keep], seconds[keep], indices[keep], acc[keep]
+
+        # Drop teleport spikes: fixes reached and left at implausible speed
+        if lat.size >= 3:
+            speeds = self._leg_speeds(lat, lon, seconds)
+            too_fast = speeds > self.max_speed_mps
+            spike = np.zeros(lat.size, dtype=bool)
+            spike[1:-1] = too_fast[:-1] & too_fast[1:]
+            keep = ~spike
+            lat, lon, seconds, indices, acc = lat[keep], lon[keep], seconds[keep], indices[keep], acc[keep]
+        accepted_count = int(lat.size)
+
+        # Skip jitter around the last accepted fix; measuring from that fix
+        # rather than the previous one still counts slow, steady movement
+        if lat.size >= 2:
+            keep = np.zeros(lat.size, dtype=bool)
+            keep[0] = True
+            anchor = 0
+            for i in range(1, lat.size):
+                leg = haversine_pairwise(lat[[anchor, i]], lon[[anchor, i]])[0]
+                if leg >= self._min_leg(acc[anchor], acc[i]):
+                    keep[i] = True
+                    anchor = i
+            lat, lon, seconds, indices = lat[keep], lon[keep], seconds[keep], indices[keep]
+
+        # Remaining implausible legs (e.g. a stale first fix) contribute no distance
+        legs = haversine_pairwise(lat, lon)
+        if legs.size:
+            speeds = self._leg_speeds(lat, lon, seconds, legs)
+            legs = np.where(speeds > self.max_speed_mps, 0.0, legs)
+
+        return {
+            'distance_meters': float(legs.sum()),
+            'point_count': int(lat.size),
+            'dropped_point_count': count - accepted_count,
+            'kept_indices': indices.tolist()
+        }
+
+    def record_location(self, location):
+        """
+        Extend the daily rollup with a newly received fix
+
+        The caller is responsible for committing the session.
+
+        Args:
+            location (Location): The fix that was just stored
+
+        Returns:
+            DailyMileage: The updated rollup row
+        """
+        timestamp = location.timestamp or datetime.utcnow()
+        day = self.local_date(timestamp)
+        rollup = self._get_or_create_rollup(location.user_id, day)
+
+        if location.accuracy is not None and location.accuracy > self.max_accuracy_meters:
+            rollup.dropped_point_count = (rollup.dropped_point_count or 0) + 1
+            return rollup
+
+        if rollup.last_timestamp is None:
+            self._accept(rollup, location, timestamp, 0.0)
+            return rollup
+
+        if timestamp < rollup.last_timestamp:
+            # Late, out-of-order fix: replay the day so ordering stays correct
+            return self.rebuild_day(location.user_id, day)
+
+        leg, speed = self._leg(rollup.last_latitude, rollup.last_longitude, rollup.last_timestamp,
+                               location.latitude, location.longitude, timestamp)
+        if speed <= self.max_speed_mps:
+            if leg >= self._min_leg(rollup.last_accuracy, location.accuracy):
+                self._accept(rollup, location, timestamp, leg)
+            return rollup
+
+        # Teleport relative to the last accepted fix. If it agrees with the previous
+        # rejected fix, the anchor was stale: re-anchor without counting the jump.
+        rollup.dropped_point_count = (rollup.dropped_point_count or 0) + 1
+        if rollup.pending_timestamp is not None:
+            pending_leg, pending_speed = self._leg(
+                rollup.pending_latitude, rollup.pending_longitude, rollup.pending_timestamp,
+                location.latitude, location.longitude, timestamp
+            )
+            if pending_speed <= self.max_speed_mps:
+                rollup.dropped_point_count -= 1
+                self._accept(rollup, location, timestamp, pending_leg)
+                return rollup
+
+        rollup.pending_latitude = location.latitude
+        rollup.pending_longitude = location.longitude
+        rollup.pending_timestamp = timestamp
+        return rollup
+
+    def rebuild_day(self, user_id, day):
+        """
+        Recompute a user's rollup for one day from the stored trail
+
+        The caller is responsible for committing the session.
+
+        Args:
+            user_id (str): Caregiver user ID
+            day (date): Agency-local day to rebuild
+
+        Returns:
+            DailyMileage: The rebuilt rollup row
+        """
+        start, end = self.day_bounds(day)
+        rows = db.session.query(
+            Location.latitude, Location.longitude, Location.timestamp, Location.accuracy
+        ).filter(
+            Location.user_id == user_id,
+            Location.timestamp >= start,
+            Location.timestamp < end
+        ).order_by(Location.timestamp).all()
+
+        rollup = self._get_or_create_rollup(user_id, day)
+        result = self.compute_trail_distance(
+            [r.latitude for r in rows],
+            [r.longitude for r in rows],
+            [r.timestamp for r in rows],
+            [r.accuracy for r in rows]
+        )
+
+        rollup.distance_meters = result['distance_meters']
+        rollup.point_count = result['point_count']
+        rollup.dropped_point_count = result['dropped_point_count']
+        rollup.pending_latitude = rollup.pending_longitude = rollup.pending_timestamp = None
+        if result['kept_indices']:
+            last = rows[result['kept_indices'][-1]]
+            rollup.last_latitude = last.latitude
+            rollup.last_longitude = last.longitude
+            rollup.last_timestamp = last.timestamp
+            rollup.last_accuracy = last.accuracy
+        else:
+            rollup.last_latitude = rollup.last_longitude = rollup.last_timestamp = None
+            rollup.last_accuracy = None
+
+        logger.info(f"Rebuilt mileage for user {user_id} on {day}: {rollup.distance_meters:.1f}m "
+                    f"from {rollup.point_count} fixes ({rollup.dropped_point_count} dropped)")
+        return rollup
+
+    def _get_or_create_rollup(self, user_id, day):
+        # Upsert, so concurrent pings for a new day do not race on uq_daily_mileage_user_date
+        insert = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+        now = datetime.utcnow()
+        db.session.execute(insert(DailyMileage.__table__).values(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            date=day,
+            distance_meters=0.0,
+            point_count=0,
+            dropped_point_count=0,
+            created_at=now,
+            updated_at=now
+        ).on_conflict_do_nothing(index_elements=['user_id', 'date']))
+        # Locked until commit, so concurrent pings extend the rollup one after another
+        return DailyMileage.query.filter_by(user_id=user_id, date=day) \
+            .populate_existing().with_for_update().one()
+
+    def _accept(self, rollup, location, timestamp, leg_meters):
+        rollup.distance_meters = (rollup.distance_meters or 0.0) + leg_meters
+        rollup.point_count = (rollup.point_count or 0) + 1
+        rollup.last_latitude = location.latitude
+        rollup.last_longitude = location.longitude
+        rollup.last_timestamp = timestamp
+        rollup.last_accuracy = location.accuracy
+        rollup.pending_latitude = rollup.pending_longitude = rollup.pending_timestamp = None
+
+    def _min_leg(self, accuracy1, accuracy2):
+        """Shortest leg that is movement rather than jitter between two fixes"""
+        radii = sum(a for a in (accuracy1, accuracy2) if a is not None and a == a)
+        return max(self.min_displacement_meters, radii)
+
+    def _leg(self, lat1, lon1, time1, lat2, lon2, time2):
+        """Distance in meters and implied speed in m/s between two fixes"""
+        leg = float(haversine_pairwise([lat1, lat2], [lon1, lon2])[0])
+        elapsed = (time2 - time1).total_seconds()
+        speed = leg / elapsed if elapsed > 0 else (0.0 if leg == 0 else float('inf'))
+        return leg, speed
+
+    def _leg_speeds(self, lat, lon, seconds, legs=None):
+        """Implied speed in m/s for each consecutive leg of a trail"""
+        if legs is None:
+            legs = haversine_pairwise(lat, lon)
+        elapsed = np.diff(seconds)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            speeds = np.where(elapsed > 0, legs / np.where(elapsed > 0, elapsed, 1.0),
+                              np.where(legs > 0, np.inf, 0.0))
+        return speeds
+
+# Global instance for easy access
+mileage_service = MileageService()
@@ -0,0 +1,379 @@
+from app import db
+from app.models.auth.role import Role
+from app.models.auth.user import User
+from app.models.client.caregiver_assignment import CaregiverAssignment
+from app.models.task.caregiver_daily_workload import CaregiverDailyWorkload
+from app.models.task.task import Task
+from app.models.task.task_assignment import TaskAssignment
+from app.models.timesheet.timesheet import Timesheet
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Parts of the day, in minutes after midnight, used to split scheduled minutes
+PERIODS = {
+    'morning': (0, 12 * 60),
+    'afternoon': (12 * 60, 17 * 60),
+    'evening': (17 * 60, 24 * 60)
+}
+
+WORKLOAD_COLUMNS = [
+    'assigned_clients', 'assigned_tasks', 'completed_tasks', 'scheduled_minutes', 'morning_minutes',
+    'afternoon_minutes', 'evening_minutes', 'flexible_minutes', 'worked_minutes', 'is_clocked_in',
+    'capacity_minutes', 'available_minutes'
+]
+
+def period_of(scheduled_time):
+    minutes = scheduled_time.hour * 60 + scheduled_time.minute
+    for name, (start, end) in PERIODS.items():
+        if start <= minutes < end:
+            return name
+    return 'evening'
+
+class CaregiverWorkloadService:
+    """
+    Maintains the caregiver_daily_workload table and answers availability queries
+
+    Rows are recomputed for the affected (caregiver, day) keys inside the same
+    transaction as every ORM change to task assignments, tasks, timesheets and
+    caregiver assignments. Days nobody has asked about yet are computed the
+    first time they are read.
+    """
+
+    def __init__(self, capacity_minutes=480, default_task_minutes=30, day_start='07:00', day_end='20:00',
+                 max_range_days=62):
+        self.capacity_minutes = capacity_minutes
+        self.default_task_minutes = default_task_minutes
+        # Working hours, used to size each part of the day
+        self.day_start = day_start
+        self.day_end = day_end
+        self.max_range_days = max_range_days
+
+    def init_app(self, app):
+        self.capacity_minutes = app.config.get('CAREGIVER_DAILY_CAPACITY_MINUTES', self.capacity_minutes)
+        self.default_task_minutes = app.config.get('VISIT_SCHEDULING_DEFAULT_VISIT_MINUTES', self.default_task_minutes)
+        self.day_start = app.config.get('VISIT_SCHEDULING_DAY_START', self.day_start)
+        self.day_end = app.config.get('VISIT_SCHEDULING_DAY_END', self.day_end)
+        self.max_range_days = app.config.get('CAREGIVER_AVAILABILITY_MAX_DAYS', self.max_range_days)
+
+    def get_availability(self, start_date, end_date, caregiver_ids=None, period=None, min_available_minutes=None):
+        """
+        Workload and free time per caregiver per day
+
+        Args:
+            start_date (date): First day
+            end_date (date): Last day, inclusive
+            caregiver_ids (list): Limit to these caregivers
+            period (str): Only report free time in 'morning', 'afternoon' or 'evening'
+            min_available_minutes (int): Only include days with at least this much free time
+
+        Returns:
+            list: Caregivers with 'caregiver_id', 'name' and 'days'; caregivers
+                  without a matching day are left out when filtering
+
+        Raises:
+            ValueError: If the range is inverted or too long, or the period is unknown
+        """
+        if end_date < start_date:
+            raise ValueError('End date must not be before start date')
+        if (end_date - start_date).days + 1 > self.max_range_days:
+            raise ValueError(f"Date range is limited to {self.max_range_days} days")
+        if period is not None and period not in PERIODS:
+            raise ValueError(f"Period must be one of {', '.join(PERIODS)}")
+
+        query = db.session.query(User.id, User.first_name, User.last_name).join(Role, Role.id == User.role_id) \
+            .filter(Role.name == 'caregiver', User.is_active == True)
+        if caregiver_ids:
+            query = query.filter(User.id.in_(caregiver_ids))
+        caregivers = query.order_by(User.last_name, User.first_name).all()
+        if not caregivers:
+            return []
+
+        ids = [caregiver.id for caregiver in caregivers]
+        days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        table = CaregiverDailyWorkload.__table__
+        workload = {}
+        for row in db.session.execute(
+            select(table.c.caregiver_id, table.c.date, table.c.updated_at, *[table.c[name] for name in WORKLOAD_COLUMNS])
+            .where(table.c.caregiver_id.in_(ids), table.c.date.between(start_date, end_date))
+        ).mappings():
+            workload[(row['caregiver_id'], row['date'])] = {
+                **row,
+                'date': row['date'].isoformat(),
+                'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None
+            }
+
+        missing = {(caregiver_id, day) for caregiver_id in ids for day in days} - workload.keys()
+        if missing:
+            try:
+                computed = self.refresh(missing)
+                db.session.commit()
+            except Exception as e:
+                # Still answer from the computed values; the next read retries the write
+                db.session.rollback()
+                logger.warning(f"Could not store caregiver workload: {str(e)}")
+                computed = self.compute(missing)
+            for key, values in computed.items():
+                workload[key] = {'caregiver_id': key[0], 'date': key[1].isoformat(), **values, 'updated_at': None}
+
+        results = []
+        for caregiver in caregivers:
+            caregiver_days = []
+            for day in days:
+                values = dict(workload[(caregiver.id, day)])
+                if period is not None:
+                    values['period'] = period
+                    values['period_available_minutes'] = self.period_available(values, period)
+                available = values['period_available_minutes'] if period is not None else values['available_minutes']
+                if min_available_minutes is not None and available < min_available_minutes:
+                    continue
+                caregiver_days.append(values)
+            if caregiver_days or (period is None and min_available_minutes is None):
+                results.append({
+                    'caregiver_id': caregiver.id,
+                    'name': f"{caregiver.first_name} {caregiver.last_name}",
+                    'days': caregiver_days
+                })
+        return results
+
+    def period_available(self, values, period):
+        """Free minutes in one part of the working day, never more than the day's free minutes"""
+        day_start = self._minutes(self.day_start)
+        day_end = self._minutes(self.day_end)
+        start, end = PERIODS[period]
+        length = max(0, min(end, day_end) - max(start, day_start))
+        return max(0, min(length - values[f"{period}_minutes"], values['available_minutes']))
+
+    def compute(self, keys, bind=None):
+        """
+        Compute workload values for (caregiver_id, date) keys with three queries
+
+        Args:
+            keys (set): (caregiver_id, date) pairs
+            bind: Session or connection to query with, defaults to db.session
+
+        Returns:
+            dict: {(caregiver_id, date): column values}
+        """
+        bind = bind if bind is not None else db.session
+        keys = set(keys)
+        values = {key: self._empty() for key in keys}
+        if not keys:
+            return values
+        caregiver_ids = {caregiver_id for caregiver_id, _ in keys}
+        start_date = min(day for _, day in keys)
+        end_date = max(day for _, day in keys)
+
+        tasks = bind.execute(
+            select(
+                TaskAssignment.assigned_user_id, Task.scheduled_date, Task.scheduled_time,
+                Task.estimated_duration, Task.status
+            ).join(Task, Task.id == TaskAssignment.task_id).where(
+                TaskAssignment.assigned_user_id.in_(caregiver_ids),
+                TaskAssignment.status != 'declined',
+                Task.status != 'cancelled',
+                Task.scheduled_date.between(start_date, end_date)
+            )
+        )
+        for caregiver_id, day, scheduled_time, duration, status in tasks:
+            row = values.get((caregiver_id, day))
+            if row is None:
+                continue
+            minutes = duration or self.default_task_minutes
+            row['assigned_tasks'] += 1
+            row['scheduled_minutes'] += minutes
+            if status == 'completed':
+                row['completed_tasks'] += 1
+            if scheduled_time is None:
+                row['flexible_minutes'] += minutes
+            else:
+                row[f"{period_of(scheduled_time)}_minutes"] += minutes
+
+        timesheets = bind.execute(
+            select(Timesheet.user_id, Timesheet.date, Timesheet.clock_in_time, Timesheet.clock_out_time,
+                   Timesheet.total_hours).where(
+                Timesheet.user_id.in_(caregiver_ids),
+                Timesheet.date.between(start_date, end_date)
+            )
+        )
+        for caregiver_id, day, clock_in_time, clock_out_time, total_hours in timesheets:
+            row = values.get((caregiver_id, day))
+            if row is None:
+                continue
+            if clock_in_time is not None and clock_out_time is None:
+                row['is_clocked_in'] = True
+            row['worked_minutes'] += int(round((total_hours or 0.0) * 60))
+
+        assignments = bind.execute(
+            select(CaregiverAssignment.caregiver_id, CaregiverAssignment.client_id,
+                   CaregiverAssignment.start_date, CaregiverAssignment.end_date).where(
+                CaregiverAssignment.caregiver_id.in_(caregiver_ids),
+                CaregiverAssignment.is_active == True,
+                CaregiverAssignment.start_date <= end_date,
+                (CaregiverAssignment.end_date.is_(None)) | (CaregiverAssignment.end_date >= start_date)
+            )
+        )
+        days_by_caregiver = {}
+        for caregiver_id, day in keys:
+            days_by_caregiver.setdefault(caregiver_id, []).append(day)
+        clients = {}
+        for caregiver_id, client_id, assignment_start, assignment_end in assignments:
+            for day in days_by_caregiver[caregiver_id]:
+                if assignment_start <= day and (assignment_end is None or assignment_end >= day):
+                    clients.setdefault((caregiver_id, day), set()).add(client_id)
+        for key, client_ids in clients.items():
+            values[key]['assigned_clients'] = len(client_ids)
+
+        for row in values.values():
+            row['available_minutes'] = max(
+                0, row['capacity_minutes'] - max(row['scheduled_minutes'], row['worked_minutes'])
+            )
+        return values
+
+    def refresh(self, keys, bind=None):
+        """
+        Recompute and upsert workload rows
+
+        Runs on the caller's transaction; the caller commits.
+
+        Returns:
+            dict: The computed values by key
+        """
+        bind = bind if bind is not None else db.session
+        values = self.compute(keys, bind)
+        if not values:
+            return values
+
+        engine = bind.get_bind() if hasattr(bind, 'get_bind') else bind
+        insert = postgresql_insert if engine.dialect.name == 'postgresql' else sqlite_insert
+        now = datetime.utcnow()
+        rows = [
+            {'id': str(uuid.uuid4()), 'caregiver_id': caregiver_id, 'date': day,
+             'created_at': now, 'updated_at': now, **row}
+            for (caregiver_id, day), row in values.items()
+        ]
+        statement = insert(CaregiverDailyWorkload.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=['caregiver_id', 'date'],
+            set_={column: statement.excluded[column] for column in WORKLOAD_COLUMNS + ['updated_at']}
+        )
+        bind.execute(statement, rows)
+        return values
+
+    def refresh_range(self, caregiver_id, start_date, end_date=None, bind=None):
+        """Recompute a caregiver's stored rows between two dates (end_date None means open-ended)"""
+        bind = bind if bind is not None else db.session
+        query = select(CaregiverDailyWorkload.date).where(
+            CaregiverDailyWorkload.caregiver_id == caregiver_id,
+            CaregiverDailyWorkload.date >= start_date
+        )
+        if end_date is not None:
+            query = query.where(CaregiverDailyWorkload.date <= end_date)
+        keys = {(caregiver_id, day) for day, in bind.execute(query)}
+        if keys:
+            self.refresh(keys, bind)
+
+    def _empty(self):
+        row = {column: 0 for column in WORKLOAD_COLUMNS}
+        row['is_clocked_in'] = False
+        row['capacity_minutes'] = self.capacity_minutes
+        return row
+
+    @staticmethod
+    def _minutes(value):
+        hours, minutes = value.split(':')[:2]
+        return int(hours) * 60 + int(minutes)
+
+# Global instance for easy access
+caregiver_workload_service = CaregiverWorkloadService()
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    pass
+
+# Active history loads the old value even after commit expired it, so a task
+# moved to another day or caregiver also refreshes the day it left
+for _attribute in (
+    Task.scheduled_date, TaskAssignment.assigned_user_id, Timesheet.user_id, Timesheet.date,
+    CaregiverAssignment.caregiver_id, CaregiverAssignment.start_date, CaregiverAssignment.end_date
+):
+    event.listen(_attribute, 'set', _load_previous_value, active_history=True)
+
+def _pending(session):
+    return session.info.setdefault('caregiver_workload_keys', set()), \
+        session.info.setdefault('caregiver_workload_ranges', set())
+
+def _values(target, attribute):
+    """Current and previous values of an attribute"""
+    history = inspect(target).attrs[attribute].history
+    return {value for value in [getattr(target, attribute), *history.deleted] if value is not None}
+
+@event.listens_for(TaskAssignment, 'after_insert')
+@event.listens_for(TaskAssignment, 'after_update')
+@event.listens_for(TaskAssignment, 'after_delete')
+def _task_assignment_changed(mapper, connection, target):
+    session = inspect(target).session
+    if session is None:
+        return
+    keys, _ = _pending(session)
+    day = connection.execute(select(Task.scheduled_date).where(Task.id == target.task_id)).scalar()
+    if day is not None:
+        keys.update((caregiver_id, day) for caregiver_id in _values(target, 'assigned_user_id'))
+
+@event.listens_for(Task, 'after_update')
+def _task_changed(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes()
+               for name in ('scheduled_date', 'scheduled_time', 'estimated_duration', 'status')):
+        return
+    if state.session is None:
+        return
+    keys, _ = _pending(state.session)
+    caregiver_ids = connection.execute(
+        select(TaskAssignment.assigned_user_id).where(TaskAssignment.task_id == target.id)
+    ).scalars().all()
+    for day in _values(target, 'scheduled_date'):
+        keys.update((caregiver_id, day) for caregiver_id in caregiver_ids)
+
+@event.listens_for(Timesheet, 'after_insert')
+@event.listens_for(Timesheet, 'after_update')
+@event.listens_for(Timesheet, 'after_delete')
+def _timesheet_changed(mapper, connection, target):
+    session = inspect(target).session
+    if session is None:
+        return
+    keys, _ = _pending(session)
+    keys.update((user_id, day) for user_id in _values(target, 'user_id') for day in _values(target, 'date'))
+
+@event.listens_for(CaregiverAssignment, 'after_insert')
+@event.listens_for(CaregiverAssignment, 'after_update')
+@event.listens_for(CaregiverAssignment, 'after_delete')
+def _caregiver_assignment_changed(mapper, connection, target):
+    session = inspect(target).session
+    if session is None:
+        return
+    _, ranges = _pending(session)
+    starts = _values(target, 'start_date')
+    ends = _values(target, 'end_date')
+    # An open-ended assignment (or one that used to be) affects every later day
+    end_history = inspect(target).attrs.end_date.history
+    open_ended = target.end_date is None or None in end_history.deleted
+    for caregiver_id in _values(target, 'caregiver_id'):
+        ranges.add((caregiver_id, min(starts), None if open_ended else max(ends)))
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _refresh_caregiver_workload(session, flush_context):
+    keys = session.info.pop('caregiver_workload_keys', None)
+    ranges = session.info.pop('caregiver_workload_ranges', None)
+    if not keys and not ranges:
+        return
+    connection = session.connection()
+    if keys:
+        caregiver_workload_service.refresh(keys, connection)
+    for caregiver_id, start_date, end_date in ranges or ():
+        caregiver_workload_service.refresh_range(caregiver_id, start_date, end_date, connection)
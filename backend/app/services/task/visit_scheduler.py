@@ -0,0 +1,406 @@
+from app.services.geolocation.distance_matrix_service import haversine_matrix
+import numpy as np
+import time
+
+PRIORITY_ORDER = {'urgent': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+# Rows of the distance matrix computed per haversine call, to bound temporary memory
+MATRIX_CHUNK_ROWS = 512
+
+def parse_minutes(value):
+    """
+    Convert a time of day to minutes after midnight
+
+    Args:
+        value: 'HH:MM' string or datetime.time
+
+    Returns:
+        int: Minutes after midnight
+    """
+    if isinstance(value, str):
+        hours, minutes = value.split(':')[:2]
+        return int(hours) * 60 + int(minutes)
+    return value.hour * 60 + value.minute
+
+def format_minutes(minutes):
+    """Format minutes after midnight as 'HH:MM'"""
+    minutes = int(round(minutes))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+class VisitScheduler:
+    """
+    Assigns visits to caregivers, minimizing travel plus continuity penalties
+
+    Visits are merged into routes with Clarke-Wright savings over each visit's
+    nearest neighbours, routes are matched to eligible caregivers, leftover
+    visits are inserted where they are cheapest, and the plan is improved with
+    relocate and 2-opt moves until nothing improves or the time limit is hit.
+
+    Routes are open: a caregiver's day starts at their first visit, since no
+    home location is on file. Waiting for a time window counts as shift time.
+    """
+
+    def __init__(self, visits, caregivers, road_factor=1.3, average_speed_kmh=40.0,
+                 neighbours=20, time_limit_seconds=5.0):
+        """
+        Args:
+            visits (list): Dicts with 'id', 'latitude', 'longitude', 'duration',
+                'earliest' and 'latest' (allowed start, minutes after midnight),
+                optional 'target' (preferred start), 'priority' and 'penalties'
+                ({caregiver_id: penalty in meters} for every caregiver allowed
+                to make the visit)
+            caregivers (list): Dicts with 'id', 'start' and 'end' (minutes after
+                midnight) and 'max_minutes' (longest shift)
+            road_factor (float): Multiplier applied to straight-line distance
+            average_speed_kmh (float): Average travel speed
+            neighbours (int): Nearest visits considered for each merge and move
+            time_limit_seconds (float): Local search budget
+        """
+        self.visits = visits
+        self.caregivers = {caregiver['id']: caregiver for caregiver in caregivers}
+        self.road_factor = road_factor
+        self.minutes_per_meter = 60.0 / (average_speed_kmh * 1000.0)
+        self.neighbours = neighbours
+        self.time_limit_seconds = time_limit_seconds
+
+        self.duration = [float(visit['duration']) for visit in visits]
+        self.earliest = [float(visit['earliest']) for visit in visits]
+        self.latest = [float(visit['latest']) for visit in visits]
+        # Only caregivers actually on the roster count
+        self.penalties = [
+            {caregiver_id: float(penalty) for caregiver_id, penalty in visit['penalties'].items()
+             if caregiver_id in self.caregivers}
+            for visit in visits
+        ]
+        self.dist = None
+        self.nearest = None
+
+    def solve(self):
+        """
+        Build the plan
+
+        Returns:
+            dict: 'routes' (caregiver_id, visits with start/end minutes and
+                  travel_meters, travel_meters, penalty), 'unassigned' (visit_id,
+                  reason) and 'metrics'
+        """
+        started = time.monotonic()
+        unassigned = {}
+        schedulable = []
+        for v in range(len(self.visits)):
+            if not self.penalties[v]:
+                unassigned[v] = 'no_eligible_caregiver'
+            elif self.earliest[v] > self.latest[v]:
+                unassigned[v] = 'invalid_time_window'
+            else:
+                schedulable.append(v)
+
+        self._build_matrix()
+
+        routes = self._savings(schedulable)
+        plan, leftovers = self._match_caregivers(routes)
+        for v in self._insertion_order(leftovers):
+            if not self._insert_best(plan, v):
+                unassigned[v] = 'no_capacity'
+
+        deadline = started + self.time_limit_seconds
+        iterations = self._local_search(plan, unassigned, deadline)
+
+        return self._result(plan, unassigned, started, iterations)
+
+    def route_travel(self, route):
+        """Road distance in meters along an open route"""
+        return sum(float(self.dist[a, b]) for a, b in zip(route, route[1:]))
+
+    def schedule(self, route, caregiver):
+        """
+        Start times for a route driven by a caregiver
+
+        Returns:
+            list: Start minute per visit, or None if a time window or the shift is violated
+        """
+        if not route:
+            return []
+        starts = []
+        current = float(caregiver['start'])
+        previous = None
+        for v in route:
+            if previous is not None:
+                current += float(self.dist[previous, v]) * self.minutes_per_meter
+            if current < self.earliest[v]:
+                current = self.earliest[v]
+            if current > self.latest[v]:
+                return None
+            starts.append(current)
+            current += self.duration[v]
+            previous = v
+        if current > caregiver['end'] or current - starts[0] > caregiver['max_minutes']:
+            return None
+        return starts
+
+    def timed_schedule(self, route, caregiver):
+        """
+        Start times moved as close to each visit's target as the route allows
+
+        schedule() starts every visit as early as possible; this keeps that
+        order but uses the slack to start visits at their preferred time.
+        """
+        starts = self.schedule(route, caregiver)
+        if not starts:
+            return starts
+
+        # Latest start of each visit that keeps the rest of the route on time
+        latest_starts = [0.0] * len(route)
+        bound = float(caregiver['end'])
+        for index in range(len(route) - 1, -1, -1):
+            v = route[index]
+            latest_starts[index] = min(self.latest[v], bound - self.duration[v])
+            if index > 0:
+                bound = latest_starts[index] - float(self.dist[route[index - 1], v]) * self.minutes_per_meter
+
+        timed = []
+        ready = None
+        for index, v in enumerate(route):
+            earliest = starts[index] if ready is None else max(starts[index], ready)
+            target = self.visits[v].get('target', earliest)
+            start = max(earliest, min(target, latest_starts[index]))
+            timed.append(start)
+            if index + 1 < len(route):
+                ready = start + self.duration[v] + float(self.dist[v, route[index + 1]]) * self.minutes_per_meter
+
+        if timed[-1] + self.duration[route[-1]] - timed[0] > caregiver['max_minutes']:
+            return starts
+        return timed
+
+    def _build_matrix(self):
+        n = len(self.visits)
+        coordinates = np.array([(visit['latitude'], visit['longitude']) for visit in self.visits],
+                               dtype=float).reshape(-1, 2)
+        self.dist = np.empty((n, n), dtype=np.float32)
+        for offset in range(0, n, MATRIX_CHUNK_ROWS):
+            block = haversine_matrix(coordinates[offset:offset + MATRIX_CHUNK_ROWS], coordinates)
+            self.dist[offset:offset + MATRIX_CHUNK_ROWS] = block * self.road_factor
+
+        k = min(self.neighbours, n - 1)
+        if k <= 0:
+            self.nearest = [[] for _ in range(n)]
+            return
+        ranked = self.dist.copy()
+        np.fill_diagonal(ranked, np.inf)
+        self.nearest = np.argpartition(ranked, k - 1, axis=1)[:, :k].tolist()
+
+    def _savings(self, schedulable):
+        """Merge single-visit routes end-to-start in order of cheapest joins"""
+        active = set(schedulable)
+        pairs = []
+        for i in schedulable:
+            for j in self.nearest[i]:
+                if j not in active:
+                    continue
+                common = self.penalties[i].keys() & self.penalties[j].keys()
+                if not common:
+                    # Never on the same route, no caregiver may make both visits
+                    continue
+                continuity = min(self.penalties[i][c] + self.penalties[j][c] for c in common) \
+                    - min(self.penalties[i].values()) - min(self.penalties[j].values())
+                pairs.append((float(self.dist[i, j]) + continuity, i, j))
+        pairs.sort()
+
+        route_of = {v: v for v in schedulable}
+        routes = {v: [v] for v in schedulable}
+        eligible = {v: dict(self.penalties[v]) for v in schedulable}
+
+        for _, i, j in pairs:
+            first, second = route_of[i], route_of[j]
+            if first == second or routes[first][-1] != i or routes[second][0] != j:
+                continue
+            merged_eligible = {
+                caregiver_id: penalty + eligible[second][caregiver_id]
+                for caregiver_id, penalty in eligible[first].items() if caregiver_id in eligible[second]
+            }
+            if not merged_eligible:
+                continue
+            merged = routes[first] + routes[second]
+            if self.schedule(merged, self._loosest_shift(merged_eligible)) is None:
+                continue
+            for v in routes[second]:
+                route_of[v] = first
+            routes[first] = merged
+            eligible[first] = merged_eligible
+            del routes[second], eligible[second]
+
+        return [(routes[key], eligible[key]) for key in routes]
+
+    def _loosest_shift(self, caregiver_ids):
+        shifts = [self.caregivers[caregiver_id] for caregiver_id in caregiver_ids]
+        return {
+            'start': min(shift['start'] for shift in shifts),
+            'end': max(shift['end'] for shift in shifts),
+            'max_minutes': max(shift['max_minutes'] for shift in shifts)
+        }
+
+    def _match_caregivers(self, routes):
+        """Give each caregiver at most one route, longest routes first"""
+        plan = {}
+        leftovers = []
+        for route, eligible in sorted(routes, key=lambda item: (-len(item[0]), min(item[1].values()))):
+            for caregiver_id in sorted(eligible, key=eligible.get):
+                if caregiver_id not in plan and self.schedule(route, self.caregivers[caregiver_id]) is not None:
+                    plan[caregiver_id] = route
+                    break
+            else:
+                leftovers.extend(route)
+        return plan, leftovers
+
+    def _insertion_order(self, visits):
+        # Important visits first, then the least flexible
+        return sorted(visits, key=lambda v: (
+            PRIORITY_ORDER.get(self.visits[v].get('priority'), 2),
+            self.latest[v] - self.earliest[v],
+            len(self.penalties[v])
+        ))
+
+    def _insertion_cost(self, route, position, v):
+        before = route[position - 1] if position > 0 else None
+        after = route[position] if position < len(route) else None
+        cost = 0.0
+        if before is not None:
+            cost += float(self.dist[before, v])
+        if after is not None:
+            cost += float(self.dist[v, after])
+        if before is not None and after is not None:
+            cost -= float(self.dist[before, after])
+        return cost
+
+    def _best_insertion(self, plan, v, exclude=None):
+        """Cheapest feasible (cost, caregiver_id, position) for a visit, or None"""
+        best = None
+        for caregiver_id, penalty in self.penalties[v].items():
+            route = plan.get(caregiver_id, [])
+            if exclude is not None and caregiver_id == exclude[0]:
+                route = exclude[1]
+            shift = self.caregivers[caregiver_id]
+            for position in range(len(route) + 1):
+                cost = self._insertion_cost(route, position, v) + penalty
+                if best is not None and cost >= best[0]:
+                    continue
+                if self.schedule(route[:position] + [v] + route[position:], shift) is not None:
+                    best = (cost, caregiver_id, position)
+        return best
+
+    def _insert_best(self, plan, v):
+        best = self._best_insertion(plan, v)
+        if best is None:
+            return False
+        _, caregiver_id, position = best
+        plan.setdefault(caregiver_id, []).insert(position, v)
+        return True
+
+    def _local_search(self, plan, unassigned, deadline):
+        owner = {v: caregiver_id for caregiver_id, route in plan.items() for v in route}
+        iterations = 0
+        improved = True
+        while improved and time.monotonic() < deadline:
+            improved = False
+            iterations += 1
+
+            # Relocate: move a visit to its cheapest feasible slot on any eligible route
+            for v in list(owner):
+                if time.monotonic() >= deadline:
+                    break
+                caregiver_id = owner[v]
+                route = plan[caregiver_id]
+                position = route.index(v)
+                remaining = route[:position] + route[position + 1:]
+                if self.schedule(remaining, self.caregivers[caregiver_id]) is None:
+                    continue
+                current = self._insertion_cost(remaining, position, v) + self.penalties[v][caregiver_id]
+                best = self._best_insertion(plan, v, exclude=(caregiver_id, remaining))
+                if best is None or best[0] >= current - 1e-3:
+                    continue
+                _, target, target_position = best
+                plan[caregiver_id] = remaining
+                plan.setdefault(target, []).insert(target_position, v)
+                owner[v] = target
+                improved = True
+
+            # 2-opt: reverse a stretch of a route when it shortens the route
+            for caregiver_id, route in plan.items():
+                if time.monotonic() >= deadline:
+                    break
+                if self._two_opt(route, self.caregivers[caregiver_id]):
+                    improved = True
+
+            # Capacity freed up by moves may fit visits that did not fit before
+            for v in self._insertion_order([v for v, reason in unassigned.items() if reason == 'no_capacity']):
+                if self._insert_best(plan, v):
+                    del unassigned[v]
+                    owner[v] = next(c for c, route in plan.items() if v in route)
+                    improved = True
+
+        for caregiver_id in [c for c, route in plan.items() if not route]:
+            del plan[caregiver_id]
+        return iterations
+
+    def _two_opt(self, route, shift):
+        improved = False
+        size = len(route)
+        for i in range(size - 1):
+            for j in range(i + 1, size):
+                before = route[i - 1] if i > 0 else None
+                after = route[j + 1] if j + 1 < size else None
+                delta = 0.0
+                if before is not None:
+                    delta += float(self.dist[before, route[j]]) - float(self.dist[before, route[i]])
+                if after is not None:
+                    delta += float(self.dist[route[i], after]) - float(self.dist[route[j], after])
+                if delta >= -1e-3:
+                    continue
+                candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                if self.schedule(candidate, shift) is not None:
+                    route[:] = candidate
+                    improved = True
+        return improved
+
+    def _result(self, plan, unassigned, started, iterations):
+        routes = []
+        total_travel = 0.0
+        total_penalty = 0.0
+        for caregiver_id, route in plan.items():
+            starts = self.timed_schedule(route, self.caregivers[caregiver_id])
+            visits = []
+            for index, v in enumerate(route):
+                travel = float(self.dist[route[index - 1], v]) if index > 0 else 0.0
+                visits.append({
+                    'visit_id': self.visits[v]['id'],
+                    'start': starts[index],
+                    'end': starts[index] + self.duration[v],
+                    'travel_meters': round(travel, 1)
+                })
+            travel = self.route_travel(route)
+            penalty = sum(self.penalties[v][caregiver_id] for v in route)
+            total_travel += travel
+            total_penalty += penalty
+            routes.append({
+                'caregiver_id': caregiver_id,
+                'visits': visits,
+                'travel_meters': round(travel, 1),
+                'penalty': round(penalty, 1)
+            })
+
+        return {
+            'routes': sorted(routes, key=lambda route: route['visits'][0]['start']),
+            'unassigned': [
+                {'visit_id': self.visits[v]['id'], 'reason': reason} for v, reason in sorted(unassigned.items())
+            ],
+            'metrics': {
+                'visits': len(self.visits),
+                'assigned': sum(len(route) for route in plan.values()),
+                'unassigned': len(unassigned),
+                'caregivers_used': len(plan),
+                'travel_meters': round(total_travel, 1),
+                'continuity_penalty': round(total_penalty, 1),
+                'local_search_iterations': iterations,
+                'elapsed_seconds': round(time.monotonic() - started, 3)
+            }
+        }
@@ -0,0 +1,388 @@
+from app import db, socketio
+from app.models.auth.role import Role
+from app.models.auth.user import User
+from app.models.client.caregiver_assignment import CaregiverAssignment
+from app.models.client.client import Client
+from app.models.reporting.audit_log import AuditLog
+from app.models.task.task import Task
+from app.models.task.task_assignment import TaskAssignment
+from app.services.task.caregiver_workload_service import caregiver_workload_service
+from app.services.task.visit_scheduler import VisitScheduler, format_minutes, parse_minutes
+from sqlalchemy import insert
+from collections import OrderedDict
+from datetime import datetime
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class VisitSchedulingService:
+    """Builds daily caregiver rosters from the day's pending tasks"""
+
+    def __init__(self, day_start='07:00', day_end='20:00', max_shift_hours=8, default_visit_minutes=30,
+                 time_window_minutes=30, backup_penalty_meters=2000, temporary_penalty_meters=1000,
+                 neighbours=20, time_limit_seconds=5.0, max_visits=5000, road_factor=1.3,
+                 average_speed_kmh=40.0, run_async=True, max_jobs=100):
+        self.day_start = day_start
+        self.day_end = day_end
+        self.max_shift_hours = max_shift_hours
+        self.default_visit_minutes = default_visit_minutes
+        # Visits with a scheduled time may start this many minutes either side of it
+        self.time_window_minutes = time_window_minutes
+        # Extra cost, in meters of travel, of sending someone other than the primary caregiver
+        self.backup_penalty_meters = backup_penalty_meters
+        self.temporary_penalty_meters = temporary_penalty_meters
+        self.neighbours = neighbours
+        self.time_limit_seconds = time_limit_seconds
+        self.max_visits = max_visits
+        self.road_factor = road_factor
+        self.average_speed_kmh = average_speed_kmh
+        # Disabled in tests so jobs run inline on the request thread
+        self.run_async = run_async
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+        self.day_start = app.config.get('VISIT_SCHEDULING_DAY_START', self.day_start)
+        self.day_end = app.config.get('VISIT_SCHEDULING_DAY_END', self.day_end)
+        self.max_shift_hours = app.config.get('VISIT_SCHEDULING_MAX_SHIFT_HOURS', self.max_shift_hours)
+        self.default_visit_minutes = app.config.get('VISIT_SCHEDULING_DEFAULT_VISIT_MINUTES', self.default_visit_minutes)
+        self.time_window_minutes = app.config.get('VISIT_SCHEDULING_TIME_WINDOW_MINUTES', self.time_window_minutes)
+        self.backup_penalty_meters = app.config.get('VISIT_SCHEDULING_BACKUP_PENALTY_METERS', self.backup_penalty_meters)
+        self.temporary_penalty_meters = app.config.get('VISIT_SCHEDULING_TEMPORARY_PENALTY_METERS', self.temporary_penalty_meters)
+        self.neighbours = app.config.get('VISIT_SCHEDULING_NEIGHBOURS', self.neighbours)
+        self.time_limit_seconds = app.config.get('VISIT_SCHEDULING_TIME_LIMIT_SECONDS', self.time_limit_seconds)
+        self.max_visits = app.config.get('VISIT_SCHEDULING_MAX_VISITS', self.max_visits)
+        self.road_factor = app.config.get('DISTANCE_MATRIX_ROAD_FACTOR', self.road_factor)
+        self.average_speed_kmh = app.config.get('DISTANCE_MATRIX_AVERAGE_SPEED_KMH', self.average_speed_kmh)
+        self.run_async = app.config.get('VISIT_SCHEDULING_ASYNC', self.run_async)
+
+    def build_schedule(self, day, caregiver_ids=None, shifts=None, time_limit_seconds=None):
+        """
+        Plan the given day's visits
+
+        Every pending task scheduled on the day is a visit. Tasks that already
+        have an assignment stay with that caregiver, so the plan shows full
+        rosters; unassigned tasks go to caregivers currently assigned to the
+        client, preferring the primary caregiver.
+
+        Args:
+            day (date): Day to plan
+            caregiver_ids (list): Limit the roster to these caregivers
+            shifts (dict): Per-caregiver {'start': 'HH:MM', 'end': 'HH:MM'} overrides
+            time_limit_seconds (float): Local search budget
+
+        Returns:
+            dict: date, routes, unassigned and metrics
+
+        Raises:
+            ValueError: If a shift override is malformed or there are too many visits
+        """
+        caregivers = self._load_caregivers(caregiver_ids, shifts or {})
+        tasks, pinned = self._load_tasks(day)
+        if len(tasks) > self.max_visits:
+            raise ValueError(f"Too many visits to schedule ({len(tasks)} > {self.max_visits})")
+
+        client_caregivers = {}
+        if tasks:
+            for row in db.session.query(
+                CaregiverAssignment.client_id, CaregiverAssignment.caregiver_id, CaregiverAssignment.assignment_type
+            ).filter(
+                CaregiverAssignment.client_id.in_({task.client_id for task in tasks}),
+                CaregiverAssignment.current_filter(day)
+            ):
+                client_caregivers.setdefault(row.client_id, {})[row.caregiver_id] = row.assignment_type
+
+        visits = []
+        unassigned = []
+        for task in tasks:
+            if task.latitude is None or task.longitude is None:
+                unassigned.append(self._visit_info(task, pinned, 'missing_coordinates'))
+                continue
+            visits.append(self._visit(task, pinned, client_caregivers.get(task.client_id, {})))
+
+        scheduler = VisitScheduler(
+            visits,
+            list(caregivers.values()),
+            road_factor=self.road_factor,
+            average_speed_kmh=self.average_speed_kmh,
+            neighbours=self.neighbours,
+            time_limit_seconds=self.time_limit_seconds if time_limit_seconds is None else time_limit_seconds
+        )
+        result = scheduler.solve()
+
+        tasks_by_id = {task.id: task for task in tasks}
+        routes = []
+        for route in result['routes']:
+            caregiver = caregivers[route['caregiver_id']]
+            routes.append({
+                'caregiver_id': caregiver['id'],
+                'caregiver_name': caregiver['name'],
+                'shift_start': format_minutes(caregiver['start']),
+                'shift_end': format_minutes(caregiver['end']),
+                'travel_meters': route['travel_meters'],
+                'visits': [
+                    {
+                        **self._visit_info(tasks_by_id[visit['visit_id']], pinned),
+                        'start_time': format_minutes(visit['start']),
+                        'end_time': format_minutes(visit['end']),
+                        'travel_meters': visit['travel_meters']
+                    }
+                    for visit in route['visits']
+                ]
+            })
+        unassigned.extend(
+            self._visit_info(tasks_by_id[item['visit_id']], pinned, item['reason']) for item in result['unassigned']
+        )
+
+        metrics = result['metrics']
+        metrics['visits'] = len(tasks)
+        metrics['unassigned'] = len(unassigned)
+        metrics['new_assignments'] = sum(
+            1 for route in routes for visit in route['visits'] if not visit['already_assigned']
+        )
+        return {
+            'date': day.isoformat(),
+            'routes': routes,
+            'unassigned': unassigned,
+            'metrics': metrics
+        }
+
+    def apply_schedule(self, schedule, assigned_by, ip_address=None, user_agent=None):
+        """
+        Create task assignments for the planned, not yet assigned visits
+
+        Tasks assigned by someone else since the plan was built are skipped.
+        The caller is responsible for committing the session.
+
+        Returns:
+            int: Number of assignments created
+        """
+        planned = {
+            visit['task_id']: route['caregiver_id']
+            for route in schedule['routes'] for visit in route['visits'] if not visit['already_assigned']
+        }
+        if not planned:
+            return 0
+
+        taken = {
+            task_id for task_id, in db.session.query(TaskAssignment.task_id).filter(
+                TaskAssignment.task_id.in_(planned),
+                TaskAssignment.status != 'declined'
+            )
+        }
+        now = datetime.utcnow()
+        rows = [
+            {
+                'id': str(uuid.uuid4()),
+                'task_id': task_id,
+                'assigned_user_id': caregiver_id,
+                'assigned_by': assigned_by,
+                'assigned_at': now,
+                'status': 'assigned'
+            }
+            for task_id, caregiver_id in planned.items() if task_id not in taken
+        ]
+        if rows:
+            db.session.execute(insert(TaskAssignment), rows)
+            # Bulk inserts bypass the ORM events that maintain the workload table
+            day = datetime.strptime(schedule['date'], '%Y-%m-%d').date()
+            caregiver_workload_service.refresh({(row['assigned_user_id'], day) for row in rows})
+
+        db.session.add(AuditLog(
+            user_id=assigned_by,
+            action='visit_schedule_applied',
+            resource_type='task_assignment',
+            details={
+                'date': schedule['date'],
+                'assignments_created': len(rows),
+                'skipped_already_assigned': len(taken),
+                'travel_meters': schedule['metrics']['travel_meters']
+            },
+            ip_address=ip_address,
+            user_agent=user_agent
+        ))
+        return len(rows)
+
+    def enqueue(self, day, requested_by, apply=False, ip_address=None, user_agent=None, **options):
+        """
+        Build (and optionally apply) a schedule in a background job
+
+        The outcome is kept for get_job and pushed to the requester's room as a
+        'visit_schedule_ready' event. Jobs live in this process only.
+
+        Returns:
+            dict: The queued job
+        """
+        job = {
+            'id': str(uuid.uuid4()),
+            'status': 'queued',
+            'date': day.isoformat(),
+            'requested_by': requested_by,
+            'apply': apply,
+            'created_at': datetime.utcnow().isoformat(),
+            'completed_at': None,
+            'result': None,
+            'error': None
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+        if self.run_async:
+            socketio.start_background_task(
+                self._run_in_app_context, job, day, apply, ip_address, user_agent, options
+            )
+        else:
+            self.run_job(job, day, apply, ip_address, user_agent, options)
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def run_job(self, job, day, apply, ip_address, user_agent, options):
+        job['status'] = 'running'
+        try:
+            schedule = self.build_schedule(day, **options)
+            if apply:
+                schedule['assignments_created'] = self.apply_schedule(
+                    schedule, job['requested_by'], ip_address, user_agent
+                )
+                db.session.commit()
+            job['result'] = schedule
+            job['status'] = 'completed'
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Visit scheduling job {job['id']} failed: {str(e)}")
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        job['completed_at'] = datetime.utcnow().isoformat()
+
+        try:
+            socketio.emit('visit_schedule_ready', {
+                'job_id': job['id'],
+                'status': job['status'],
+                'date': job['date'],
+                'metrics': job['result']['metrics'] if job['result'] else None,
+                'error': job['error']
+            }, room=f"user_{job['requested_by']}")
+        except Exception as e:
+            logger.warning(f"Could not emit schedule update for job {job['id']}: {str(e)}")
+        return job
+
+    def _run_in_app_context(self, job, day, apply, ip_address, user_agent, options):
+        with self._app.app_context():
+            try:
+                self.run_job(job, day, apply, ip_address, user_agent, options)
+            finally:
+                db.session.remove()
+
+    def _load_caregivers(self, caregiver_ids, shifts):
+        query = db.session.query(User.id, User.first_name, User.last_name).join(Role, Role.id == User.role_id) \
+            .filter(Role.name == 'caregiver', User.is_active == True)
+        if caregiver_ids:
+            query = query.filter(User.id.in_(caregiver_ids))
+
+        day_start = parse_minutes(self.day_start)
+        day_end = parse_minutes(self.day_end)
+        caregivers = {}
+        for row in query:
+            shift = shifts.get(row.id, {})
+            try:
+                start = parse_minutes(shift['start']) if shift.get('start') else day_start
+                end = parse_minutes(shift['end']) if shift.get('end') else day_end
+            except (ValueError, AttributeError):
+                raise ValueError(f"Invalid shift for caregiver {row.id}, use HH:MM")
+            if end <= start:
+                raise ValueError(f"Shift for caregiver {row.id} must end after it starts")
+            caregivers[row.id] = {
+                'id': row.id,
+                'name': f"{row.first_name} {row.last_name}",
+                'start': start,
+                'end': end,
+                'max_minutes': min(self.max_shift_hours * 60, end - start)
+            }
+        return caregivers
+
+    def _load_tasks(self, day):
+        """Pending tasks for the day with client coordinates, plus {task_id: caregiver_id} of existing assignments"""
+        tasks = db.session.query(
+            Task.id, Task.title, Task.client_id, Task.priority, Task.estimated_duration, Task.scheduled_time,
+            Client.first_name, Client.last_name, Client.latitude, Client.longitude
+        ).join(Client, Client.id == Task.client_id).filter(
+            Task.scheduled_date == day,
+            Task.status == 'pending',
+            Client.is_active == True
+        ).order_by(Task.scheduled_time, Task.id).all()
+
+        pinned = {}
+        if tasks:
+            for task_id, caregiver_id in db.session.query(
+                TaskAssignment.task_id, TaskAssignment.assigned_user_id
+            ).join(Task, Task.id == TaskAssignment.task_id).filter(
+                Task.scheduled_date == day,
+                Task.status == 'pending',
+                TaskAssignment.status != 'declined'
+            ):
+                pinned[task_id] = caregiver_id
+        return tasks, pinned
+
+    def _visit(self, task, pinned, assigned_caregivers):
+        duration = task.estimated_duration or self.default_visit_minutes
+        target = None
+        if task.scheduled_time is not None:
+            target = parse_minutes(task.scheduled_time)
+            earliest = target - self.time_window_minutes
+            latest = target + self.time_window_minutes
+        else:
+            earliest = parse_minutes(self.day_start)
+            latest = parse_minutes(self.day_end) - duration
+
+        if task.id in pinned:
+            # Already assigned visits stay with their caregiver
+            penalties = {pinned[task.id]: 0}
+        else:
+            penalties = {
+                caregiver_id: {
+                    'primary': 0,
+                    'backup': self.backup_penalty_meters
+                }.get(assignment_type, self.temporary_penalty_meters)
+                for caregiver_id, assignment_type in assigned_caregivers.items()
+            }
+
+        visit = {
+            'id': task.id,
+            'latitude': task.latitude,
+            'longitude': task.longitude,
+            'duration': duration,
+            'earliest': earliest,
+            'latest': latest,
+            'priority': task.priority,
+            'penalties': penalties
+        }
+        if target is not None:
+            visit['target'] = target
+        return visit
+
+    @staticmethod
+    def _visit_info(task, pinned, reason=None):
+        info = {
+            'task_id': task.id,
+            'title': task.title,
+            'client_id': task.client_id,
+            'client_name': f"{task.first_name} {task.last_name}",
+            'scheduled_time': task.scheduled_time.strftime('%H:%M') if task.scheduled_time else None,
+            'already_assigned': task.id in pinned
+        }
+        if reason:
+            info['reason'] = reason
+        return info
+
+# Global instance for easy access
+visit_scheduling_service = VisitSchedulingService()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Backfill coordinates and home geofences for existing clients
+
+Geocodes active clients that have an address but no latitude/longitude and
+creates a home geofence for every active client with coordinates but no
+active geofence. Progress is checkpointed after each committed batch, so an
+interrupted run resumes where it stopped; the checkpoint is removed once a
+pass completes.
+
+Usage:
+    python backfill_client_coordinates.py                       # run or resume
+    python backfill_client_coordinates.py --dry-run --limit 500 # estimate hit rate
+    python backfill_client_coordinates.py --restart --retry-failed
+    python backfill_client_coordinates.py --requests-per-second 0.5 --workers 2
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+from app import create_app, db
+from app.services.geolocation.batch_geocoder import RateLimiter, batch_geocoder
+from app.services.geolocation.coordinate_backfill_service import coordinate_backfill_service
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle).get('last_id')
+
+def save_checkpoint(path, metrics):
+    # Write then rename so a crash never leaves a truncated checkpoint
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as handle:
+        json.dump(metrics, handle, indent=2)
+    os.replace(temp_path, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Backfill client coordinates and home geofences')
+    parser.add_argument('--checkpoint', default='backfill_checkpoint.json',
+                        help='Checkpoint file used to resume (default: backfill_checkpoint.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the beginning')
+    parser.add_argument('--limit', type=int, help='Stop after this many clients')
+    parser.add_argument('--batch-size', type=int, help='Clients per batch (default: COORDINATE_BACKFILL_BATCH_SIZE)')
+    parser.add_argument('--workers', type=int, help='Concurrent geocoding requests (default: GEOCODING_BATCH_WORKERS)')
+    parser.add_argument('--requests-per-second', type=float,
+                        help='Provider rate limit (default: GEOCODING_REQUESTS_PER_SECOND)')
+    parser.add_argument('--retry-failed', action='store_true', help='Retry clients whose geocoding failed before')
+    parser.add_argument('--dry-run', action='store_true', help='Geocode and report without writing')
+    parser.add_argument('--config', default=os.environ.get('FLASK_ENV', 'development'),
+                        help='Application config to use (development, production, testing)')
+    args = parser.parse_args(argv)
+
+    app = create_app(args.config)
+
+    if args.batch_size:
+        coordinate_backfill_service.batch_size = args.batch_size
+    if args.workers:
+        batch_geocoder.max_workers = args.workers
+    if args.requests_per_second:
+        batch_geocoder.requests_per_second = args.requests_per_second
+        batch_geocoder.limiter = RateLimiter(args.requests_per_second)
+
+    start_after = None if args.restart else load_checkpoint(args.checkpoint)
+
+    def report(metrics):
+        if not args.dry_run:
+            save_checkpoint(args.checkpoint, metrics)
+        print(f"   ⏳ batch {metrics['batches']}: {metrics['processed']} processed, "
+              f"{metrics['geocoded']} geocoded, {metrics['failed']} failed, "
+              f"{metrics['geofences_created']} geofences, {metrics['clients_per_second']} clients/s")
+
+    with app.app_context():
+        remaining = coordinate_backfill_service.count_remaining(start_after, args.retry_failed)
+        print(f"🔍 {remaining} clients need coordinates or a home geofence"
+              + (f" (resuming after {start_after})" if start_after else ''))
+
+        try:
+            metrics = coordinate_backfill_service.run(
+                start_after=start_after,
+                limit=args.limit,
+                dry_run=args.dry_run,
+                retry_failed=args.retry_failed,
+                checkpoint=report
+            )
+        except KeyboardInterrupt:
+            print(f"\n⏸️  Interrupted; rerun to resume from {args.checkpoint}")
+            return 130
+        finally:
+            db.session.remove()
+
+    # Client ids are random UUIDs, so a finished pass starts over next time
+    if metrics['done'] and not args.dry_run and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    attempted = metrics['geocoded'] + metrics['failed']
+    print(f"\n📊 {metrics['processed']} clients in {metrics['elapsed_seconds']}s "
+          f"({metrics['clients_per_second']} clients/s)")
+    print(f"   📍 {metrics['geocoded']} geocoded, {metrics['failed']} failed"
+          + (f" ({metrics['failed'] / attempted:.1%} failure rate)" if attempted else ''))
+    print(f"   🏠 {metrics['geofences_created']} home geofences {'would be ' if args.dry_run else ''}created")
+    if metrics['done']:
+        print("✅ Backfill complete")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark login throughput for one worker process
+
+Creates throwaway users in a temporary SQLite database, then logs them in
+from concurrent clients through the Flask test client, once per password
+hashing executor. While logins run, a second set of clients keeps calling
+GET /api/auth/profile, to show how much the logins slow everyone else down.
+The numbers are per worker process: multiply by the number of workers for a
+deployment estimate.
+
+Usage:
+    python benchmark_login.py
+    python benchmark_login.py --logins 400 --concurrency 32 --rounds 12
+    python benchmark_login.py --executors inline,process --workers 4
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import queue
+import statistics
+import tempfile
+import threading
+import time
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_clients(app, count, concurrency, make_request):
+    """Run count requests over concurrency threads; returns (elapsed, latencies, failures)"""
+    jobs = queue.Queue()
+    for i in range(count):
+        jobs.put(i)
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        while True:
+            try:
+                i = jobs.get_nowait()
+            except queue.Empty:
+                return
+            started = time.perf_counter()
+            response = make_request(client, i)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark login throughput for one worker process')
+    parser.add_argument('--logins', type=int, default=200, help='Logins per executor')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent login clients')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost of the stored passwords')
+    parser.add_argument('--executors', default='inline,thread,process',
+                        help='Comma-separated password hashing executors to compare')
+    parser.add_argument('--workers', type=int, help='Password hashing pool size (default: one per CPU)')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='login-benchmark-')
+    # Never touch a real database: the users below are throwaway
+    os.environ['DEV_DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(args.rounds)
+
+    from app import create_app, db
+    import app.models  # noqa: F401
+    from app.models.auth.role import Role
+    from app.models.auth.user import User
+    from app.services.auth.password_hashing_service import password_hashing_service
+    from app.services.auth.rate_limit_service import rate_limit_service
+
+    application = create_app('development')
+    application.config['DEBUG'] = False
+    # Every benchmark client shares one IP
+    rate_limit_service.enabled = False
+    password = 'benchmark-password'
+    users = min(args.logins, 500)
+
+    with application.app_context():
+        db.create_all()
+        role = Role(name='caregiver', description='Caregiver')
+        db.session.add(role)
+        db.session.flush()
+        password_hash = password_hashing_service.hash_many([password])[0]
+        db.session.add_all(User(
+            email=f'aide{i}@benchmark.local', username=f'aide{i}', password_hash=password_hash,
+            first_name='Aide', last_name=str(i), role_id=role.id, is_active=True
+        ) for i in range(users))
+        db.session.commit()
+
+    # One token to measure how other requests fare during the login storm
+    probe = application.test_client().post('/api/auth/login', json={
+        'email': 'aide0@benchmark.local', 'password': password
+    }).get_json()['access_token']
+    probe_headers = {'Authorization': f'Bearer {probe}'}
+
+    print(f"🔐 {args.logins} logins, {args.concurrency} concurrent clients, bcrypt cost {args.rounds}, "
+          f"{args.workers or os.cpu_count()} hashing workers")
+    print(f"{'executor':<10} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'profile p95 ms':>15} {'errors':>7}")
+
+    for executor in [e.strip() for e in args.executors.split(',') if e.strip()]:
+        password_hashing_service.shutdown()
+        password_hashing_service.executor = executor
+        password_hashing_service.workers = args.workers
+        # Warm the pool so process start-up is not counted
+        password_hashing_service.verify(password_hash, password)
+
+        stop = threading.Event()
+        profile_latencies = []
+
+        def probe_loop():
+            client = application.test_client()
+            while not stop.is_set():
+                started = time.perf_counter()
+                client.get('/api/auth/profile', headers=probe_headers)
+                profile_latencies.append(time.perf_counter() - started)
+                time.sleep(0.01)
+
+        prober = threading.Thread(target=probe_loop)
+        prober.start()
+        elapsed, latencies, failures = run_clients(
+            application, args.logins, args.concurrency,
+            lambda client, i: client.post('/api/auth/login', json={
+                'email': f'aide{i % users}@benchmark.local', 'password': password
+            })
+        )
+        stop.set()
+        prober.join()
+
+        print(f"{executor:<10} {args.logins / elapsed:>9.1f} {statistics.median(latencies) * 1000:>8.0f} "
+              f"{percentile(latencies, 0.95) * 1000:>8.0f} {percentile(profile_latencies, 0.95) * 1000:>15.0f} "
+              f"{len(failures):>7}")
+
+    password_hashing_service.shutdown()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark Socket.IO fan-out latency across worker processes
+
+Starts several app worker processes sharing one message queue, connects
+clients to each of them, then emits events from a separate, write-only
+process (as a Celery task or CLI script would) to one user's room. Reports
+delivery latency per worker, which shows the cost of the queue hop and that
+every worker receives every event.
+
+Needs a reachable message queue (Redis) and the python-socketio client.
+
+Usage:
+    python benchmark_socketio_fanout.py --queue redis://localhost:6379/0
+    python benchmark_socketio_fanout.py --workers 4 --clients 25 --events 200
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import multiprocessing
+import statistics
+import tempfile
+import threading
+import time
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def serve(port, database_url, queue):
+    """Run one app worker process"""
+    os.environ['DEV_DATABASE_URL'] = database_url
+    os.environ['SOCKETIO_MESSAGE_QUEUE'] = queue
+    from app import create_app, socketio
+
+    application = create_app('development')
+    application.config['DEBUG'] = False
+    socketio.run(application, host='127.0.0.1', port=port, debug=False, use_reloader=False,
+                 log_output=False, allow_unsafe_werkzeug=True)
+
+def prepare_database(database_url):
+    """Create one user and return (user_id, access token)"""
+    os.environ['DEV_DATABASE_URL'] = database_url
+    from app import create_app, db
+    import app.models  # noqa: F401
+    from app.models.auth.role import Role
+    from app.models.auth.user import User
+
+    application = create_app('development')
+    with application.app_context():
+        db.create_all()
+        role = Role(name='manager', description='Manager')
+        db.session.add(role)
+        db.session.flush()
+        user = User(email='fanout@benchmark.local', username='fanout', first_name='Fan',
+                    last_name='Out', role_id=role.id, password_hash='-')
+        db.session.add(user)
+        db.session.commit()
+        return user.id, user.generate_tokens()['access_token']
+
+def connect_client(url, token, latencies, lock, attempts=50):
+    import socketio as socketio_client
+
+    client = socketio_client.Client(reconnection=False)
+
+    @client.on('benchmark_ping')
+    def on_ping(data):
+        with lock:
+            latencies.append(time.time() - data['sent_at'])
+
+    for _ in range(attempts):
+        try:
+            client.connect(url, auth={'token': token}, wait_timeout=5)
+            return client
+        except Exception:
+            # The worker may still be starting
+            time.sleep(0.2)
+    raise RuntimeError(f'Could not connect to {url}')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Socket.IO fan-out latency across worker processes')
+    parser.add_argument('--queue', default=os.environ.get('SOCKETIO_MESSAGE_QUEUE') or os.environ.get('REDIS_URL'),
+                        help='Message queue URL (default: SOCKETIO_MESSAGE_QUEUE or REDIS_URL)')
+    parser.add_argument('--workers', type=int, default=2, help='App worker processes')
+    parser.add_argument('--clients', type=int, default=10, help='Connected clients per worker')
+    parser.add_argument('--events', type=int, default=100, help='Events to emit')
+    parser.add_argument('--interval', type=float, default=0.01, help='Seconds between events')
+    parser.add_argument('--port', type=int, default=5600, help='First worker port')
+    args = parser.parse_args(argv)
+
+    if not args.queue:
+        print("❌ A message queue is required, e.g. --queue redis://localhost:6379/0", file=sys.stderr)
+        return 2
+
+    directory = tempfile.mkdtemp(prefix='fanout-benchmark-')
+    database_url = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    user_id, token = prepare_database(database_url)
+
+    context = multiprocessing.get_context('spawn')
+    workers = [
+        context.Process(target=serve, args=(args.port + i, database_url, args.queue), daemon=True)
+        for i in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    lock = threading.Lock()
+    latencies = {i: [] for i in range(args.workers)}
+    clients = []
+    try:
+        print(f"📡 {args.workers} workers x {args.clients} clients, {args.events} events via {args.queue}")
+        for i in range(args.workers):
+            for _ in range(args.clients):
+                clients.append(connect_client(f'http://127.0.0.1:{args.port + i}', token, latencies[i], lock))
+
+        # A write-only emitter, like a background job outside the web workers
+        from flask_socketio import SocketIO
+        emitter = SocketIO(message_queue=args.queue, channel=os.environ.get('SOCKETIO_CHANNEL', 'home-health-socketio'))
+        for seq in range(args.events):
+            emitter.emit('benchmark_ping', {'seq': seq, 'sent_at': time.time()}, room=f'user_{user_id}')
+            time.sleep(args.interval)
+
+        expected = args.events * args.clients
+        deadline = time.time() + 10
+        while time.time() < deadline and any(len(values) < expected for values in latencies.values()):
+            time.sleep(0.1)
+
+        print(f"{'worker':<8} {'delivered':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for i, values in latencies.items():
+            print(f"{i:<8} {len(values):>5}/{expected:<4} {statistics.median(values) * 1000 if values else 0:>8.1f} "
+                  f"{percentile(values, 0.95) * 1000:>8.1f} {max(values, default=0) * 1000:>8.1f}")
+        every = [value for values in latencies.values() for value in values]
+        print(f"📊 overall p50 {statistics.median(every) * 1000 if every else 0:.1f} ms, "
+              f"p95 {percentile(every, 0.95) * 1000:.1f} ms")
+        return 0 if len(every) == expected * args.workers else 1
+    finally:
+        for client in clients:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        for worker in workers:
+            worker.terminate()
+
+if __name__ == '__main__':
+    sys.exit(main())
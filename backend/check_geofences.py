@@ -1,36 +1,249 @@
 #!/usr/bin/env python3
 """
-Simple script to check geofences in the database
+Geofence diagnostics CLI
+
+Reports overlapping geofences, active clients without a geofence, geofences
+with implausible radii, invalid polygons and geofences attached to missing or
+inactive clients.
+
+Usage:
+    python check_geofences.py                      # human readable summary
+    python check_geofences.py --format json -o report.json
+    python check_geofences.py --format csv --checks overlap,radius
 """
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import argparse
+import csv
+import json
+import shapely
 from app import create_app, db
 from app.models.geolocation.geofence import Geofence
 from app.models.client.client import Client
+from app.services.geolocation.geofence_index_service import GeofenceIndexService, polygon_from_coordinates
+
+CHECKS = ['overlap', 'missing_fence', 'radius', 'polygon', 'orphan']
+CSV_FIELDS = ['check', 'severity', 'geofence_id', 'geofence_name', 'client_id', 'client_name', 'detail']
+
+def load_geofences(include_inactive=False):
+    """Load geofences with their client in a single joined query"""
+    query = db.session.query(
+        Geofence.id, Geofence.name, Geofence.client_id, Geofence.geofence_type,
+        Geofence.center_latitude, Geofence.center_longitude, Geofence.radius_meters,
+        Geofence.polygon_coordinates, Geofence.is_active,
+        Client.first_name.label('client_first_name'),
+        Client.last_name.label('client_last_name'),
+        Client.is_active.label('client_is_active')
+    ).outerjoin(Client, Client.id == Geofence.client_id)
+
+    if not include_inactive:
+        query = query.filter(Geofence.is_active == True)
+
+    return query.all()
+
+def client_name(row):
+    if row.client_first_name is None:
+        return None
+    return f"{row.client_first_name} {row.client_last_name}"
+
+def finding(check, severity, row=None, detail='', **extra):
+    result = {
+        'check': check,
+        'severity': severity,
+        'geofence_id': row.id if row is not None else None,
+        'geofence_name': row.name if row is not None else None,
+        'client_id': row.client_id if row is not None else None,
+        'client_name': client_name(row) if row is not None else None,
+        'detail': detail
+    }
+    result.update(extra)
+    return result
+
+def check_overlaps(rows):
+    """Find overlapping active geofences using the spatial index"""
+    index = GeofenceIndexService(max_age_seconds=float('inf'))
+    index.load([row for row in rows if row.is_active])
+    rows_by_id = {row.id: row for row in rows}
+
+    findings = []
+    for a, b, distance in index.query_overlaps():
+        same_client = a['client_id'] == b['client_id']
+        findings.append(finding(
+            'overlap',
+            'info' if same_client else 'warning',
+            rows_by_id[a['id']],
+            f"Overlaps geofence {b['id']} ({b['name']}) at {distance:.0f}m"
+            + (' for the same client' if same_client else f" for client {b['client_id']}"),
+            other_geofence_id=b['id']
+        ))
+    return findings
+
+def check_missing_fences():
+    """Find active clients with no active geofence in a single query"""
+    has_fence = db.session.query(Geofence.id).filter(
+        Geofence.client_id == Client.id,
+        Geofence.is_active == True
+    ).exists()
+    clients = db.session.query(
+        Client.id, Client.first_name, Client.last_name, Client.address, Client.latitude
+    ).filter(Client.is_active == True, ~has_fence).all()
+
+    findings = []
+    for client in clients:
+        if client.latitude is None:
+            detail = 'No active geofence and no coordinates' + ('' if client.address else ' or address')
+        else:
+            detail = 'No active geofence'
+        findings.append({
+            'check': 'missing_fence',
+            'severity': 'error',
+            'geofence_id': None,
+            'geofence_name': None,
+            'client_id': client.id,
+            'client_name': f"{client.first_name} {client.last_name}",
+            'detail': detail
+        })
+    return findings
+
+def check_radii(rows, min_radius, max_radius):
+    findings = []
+    for row in rows:
+        radius = row.radius_meters
+        if radius is None or radius < min_radius or radius > max_radius:
+            findings.append(finding(
+                'radius', 'warning', row,
+                f"Radius {radius}m outside plausible range {min_radius}-{max_radius}m"
+            ))
+    return findings
+
+def check_polygons(rows):
+    """Validate polygon geofences with a single vectorized validity check"""
+    findings = []
+    candidates = []
+    geometries = []
+    for row in rows:
+        if row.geofence_type != 'polygon':
+            continue
+        if not row.polygon_coordinates:
+            findings.append(finding('polygon', 'error', row, 'Polygon geofence has no coordinates'))
+            continue
+        try:
+            geometries.append(polygon_from_coordinates(row.polygon_coordinates))
+            candidates.append(row)
+        except Exception as e:
+            findings.append(finding('polygon', 'error', row, f'Malformed polygon: {e}'))
+
+    if geometries:
+        reasons = shapely.is_valid_reason(geometries)
+        for row, valid, reason in zip(candidates, shapely.is_valid(geometries), reasons):
+            if not valid:
+                findings.append(finding('polygon', 'error', row, f'Invalid polygon: {reason}'))
+    return findings
+
+def check_orphans(rows):
+    findings = []
+    for row in rows:
+        if row.client_first_name is None:
+            findings.append(finding('orphan', 'error', row, 'Client does not exist'))
+        elif row.is_active and not row.client_is_active:
+            findings.append(finding('orphan', 'warning', row, 'Active geofence for an inactive client'))
+    return findings
+
+def run_diagnostics(checks, include_inactive=False, min_radius=10, max_radius=5000):
+    """Run the selected checks and return a report dict"""
+    rows = load_geofences(include_inactive)
+    findings = []
+
+    if 'overlap' in checks:
+        findings.extend(check_overlaps(rows))
+    if 'missing_fence' in checks:
+        findings.extend(check_missing_fences())
+    if 'radius' in checks:
+        findings.extend(check_radii(rows, min_radius, max_radius))
+    if 'polygon' in checks:
+        findings.extend(check_polygons(rows))
+    if 'orphan' in checks:
+        findings.extend(check_orphans(rows))
+
+    summary = {check: 0 for check in checks}
+    for item in findings:
+        summary[item['check']] += 1
+
+    return {
+        'geofences_checked': len(rows),
+        'active_geofences': sum(1 for row in rows if row.is_active),
+        'summary': summary,
+        'findings': findings
+    }
+
+def write_text(report, out):
+    out.write("🔍 Geofence diagnostics\n")
+    out.write(f"\n📊 Checked {report['geofences_checked']} geofences "
+              f"({report['active_geofences']} active)\n")
+    for check, count in report['summary'].items():
+        marker = '✅' if count == 0 else '⚠️ '
+        out.write(f"   {marker} {check}: {count}\n")
+
+    for item in report['findings']:
+        target = item['geofence_name'] or item['client_name'] or item['client_id']
+        out.write(f"\n[{item['severity']}] {item['check']}: {target}\n")
+        if item['geofence_id']:
+            out.write(f"   Geofence: {item['geofence_id']}\n")
+        out.write(f"   Client: {item['client_name'] or 'Unknown'} ({item['client_id']})\n")
+        out.write(f"   {item['detail']}\n")
+
+def write_csv(report, out):
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(report['findings'])
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Check geofences for common problems')
+    parser.add_argument('--format', choices=['text', 'json', 'csv'], default='text')
+    parser.add_argument('-o', '--output', help='Write the report to a file instead of stdout')
+    parser.add_argument('--checks', default=','.join(CHECKS),
+                        help=f"Comma-separated checks to run (default: {','.join(CHECKS)})")
+    parser.add_argument('--include-inactive', action='store_true',
+                        help='Also check deactivated geofences (overlaps only consider active ones)')
+    parser.add_argument('--config', default=os.environ.get('FLASK_ENV', 'development'),
+                        help='Application config to use (development, production, testing)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    checks = [check.strip() for check in args.checks.split(',') if check.strip()]
+    unknown = set(checks) - set(CHECKS)
+    if unknown:
+        print(f"Unknown checks: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    app = create_app(args.config)
 
-def check_geofences():
-    """Check all geofences in the database"""
-    app = create_app()
-    
     with app.app_context():
-        print("🔍 Checking geofences in database...")
-        
-        geofences = Geofence.query.all()
-        print(f"\n📊 Found {len(geofences)} geofences:")
-        
-        for geofence in geofences:
-            client = Client.query.get(geofence.client_id)
-            print(f"\n📍 Geofence: {geofence.name}")
-            print(f"   ID: {geofence.id}")
-            print(f"   Active: {geofence.is_active}")
-            print(f"   Client: {client.first_name} {client.last_name}" if client else "   Client: Unknown")
-            print(f"   Coordinates: {geofence.center_latitude}, {geofence.center_longitude}")
-            print(f"   Radius: {geofence.radius_meters}m")
-            print(f"   Type: {geofence.geofence_type}")
-            print(f"   Description: {geofence.description}")
+        report = run_diagnostics(
+            checks,
+            include_inactive=args.include_inactive,
+            min_radius=app.config['GEOFENCE_MIN_RADIUS_METERS'],
+            max_radius=app.config['GEOFENCE_MAX_RADIUS_METERS']
+        )
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump(report, out, indent=2)
+            out.write('\n')
+        elif args.format == 'csv':
+            write_csv(report, out)
+        else:
+            write_text(report, out)
+    finally:
+        if args.output:
+            out.close()
+
+    return 1 if any(item['severity'] == 'error' for item in report['findings']) else 0
 
 if __name__ == '__main__':
-    check_geofences() 
\ No newline at end of file
+    sys.exit(main())
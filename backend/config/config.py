@@ -4,9 +4,20 @@ from datetime import timedelta
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    AGENCY_TIMEZONE = os.environ.get('AGENCY_TIMEZONE', 'America/New_York')  # local calendar day for daily rollups
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))  # changing it rehashes passwords at next login
+    PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'process')  # process, thread or inline
+    PASSWORD_HASH_WORKERS = None  # defaults to one per CPU
+    PASSWORD_HASH_MAX_PENDING = 64  # password checks queued or running at once
+    PASSWORD_HASH_WAIT_SECONDS = 10
+    PASSWORD_HASH_PARALLEL_THRESHOLD = 4  # smaller batches are hashed inline
+    AUTHZ_CACHE_MAX_AGE_SECONDS = 30  # recheck that token role claims are current at least this often
+    AUTHZ_CACHE_SIZE = 4096
+    IDENTITY_CACHE_MAX_AGE_SECONDS = 30  # reload the cached current user and role at least this often
+    IDENTITY_CACHE_SIZE = 4096
     
     # Mail settings
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
@@ -14,9 +25,47 @@ class Config:
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', True)
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
     
     # Redis settings
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    TOKEN_BLOCKLIST_REDIS_URL = REDIS_URL  # None keeps revoked tokens in each process only
+    TOKEN_BLOCKLIST_CAPACITY = 100000  # Bloom filter size; grows on resync if more tokens are revoked
+    TOKEN_BLOCKLIST_ERROR_RATE = 0.001
+    TOKEN_BLOCKLIST_SYNC_SECONDS = 5  # pick up tokens revoked by other processes at least this often
+    TOKEN_BLOCKLIST_RETRY_REDIS_SECONDS = 30  # skip Redis this long after an error
+    
+    # Proxies in front of the app that append X-Forwarded-For, e.g. 1 behind an ALB;
+    # 0 uses the socket address, since the header is then client supplied
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 0))
+    
+    # Rate limit settings
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_REDIS_URL = REDIS_URL  # None counts requests in each process only
+    RATE_LIMIT_RETRY_REDIS_SECONDS = 30  # count in memory this long after a Redis error
+    # Each policy matches endpoint names ('auth.login') or whole blueprints ('geolocation'),
+    # and counts per key: any of 'ip', 'user' and 'endpoint'
+    RATE_LIMIT_POLICIES = {
+        'login': {'match': ['auth.login'], 'limit': 30, 'period': 60, 'key': ['ip']},
+        'register': {'match': ['auth.register'], 'limit': 10, 'period': 3600, 'key': ['ip']},
+        'change_password': {'match': ['auth.change_password'], 'limit': 10, 'period': 300, 'key': ['user']},
+        'accept_invite': {'match': ['auth.accept_invite'], 'limit': 10, 'period': 300, 'key': ['ip']},
+        'geocode': {
+            'match': ['geolocation.geocode_address', 'geolocation.reverse_geocode'],
+            'limit': 60, 'period': 60, 'key': ['user']
+        },
+    }
+    
+    # Socket.IO settings
+    # Redis URL (e.g. REDIS_URL) that fans emits out to every worker process;
+    # None keeps Socket.IO in one process, which is enough for one worker and tests
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'home-health-socketio')
+    # Where each user's socket ids are shared, so removing a participant on one
+    # worker takes their sockets on the others out of the room; None for one process
+    SOCKET_SESSION_REDIS_URL = SOCKETIO_MESSAGE_QUEUE
+    SOCKET_SESSION_TTL_SECONDS = 86400  # ids left by a crashed worker expire after this long
+    SOCKET_SESSION_RETRY_REDIS_SECONDS = 30  # skip Redis this long after an error
     
     # AWS settings
     AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
@@ -35,8 +84,86 @@ class Config:
     
     # Geofencing settings
     DEFAULT_GEOFENCE_RADIUS = 100  # meters
+    GEOFENCE_MIN_RADIUS_METERS = 10
+    GEOFENCE_MAX_RADIUS_METERS = 5000
+    GEOFENCE_INDEX_MAX_AGE_SECONDS = 60  # rebuild the in-process spatial index at least this often
+    GEOFENCE_IMPORT_BATCH_SIZE = 1000
     LOCATION_UPDATE_INTERVAL = 30  # seconds
     
+    # Travel model settings
+    DISTANCE_MATRIX_ROAD_FACTOR = float(os.environ.get('DISTANCE_MATRIX_ROAD_FACTOR', 1.3))
+    DISTANCE_MATRIX_AVERAGE_SPEED_KMH = float(os.environ.get('DISTANCE_MATRIX_AVERAGE_SPEED_KMH', 40))
+    DISTANCE_MATRIX_MAX_CELLS = 250000  # origins x destinations; ~7 MB of JSON per response
+    DISTANCE_MATRIX_CACHE_MAX_CELLS = 5000000  # cached client matrices, ~40 MB in total
+    
+    # Geocoding settings
+    GAZETTEER_PATH = os.environ.get('GAZETTEER_PATH') or \
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gazetteer.db')
+    GEOCODING_OFFLINE = os.environ.get('GEOCODING_OFFLINE', 'false').lower() in ('1', 'true', 'yes')  # gazetteer only
+    
+    # Client geocoding settings
+    CLIENT_GEOCODING_ASYNC = True  # geocode new clients in a background job
+    CLIENT_GEOCODING_MAX_ATTEMPTS = 3
+    CLIENT_GEOCODING_RETRY_BACKOFF_SECONDS = 5  # doubled after each failed attempt
+    CLIENT_GEOCODING_STALE_SECONDS = 600  # pending/in-progress jobs older than this were lost and are requeued
+    
+    # Bulk geocoding and client import settings
+    GEOCODING_BATCH_WORKERS = 4
+    GEOCODING_REQUESTS_PER_SECOND = float(os.environ.get('GEOCODING_REQUESTS_PER_SECOND', 1.0))  # Nominatim usage policy
+    CLIENT_IMPORT_CHUNK_SIZE = 500
+    CLIENT_IMPORT_MAX_ERRORS = 1000
+    COORDINATE_BACKFILL_BATCH_SIZE = 200
+    CLIENT_LIST_MAX_LIMIT = 500
+    CLIENT_SEARCH_DEFAULT_LIMIT = 10
+    CLIENT_SEARCH_MAX_LIMIT = 50
+    CLIENT_OVERVIEW_UPCOMING_DAYS = 14
+    CLIENT_OVERVIEW_MAX_UPCOMING_TASKS = 50
+    CLIENT_OVERVIEW_RECENT_TIMESHEETS = 10
+    CAREGIVER_ACCESS_CACHE_MAX_AGE_SECONDS = 60  # reload cached caregiver->client access at least this often
+    CAREGIVER_ACCESS_CACHE_SIZE = 1024
+    
+    # Messaging settings
+    INBOX_DEFAULT_LIMIT = 20
+    INBOX_MAX_LIMIT = 100
+    INBOX_PARTICIPANT_PREVIEW = 5  # participants listed per conversation in the inbox
+    INBOX_PREVIEW_LENGTH = 200  # characters of the last message shown in the inbox
+    MESSAGE_PAGE_MAX_LIMIT = 100
+    CONVERSATION_MEMBERSHIP_CACHE_MAX_AGE_SECONDS = 30  # reload cached conversation memberships at least this often
+    CONVERSATION_MEMBERSHIP_CACHE_SIZE = 4096
+    # Where membership changes are announced to the other workers' caches; None for one process
+    CONVERSATION_MEMBERSHIP_REDIS_URL = REDIS_URL
+    CONVERSATION_MEMBERSHIP_RETRY_REDIS_SECONDS = 30  # trust cache ages alone this long after a Redis error
+    
+    # Visit scheduling settings
+    VISIT_SCHEDULING_ASYNC = True  # run background scheduling jobs off the request thread
+    VISIT_SCHEDULING_DAY_START = '07:00'  # default shift window, overridable per caregiver
+    VISIT_SCHEDULING_DAY_END = '20:00'
+    VISIT_SCHEDULING_MAX_SHIFT_HOURS = 8
+    VISIT_SCHEDULING_DEFAULT_VISIT_MINUTES = 30  # for tasks without an estimated duration
+    VISIT_SCHEDULING_TIME_WINDOW_MINUTES = 30  # allowed slack either side of a task's scheduled time
+    VISIT_SCHEDULING_BACKUP_PENALTY_METERS = 2000  # continuity of care: cost of a backup over the primary
+    VISIT_SCHEDULING_TEMPORARY_PENALTY_METERS = 1000
+    VISIT_SCHEDULING_NEIGHBOURS = 20
+    VISIT_SCHEDULING_TIME_LIMIT_SECONDS = 5
+    VISIT_SCHEDULING_MAX_VISITS = 5000
+    
+    # Caregiver availability settings
+    CAREGIVER_DAILY_CAPACITY_MINUTES = 480
+    CAREGIVER_AVAILABILITY_MAX_DAYS = 62
+    
+    # Caregiver provisioning settings
+    CAREGIVER_PROVISIONING_MAX_ROWS = 2000
+    CAREGIVER_INVITES_ASYNC = True  # send invite emails from a background queue
+    CAREGIVER_INVITE_URL = os.environ.get('CAREGIVER_INVITE_URL', 'http://localhost:3000/accept-invite')  # ?token= is appended
+    CAREGIVER_INVITE_TTL_HOURS = 72
+    CAREGIVER_INVITE_MAX_ATTEMPTS = 5  # failed sends are retried until then
+    CAREGIVER_INVITE_STALE_SECONDS = 600  # a send claimed this long ago was lost and is retried
+    
+    # Mileage settings
+    MILEAGE_MAX_ACCURACY_METERS = 50  # fixes with worse accuracy are ignored
+    MILEAGE_MAX_SPEED_MPS = 55  # legs faster than this are GPS teleports
+    MILEAGE_MIN_DISPLACEMENT_METERS = 25  # shorter moves (or within both fixes' accuracy) are stationary jitter
+    
     # File upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     UPLOAD_FOLDER = 'uploads'
@@ -51,8 +178,22 @@ class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'postgresql://localhost/home_health_aid'
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE', Config.REDIS_URL)
+    SOCKET_SESSION_REDIS_URL = SOCKETIO_MESSAGE_QUEUE
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 1))  # the ALB
 
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    GAZETTEER_PATH = ':memory:'
+    GEOCODING_OFFLINE = True
     WTF_CSRF_ENABLED = False
+    CLIENT_GEOCODING_ASYNC = False
+    VISIT_SCHEDULING_ASYNC = False
+    CAREGIVER_INVITES_ASYNC = False
+    MAIL_DEFAULT_SENDER = 'noreply@homehealth.test'  # Flask-Mail records rather than sends while testing
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_EXECUTOR = 'inline'
+    TOKEN_BLOCKLIST_REDIS_URL = None
+    RATE_LIMIT_REDIS_URL = None
+    CONVERSATION_MEMBERSHIP_REDIS_URL = None
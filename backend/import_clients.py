@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Bulk import clients from a CSV or XLSX spreadsheet
+
+Rows are read, validated, geocoded and inserted in chunks, together with a
+home geofence for every client that ends up with coordinates. Columns match
+the client fields (first_name, last_name, address, latitude, longitude, ...);
+common variants such as "First Name", "DOB" or "Lat" are recognized.
+
+Usage:
+    python import_clients.py clients.csv --created-by admin@homehealth.com
+    python import_clients.py clients.xlsx --created-by admin@homehealth.com --dry-run
+    python import_clients.py clients.csv --created-by admin@homehealth.com --no-geocode
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+from app import create_app, db
+from app.models.auth.user import User
+from app.models.reporting.audit_log import AuditLog
+from app.services.client.client_import_service import client_import_service
+
+def print_progress(summary):
+    if summary['done']:
+        return
+    print(f"   ⏳ {summary['total_rows']} rows read, {summary['imported']} imported, "
+          f"{summary['failed']} failed, {summary['geocoded']} geocoded")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk import clients from CSV or XLSX')
+    parser.add_argument('path', help='CSV or XLSX file')
+    parser.add_argument('--created-by', required=True, help='Email of the user recorded as creator')
+    parser.add_argument('--dry-run', action='store_true', help='Validate rows without importing')
+    parser.add_argument('--no-geocode', action='store_true',
+                        help='Leave addresses without coordinates deferred for the backfill job')
+    parser.add_argument('--chunk-size', type=int, help='Rows per chunk (default: CLIENT_IMPORT_CHUNK_SIZE)')
+    parser.add_argument('--errors', help='Write per-row errors to this JSON file')
+    parser.add_argument('--config', default=os.environ.get('FLASK_ENV', 'development'),
+                        help='Application config to use (development, production, testing)')
+    args = parser.parse_args(argv)
+
+    app = create_app(args.config)
+
+    with app.app_context():
+        user = User.query.filter_by(email=args.created_by).first()
+        if not user:
+            print(f"❌ No user with email {args.created_by}", file=sys.stderr)
+            return 2
+
+        if args.chunk_size:
+            client_import_service.chunk_size = args.chunk_size
+
+        print(f"📥 Importing clients from {args.path}{' (dry run)' if args.dry_run else ''}")
+        try:
+            with open(args.path, 'rb') as stream:
+                summary = client_import_service.import_clients(
+                    stream,
+                    os.path.basename(args.path),
+                    user.id,
+                    dry_run=args.dry_run,
+                    geocode=not args.no_geocode,
+                    progress=print_progress
+                )
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 2
+
+        if summary['imported']:
+            db.session.add(AuditLog(
+                user_id=user.id,
+                action='clients_imported',
+                resource_type='client',
+                details={
+                    **{k: v for k, v in summary.items() if k != 'errors'},
+                    'filename': os.path.basename(args.path),
+                    'errors': summary['errors'][:100]
+                }
+            ))
+            db.session.commit()
+
+    print(f"\n📊 {summary['total_rows']} rows: {summary['valid']} valid, {summary['imported']} imported, "
+          f"{summary['failed']} failed")
+    print(f"   📍 {summary['geocoded']} geocoded, {summary['geocode_failed']} could not be geocoded")
+    print(f"   🏠 {summary['geofences_created']} home geofences created")
+
+    for error in summary['errors'][:20]:
+        print(f"   ⚠️  Row {error['row']}: {error['error']}")
+    if len(summary['errors']) > 20:
+        print(f"   ... {len(summary['errors']) - 20} more")
+
+    if args.errors:
+        with open(args.errors, 'w') as handle:
+            json.dump(summary['errors'], handle, indent=2)
+        print(f"📝 Errors written to {args.errors}")
+
+    return 1 if summary['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Load addresses into the offline geocoding gazetteer
+
+The CSV needs address, latitude and longitude columns; postcode and source
+are optional. Existing entries for the same normalized address are replaced.
+
+Usage:
+    python load_gazetteer.py addresses.csv
+    python load_gazetteer.py --from-clients    # learn from clients that already have coordinates
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+from app.services.geolocation.local_gazetteer import LocalGazetteer
+from config import Config
+
+def load_from_clients(gazetteer):
+    """Copy client addresses with known coordinates into the gazetteer"""
+    from app import create_app, db
+    from app.models.client.client import Client
+    
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    count = 0
+    with app.app_context():
+        rows = db.session.query(Client.address, Client.latitude, Client.longitude).filter(
+            Client.address.isnot(None),
+            Client.latitude.isnot(None),
+            Client.longitude.isnot(None)
+        ).yield_per(1000)
+        for row in rows:
+            gazetteer.add(row.address, row.latitude, row.longitude, source='clients')
+            count += 1
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load addresses into the offline gazetteer')
+    parser.add_argument('csv_path', nargs='?', help='CSV file with address, latitude, longitude columns')
+    parser.add_argument('--from-clients', action='store_true', help='Load geocoded client addresses')
+    parser.add_argument('--path', default=Config.GAZETTEER_PATH,
+                        help='Gazetteer SQLite file (default: $GAZETTEER_PATH or backend/gazetteer.db)')
+    args = parser.parse_args(argv)
+    
+    if not args.csv_path and not args.from_clients:
+        parser.error('Provide a CSV file and/or --from-clients')
+    
+    gazetteer = LocalGazetteer(args.path)
+    
+    if args.csv_path:
+        print(f"📥 Loaded {gazetteer.import_csv(args.csv_path)} entries from {args.csv_path}")
+    if args.from_clients:
+        print(f"📥 Loaded {load_from_clients(gazetteer)} entries from clients")
+    
+    print(f"📊 Gazetteer now holds {gazetteer.count()} entries ({args.path})")
+
+if __name__ == '__main__':
+    main()
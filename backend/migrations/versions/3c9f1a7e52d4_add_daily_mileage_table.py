@@ -0,0 +1,44 @@
+"""Add daily mileage rollup table
+
+Revision ID: 3c9f1a7e52d4
+Revises: 66ee71d2914a
+Create Date: 2026-10-19 09:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9f1a7e52d4'
+down_revision = '66ee71d2914a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_mileage',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('distance_meters', sa.Float(), nullable=True),
+    sa.Column('point_count', sa.Integer(), nullable=True),
+    sa.Column('dropped_point_count', sa.Integer(), nullable=True),
+    sa.Column('last_latitude', sa.Float(), nullable=True),
+    sa.Column('last_longitude', sa.Float(), nullable=True),
+    sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+    sa.Column('pending_latitude', sa.Float(), nullable=True),
+    sa.Column('pending_longitude', sa.Float(), nullable=True),
+    sa.Column('pending_timestamp', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'date', name='uq_daily_mileage_user_date')
+    )
+    op.create_index('ix_locations_user_timestamp', 'locations', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_locations_user_timestamp', table_name='locations')
+    op.drop_table('daily_mileage')
@@ -0,0 +1,33 @@
+"""Add client geocoding status
+
+Revision ID: 8d21b6f4c0a3
+Revises: 3c9f1a7e52d4
+Create Date: 2026-10-19 11:03:17.582904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d21b6f4c0a3'
+down_revision = '3c9f1a7e52d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geocoding_status', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('geocoding_error', sa.String(length=255), nullable=True))
+
+    # Existing clients: geocoded ones are complete, the rest still need geocoding
+    op.execute("UPDATE clients SET geocoding_status = 'completed' WHERE latitude IS NOT NULL AND longitude IS NOT NULL")
+    op.execute("UPDATE clients SET geocoding_status = 'pending' WHERE geocoding_status IS NULL AND address IS NOT NULL AND address <> ''")
+    op.execute("UPDATE clients SET geocoding_status = 'not_required' WHERE geocoding_status IS NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_column('geocoding_error')
+        batch_op.drop_column('geocoding_status')
@@ -0,0 +1,26 @@
+"""Add user authz version
+
+Revision ID: a3d7e5f9c2b4
+Revises: f4b9d2e6a158
+Create Date: 2026-10-19 19:41:52.306118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d7e5f9c2b4'
+down_revision = 'f4b9d2e6a158'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('authz_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('authz_version')
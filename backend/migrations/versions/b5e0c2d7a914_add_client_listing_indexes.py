@@ -0,0 +1,26 @@
+"""Add client listing indexes
+
+Revision ID: b5e0c2d7a914
+Revises: 8d21b6f4c0a3
+Create Date: 2026-10-19 13:41:52.106238
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e0c2d7a914'
+down_revision = '8d21b6f4c0a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_clients_active_last_name', 'clients', ['is_active', 'last_name', 'id'], unique=False)
+    op.create_index('ix_clients_active_updated_at', 'clients', ['is_active', 'updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_clients_active_updated_at', table_name='clients')
+    op.drop_index('ix_clients_active_last_name', table_name='clients')
@@ -0,0 +1,28 @@
+"""Add message keyset index
+
+Revision ID: b7c3e9a5d2f8
+Revises: d8e2b4f6a1c3
+Create Date: 2026-10-19 21:48:12.905316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c3e9a5d2f8'
+down_revision = 'd8e2b4f6a1c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Covers (created_at, id) keyset pages; the old index is a prefix of it
+    op.create_index('ix_messages_conversation_created_id', 'messages',
+                    ['conversation_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_messages_conversation_created', table_name='messages')
+
+
+def downgrade():
+    op.create_index('ix_messages_conversation_created', 'messages', ['conversation_id', 'created_at'], unique=False)
+    op.drop_index('ix_messages_conversation_created_id', table_name='messages')
@@ -0,0 +1,26 @@
+"""Add daily mileage last accuracy
+
+Revision ID: c4f1a8d3b6e2
+Revises: b7c3e9a5d2f8
+Create Date: 2026-10-19 18:40:12.204615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f1a8d3b6e2'
+down_revision = 'b7c3e9a5d2f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('daily_mileage', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_accuracy', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('daily_mileage', schema=None) as batch_op:
+        batch_op.drop_column('last_accuracy')
@@ -0,0 +1,83 @@
+"""Add client search index
+
+Revision ID: c7a3e91f0b26
+Revises: b5e0c2d7a914
+Create Date: 2026-10-19 15:12:08.473615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a3e91f0b26'
+down_revision = 'b5e0c2d7a914'
+branch_labels = None
+depends_on = None
+
+PHONE_DIGITS_SQLITE = (
+    "replace(replace(replace(replace(replace(replace(coalesce({0}phone, ''), ' ', ''), '-', ''), "
+    "'(', ''), ')', ''), '.', ''), '+', '')"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Expressions must match the ones in ClientSearchService's query
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(
+            "CREATE INDEX ix_clients_search_name_trgm ON clients "
+            "USING gin ((lower(first_name || ' ' || last_name)) gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX ix_clients_search_address_trgm ON clients "
+            "USING gin ((lower(coalesce(address, ''))) gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX ix_clients_search_phone_trgm ON clients "
+            "USING gin ((regexp_replace(coalesce(phone, ''), '\\D', '', 'g')) gin_trgm_ops)"
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS client_search USING fts5("
+            "client_id UNINDEXED, name, phone, address, tokenize='trigram')"
+        )
+        row_values = (
+            "new.id, new.first_name || ' ' || new.last_name, "
+            + PHONE_DIGITS_SQLITE.format('new.') + ", coalesce(new.address, '')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS clients_search_insert AFTER INSERT ON clients BEGIN "
+            f"INSERT INTO client_search (client_id, name, phone, address) VALUES ({row_values}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS clients_search_update "
+            "AFTER UPDATE OF first_name, last_name, phone, address ON clients BEGIN "
+            "DELETE FROM client_search WHERE client_id = old.id; "
+            f"INSERT INTO client_search (client_id, name, phone, address) VALUES ({row_values}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS clients_search_delete AFTER DELETE ON clients BEGIN "
+            "DELETE FROM client_search WHERE client_id = old.id; END"
+        )
+        op.execute(
+            "INSERT INTO client_search (client_id, name, phone, address) "
+            "SELECT id, first_name || ' ' || last_name, "
+            + PHONE_DIGITS_SQLITE.format('') + ", coalesce(address, '') FROM clients"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_clients_search_phone_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_clients_search_address_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_clients_search_name_trgm')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS clients_search_delete')
+        op.execute('DROP TRIGGER IF EXISTS clients_search_update')
+        op.execute('DROP TRIGGER IF EXISTS clients_search_insert')
+        op.execute('DROP TABLE IF EXISTS client_search')
@@ -0,0 +1,45 @@
+"""Add participant read watermark
+
+Revision ID: d8e2b4f6a1c3
+Revises: a3d7e5f9c2b4
+Create Date: 2026-10-19 21:05:37.418260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e2b4f6a1c3'
+down_revision = 'a3d7e5f9c2b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('conversation_participants', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_read_message_id', sa.String(length=36), nullable=True))
+        batch_op.add_column(sa.Column('last_read_at', sa.DateTime(), nullable=True))
+    # Start from the newest message the legacy is_read flag marks as read
+    op.execute("""
+        UPDATE conversation_participants SET last_read_at = (
+            SELECT MAX(m.created_at) FROM messages m
+            WHERE m.conversation_id = conversation_participants.conversation_id AND m.is_read = true
+        )
+    """)
+    op.execute("""
+        UPDATE conversation_participants SET last_read_message_id = (
+            SELECT MAX(m.id) FROM messages m
+            WHERE m.conversation_id = conversation_participants.conversation_id
+            AND m.created_at = conversation_participants.last_read_at
+        )
+        WHERE last_read_at IS NOT NULL
+    """)
+    op.create_index('ix_messages_conversation_created', 'messages', ['conversation_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_messages_conversation_created', table_name='messages')
+    with op.batch_alter_table('conversation_participants', schema=None) as batch_op:
+        batch_op.drop_column('last_read_at')
+        batch_op.drop_column('last_read_message_id')
@@ -0,0 +1,25 @@
+"""Add caregiver assignment current index
+
+Revision ID: e2f8a4c1d937
+Revises: c7a3e91f0b26
+Create Date: 2026-10-19 16:12:08.531742
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f8a4c1d937'
+down_revision = 'c7a3e91f0b26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_caregiver_assignments_current', 'caregiver_assignments',
+                    ['caregiver_id', 'is_active', 'start_date', 'end_date', 'client_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_caregiver_assignments_current', table_name='caregiver_assignments')
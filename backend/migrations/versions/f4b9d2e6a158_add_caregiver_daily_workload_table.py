@@ -0,0 +1,51 @@
+"""Add caregiver daily workload table
+
+Revision ID: f4b9d2e6a158
+Revises: e2f8a4c1d937
+Create Date: 2026-10-19 18:03:27.640915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b9d2e6a158'
+down_revision = 'e2f8a4c1d937'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('caregiver_daily_workload',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('caregiver_id', sa.String(length=36), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('assigned_clients', sa.Integer(), nullable=True),
+    sa.Column('assigned_tasks', sa.Integer(), nullable=True),
+    sa.Column('completed_tasks', sa.Integer(), nullable=True),
+    sa.Column('scheduled_minutes', sa.Integer(), nullable=True),
+    sa.Column('morning_minutes', sa.Integer(), nullable=True),
+    sa.Column('afternoon_minutes', sa.Integer(), nullable=True),
+    sa.Column('evening_minutes', sa.Integer(), nullable=True),
+    sa.Column('flexible_minutes', sa.Integer(), nullable=True),
+    sa.Column('worked_minutes', sa.Integer(), nullable=True),
+    sa.Column('is_clocked_in', sa.Boolean(), nullable=True),
+    sa.Column('capacity_minutes', sa.Integer(), nullable=True),
+    sa.Column('available_minutes', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['caregiver_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('caregiver_id', 'date', name='uq_caregiver_daily_workload_caregiver_date')
+    )
+    op.create_index('ix_caregiver_daily_workload_date_available', 'caregiver_daily_workload',
+                    ['date', 'available_minutes'], unique=False)
+    # Task lookups by assignee when recomputing a caregiver's days
+    op.create_index('ix_task_assignments_assigned_user_id', 'task_assignments', ['assigned_user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_task_assignments_assigned_user_id', table_name='task_assignments')
+    op.drop_index('ix_caregiver_daily_workload_date_available', table_name='caregiver_daily_workload')
+    op.drop_table('caregiver_daily_workload')
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Bulk create caregiver accounts from a CSV file
+
+Columns are first_name, last_name, email and phone, plus optional password,
+client_ids (several IDs separated by ";") and assignment_type. Passwords are
+hashed on a process pool and every valid row is created in one transaction.
+Each new caregiver is emailed a single-use link to set their password; rows
+without a password can only sign in that way.
+
+Usage:
+    python provision_caregivers.py caregivers.csv --created-by admin@homehealth.com
+    python provision_caregivers.py caregivers.csv --created-by admin@homehealth.com --dry-run
+    python provision_caregivers.py caregivers.csv --created-by admin@homehealth.com --no-invites
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+from app import create_app
+from app.models.auth.user import User
+from app.services.auth.caregiver_provisioning_service import caregiver_provisioning_service
+from app.services.auth.password_hashing_service import password_hashing_service
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk create caregiver accounts from CSV')
+    parser.add_argument('path', help='CSV file')
+    parser.add_argument('--created-by', required=True, help='Email of the user recorded as creator')
+    parser.add_argument('--dry-run', action='store_true', help='Validate rows without creating accounts')
+    parser.add_argument('--no-invites', action='store_true',
+                        help='Do not email invites (every row then needs a password)')
+    parser.add_argument('--workers', type=int, help='Password hashing processes (default: one per CPU)')
+    parser.add_argument('--results', help='Write per-row results to this JSON file')
+    parser.add_argument('--config', default=os.environ.get('FLASK_ENV', 'development'),
+                        help='Application config to use (development, production, testing)')
+    args = parser.parse_args(argv)
+
+    # The CLI exits once the batch is done, so invites cannot wait on a background queue
+    app = create_app(args.config, {'CAREGIVER_INVITES_ASYNC': False})
+
+    with app.app_context():
+        user = User.query.filter_by(email=args.created_by).first()
+        if not user:
+            print(f"❌ No user with email {args.created_by}", file=sys.stderr)
+            return 2
+
+        if args.workers:
+            password_hashing_service.workers = args.workers
+
+        print(f"👥 Creating caregivers from {args.path}{' (dry run)' if args.dry_run else ''}")
+        try:
+            with open(args.path, 'rb') as stream:
+                rows = caregiver_provisioning_service.read_csv(stream)
+            result = caregiver_provisioning_service.provision(
+                rows,
+                user.id,
+                send_invites=not args.no_invites,
+                dry_run=args.dry_run
+            )
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 2
+        finally:
+            password_hashing_service.shutdown()
+
+    summary = result['summary']
+    print(f"\n📊 {summary['total_rows']} rows: {summary['created']} created, {summary['valid']} valid, "
+          f"{summary['failed']} failed")
+
+    failed = [r for r in result['results'] if r['status'] == 'failed']
+    for row in failed[:20]:
+        # Row 1 of the data is line 2 of the file
+        print(f"   ⚠️  Line {row['row'] + 1} ({row['email']}): {row['error']}")
+    if len(failed) > 20:
+        print(f"   ... {len(failed) - 20} more")
+
+    if args.results:
+        with open(args.results, 'w') as handle:
+            json.dump(result['results'], handle, indent=2)
+        print(f"📝 Results written to {args.results}")
+
+    return 1 if summary['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,12 @@
 from app import create_app, socketio
+from app.services.auth.caregiver_provisioning_service import caregiver_provisioning_service
+from app.services.geolocation.client_geocoding_service import client_geocoding_service
 
 app = create_app()
 
 if __name__ == '__main__':
+    # Only the server picks up background work lost when it last stopped; under
+    # gunicorn, run `flask requeue-geocoding` and `flask retry-invites` once per deploy instead
+    client_geocoding_service.start_sweep()
+    caregiver_provisioning_service.start_sweep()
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for role and permission checks and token role claim freshness
+"""
+
+import sys
+import os
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.auth.authorization_service import AuthorizationService
+
+def make_service(versions):
+    service = AuthorizationService(max_age_seconds=60)
+    for user_id, version in versions.items():
+        service._cache[user_id] = (time.monotonic(), version)
+    return service
+
+def test_tokens_must_carry_the_current_version():
+    service = make_service({'ann': 3, 'bob': None})
+
+    assert service.is_current({'sub': 'ann', 'role': 'manager', 'authz_version': 3})
+    assert not service.is_current({'sub': 'ann', 'role': 'manager', 'authz_version': 2})
+    # Deactivated or deleted users have no current version
+    assert not service.is_current({'sub': 'bob', 'role': 'caregiver', 'authz_version': 0})
+
+def test_tokens_without_claims_are_not_checked():
+    service = make_service({})
+
+    # Refresh tokens, and access tokens issued before role claims
+    assert service.is_current({'sub': 'ann', 'type': 'refresh'})
+    assert service._cache == {}
+
+def test_invalidate_drops_cached_versions():
+    service = make_service({'ann': 1, 'bob': 1})
+
+    service.invalidate('ann')
+    assert list(service._cache) == ['bob']
+    service.invalidate()
+    assert not service._cache
+
+def test_routes_check_roles_and_permissions(app, client, make_user):
+    from app import db
+    from app.models.auth.role import Role
+    db.session.add(Role(name='coordinator', description='Coordinator', permissions={'clients': ['create']}))
+    db.session.commit()
+    _, admin = make_user('admin')
+    _, manager = make_user('manager')
+    _, caregiver = make_user('caregiver')
+    _, coordinator = make_user('coordinator')
+    new_client = {'first_name': 'Ada', 'last_name': 'Client'}
+
+    # require_roles('admin', 'manager')
+    assert [client.get('/api/client/', headers=h).status_code
+            for h in (admin, manager, caregiver, coordinator)] == [200, 200, 403, 403]
+    # require_permission('clients', 'create'): granted by the role, whatever its name
+    assert [client.post('/api/client/', headers=h, json=new_client).status_code
+            for h in (admin, manager, caregiver, coordinator)] == [201, 201, 403, 201]
+
+def test_old_tokens_stop_working_after_role_and_status_changes(app, client, make_user):
+    from app import db
+    from app.models.auth.role import Role
+    user, headers = make_user('manager')
+    caregiver_role = Role(name='caregiver', description='Caregiver')
+    db.session.add(caregiver_role)
+    db.session.commit()
+    assert client.get('/api/client/', headers=headers).status_code == 200
+
+    user.role_id = caregiver_role.id
+    db.session.commit()
+    response = client.get('/api/client/', headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Token is out of date, please refresh it'
+    # A new token carries the new role
+    access_token, _ = user.generate_tokens()
+    fresh = {'Authorization': f'Bearer {access_token}'}
+    assert client.get('/api/client/', headers=fresh).status_code == 403
+
+    # Taking a permission away from the role makes its members' tokens stale too
+    caregiver_role.permissions = {**caregiver_role.permissions, 'clients': []}
+    db.session.commit()
+    assert client.get('/api/auth/profile', headers=fresh).status_code == 401
+    access_token, _ = user.generate_tokens()
+    fresh = {'Authorization': f'Bearer {access_token}'}
+    assert client.get('/api/auth/profile', headers=fresh).status_code == 200
+
+    user.is_active = False
+    db.session.commit()
+    assert client.get('/api/auth/profile', headers=fresh).status_code == 401
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for caregiver invite emails and single-use set-password tokens
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+def _provision(make_user, email='ann@example.com'):
+    from app.services.auth.caregiver_provisioning_service import caregiver_provisioning_service
+    admin, headers = make_user('admin')
+    make_user('caregiver')
+    row = {'first_name': 'Ann', 'last_name': 'Lee', 'email': email, 'phone': '555-0100'}
+    result = caregiver_provisioning_service.provision([row], admin.id)
+    return result['results'][0]['caregiver_id'], headers
+
+def _token(message):
+    link = next(line for line in message.body.splitlines() if line.startswith('http'))
+    return parse_qs(urlparse(link).query)['token'][0]
+
+def test_invite_token_sets_the_password_once(app, client, make_user):
+    from app import mail
+    from app.models.auth.user_invite import UserInvite
+    with mail.record_messages() as outbox:
+        caregiver_id, _ = _provision(make_user)
+
+    assert len(outbox) == 1
+    assert outbox[0].recipients == ['ann@example.com']
+    assert 'password:' not in outbox[0].body.lower()
+    token = _token(outbox[0])
+    invite = UserInvite.query.filter_by(user_id=caregiver_id).one()
+    assert invite.status == 'sent'
+    assert invite.token_hash and invite.token_hash != token
+
+    response = client.post('/api/auth/accept-invite', json={'token': token, 'password': 'new-password'})
+    assert response.status_code == 200
+    assert response.get_json()['user']['is_verified'] is True
+    assert UserInvite.query.filter_by(user_id=caregiver_id).one().status == 'accepted'
+
+    response = client.post('/api/auth/accept-invite', json={'token': token, 'password': 'other-password'})
+    assert response.status_code == 400
+    response = client.post('/api/auth/login', json={'email': 'ann@example.com', 'password': 'new-password'})
+    assert response.status_code == 200
+
+def test_failed_invites_are_recorded_and_retried(app, client, make_user, monkeypatch):
+    from app import mail
+    from app.models.auth.user_invite import UserInvite
+
+    def unavailable(message):
+        raise ConnectionError('mail server unavailable')
+
+    monkeypatch.setattr(mail, 'send', unavailable)
+    caregiver_id, headers = _provision(make_user)
+    invite = UserInvite.query.filter_by(user_id=caregiver_id).one()
+    assert (invite.status, invite.attempts, invite.token_hash) == ('failed', 1, None)
+    assert invite.last_error == 'mail server unavailable'
+
+    monkeypatch.undo()
+    with mail.record_messages() as outbox:
+        response = client.post('/api/caregiver/invites/retry', headers=headers)
+    assert response.get_json()['queued'] == 1
+    assert len(outbox) == 1
+    invite = UserInvite.query.filter_by(user_id=caregiver_id).one()
+    assert (invite.status, invite.attempts) == ('sent', 2)
+
+    # Sent invites are not sent again
+    response = client.post('/api/caregiver/invites/retry', headers=headers)
+    assert response.get_json()['queued'] == 0
+
+def test_resending_replaces_an_expired_token(app, client, make_user):
+    from app import db, mail
+    from app.models.auth.user_invite import UserInvite
+    with mail.record_messages() as outbox:
+        caregiver_id, headers = _provision(make_user)
+        invite = UserInvite.query.filter_by(user_id=caregiver_id).one()
+        invite.expires_at = datetime.utcnow() - timedelta(minutes=1)
+        db.session.commit()
+
+        expired = _token(outbox[0])
+        response = client.post('/api/auth/accept-invite', json={'token': expired, 'password': 'new-password'})
+        assert response.status_code == 400
+
+        response = client.post(f'/api/caregiver/{caregiver_id}/invite', headers=headers)
+        assert response.status_code == 202
+        assert response.get_json()['invite']['status'] == 'sent'
+    assert len(outbox) == 2
+
+    fresh = _token(outbox[1])
+    assert fresh != expired
+    response = client.post('/api/auth/accept-invite', json={'token': fresh, 'password': 'new-password'})
+    assert response.status_code == 200
+    response = client.post(f'/api/caregiver/{caregiver_id}/invite', headers=headers)
+    assert response.status_code == 409
+
+def test_scripts_do_not_start_the_invite_sweep(app, monkeypatch):
+    from app import create_app, socketio
+    from app.services.auth.caregiver_provisioning_service import caregiver_provisioning_service
+    started = []
+    monkeypatch.setattr(socketio, 'start_background_task', lambda *args: started.append(args))
+
+    create_app('testing', {'CAREGIVER_INVITES_ASYNC': True})
+    assert started == [] and caregiver_provisioning_service.invites_async
+
+    # Scripts pass the override instead of patching the service afterwards
+    create_app('testing', {'CAREGIVER_INVITES_ASYNC': False})
+    assert not caregiver_provisioning_service.invites_async
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk caregiver provisioning
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.auth.caregiver_provisioning_service import CaregiverProvisioningService, split_ids
+
+def make_row(**overrides):
+    row = {'first_name': 'Ann', 'last_name': 'Lee', 'email': 'ann@example.com', 'phone': '555-0100'}
+    row.update(overrides)
+    return row
+
+def test_rows_are_validated_and_normalized():
+    service = CaregiverProvisioningService()
+
+    values, error = service.validate_row(make_row(client_ids='c1; c2;c1', assignment_type='Backup'))
+    assert error is None
+    assert values['client_ids'] == ['c1', 'c2']
+    assert values['assignment_type'] == 'backup'
+    assert values['password'] is None
+
+    assert service.validate_row(make_row(phone=''))[1] == 'Phone is required'
+    assert service.validate_row(make_row(email='not-an-email'))[1] == 'Invalid email address'
+    assert service.validate_row(make_row(password='x' * 73))[1] == 'Password must be at most 72 bytes'
+    # Without an invite a generated password would never reach the caregiver
+    assert service.validate_row(make_row(), send_invites=False)[1] == 'Password is required when invites are not sent'
+
+def test_split_ids_accepts_lists_and_delimited_strings():
+    assert split_ids(['a', ' b ', '']) == ['a', 'b']
+    assert split_ids('a|b,c') == ['a', 'b', 'c']
+    assert split_ids(None) == []
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached current user copies
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from sqlalchemy import inspect
+import app.models
+import app.models.communication.conversation_participant  # referenced by name from Conversation
+from app.models.auth.user import User
+from app.services.auth.identity_service import detached_copy
+
+def test_detached_copy_keeps_columns_without_history():
+    user = User(id='u1', email='ann@example.com', username='ann', password_hash='x',
+                first_name='Ann', last_name='Lee', role_id='r1', authz_version=2)
+
+    copy = detached_copy(user)
+
+    assert copy is not user
+    assert inspect(copy).detached
+    assert inspect(copy).identity == ('u1',)
+    assert (copy.email, copy.role_id, copy.authz_version) == ('ann@example.com', 'r1', 2)
+    # Merging with load=False requires a clean instance
+    assert not inspect(copy).modified
+
+def _user_statements(client, headers):
+    """Statements that touched the users table while serving the profile"""
+    from app import db
+    from sqlalchemy import event
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM users' in statement:
+            statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/api/auth/profile', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return statements
+
+def test_warm_cache_serves_the_current_user_without_a_query(app, client, make_user):
+    from app.services.auth.identity_service import identity_service
+    user, headers = make_user('manager')
+
+    assert _user_statements(client, headers)
+    assert user.id in identity_service._cache
+    assert _user_statements(client, headers) == []
+    assert client.get('/api/auth/profile', headers=headers).get_json()['user']['email'] == user.email
+
+def test_role_status_and_password_changes_evict_the_user(app, client, make_user):
+    from app import db
+    from app.models.auth.role import Role
+    from app.services.auth.identity_service import identity_service
+    other_role = Role(name='scheduler', description='Scheduler')
+    db.session.add(other_role)
+    db.session.commit()
+    changes = [('role_id', other_role.id), ('is_active', False), ('password_hash', 'changed')]
+
+    for field, value in changes:
+        user, headers = make_user('manager')
+        client.get('/api/auth/profile', headers=headers)
+        assert user.id in identity_service._cache
+
+        setattr(user, field, value)
+        db.session.commit()
+        assert user.id not in identity_service._cache, field
+
+    # Edits through the API evict too, and the next request sees them
+    user, headers = make_user('manager')
+    client.get('/api/auth/profile', headers=headers)
+    assert client.put('/api/auth/profile', headers=headers, json={'first_name': 'Renamed'}).status_code == 200
+    assert client.get('/api/auth/profile', headers=headers).get_json()['user']['first_name'] == 'Renamed'
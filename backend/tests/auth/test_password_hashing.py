@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for password hashing off the request worker
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask_bcrypt import Bcrypt
+from app.services.auth.password_hashing_service import (
+    PasswordHashingService, check_password, hash_password, hash_rounds
+)
+
+def test_hashes_match_flask_bcrypt():
+    hashed = hash_password('Secret123', rounds=4)
+
+    assert hash_rounds(hashed) == 4
+    assert Bcrypt().check_password_hash(hashed, 'Secret123')
+    assert check_password(Bcrypt().generate_password_hash('Secret123', 4).decode('utf-8'), 'Secret123')
+    assert not check_password(hashed, 'wrong')
+    assert not check_password('not-a-hash', 'Secret123')
+
+def test_rehash_needed_when_cost_changes():
+    service = PasswordHashingService(rounds=4, executor='inline')
+    hashed = service.hash('Secret123')
+
+    assert not service.needs_rehash(hashed)
+    service.rounds = 5
+    assert service.needs_rehash(hashed)
+    assert service.verify(hashed, 'Secret123')
+    assert not service.verify(hashed, '')
+
+def test_thread_pool_verifies_and_hashes_in_order():
+    service = PasswordHashingService(rounds=4, executor='thread', workers=2, parallel_threshold=2)
+    try:
+        hashes = service.hash_many(['a', 'b', 'c'])
+        assert [check_password(h, p) for h, p in zip(hashes, ['a', 'b', 'c'])] == [True, True, True]
+        assert service.verify(hashes[0], 'a')
+        assert not service.verify(hashes[0], 'b')
+    finally:
+        service.shutdown()
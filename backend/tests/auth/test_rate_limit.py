@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the sliding window rate limiter
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.auth.rate_limit_service import MemoryWindowStore, retry_after
+
+def test_rejected_requests_are_not_counted():
+    store = MemoryWindowStore()
+
+    results = [store.hit('login:1.2.3.4', 3, 60, 600.0)[0] for _ in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert store.hit('login:5.6.7.8', 3, 60, 600.0)[0]
+
+def test_previous_window_weighs_less_as_time_passes():
+    store = MemoryWindowStore()
+    for _ in range(4):
+        store.hit('k', 4, 60, 600.0)
+
+    # A quarter into the next window, 3 of the 4 earlier requests still count
+    assert store.hit('k', 4, 60, 675.0)[0]
+    assert not store.hit('k', 4, 60, 675.0)[0]
+    # Two windows later they are forgotten
+    assert all(store.hit('k', 4, 60, 780.0)[0] for _ in range(4))
+
+def test_retry_after():
+    # Full current window: wait for the roll over, then for its weight to drop
+    assert retry_after(limit=4, period=60, elapsed=50, current=4, previous=0) == 25
+    # Previous window only: wait until its weight lets one more through
+    assert retry_after(limit=4, period=60, elapsed=0, current=0, previous=8) == 38
+    assert retry_after(limit=4, period=60, elapsed=59.9, current=0, previous=8) == 1
+
+def test_forwarded_clients_get_separate_counters(monkeypatch):
+    import config
+    from app import create_app
+    monkeypatch.setattr(config.TestingConfig, 'TRUSTED_PROXY_COUNT', 1, raising=False)
+    monkeypatch.setattr(config.TestingConfig, 'RATE_LIMIT_POLICIES', {
+        'login': {'match': ['auth.login'], 'limit': 2, 'period': 60, 'key': ['ip']}
+    })
+    client = create_app('testing').test_client()
+
+    def login(forwarded_for):
+        return client.post('/api/auth/login', json={}, headers={'X-Forwarded-For': forwarded_for}).status_code
+
+    assert [login('203.0.113.7') for _ in range(3)] == [400, 400, 429]
+    assert login('198.51.100.4') == 400
+    # Only the address the trusted proxy appended counts, not ones the client sent
+    assert login('198.51.100.4, 203.0.113.9') == 400
+    assert login('203.0.113.9, 203.0.113.7') == 429
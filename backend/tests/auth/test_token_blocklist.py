@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the revoked token blocklist
+"""
+
+import sys
+import os
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.auth.token_blocklist_service import BloomFilter, TokenBlocklistService
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'jti-{i}')
+
+    assert all(f'jti-{i}' in bloom for i in range(1000))
+    false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+    assert false_positives < 300
+
+def test_revoked_until_expiry_without_redis():
+    service = TokenBlocklistService(redis_url=None, capacity=100)
+    now = time.time()
+
+    service.revoke('live', now + 60)
+    service.revoke('already-expired', now - 1)
+
+    assert service.is_revoked('live')
+    assert not service.is_revoked('already-expired')
+    assert not service.is_revoked('never-revoked')
+
+def test_sync_drops_expired_revocations():
+    service = TokenBlocklistService(redis_url=None, capacity=100)
+    service.revoke('short', time.time() + 1)
+    service.revoke('long', time.time() + 60)
+    service._local['short'] = time.time() - 1
+
+    service.sync()
+
+    assert 'short' not in service._local
+    assert not service.is_revoked('short')
+    assert service.is_revoked('long')
+
+class FlakyRedis:
+    """Stands in for a Redis client; fails every call while down"""
+
+    def __init__(self):
+        self.down = True
+        self.calls = 0
+        self.revoked = {}
+
+    def pipeline(self):
+        return FlakyPipeline(self)
+
+    def exists(self, key):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError('Redis is down')
+        return key.split(':', 1)[1] in self.revoked
+
+class FlakyPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append(('set', key))
+
+    def zadd(self, key, mapping):
+        self.commands.append(('zadd', mapping))
+
+    def zremrangebyscore(self, key, low, high):
+        self.commands.append(('zremrangebyscore', None))
+
+    def zrangebyscore(self, key, low, high):
+        self.commands.append(('zrangebyscore', None))
+
+    def execute(self):
+        self.redis.calls += 1
+        if self.redis.down:
+            raise ConnectionError('Redis is down')
+        results = []
+        for command, argument in self.commands:
+            if command == 'zadd':
+                self.redis.revoked.update(argument)
+            results.append(list(self.redis.revoked) if command == 'zrangebyscore' else True)
+        return results
+
+def test_redis_is_skipped_for_a_while_after_an_error():
+    service = TokenBlocklistService(redis_url='redis://unreachable', capacity=100, retry_redis_seconds=30)
+    redis = FlakyRedis()
+    service._redis = redis
+    service._synced_at = time.monotonic()
+
+    service.revoke('first', time.time() + 60)
+    service.revoke('second', time.time() + 60)
+    service._local.clear()
+
+    # One failed call, then the filter answers alone: matches count as revoked
+    assert redis.calls == 1
+    assert service.is_revoked('first')
+    assert not service.is_revoked('never-revoked')
+    service.sync()
+    assert redis.calls == 1
+
+    # Once the window passes, the next sync stores what Redis missed
+    redis.down = False
+    service._redis_failed_at -= 31
+    service.sync()
+    assert set(redis.revoked) == {'first', 'second'}
+    assert not service._unstored
+    assert service.is_revoked('second')
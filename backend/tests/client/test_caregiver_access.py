@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for current caregiver assignments and the per-caregiver access cache
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+def _make_client(user, name):
+    from app import db
+    from app.models.client.client import Client
+    client = Client(first_name=name, last_name='Client', created_by=user.id)
+    db.session.add(client)
+    db.session.commit()
+    return client
+
+def _assign(caregiver, client, manager, **fields):
+    from app import db
+    from app.models.client.caregiver_assignment import CaregiverAssignment
+    assignment = CaregiverAssignment(caregiver_id=caregiver.id, client_id=client.id,
+                                     assigned_by=manager.id, **fields)
+    db.session.add(assignment)
+    db.session.commit()
+    return assignment
+
+def test_current_filter_bounds(app, make_user):
+    from app import db
+    from app.models.client.caregiver_assignment import CaregiverAssignment
+    manager, _ = make_user('manager')
+    caregiver, _ = make_user('caregiver')
+    today = datetime.utcnow().date()
+    day = timedelta(days=1)
+
+    cases = {
+        'starts today': dict(start_date=today),
+        'ends today': dict(start_date=today - day, end_date=today),
+        'ongoing': dict(start_date=today - day),
+        'starts tomorrow': dict(start_date=today + day),
+        'ended yesterday': dict(start_date=today - 2 * day, end_date=today - day),
+        'inactive': dict(start_date=today - day, is_active=False),
+    }
+    ids = {name: _assign(caregiver, _make_client(manager, name), manager, **fields).client_id
+           for name, fields in cases.items()}
+
+    current = {client_id for client_id, in db.session.query(CaregiverAssignment.client_id).filter(
+        CaregiverAssignment.current_filter(today)
+    )}
+    assert current == {ids['starts today'], ids['ends today'], ids['ongoing']}
+    # The SQL filter agrees with the Python check
+    for assignment in CaregiverAssignment.query.all():
+        assert assignment.is_current() == (assignment.client_id in current)
+
+def test_ending_an_assignment_drops_the_cached_access(app, client, make_user):
+    from app.services.client.caregiver_access_service import caregiver_access_service
+    manager, manager_headers = make_user('manager')
+    caregiver, caregiver_headers = make_user('caregiver')
+    today = datetime.utcnow().date()
+    kept = _make_client(manager, 'Kept')
+    ended = _make_client(manager, 'Ended')
+    _assign(caregiver, kept, manager, start_date=today)
+    assignment = _assign(caregiver, ended, manager, start_date=today - timedelta(days=7))
+
+    assert caregiver_access_service.assigned_client_ids(caregiver.id) == {kept.id, ended.id}
+    assert client.get(f'/api/client/{ended.id}/overview', headers=caregiver_headers).status_code == 200
+    assert caregiver.id in caregiver_access_service._cache
+
+    response = client.put(f'/api/caregiver-assignment/{assignment.id}', headers=manager_headers, json={
+        'end_date': (today - timedelta(days=1)).isoformat()
+    })
+    assert response.status_code == 200
+    assert caregiver.id not in caregiver_access_service._cache
+    assert client.get(f'/api/client/{ended.id}/overview', headers=caregiver_headers).status_code == 403
+
+    assigned = client.get('/api/client/assigned', headers=caregiver_headers).get_json()['clients']
+    assert [c['id'] for c in assigned] == [kept.id]
+
+def test_deactivating_an_assignment_drops_the_cached_access(app, client, make_user):
+    from app.services.client.caregiver_access_service import caregiver_access_service
+    manager, manager_headers = make_user('manager')
+    caregiver, _ = make_user('caregiver')
+    assigned = _make_client(manager, 'Assigned')
+    assignment = _assign(caregiver, assigned, manager)
+
+    assert caregiver_access_service.is_assigned(caregiver.id, assigned.id)
+    response = client.delete(f'/api/caregiver-assignment/{assignment.id}', headers=manager_headers)
+    assert response.status_code == 200
+    assert caregiver.id not in caregiver_access_service._cache
+    assert not caregiver_access_service.is_assigned(caregiver.id, assigned.id)
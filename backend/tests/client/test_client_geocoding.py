@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for geocoding new clients in a job (run inline under TestingConfig)
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+ADDRESS = '5007 Water Tank Rd, Haines City, FL 33844'
+
+def _stub_geocoder(monkeypatch, result):
+    from app.services.geolocation.client_geocoding_service import client_geocoding_service
+    from app.services.geolocation.geocoding_service import geocoding_service
+
+    addresses = []
+
+    def address_to_coordinates(address, timeout=10, max_retries=3):
+        addresses.append(address)
+        return result
+
+    monkeypatch.setattr(geocoding_service, 'address_to_coordinates', address_to_coordinates)
+    monkeypatch.setattr(client_geocoding_service, 'retry_backoff_seconds', 0)
+    return addresses
+
+def test_create_geocodes_and_pushes_the_home_geofence(app, client, make_user, monkeypatch):
+    from app import socketio
+    addresses = _stub_geocoder(monkeypatch, {'latitude': 28.0493, 'longitude': -81.5882})
+    _, headers = make_user('manager')
+    socket = socketio.test_client(app, auth={'token': headers['Authorization'].split()[1]})
+    assert socket.is_connected()
+
+    response = client.post('/api/client/', headers=headers, json={
+        'first_name': 'Ada', 'last_name': 'Client', 'address': ADDRESS
+    })
+
+    assert response.status_code == 201
+    client_id = response.get_json()['client']['id']
+    assert addresses == [ADDRESS]
+
+    status = client.get(f'/api/client/{client_id}/geocoding-status', headers=headers).get_json()
+    assert status['geocoding_status'] == 'completed'
+    assert (status['latitude'], status['longitude']) == (28.0493, -81.5882)
+    assert status['geofence']['name'] == 'Ada Client Residence'
+
+    events = [event for event in socket.get_received() if event['name'] == 'client_geocoding_updated']
+    assert len(events) == 1
+    assert events[0]['args'][0]['client_id'] == client_id
+    assert events[0]['args'][0]['geofence']['id'] == status['geofence']['id']
+    socket.disconnect()
+
+def test_failed_geocoding_can_be_retried_once(app, client, make_user, monkeypatch):
+    from app.services.geolocation.client_geocoding_service import client_geocoding_service
+    addresses = _stub_geocoder(monkeypatch, None)
+    _, headers = make_user('manager')
+
+    client_id = client.post('/api/client/', headers=headers, json={
+        'first_name': 'Ada', 'last_name': 'Client', 'address': ADDRESS
+    }).get_json()['client']['id']
+
+    status = client.get(f'/api/client/{client_id}/geocoding-status', headers=headers).get_json()
+    assert status['geocoding_status'] == 'failed'
+    assert status['geofence'] is None
+    assert len(addresses) == client_geocoding_service.max_attempts
+
+    _stub_geocoder(monkeypatch, {'latitude': 28.0493, 'longitude': -81.5882})
+    response = client.post(f'/api/client/{client_id}/geocoding-status/retry', headers=headers)
+    assert response.status_code == 202
+    assert response.get_json()['geocoding_status'] == 'completed'
+
+    # A completed client keeps its one geofence
+    response = client.post(f'/api/client/{client_id}/geocoding-status/retry', headers=headers)
+    assert response.status_code == 409
+
+def test_stale_jobs_are_requeued(app, client, make_user, monkeypatch):
+    from app import db
+    from app.models.client.client import Client
+    from app.models.geolocation.geofence import Geofence
+    from app.services.geolocation.client_geocoding_service import client_geocoding_service
+    addresses = _stub_geocoder(monkeypatch, {'latitude': 28.0493, 'longitude': -81.5882})
+    user, headers = make_user('manager')
+
+    # Jobs lost to a restart: one stuck mid-run an hour ago, one enqueued just now
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    stuck = Client(first_name='Stuck', last_name='Client', address=ADDRESS, created_by=user.id,
+                   geocoding_status='in_progress')
+    fresh = Client(first_name='Fresh', last_name='Client', address=ADDRESS, created_by=user.id,
+                   geocoding_status='pending')
+    db.session.add_all([stuck, fresh])
+    db.session.commit()
+    db.session.execute(db.update(Client).where(Client.id == stuck.id).values(updated_at=long_ago))
+    db.session.commit()
+
+    response = client.post(f'/api/client/{fresh.id}/geocoding-status/retry', headers=headers)
+    assert response.status_code == 409
+
+    assert client_geocoding_service.requeue_stale() == 1
+    assert addresses == [ADDRESS]
+    assert db.session.get(Client, stuck.id).geocoding_status == 'completed'
+    assert db.session.get(Client, fresh.id).geocoding_status == 'pending'
+    assert Geofence.query.filter_by(client_id=stuck.id).count() == 1
+    assert client_geocoding_service.requeue_stale() == 0
+
+def test_only_the_server_sweeps_for_lost_jobs(app, make_user, monkeypatch):
+    from app import create_app, db, socketio
+    from app.models.client.client import Client
+    addresses = _stub_geocoder(monkeypatch, {'latitude': 28.0493, 'longitude': -81.5882})
+    started = []
+    monkeypatch.setattr(socketio, 'start_background_task', lambda *args: started.append(args))
+    monkeypatch.setattr('config.TestingConfig.CLIENT_GEOCODING_ASYNC', True)
+    user, _ = make_user('manager')
+
+    # Migrations and scripts build the app too, and must not start geocoding
+    create_app('testing')
+    assert started == []
+
+    stuck = Client(first_name='Stuck', last_name='Client', address=ADDRESS, created_by=user.id,
+                   geocoding_status='in_progress')
+    db.session.add(stuck)
+    db.session.commit()
+    db.session.execute(db.update(Client).where(Client.id == stuck.id)
+                       .values(updated_at=datetime.utcnow() - timedelta(hours=1)))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['requeue-geocoding'])
+    assert 'Requeued geocoding for 1 clients' in result.output
+    assert addresses == [ADDRESS]
+    assert db.session.get(Client, stuck.id).geocoding_status == 'completed'
+    assert started == []
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for client spreadsheet parsing, validation and batched geocoding
+"""
+
+import sys
+import os
+import io
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from datetime import date, datetime
+from app.services.client.client_import_service import ClientImportService
+from app.services.geolocation.batch_geocoder import BatchGeocoder, RateLimiter
+
+class FakeGeocodingService:
+    """Resolves addresses containing 'known' locally and everything else but 'nowhere' remotely"""
+    
+    def __init__(self):
+        self.network_calls = []
+    
+    def local_lookup(self, address):
+        if 'known' in address:
+            return {'latitude': 1.0, 'longitude': 2.0}
+        return None
+    
+    def address_to_coordinates(self, address, max_retries=3):
+        self.network_calls.append(address)
+        if 'nowhere' in address:
+            return None
+        return {'latitude': 3.0, 'longitude': 4.0}
+
+def test_csv_rows_use_normalized_headers_and_spreadsheet_row_numbers():
+    service = ClientImportService()
+    stream = io.BytesIO(b'\xef\xbb\xbfFirst Name,Last Name,DOB,Lat,Lng\nAda,Lovelace,12/10/1915,,\n,,,,\nAlan,Turing,1912-06-23,51.5,-0.1\n')
+    rows = list(service.iter_rows(stream, 'clients.csv'))
+    
+    assert [number for number, _ in rows] == [2, 4]
+    assert rows[0][1]['first_name'] == 'Ada'
+    assert rows[1][1]['latitude'] == '51.5'
+
+def test_validate_row():
+    service = ClientImportService()
+    
+    values, error = service.validate_row({'first_name': ' Ada ', 'last_name': 'Lovelace', 'date_of_birth': '12/10/1915'})
+    assert error is None
+    assert values['first_name'] == 'Ada'
+    assert values['date_of_birth'] == date(1915, 12, 10)
+    
+    assert service.validate_row({'first_name': 'Ada'})[1] == 'First name and last name are required'
+    assert 'latitude' in service.validate_row({'first_name': 'A', 'last_name': 'B', 'latitude': '95', 'longitude': '0'})[1]
+    assert 'together' in service.validate_row({'first_name': 'A', 'last_name': 'B', 'latitude': '25'})[1]
+    assert 'email' in service.validate_row({'first_name': 'A', 'last_name': 'B', 'email': 'not-an-email'})[1]
+    assert 'date_of_birth' in service.validate_row({'first_name': 'A', 'last_name': 'B', 'date_of_birth': 'soon'})[1]
+
+def test_batch_geocoder_skips_network_for_gazetteer_hits_and_duplicates():
+    fake = FakeGeocodingService()
+    geocoder = BatchGeocoder(fake, max_workers=2, requests_per_second=1000)
+    results = geocoder.geocode_many(['1 known st', '2 remote st', '2 remote st', 'nowhere', ''])
+    
+    assert results['1 known st']['latitude'] == 1.0
+    assert results['2 remote st']['latitude'] == 3.0
+    assert results['nowhere'] is None
+    assert sorted(fake.network_calls) == ['2 remote st', 'nowhere']
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(rate=20)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    
+    # Five calls at 20/s need at least four 50ms gaps
+    assert time.monotonic() - started >= 0.19
+
+def test_clients_imported_without_geocoding_are_left_to_the_backfill(app, make_user):
+    from app import db
+    from app.models.client.client import Client
+    from app.services.geolocation.client_geocoding_service import client_geocoding_service
+    user, _ = make_user('manager')
+    service = ClientImportService(geocoder=BatchGeocoder(FakeGeocodingService()))
+    stream = io.BytesIO(b'first_name,last_name,address\nAda,Client,1 Main St\n')
+
+    summary = service.import_clients(stream, 'clients.csv', user.id, geocode=False)
+
+    assert summary['imported'] == 1
+    client = Client.query.one()
+    assert (client.geocoding_status, client.latitude) == ('deferred', None)
+    # Even once old, the lost-job sweep does not pick it up
+    db.session.execute(db.update(Client).values(updated_at=datetime(2020, 1, 1)))
+    db.session.commit()
+    assert client_geocoding_service.requeue_stale() == 0
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the paginated, sparse client list
+"""
+
+import sys
+import os
+import base64
+import json
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+def _clients(make_user, last_names):
+    from app import db
+    from app.models.client.client import Client
+    user, headers = make_user('manager')
+    clients = [Client(first_name=f'Client{i}', last_name=name, created_by=user.id)
+               for i, name in enumerate(last_names)]
+    db.session.add_all(clients)
+    db.session.commit()
+    return headers, clients
+
+def test_pages_cover_equal_sort_keys_once(app, client, make_user):
+    headers, clients = _clients(make_user, ['Smith'] * 5 + ['Adams', 'Young'])
+    expected = [c.id for c in sorted(clients, key=lambda c: (c.last_name, c.id))]
+
+    for sort, ids in (('last_name', expected), ('-last_name', expected[::-1])):
+        seen = []
+        params = {'limit': 2, 'sort': sort, 'fields': 'last_name'}
+        while True:
+            response = client.get('/api/client/', headers=headers, query_string=params)
+            assert response.status_code == 200
+            page = response.get_json()
+            assert all(set(c) == {'id', 'last_name'} for c in page['clients'])
+            seen += [c['id'] for c in page['clients']]
+            if not page['has_more']:
+                break
+            params['cursor'] = page['next_cursor']
+        assert seen == ids
+
+def test_matching_etag_is_not_modified(app, client, make_user):
+    from app import db
+    headers, clients = _clients(make_user, ['Smith', 'Jones'])
+
+    first = client.get('/api/client/', headers=headers, query_string={'limit': 1})
+    etag = first.headers['ETag']
+    cached = client.get('/api/client/', headers={**headers, 'If-None-Match': etag}, query_string={'limit': 1})
+    assert cached.status_code == 304 and cached.data == b''
+
+    clients[0].last_name = 'Smythe'
+    db.session.commit()
+    changed = client.get('/api/client/', headers={**headers, 'If-None-Match': etag}, query_string={'limit': 1})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+
+def test_rejects_unknown_fields_and_bad_cursors(app, client, make_user):
+    headers, _ = _clients(make_user, ['Smith'])
+
+    response = client.get('/api/client/', headers=headers, query_string={'fields': 'last_name,ssn'})
+    assert response.status_code == 400 and 'ssn' in response.get_json()['error']
+
+    for payload in ([123, 'x'], ['2026-10-01T09:00:00', 5], 'not-a-pair'):
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        response = client.get('/api/client/', headers=headers,
+                              query_string={'sort': 'created_at', 'limit': 1, 'cursor': cursor})
+        assert response.status_code == 400
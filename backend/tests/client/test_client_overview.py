@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the client overview endpoint
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+def _overview_client(manager, caregiver, tasks=2, timesheets=2):
+    """A client with a care plan, a geofence, a current caregiver, tasks and timesheets"""
+    from app import db
+    from app.models.client.care_plan import CarePlan
+    from app.models.client.caregiver_assignment import CaregiverAssignment
+    from app.models.client.client import Client
+    from app.models.geolocation.geofence import Geofence
+    from app.models.task.task import Task
+    from app.models.task.task_assignment import TaskAssignment
+    from app.models.timesheet.break_time import BreakTime
+    from app.models.timesheet.timesheet import Timesheet
+    today = datetime.utcnow().date()
+    client = Client(first_name='Ada', last_name='Client', created_by=manager.id)
+    db.session.add(client)
+    db.session.flush()
+    plan = CarePlan(client_id=client.id, title='Daily care', start_date=today, created_by=manager.id)
+    db.session.add_all([
+        plan,
+        Geofence(name='Home', client_id=client.id, center_latitude=28.0, center_longitude=-81.0,
+                 radius_meters=100, created_by=manager.id),
+        CaregiverAssignment(caregiver_id=caregiver.id, client_id=client.id, assigned_by=manager.id,
+                            start_date=today - timedelta(days=1))
+    ])
+    db.session.flush()
+    for i in range(tasks):
+        task = Task(title=f'Visit {i}', client_id=client.id, care_plan_id=plan.id if i % 2 else None,
+                    scheduled_date=today + timedelta(days=i), created_by=manager.id)
+        db.session.add(task)
+        db.session.flush()
+        db.session.add(TaskAssignment(task_id=task.id, assigned_user_id=caregiver.id, assigned_by=manager.id))
+    for i in range(timesheets):
+        timesheet = Timesheet(user_id=caregiver.id, client_id=client.id, date=today - timedelta(days=i + 1),
+                              clock_in_time=datetime.utcnow() - timedelta(days=i + 1, hours=2))
+        db.session.add(timesheet)
+        db.session.flush()
+        db.session.add(BreakTime(timesheet_id=timesheet.id, start_time=timesheet.clock_in_time))
+    db.session.commit()
+    return client
+
+def _count_statements(client, url, headers):
+    from app import db
+    from sqlalchemy import event
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert response.status_code == 200
+    return response, len(statements)
+
+def test_overview_shape_and_bounded_queries(app, client, make_user):
+    manager, headers = make_user('manager')
+    caregiver, _ = make_user('caregiver')
+    small = _overview_client(manager, caregiver, tasks=2, timesheets=1)
+    large = _overview_client(manager, caregiver, tasks=12, timesheets=6)
+
+    # Warm the identity cache so only the overview's own statements are counted
+    client.get(f'/api/client/{small.id}/overview', headers=headers)
+    response, small_count = _count_statements(client, f'/api/client/{small.id}/overview', headers)
+    overview = response.get_json()
+    assert set(overview) == {'client', 'care_plans', 'geofences', 'caregiver_assignments',
+                             'upcoming_tasks', 'recent_timesheets'}
+    assert overview['client']['id'] == small.id
+    assert [len(plan['tasks']) for plan in overview['care_plans']] == [1]
+    assert len(overview['geofences']) == 1
+    assert [a['caregiver_id'] for a in overview['caregiver_assignments']] == [caregiver.id]
+    assert len(overview['upcoming_tasks']) == 2
+    assert all(task['assignments'] for task in overview['upcoming_tasks'])
+    assert len(overview['recent_timesheets'][0]['break_times']) == 1
+
+    # The ETag aggregate, the client and one query per section, however much each holds
+    _, large_count = _count_statements(client, f'/api/client/{large.id}/overview', headers)
+    assert large_count == small_count <= 9
+
+def test_etag_changes_with_tasks_and_assignments(app, client, make_user):
+    manager, headers = make_user('manager')
+    caregiver, caregiver_headers = make_user('caregiver')
+    overview_client = _overview_client(manager, caregiver)
+    url = f'/api/client/{overview_client.id}/overview'
+
+    def etag():
+        return client.get(url, headers=headers).headers['ETag'].strip('"')
+
+    first = etag()
+    cached = client.get(url, headers={**headers, 'If-None-Match': f'"{first}"'})
+    assert cached.status_code == 304 and cached.data == b''
+
+    task_id = client.get(url, headers=headers).get_json()['upcoming_tasks'][0]['id']
+    assert client.put(f'/api/task/{task_id}', headers=headers, json={'title': 'Renamed'}).status_code == 200
+    after_task = etag()
+    assert after_task != first
+
+    assert client.post(f'/api/task/{task_id}/start', headers=caregiver_headers).status_code == 200
+    assert etag() != after_task
+    assert client.get(url, headers={**headers, 'If-None-Match': f'"{first}"'}).status_code == 200
+
+def test_only_assigned_caregivers_see_the_overview(app, client, make_user):
+    manager, _ = make_user('manager')
+    caregiver, caregiver_headers = make_user('caregiver')
+    _, stranger_headers = make_user('caregiver')
+    overview_client = _overview_client(manager, caregiver)
+    url = f'/api/client/{overview_client.id}/overview'
+
+    assert client.get(url, headers=caregiver_headers).status_code == 200
+    assert client.get(url, headers=stranger_headers).status_code == 403
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for client search query building and the SQLite search index
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.client.client_search_service import build_fts_queries, escape_like, phone_digits
+
+def test_terms_become_quoted_substring_matches():
+    exact, fuzzy = build_fts_queries('  Ada   Lovelace ')
+    
+    assert exact == '"ada" AND "lovelace"'
+    # Only terms of four or more characters contribute fuzzy trigrams
+    assert fuzzy == ' OR '.join(f'"{t}"' for t in ['lov', 'ove', 'vel', 'ela', 'lac', 'ace'])
+
+def test_phone_terms_match_digits_only():
+    exact, fuzzy = build_fts_queries('(555) 012-3456')
+    
+    assert exact == 'phone : "555" AND phone : "0123456"'
+    assert fuzzy is None
+
+def test_short_queries_and_quotes():
+    assert build_fts_queries('al') == (None, None)
+    exact, _ = build_fts_queries('o"neil')
+    assert exact == '"o""neil"'
+
+def test_helpers():
+    assert phone_digits('+1 (555) 010-9999') == '15550109999'
+    assert escape_like('50%_off') == '50\\%\\_off'
+
+def test_search_index_follows_inserts_and_updates(app, client, make_user):
+    from app import db
+    from app.models.client.client import Client
+    from app.services.client.client_search_service import client_search_service
+    user, headers = make_user('manager')
+    ada = Client(first_name='Ada', last_name='Lovelace', phone='(555) 010-2345', address='12 Analytical Way',
+                 created_by=user.id)
+    db.session.add(ada)
+    db.session.commit()
+
+    def search(q):
+        response = client.get('/api/client/search', headers=headers, query_string={'q': q})
+        assert response.status_code == 200
+        return [c['id'] for c in response.get_json()['clients']]
+
+    # Built on first use from the rows already there, then kept up to date by triggers
+    assert search('lovelace') == [ada.id]
+    assert db.engine in client_search_service._sqlite_ready
+    grace = Client(first_name='Grace', last_name='Hopper', phone='555.777.8888', address='1 Harbor Rd',
+                   created_by=user.id)
+    db.session.add(grace)
+    db.session.commit()
+
+    assert search('hopper') == [grace.id]
+    assert search('Grace Hop') == [grace.id]
+    # Misspellings fall back to trigram overlap
+    assert search('Hoper') == [grace.id]
+    # Phone numbers match on digits, however they are formatted
+    assert search('777-8888') == [grace.id]
+    assert search('(555) 010') == [ada.id]
+    assert search('analytical') == [ada.id]
+
+    grace.last_name = 'Brewster'
+    grace.phone = '555-000-1111'
+    db.session.commit()
+    assert search('brewster') == [grace.id]
+    assert search('777-8888') == []
+
+    ada.is_active = False
+    db.session.commit()
+    # No exact match left, so only fuzzy matches such as Grace's 'ace' come back
+    assert search('lovelace') == [grace.id]
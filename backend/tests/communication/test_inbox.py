@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the conversation inbox and its cursor
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.communication.inbox_service import decode_cursor, encode_cursor
+
+START = datetime(2026, 10, 1, 9, 0)
+
+def _conversation(members, created_at=START, messages=()):
+    """A group conversation; messages are (sender, minutes after START) pairs"""
+    from app import db
+    from app.models.communication.conversation import Conversation
+    from app.models.communication.conversation_participant import ConversationParticipant
+    from app.models.communication.message import Message
+    conversation = Conversation(name='Team', conversation_type='group', created_by=members[0].id,
+                                created_at=created_at)
+    db.session.add(conversation)
+    db.session.flush()
+    db.session.add_all([
+        ConversationParticipant(conversation_id=conversation.id, user_id=member.id,
+                                joined_at=START + timedelta(seconds=i))
+        for i, member in enumerate(members)
+    ])
+    rows = [Message(conversation_id=conversation.id, sender_id=sender.id, content=f'message {i}',
+                    created_at=START + timedelta(minutes=minutes))
+            for i, (sender, minutes) in enumerate(messages)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return conversation, rows
+
+def _inbox(client, headers, **params):
+    response = client.get('/api/communication/inbox', headers=headers, query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_cursor_round_trip():
+    position = (datetime(2026, 10, 1, 9, 30, 15, 123456), 'c9f1a7e5')
+
+    cursor = encode_cursor(*position)
+
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == position
+
+def test_malformed_cursor_is_rejected():
+    for cursor in ['zzz', encode_cursor(datetime(2026, 1, 1), 'x')[:-4], '']:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            continue
+        assert False, f'{cursor!r} was accepted'
+
+def test_last_message_unread_count_and_participants(app, client, make_user, monkeypatch):
+    from app import db
+    from app.models.communication.conversation_participant import ConversationParticipant
+    from app.services.communication.inbox_service import inbox_service
+    monkeypatch.setattr(inbox_service, 'participant_preview', 2)
+    user, headers = make_user('caregiver')
+    others = [make_user('manager')[0] for _ in range(3)]
+    conversation, messages = _conversation(
+        [user, *others],
+        messages=[(others[0], 1), (user, 2), (others[1], 3), (others[0], 3), (others[2], 4)]
+    )
+    quiet, _ = _conversation([user, others[0]], created_at=START - timedelta(days=1))
+
+    # Read up to the first of the two messages sent at the same time
+    first_at_three = min(messages[2:4], key=lambda message: message.id)
+    participant = ConversationParticipant.query.filter_by(conversation_id=conversation.id, user_id=user.id).one()
+    participant.mark_read(first_at_three)
+    db.session.commit()
+
+    inbox = _inbox(client, headers)
+    busy = inbox['conversations'][0]
+    assert [c['id'] for c in inbox['conversations']] == [conversation.id, quiet.id]
+    assert busy['last_message']['id'] == messages[4].id
+    assert busy['last_message']['sender_name'] == f'{others[2].first_name} {others[2].last_name}'
+    assert busy['last_activity_at'] == messages[4].created_at.isoformat()
+    # The other message at the same time and the later one; the user's own never count
+    assert busy['unread_count'] == 2
+    assert busy['participant_count'] == 4
+    assert [p['id'] for p in busy['participants']] == [others[0].id, others[1].id]
+
+    assert inbox['conversations'][1]['last_message'] is None
+    assert inbox['conversations'][1]['unread_count'] == 0
+    assert inbox['conversations'][1]['last_activity_at'] == quiet.created_at.isoformat()
+
+def test_paging_over_equal_activity_returns_each_conversation_once(app, client, make_user):
+    user, headers = make_user('caregiver')
+    other, _ = make_user('manager')
+    ids = [_conversation([user, other])[0].id for _ in range(5)]
+    ids.append(_conversation([user, other], messages=[(other, 0)])[0].id)
+
+    page = _inbox(client, headers, limit=2)
+    seen = [c['id'] for c in page['conversations']]
+    while page['has_more']:
+        page = _inbox(client, headers, limit=2, cursor=page['next_cursor'])
+        seen += [c['id'] for c in page['conversations']]
+
+    assert sorted(seen) == sorted(ids) and len(seen) == len(ids)
+    # Equal activity times are ordered by id, newest activity first
+    assert seen == sorted(ids, reverse=True)
+    assert client.get('/api/communication/inbox', headers=headers,
+                      query_string={'cursor': 'not-a-cursor'}).status_code == 400
+
+def test_statement_count_does_not_grow_with_conversations(app, client, make_user):
+    from app import db
+    from sqlalchemy import event
+    user, headers = make_user('caregiver')
+    others = [make_user('manager')[0] for _ in range(3)]
+
+    def count_statements():
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            _inbox(client, headers)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return len(statements)
+
+    _conversation([user, others[0]], messages=[(others[0], 1)])
+    _inbox(client, headers)
+    few = count_statements()
+    for i in range(8):
+        _conversation([user, *others], messages=[(others[i % 3], i), (user, i + 1)])
+    many = count_statements()
+
+    assert few == many == 3
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for the conversation membership cache
+"""
+
+import sys
+import os
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import app.models
+from app.services.communication.conversation_membership_service import ConversationMembershipService
+
+def test_cached_memberships_answer_without_a_query_until_invalidated():
+    service = ConversationMembershipService(max_age_seconds=30, cache_size=2)
+    now = time.monotonic()
+    service._cache['u1'] = (now, None, frozenset({'c1', 'c2'}))
+    service._cache['u2'] = (now, None, frozenset())
+
+    assert service.is_member('u1', 'c1')
+    assert not service.is_member('u1', 'c3')
+    assert not service.is_member('u2', 'c1')
+
+    service.invalidate('u1')
+    assert 'u1' not in service._cache and 'u2' in service._cache
+    service.invalidate()
+    assert not service._cache
+
+class SharedRedis:
+    """Stands in for the Redis server the workers share"""
+
+    def __init__(self):
+        self.values = {}
+        self.down = False
+
+    def mget(self, keys):
+        if self.down:
+            raise ConnectionError('Redis is down')
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self):
+        return SharedPipeline(self)
+
+class SharedPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value))
+
+    def execute(self):
+        if self.redis.down:
+            raise ConnectionError('Redis is down')
+        self.redis.values.update(self.commands)
+
+def _worker(redis):
+    service = ConversationMembershipService(max_age_seconds=30, redis_url='redis://shared')
+    service._redis = redis
+    return service
+
+def test_published_versions_are_shared_and_never_reused():
+    redis = SharedRedis()
+    here, there = _worker(redis), _worker(redis)
+    before = here._version('u1')
+
+    there.publish(['u1'])
+    after_user = here._version('u1')
+    there.publish(everyone=True)
+    after_everyone = here._version('u1')
+
+    assert before == (None, None)
+    assert len({before, after_user, after_everyone}) == 3
+    assert here._version('u2')[1] == after_everyone[1]
+
+def test_sends_use_the_cache_and_see_changes_from_other_workers(app, client, make_user):
+    from app import db
+    from app.models.communication.conversation import Conversation
+    from app.models.communication.conversation_participant import ConversationParticipant
+    from app.services.communication.conversation_membership_service import conversation_membership_service
+    from sqlalchemy import event, update
+    user, headers = make_user('manager')
+    other, _ = make_user('caregiver')
+    conversation = Conversation(name='Team', conversation_type='group', created_by=user.id)
+    db.session.add(conversation)
+    db.session.flush()
+    db.session.add(ConversationParticipant(conversation_id=conversation.id, user_id=user.id))
+    db.session.commit()
+    url = f'/api/communication/conversations/{conversation.id}'
+    redis = SharedRedis()
+    conversation_membership_service.redis_url = 'redis://shared'
+    conversation_membership_service._redis = redis
+    try:
+        assert client.get(f'{url}/messages', headers=headers).status_code == 200
+
+        membership_queries = []
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if 'conversation_participants' in statement:
+                membership_queries.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            assert client.post(f'{url}/messages', headers=headers, json={'content': 'hi'}).status_code == 201
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        assert membership_queries == []
+
+        # Removed by another worker: a bulk update skips this process's mapper events,
+        # but that worker publishes the change once it commits
+        db.session.execute(update(ConversationParticipant).values(is_active=False))
+        db.session.commit()
+        _worker(redis).publish([user.id])
+
+        assert client.get(f'{url}/messages', headers=headers).status_code == 403
+        assert client.post(f'{url}/messages', headers=headers, json={'content': 'hi'}).status_code == 403
+
+        # While Redis is down, entries are trusted until they expire
+        redis.down = True
+        assert client.post(f'{url}/messages', headers=headers, json={'content': 'hi'}).status_code == 403
+        assert conversation_membership_service._redis_failed_at is not None
+    finally:
+        conversation_membership_service.redis_url = None
+        conversation_membership_service._redis = None
+        conversation_membership_service._redis_failed_at = None
+
+def test_participant_changes_check_the_participant_row_not_the_cache(app, client, make_user):
+    from app import db
+    from app.models.communication.conversation import Conversation
+    from app.models.communication.conversation_participant import ConversationParticipant
+    from sqlalchemy import update
+    user, headers = make_user('manager')
+    other, _ = make_user('caregiver')
+    conversation = Conversation(name='Team', conversation_type='group', created_by=user.id)
+    db.session.add(conversation)
+    db.session.flush()
+    db.session.add(ConversationParticipant(conversation_id=conversation.id, user_id=user.id))
+    db.session.commit()
+    url = f'/api/communication/conversations/{conversation.id}'
+
+    assert client.get(f'{url}/messages', headers=headers).status_code == 200
+    # Removed by another worker without Redis: this process's entry is stale until it expires
+    db.session.execute(update(ConversationParticipant).values(is_active=False))
+    db.session.commit()
+
+    assert client.get(f'{url}/messages', headers=headers).status_code == 200
+    assert client.post(f'{url}/participants', headers=headers, json={'user_id': other.id}).status_code == 403
+    assert client.delete(f'{url}/participants/{other.id}', headers=headers).status_code == 403
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for keyset pagination of a conversation's messages
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+def _conversation(make_user, count=7):
+    """A conversation whose messages share created_at in runs of three; returns (url, headers, ids oldest first)"""
+    from app import db
+    from app.models.communication.conversation import Conversation
+    from app.models.communication.conversation_participant import ConversationParticipant
+    from app.models.communication.message import Message
+    user, headers = make_user('manager')
+    conversation = Conversation(name='Team', conversation_type='group', created_by=user.id)
+    db.session.add(conversation)
+    db.session.flush()
+    db.session.add(ConversationParticipant(conversation_id=conversation.id, user_id=user.id))
+
+    start = datetime(2026, 10, 1, 9, 0)
+    messages = [
+        Message(conversation_id=conversation.id, sender_id=user.id, content=f'message {i}',
+                created_at=start + timedelta(minutes=i // 3))
+        for i in range(count)
+    ]
+    db.session.add_all(messages)
+    db.session.commit()
+    ordered = sorted(messages, key=lambda message: (message.created_at, message.id))
+    return f'/api/communication/conversations/{conversation.id}/messages', headers, [m.id for m in ordered]
+
+def _page(client, url, headers, **params):
+    response = client.get(url, headers=headers, query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_paging_back_returns_every_message_once(app, client, make_user):
+    url, headers, ids = _conversation(make_user)
+
+    page = _page(client, url, headers, limit=2)
+    seen = [m['id'] for m in page['messages']]
+    while page['has_more']:
+        page = _page(client, url, headers, limit=2, before=page['before_cursor'])
+        seen = [m['id'] for m in page['messages']] + seen
+
+    assert seen == ids
+
+def test_catching_up_returns_every_message_once(app, client, make_user):
+    url, headers, ids = _conversation(make_user)
+
+    page = _page(client, url, headers, limit=1)
+    assert [m['id'] for m in page['messages']] == ids[-1:]
+    oldest = _page(client, url, headers, limit=1, before=page['before_cursor'])
+    while oldest['has_more']:
+        oldest = _page(client, url, headers, limit=1, before=oldest['before_cursor'])
+
+    seen = [m['id'] for m in oldest['messages']]
+    page = oldest
+    while True:
+        page = _page(client, url, headers, limit=2, after=page['after_cursor'])
+        seen += [m['id'] for m in page['messages']]
+        if not page['has_more']:
+            break
+
+    assert seen == ids
+    # Nothing new: an empty page keeps the position
+    empty = _page(client, url, headers, after=page['after_cursor'])
+    assert empty['messages'] == [] and empty['after_cursor'] == page['after_cursor']
+
+def test_before_id_pages_like_a_cursor(app, client, make_user):
+    url, headers, ids = _conversation(make_user)
+
+    by_id = _page(client, url, headers, limit=3, before_id=ids[4])
+    assert [m['id'] for m in by_id['messages']] == ids[1:4]
+    assert by_id['has_more']
+
+    newest = _page(client, url, headers, limit=3)
+    by_cursor = _page(client, url, headers, limit=3, before=newest['before_cursor'])
+    assert [m['id'] for m in by_cursor['messages']] == ids[1:4]
+
+def test_before_and_after_together_are_rejected(app, client, make_user):
+    url, headers, _ = _conversation(make_user)
+    page = _page(client, url, headers, limit=2)
+
+    response = client.get(url, headers=headers, query_string={
+        'before': page['before_cursor'], 'after': page['after_cursor']
+    })
+    assert response.status_code == 400
+    response = client.get(url, headers=headers, query_string={'before': 'not-a-cursor'})
+    assert response.status_code == 400
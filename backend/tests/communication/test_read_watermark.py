@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for per-participant read watermarks
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import app.models
+from app.models.communication.conversation_participant import ConversationParticipant
+from app.models.communication.message import Message
+
+def test_watermark_only_moves_forward_in_created_at_then_id_order():
+    participant = ConversationParticipant(conversation_id='c1', user_id='u1')
+    same_time = datetime(2026, 10, 1, 9, 0)
+    first = Message(id='a', conversation_id='c1', sender_id='u2', content='hi', created_at=same_time)
+    second = Message(id='b', conversation_id='c1', sender_id='u2', content='hi', created_at=same_time)
+    later = Message(id='0', conversation_id='c1', sender_id='u2', content='hi', created_at=datetime(2026, 10, 1, 9, 1))
+
+    assert participant.mark_read(second)
+    # A message with the same timestamp but a lower id is already covered
+    assert not participant.mark_read(first)
+    assert participant.mark_read(later)
+    assert not participant.mark_read(second)
+    assert (participant.last_read_message_id, participant.last_read_at) == ('0', later.created_at)
+
+def _group(members):
+    """A group conversation with a message from each member, a minute apart"""
+    from app import db
+    from app.models.communication.conversation import Conversation
+    conversation = Conversation(name='Team', conversation_type='group', created_by=members[0].id)
+    db.session.add(conversation)
+    db.session.flush()
+    db.session.add_all([ConversationParticipant(conversation_id=conversation.id, user_id=member.id)
+                        for member in members])
+    start = datetime(2026, 10, 1, 9, 0)
+    messages = [Message(conversation_id=conversation.id, sender_id=member.id, content='hi',
+                        created_at=start + timedelta(minutes=i)) for i, member in enumerate(members)]
+    db.session.add_all(messages)
+    db.session.commit()
+    return conversation, messages
+
+def test_mark_read_route(app, client, make_user):
+    (ann, ann_headers), (bob, bob_headers), (cat, cat_headers) = [make_user('caregiver') for _ in range(3)]
+    conversation, messages = _group([ann, bob, cat])
+    other, other_messages = _group([ann, bob])
+    url = f'/api/communication/conversations/{conversation.id}/read'
+
+    def unread(user):
+        return ConversationParticipant.query.filter_by(
+            conversation_id=conversation.id, user_id=user.id
+        ).one().unread_messages().count()
+
+    # Each participant counts only the others' messages
+    assert [unread(user) for user in (ann, bob, cat)] == [2, 2, 2]
+
+    # Up to a chosen message
+    response = client.post(url, headers=ann_headers, json={'message_id': messages[1].id})
+    assert response.status_code == 200
+    assert response.get_json()['last_read_message_id'] == messages[1].id
+    assert response.get_json()['unread_count'] == 1
+    assert [unread(user) for user in (ann, bob, cat)] == [1, 2, 2]
+
+    # Up to the latest message, with or without a body
+    response = client.post(url, headers=bob_headers)
+    assert response.status_code == 200
+    assert response.get_json()['last_read_message_id'] == messages[2].id
+    assert response.get_json()['unread_count'] == 0
+    assert [unread(user) for user in (ann, bob, cat)] == [1, 0, 2]
+
+    # The watermark never moves back
+    response = client.post(url, headers=bob_headers, json={'message_id': messages[0].id})
+    assert response.get_json()['last_read_message_id'] == messages[2].id
+
+    # Messages must belong to the conversation, and only participants may mark it
+    response = client.post(url, headers=cat_headers, json={'message_id': other_messages[0].id})
+    assert response.status_code == 404
+    assert unread(cat) == 2
+    assert client.post(f'/api/communication/conversations/{other.id}/read', headers=cat_headers).status_code == 403
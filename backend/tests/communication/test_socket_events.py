@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for Socket.IO authentication and conversation rooms (in-process manager)
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+def _connect(app, token):
+    from app import socketio
+    return socketio.test_client(app, auth={'token': token})
+
+def test_connect_rejects_tokens_jwt_required_would(app, make_user):
+    from app import db
+    from app.models.auth.role import Role
+    from app.services.auth.token_blocklist_service import token_blocklist_service
+    from flask_jwt_extended import decode_token
+    user, headers = make_user('caregiver')
+    access_token = headers['Authorization'].split()[1]
+    _, refresh_token = user.generate_tokens()
+
+    assert not _connect(app, None).is_connected()
+    assert not _connect(app, 'not-a-token').is_connected()
+    assert not _connect(app, refresh_token).is_connected()
+
+    socket = _connect(app, access_token)
+    assert socket.is_connected()
+    socket.disconnect()
+
+    revoked_token, _ = user.generate_tokens()
+    claims = decode_token(revoked_token)
+    token_blocklist_service.revoke(claims['jti'], claims['exp'])
+    assert not _connect(app, revoked_token).is_connected()
+
+    # A role change makes the token's role claims stale
+    manager_role = Role(name='manager', description='Manager')
+    db.session.add(manager_role)
+    db.session.flush()
+    user.role_id = manager_role.id
+    db.session.commit()
+    assert not _connect(app, access_token).is_connected()
+    fresh_token, _ = user.generate_tokens()
+    assert _connect(app, fresh_token).is_connected()
+
+def test_removed_participants_leave_the_conversation_room(app, client, make_user):
+    from app import db
+    from app.models.communication.conversation import Conversation
+    from app.models.communication.conversation_participant import ConversationParticipant
+    from app.services.communication.socket_session_service import socket_session_service
+    owner, owner_headers = make_user('manager')
+    member, member_headers = make_user('caregiver')
+    conversation = Conversation(name='Team', conversation_type='group', created_by=owner.id)
+    db.session.add(conversation)
+    db.session.flush()
+    db.session.add_all([ConversationParticipant(conversation_id=conversation.id, user_id=user.id)
+                        for user in (owner, member)])
+    db.session.commit()
+    url = f'/api/communication/conversations/{conversation.id}'
+
+    owner_socket = _connect(app, owner_headers['Authorization'].split()[1])
+    member_socket = _connect(app, member_headers['Authorization'].split()[1])
+    assert len(socket_session_service.sids(member.id)) == 1
+
+    assert client.delete(f'{url}/participants/{member.id}', headers=owner_headers).status_code == 200
+    assert client.post(f'{url}/messages', headers=owner_headers, json={'content': 'hi'}).status_code == 201
+
+    def new_messages(socket):
+        return [event for event in socket.get_received() if event['name'] == 'new_message']
+
+    assert len(new_messages(owner_socket)) == 1
+    assert new_messages(member_socket) == []
+
+    member_socket.disconnect()
+    assert socket_session_service.sids(member.id) == set()
+    owner_socket.disconnect()
+
+def test_sockets_on_other_workers_are_asked_to_leave(app, monkeypatch):
+    from app import socketio
+    from app.routes.socket_events import leave_conversation_room
+    from app.services.communication.socket_session_service import socket_session_service
+    left = []
+    monkeypatch.setattr(socketio.server, 'leave_room', lambda sid, room, namespace=None: left.append((sid, room)))
+
+    # Recorded by another worker; with a message queue the manager publishes the leave there
+    socket_session_service.add('user-1', 'sid-on-other-worker')
+    leave_conversation_room('user-1', 'conversation-1')
+
+    assert left == [('sid-on-other-worker', 'conversation-1')]
@@ -0,0 +1,67 @@
+"""
+Shared fixtures for tests that go through the app and its routes
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from app import create_app, db
+
+# Scripts that call the live geocoding providers, run only when asked for
+if os.environ.get('RUN_NETWORK_TESTS', 'false').lower() not in ('1', 'true', 'yes'):
+    collect_ignore = ['geocoding/test_providers_ssl.py', 'geocoding/test_service_integration.py']
+
+@pytest.fixture
+def app():
+    """An app on an empty in-memory database, with the process-level caches cleared"""
+    application = create_app('testing')
+    with application.app_context():
+        import app.models  # noqa: F401
+        db.create_all()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+    from app.services.auth.authorization_service import authorization_service
+    from app.services.auth.identity_service import identity_service
+    from app.services.client.caregiver_access_service import caregiver_access_service
+    from app.services.communication.conversation_membership_service import conversation_membership_service
+    for service in (authorization_service, identity_service, caregiver_access_service,
+                    conversation_membership_service):
+        service.invalidate()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(app):
+    """Create a user with a role; returns (user, Authorization headers)"""
+    from app.models.auth.role import Role
+    from app.models.auth.user import User
+
+    created = []
+
+    def make(role='manager', **fields):
+        role_row = Role.query.filter_by(name=role).first()
+        if role_row is None:
+            role_row = Role(name=role, description=role.title())
+            db.session.add(role_row)
+            db.session.flush()
+        index = len(created)
+        fields.setdefault('email', f'{role}{index}@test.local')
+        fields.setdefault('username', f'{role}{index}')
+        fields.setdefault('first_name', role.title())
+        fields.setdefault('last_name', str(index))
+        user = User(role_id=role_row.id, password_hash='-', **fields)
+        db.session.add(user)
+        db.session.commit()
+        created.append(user)
+        access_token, _ = user.generate_tokens()
+        return user, {'Authorization': f'Bearer {access_token}'}
+
+    return make
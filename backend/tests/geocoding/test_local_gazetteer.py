@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Hermetic tests for the offline gazetteer provider (no network access)
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.geolocation.geocoding_service import GeocodingService
+from app.services.geolocation.local_gazetteer import LocalGazetteer, normalize_address
+
+def _service(tmp_path):
+    service = GeocodingService(gazetteer_path=str(tmp_path / 'gazetteer.db'), offline=True)
+    service.gazetteer.add(
+        '5007 Water Tank Road, Haines City, Florida 33844',
+        28.049308, -81.588240,
+        formatted_address='5007 Water Tank Rd, Haines City, Florida, 33844'
+    )
+    service.gazetteer.add('101 Main Street, Haines City, FL 33844', 28.1000, -81.6000)
+    return service
+
+def test_normalize_address():
+    assert normalize_address('5007 Water Tank Road, Haines City, Florida') == \
+        normalize_address('5007 water tank rd. haines city fl')
+
+def test_offline_service_uses_only_gazetteer(tmp_path):
+    service = _service(tmp_path)
+    
+    assert service.providers == [service.gazetteer]
+
+def test_address_to_coordinates_hits_gazetteer(tmp_path):
+    service = _service(tmp_path)
+    
+    result = service.address_to_coordinates('5007 water tank rd, Haines City, FL 33844')
+    
+    assert result['latitude'] == 28.049308
+    assert result['longitude'] == -81.588240
+    assert result['formatted_address'] == '5007 Water Tank Rd, Haines City, Florida, 33844'
+    assert result['provider'] == 'provider_1'
+
+def test_postcode_lookup_returns_centroid(tmp_path):
+    service = _service(tmp_path)
+    
+    result = service.address_to_coordinates('33844')
+    
+    assert abs(result['latitude'] - (28.049308 + 28.1) / 2) < 1e-9
+
+def test_unknown_address_fails_fast(tmp_path):
+    service = _service(tmp_path)
+    
+    assert service.address_to_coordinates('1 Nowhere Lane, Atlantis') is None
+
+def test_reverse_geocoding_finds_nearest_entry(tmp_path):
+    service = _service(tmp_path)
+    
+    result = service.coordinates_to_address(28.04935, -81.58820)
+    
+    assert result['formatted_address'] == '5007 Water Tank Rd, Haines City, Florida, 33844'
+    assert service.coordinates_to_address(0.0, 0.0) is None
+
+def test_import_csv(tmp_path):
+    csv_path = tmp_path / 'addresses.csv'
+    csv_path.write_text('address,latitude,longitude\n"1 Elm St, Orlando, FL 32801",28.54,-81.38\n')
+    gazetteer = LocalGazetteer(str(tmp_path / 'imported.db'))
+    
+    assert gazetteer.import_csv(str(csv_path)) == 1
+    assert gazetteer.geocode('1 elm street orlando fl 32801').latitude == 28.54
+
+def test_importing_routes_creates_no_gazetteer_file(tmp_path):
+    import subprocess
+    backend = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    environment = {**os.environ, 'PYTHONPATH': backend}
+    environment.pop('GAZETTEER_PATH', None)
+    
+    subprocess.run([sys.executable, '-c', 'import app.routes.geolocation, app.routes.client'],
+                   cwd=tmp_path, env=environment, check=True)
+    
+    assert list(tmp_path.iterdir()) == []
+
+def test_testing_config_keeps_the_gazetteer_in_memory_and_offline(app):
+    from app.services.geolocation.geocoding_service import geocoding_service
+    
+    assert geocoding_service.offline
+    assert geocoding_service.providers == [geocoding_service.gazetteer]
+    assert geocoding_service.gazetteer.path == ':memory:'
+    assert geocoding_service.address_to_coordinates('1 Nowhere Lane, Haines City, FL 33844') is None
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the resumable coordinate and home geofence backfill
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.geolocation.coordinate_backfill_service import CoordinateBackfillService
+
+class FakeGeocoder:
+    """Resolves every address except those containing 'nowhere'"""
+
+    def __init__(self):
+        self.addresses = []
+
+    def geocode_many(self, addresses):
+        self.addresses.extend(addresses)
+        return {a: {'latitude': 28.0, 'longitude': -81.0} for a in addresses if 'nowhere' not in a}
+
+def _clients(make_user, *specs):
+    from app import db
+    from app.models.client.client import Client
+    user, _ = make_user('manager')
+    clients = []
+    for index, spec in enumerate(specs):
+        clients.append(Client(id=f'client-{index}', first_name=f'Client{index}', last_name='Test',
+                              created_by=user.id, **spec))
+    db.session.add_all(clients)
+    db.session.commit()
+    return user, clients
+
+def test_resumes_after_the_checkpointed_id(app, make_user):
+    from app.models.client.client import Client
+    from app.models.geolocation.geofence import Geofence
+    _clients(make_user, *[{'address': f'{i} Main St', 'geocoding_status': 'deferred'} for i in range(5)])
+    geocoder = FakeGeocoder()
+    service = CoordinateBackfillService(batch_size=2, geocoder=geocoder)
+    checkpoints = []
+
+    first = service.run(limit=2, checkpoint=lambda metrics: checkpoints.append(dict(metrics)))
+    assert (first['processed'], first['last_id'], first['done']) == (2, 'client-1', False)
+    assert checkpoints[-1]['last_id'] == 'client-1'
+
+    second = service.run(start_after=checkpoints[-1]['last_id'])
+    assert second['processed'] == 3 and second['done']
+    assert geocoder.addresses == [f'{i} Main St' for i in range(5)]
+    assert Client.query.filter_by(geocoding_status='completed').count() == 5
+    assert Geofence.query.count() == 5
+    assert service.count_remaining() == 0
+
+def test_dry_run_writes_nothing(app, make_user):
+    from app.models.client.client import Client
+    from app.models.geolocation.geofence import Geofence
+    _clients(make_user, {'address': '1 Main St'}, {'address': 'nowhere'})
+    service = CoordinateBackfillService(geocoder=FakeGeocoder())
+
+    metrics = service.run(dry_run=True)
+
+    assert (metrics['geocoded'], metrics['failed'], metrics['geofences_created']) == (1, 1, 1)
+    assert Client.query.filter(Client.latitude.isnot(None)).count() == 0
+    assert Client.query.filter_by(geocoding_status='failed').count() == 0
+    assert Geofence.query.count() == 0
+
+def test_skips_fenced_clients_and_running_jobs(app, make_user):
+    from app import db
+    from app.models.geolocation.geofence import Geofence
+    from app.services.geolocation.client_geocoding_service import home_geofence_row
+    user, clients = _clients(
+        make_user,
+        {'address': '1 Main St', 'latitude': 28.0, 'longitude': -81.0, 'geocoding_status': 'completed'},
+        {'address': '2 Main St', 'latitude': 28.1, 'longitude': -81.1, 'geocoding_status': 'completed'},
+        {'address': '3 Main St', 'geocoding_status': 'pending'},
+        {'address': '4 Main St', 'geocoding_status': 'in_progress'},
+        {'address': '5 Main St', 'geocoding_status': 'failed'},
+    )
+    fenced = clients[0]
+    db.session.execute(db.insert(Geofence), [home_geofence_row(
+        fenced.id, fenced.first_name, fenced.last_name, fenced.address, 28.0, -81.0, 100, user.id
+    )])
+    db.session.commit()
+    geocoder = FakeGeocoder()
+    service = CoordinateBackfillService(geocoder=geocoder)
+
+    assert [row.id for row in service.candidates_query()] == ['client-1']
+    metrics = service.run()
+
+    # Only the unfenced client with coordinates; queued jobs make their own fence
+    assert (metrics['processed'], metrics['geofences_created']) == (1, 1)
+    assert geocoder.addresses == []
+    assert Geofence.query.filter_by(client_id=fenced.id).count() == 1
+    assert [row.id for row in service.candidates_query(retry_failed=True)] == ['client-4']
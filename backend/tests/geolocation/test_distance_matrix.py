@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized distance matrix helpers
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from geopy.distance import geodesic
+from app.services.geolocation.distance_matrix_service import (
+    DistanceMatrixService, haversine_matrix, haversine_pairwise
+)
+
+POINTS = [
+    (28.049308, -81.588240),  # Haines City, FL
+    (28.538336, -81.379234),  # Orlando, FL
+    (27.950575, -82.457178),  # Tampa, FL
+]
+
+def test_haversine_matrix_matches_geodesic():
+    """Haversine distances should be within 0.5% of geodesic distances"""
+    matrix = haversine_matrix(POINTS, POINTS)
+    
+    assert matrix.shape == (3, 3)
+    for i, origin in enumerate(POINTS):
+        assert matrix[i][i] == 0
+        for j, destination in enumerate(POINTS):
+            if i != j:
+                expected = geodesic(origin, destination).meters
+                assert abs(matrix[i][j] - expected) / expected < 0.005
+
+def test_haversine_pairwise_matches_matrix_diagonal():
+    """Consecutive trail distances should match the matrix entries"""
+    latitudes = [p[0] for p in POINTS]
+    longitudes = [p[1] for p in POINTS]
+    matrix = haversine_matrix(POINTS, POINTS)
+    
+    legs = haversine_pairwise(latitudes, longitudes)
+    
+    assert len(legs) == 2
+    assert abs(legs[0] - matrix[0][1]) < 1e-6
+    assert abs(legs[1] - matrix[1][2]) < 1e-6
+
+def test_travel_model_applies_road_factor_and_speed():
+    """Road distance and duration should follow the configured travel model"""
+    service = DistanceMatrixService(road_factor=1.5, average_speed_kmh=36)
+    result = service.build_matrix(POINTS[:1], POINTS[1:])
+    
+    straight = result['distance_meters']
+    assert result['road_distance_meters'].shape == (1, 2)
+    assert abs(result['road_distance_meters'][0][0] - straight[0][0] * 1.5) < 1e-6
+    # 36 km/h is 10 m/s
+    assert abs(result['duration_seconds'][0][0] - straight[0][0] * 1.5 / 10) < 1e-6
+
+def test_cache_is_bounded_by_cells():
+    service = DistanceMatrixService(cache_size=10, cache_max_cells=20)
+    for i in range(4):
+        entry = {'distances': haversine_matrix(POINTS, POINTS), 'client_ids': {f'c{i}'}}
+        service._cache_put((f'c{i}',), entry)
+    
+    # Two 3 x 3 matrices fit in 20 cells
+    assert list(service._cache) == [('c2',), ('c3',)]
+    assert service._cached_cells == 18
+    service.invalidate_client('c3')
+    assert service._cached_cells == 9
+
+def test_matrix_route_rejects_malformed_and_oversized_requests(app, client, make_user):
+    _, headers = make_user('manager')
+    url = '/api/geolocation/geocode/distance-matrix'
+    point = {'latitude': 28.0, 'longitude': -81.0}
+    
+    for body in [{'origins': 5}, {'client_ids': 'abc'}, {'client_ids': [{'id': 1}]},
+                 {'origins': [point], 'destinations': {'a': 1}}]:
+        response = client.post(url, json=body, headers=headers)
+        assert response.status_code == 400, body
+    
+    app.config['DISTANCE_MATRIX_MAX_CELLS'] = 6
+    response = client.post(url, json={'origins': [point] * 2, 'destinations': [point] * 4}, headers=headers)
+    assert response.status_code == 400
+    assert '2 x 4' in response.get_json()['error']
+    
+    response = client.post(url, json={'origins': [point] * 2, 'destinations': [point] * 3}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()['distance_meters'][0]) == 3
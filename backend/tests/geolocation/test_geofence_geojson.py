@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for GeoJSON geofence validation
+"""
+
+import sys
+import os
+import json
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.geolocation.geofence_geojson_service import GeofenceGeoJSONService
+
+def _feature(geometry_type, coordinates, **properties):
+    properties.setdefault('name', 'Test fence')
+    properties.setdefault('client_id', 'client-1')
+    return {
+        'type': 'Feature',
+        'geometry': {'type': geometry_type, 'coordinates': coordinates},
+        'properties': properties
+    }
+
+def test_valid_circle_and_polygon():
+    service = GeofenceGeoJSONService()
+    square = [[[-81.001, 28.0], [-80.999, 28.0], [-80.999, 28.002], [-81.001, 28.002], [-81.001, 28.0]]]
+    rows, errors = service.validate_features([
+        _feature('Point', [-81.0, 28.0], radius_meters=100),
+        _feature('Polygon', square)
+    ], {'client-1'})
+    
+    assert errors == []
+    assert [row['geofence_type'] for row in rows] == ['circle', 'polygon']
+    assert abs(rows[1]['center_latitude'] - 28.001) < 1e-9
+    # Radius reaches the furthest corner (~147 m from the centroid)
+    assert 140 < rows[1]['radius_meters'] < 155
+    assert rows[1]['polygon_coordinates'][0] == {'lat': 28.0, 'lng': -81.001}
+
+def test_invalid_features_are_reported_by_index():
+    service = GeofenceGeoJSONService(max_radius_meters=5000)
+    bowtie = [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]
+    rows, errors = service.validate_features([
+        _feature('Polygon', bowtie),
+        _feature('Point', [-81.0, 128.0], radius_meters=100),
+        _feature('Point', [-81.0, 28.0], radius_meters=100, client_id='unknown'),
+        _feature('Point', [-81.0, 28.0], radius_meters=50000),
+        _feature('LineString', [[-81.0, 28.0], [-81.1, 28.1]]),
+        _feature('Point', [-81.0, 28.0], radius_meters=100)
+    ], {'client-1'})
+    
+    assert len(rows) == 1
+    assert [error['index'] for error in errors] == [0, 1, 2, 3, 4]
+    assert errors[0]['error'].startswith('Invalid polygon')
+
+def test_feature_collection_round_trip():
+    service = GeofenceGeoJSONService()
+    rows, _ = service.validate_features([_feature('Point', [-81.0, 28.0], radius_meters=100)], {'client-1'})
+    
+    class Row:
+        pass
+    
+    geofence = Row()
+    geofence.__dict__.update(rows[0])
+    text = ''.join(service.iter_feature_collection([geofence]))
+    
+    import io
+    features = list(service.iter_features(io.StringIO(text)))
+    assert features[0]['geometry'] == {'type': 'Point', 'coordinates': [-81.0, 28.0]}
+    assert features[0]['properties']['radius_meters'] == 100.0
+
+def test_feature_collection_is_read_incrementally():
+    import io
+    features = [_feature('Point', [-81.0 - i / 1000, 28.0], radius_meters=100 + i) for i in range(50)]
+    text = json.dumps({'bbox': [-82, 27, -80, 29], 'type': 'FeatureCollection', 'features': features,
+                       'crs': None})
+    stream = io.BytesIO(text.encode('utf-8'))
+    
+    parsed = []
+    for feature in GeofenceGeoJSONService(read_chunk_size=64).iter_features(stream):
+        parsed.append(feature)
+        if len(parsed) == 1:
+            # Only the first few chunks have been read
+            assert stream.tell() < len(text) / 4
+    
+    assert parsed == features
+
+def test_single_features_and_malformed_documents():
+    import io
+    service = GeofenceGeoJSONService()
+    feature = _feature('Point', [-81.0, 28.0], radius_meters=100)
+    
+    assert list(service.iter_features(io.BytesIO(json.dumps(feature).encode()))) == [feature]
+    assert list(service.iter_features(io.StringIO('{"type": "FeatureCollection", "features": []}'))) == []
+    for text in ['[]', '{"type": "Polygon"}', '{"type": "FeatureCollection", "features": [{}',
+                 '{"type": "FeatureCollection", "features": []} {}',
+                 '{"type": "Topology", "features": [{"type": "Feature"}]}']:
+        try:
+            list(service.iter_features(io.StringIO(text)))
+        except ValueError:
+            continue
+        assert False, f'{text!r} was accepted'
+
+def test_is_active_must_be_a_boolean():
+    service = GeofenceGeoJSONService()
+    rows, errors = service.validate_features([
+        _feature('Point', [-81.0, 28.0], radius_meters=100, is_active='no'),
+        _feature('Point', [-81.0, 28.0], radius_meters=100, is_active=False)
+    ], {'client-1'})
+    
+    assert errors == [{'index': 0, 'error': 'is_active must be true or false'}]
+    assert rows[0]['is_active'] is False
+
+def test_import_inserts_in_batches_within_one_transaction(app, client, make_user):
+    from app import db
+    from app.models.client.client import Client
+    from app.models.geolocation.geofence import Geofence
+    
+    user, headers = make_user('manager')
+    db.session.add(Client(id='client-1', first_name='Ada', last_name='Client', address='1 Main St',
+                          created_by=user.id))
+    db.session.commit()
+    app.config['GEOFENCE_IMPORT_BATCH_SIZE'] = 2
+    features = [_feature('Point', [-81.0, 28.0], radius_meters=100) for _ in range(5)]
+    features[3]['properties']['radius_meters'] = 1
+    
+    response = client.post('/api/geolocation/geofences/import', headers=headers,
+                           json={'type': 'FeatureCollection', 'features': features})
+    
+    assert response.status_code == 201
+    assert response.get_json()['summary']['imported'] == 4
+    assert response.get_json()['errors'][0]['index'] == 3
+    assert Geofence.query.count() == 4
+    
+    # A malformed document after some batches were inserted leaves nothing behind
+    text = json.dumps({'type': 'FeatureCollection', 'features': features})[:-5]
+    response = client.post('/api/geolocation/geofences/import', headers=headers, data=text,
+                           content_type='application/geo+json')
+    assert response.status_code == 400
+    assert Geofence.query.count() == 4
+
+def test_malformed_features_are_reported_not_raised(app, client, make_user):
+    from app import db
+    from app.models.client.client import Client
+    from app.models.geolocation.geofence import Geofence
+    
+    user, headers = make_user('manager')
+    db.session.add(Client(id='client-1', first_name='Ada', last_name='Client', address='1 Main St',
+                          created_by=user.id))
+    db.session.commit()
+    features = [
+        _feature('Point', [-81.0, 28.0], radius_meters=100, client_id=['client-1']),
+        _feature('Point', [-81.0, 28.0], radius_meters=100, client_id={'id': 'client-1'}),
+        'not a feature',
+        {'type': 'Feature', 'geometry': ['Point'], 'properties': {'name': 'Fence', 'client_id': 'client-1'}},
+        _feature('Point', [-81.0, 28.0], radius_meters=100, name=['Fence']),
+        _feature('Point', [-81.0, 28.0], radius_meters=100)
+    ]
+    
+    response = client.post('/api/geolocation/geofences/import', headers=headers,
+                           json={'type': 'FeatureCollection', 'features': features})
+    
+    assert response.status_code == 201
+    assert response.get_json()['errors'] == [
+        {'index': 0, 'error': 'client_id must be a string'},
+        {'index': 1, 'error': 'client_id must be a string'},
+        {'index': 2, 'error': 'Feature must be a JSON object'},
+        {'index': 3, 'error': 'properties and geometry must be JSON objects'},
+        {'index': 4, 'error': 'name must be a string'}
+    ]
+    assert Geofence.query.count() == 1
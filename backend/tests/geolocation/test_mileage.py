@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for trail mileage computation
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from datetime import datetime, timedelta
+from app.services.geolocation.mileage_service import MileageService
+
+START = datetime(2026, 1, 5, 8, 0)
+
+def _trail(points):
+    """Build trail columns from (latitude, longitude, accuracy) tuples one minute apart"""
+    return (
+        [p[0] for p in points],
+        [p[1] for p in points],
+        [START + timedelta(minutes=i) for i in range(len(points))],
+        [p[2] for p in points]
+    )
+
+def test_straight_trail_distance():
+    """Three fixes 0.001 degrees of latitude apart cover about 222 meters"""
+    service = MileageService()
+    result = service.compute_trail_distance(*_trail([
+        (28.000, -81.0, 5), (28.001, -81.0, 5), (28.002, -81.0, 5)
+    ]))
+    
+    assert abs(result['distance_meters'] - 222.4) < 1.0
+    assert result['point_count'] == 3
+    assert result['dropped_point_count'] == 0
+
+def test_inaccurate_and_teleport_fixes_are_dropped():
+    """Low-accuracy fixes and single-point teleports do not add distance"""
+    service = MileageService(max_accuracy_meters=50)
+    result = service.compute_trail_distance(*_trail([
+        (28.000, -81.0, 5),
+        (28.001, -81.0, 5),
+        (28.500, -81.0, 400),  # inaccurate
+        (35.000, -81.0, 5),    # teleport
+        (28.002, -81.0, None),  # unknown accuracy is trusted
+    ]))
+    
+    assert abs(result['distance_meters'] - 222.4) < 1.0
+    assert result['kept_indices'] == [0, 1, 4]
+    assert result['dropped_point_count'] == 2
+
+def test_empty_trail():
+    service = MileageService()
+    result = service.compute_trail_distance([], [], [], [])
+    
+    assert result['distance_meters'] == 0.0
+    assert result['point_count'] == 0
+
+def test_stationary_jitter_adds_no_distance():
+    """Fixes wandering within their accuracy radius while parked are not driving"""
+    service = MileageService(min_displacement_meters=25)
+    parked = [(28.0000, -81.0, 20), (28.0002, -81.0, 20), (27.9999, -81.0, 20), (28.0003, -81.0, 20)]
+    result = service.compute_trail_distance(*_trail(parked * 10))
+    
+    assert result['distance_meters'] == 0.0
+    assert result['point_count'] == 1
+    assert result['dropped_point_count'] == 0
+    
+    # Slow, steady movement is measured from the last accepted fix, so it still counts
+    walk = [(28.0 + i * 0.0001, -81.0, 5) for i in range(21)]
+    result = service.compute_trail_distance(*_trail(walk))
+    # At most the last threshold's worth of movement is not counted
+    assert 222.4 - 25 < result['distance_meters'] < 223.4
+
+def test_rollups_use_the_agency_local_day():
+    service = MileageService(timezone_name='America/New_York')
+    
+    # 9pm EST on January 5th is 02:00 UTC on the 6th
+    assert service.local_date(datetime(2026, 1, 6, 2, 0)).isoformat() == '2026-01-05'
+    start, end = service.day_bounds(START.date())
+    assert start == datetime(2026, 1, 5, 5, 0)
+    assert end == datetime(2026, 1, 6, 5, 0)
+    # The day clocks spring forward has 23 hours
+    start, end = service.day_bounds(datetime(2026, 3, 8).date())
+    assert end - start == timedelta(hours=23)
+
+def test_record_location_upserts_one_rollup_per_day(app, make_user):
+    from app import db
+    from app.models.geolocation.daily_mileage import DailyMileage
+    from app.models.geolocation.location import Location
+    from app.services.geolocation.mileage_service import mileage_service
+    
+    caregiver, _ = make_user('caregiver')
+    evening = datetime(2026, 1, 6, 1, 0)  # 8pm on the 5th in New York
+    for i, latitude in enumerate([28.000, 28.001, 28.0011, 28.002]):
+        location = Location(user_id=caregiver.id, latitude=latitude, longitude=-81.0, accuracy=5,
+                            timestamp=evening + timedelta(minutes=i))
+        db.session.add(location)
+        mileage_service.record_location(location)
+        db.session.commit()
+    
+    rollups = DailyMileage.query.filter_by(user_id=caregiver.id).all()
+    assert [rollup.date.isoformat() for rollup in rollups] == ['2026-01-05']
+    assert abs(rollups[0].distance_meters - 222.4) < 1.0
+    assert rollups[0].point_count == 3
+    assert rollups[0].last_accuracy == 5
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for caregiver availability and the stored daily workload
+"""
+
+import sys
+import os
+from datetime import date, datetime, time, timedelta
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.task.caregiver_workload_service import CaregiverWorkloadService, period_of
+
+def test_period_boundaries():
+    assert period_of(time(7, 0)) == 'morning'
+    assert period_of(time(11, 59)) == 'morning'
+    assert period_of(time(12, 0)) == 'afternoon'
+    assert period_of(time(16, 59)) == 'afternoon'
+    assert period_of(time(17, 0)) == 'evening'
+
+def test_period_availability_is_clipped_to_working_hours_and_day_total():
+    service = CaregiverWorkloadService(day_start='07:00', day_end='20:00')
+    values = {'morning_minutes': 60, 'afternoon_minutes': 0, 'evening_minutes': 0, 'available_minutes': 400}
+
+    # 07:00-12:00 is 300 working minutes, 60 already booked
+    assert service.period_available(values, 'morning') == 240
+    # 17:00-20:00 is only 180 working minutes
+    assert service.period_available(values, 'evening') == 180
+
+    values['available_minutes'] = 90
+    assert service.period_available(values, 'afternoon') == 90
+
+DAY = date(2026, 10, 5)
+NEXT_DAY = DAY + timedelta(days=1)
+
+def _workload(caregiver_id, day):
+    from app import db
+    from app.models.task.caregiver_daily_workload import CaregiverDailyWorkload
+    row = db.session.query(CaregiverDailyWorkload).filter_by(caregiver_id=caregiver_id, date=day).one_or_none()
+    return row.to_dict() if row else None
+
+def _task(manager, client, **fields):
+    from app import db
+    from app.models.task.task import Task
+    task = Task(title='Visit', client_id=client.id, created_by=manager.id, **fields)
+    db.session.add(task)
+    db.session.commit()
+    return task
+
+def _client(manager):
+    from app import db
+    from app.models.client.client import Client
+    client = Client(first_name='Ada', last_name='Client', created_by=manager.id)
+    db.session.add(client)
+    db.session.commit()
+    return client
+
+def test_orm_changes_refresh_the_stored_rows(app, make_user):
+    from app import db
+    from app.models.task.task_assignment import TaskAssignment
+    from app.models.timesheet.timesheet import Timesheet
+    manager, _ = make_user('manager')
+    first, _ = make_user('caregiver')
+    second, _ = make_user('caregiver')
+    task = _task(manager, _client(manager), scheduled_date=DAY, scheduled_time=time(9, 0), estimated_duration=60)
+
+    assignment = TaskAssignment(task_id=task.id, assigned_user_id=first.id, assigned_by=manager.id)
+    db.session.add(assignment)
+    db.session.commit()
+    row = _workload(first.id, DAY)
+    assert (row['assigned_tasks'], row['morning_minutes'], row['available_minutes']) == (1, 60, 420)
+
+    # Moving the assignment refreshes the day it left as well as the one it joined
+    assignment.assigned_user_id = second.id
+    db.session.commit()
+    assert _workload(first.id, DAY)['assigned_tasks'] == 0
+    assert _workload(second.id, DAY)['assigned_tasks'] == 1
+
+    task.scheduled_date = NEXT_DAY
+    task.scheduled_time = time(13, 0)
+    db.session.commit()
+    assert _workload(second.id, DAY)['assigned_tasks'] == 0
+    row = _workload(second.id, NEXT_DAY)
+    assert (row['assigned_tasks'], row['afternoon_minutes']) == (1, 60)
+
+    clock_in = datetime.combine(NEXT_DAY, time(8, 0))
+    timesheet = Timesheet(user_id=second.id, client_id=task.client_id, date=NEXT_DAY, clock_in_time=clock_in)
+    db.session.add(timesheet)
+    db.session.commit()
+    assert _workload(second.id, NEXT_DAY)['is_clocked_in']
+
+    timesheet.clock_out_time = clock_in + timedelta(hours=2)
+    timesheet.total_hours = 2.0
+    db.session.commit()
+    row = _workload(second.id, NEXT_DAY)
+    assert (row['is_clocked_in'], row['worked_minutes']) == (False, 120)
+
+    timesheet.date = DAY
+    db.session.commit()
+    assert _workload(second.id, NEXT_DAY)['worked_minutes'] == 0
+    assert _workload(second.id, DAY)['worked_minutes'] == 120
+
+def test_applying_a_schedule_refreshes_the_stored_rows(app, make_user):
+    from app import db
+    from app.services.task.visit_scheduling_service import visit_scheduling_service
+    manager, _ = make_user('manager')
+    caregiver, _ = make_user('caregiver')
+    client = _client(manager)
+    tasks = [_task(manager, client, scheduled_date=DAY, scheduled_time=time(18, 0), estimated_duration=45)
+             for _ in range(2)]
+    schedule = {
+        'date': DAY.isoformat(),
+        'routes': [{'caregiver_id': caregiver.id, 'visits': [
+            {'task_id': task.id, 'already_assigned': False} for task in tasks
+        ]}],
+        'metrics': {'travel_meters': 0}
+    }
+
+    assert visit_scheduling_service.apply_schedule(schedule, manager.id) == 2
+    db.session.commit()
+
+    row = _workload(caregiver.id, DAY)
+    assert (row['assigned_tasks'], row['evening_minutes'], row['available_minutes']) == (2, 90, 390)
+
+def test_availability_route(app, client, make_user):
+    from app import db
+    from app.models.task.task_assignment import TaskAssignment
+    manager, manager_headers = make_user('manager')
+    busy, busy_headers = make_user('caregiver', first_name='Busy')
+    free, _ = make_user('caregiver', first_name='Free')
+    task = _task(manager, _client(manager), scheduled_date=DAY, estimated_duration=480)
+    db.session.add(TaskAssignment(task_id=task.id, assigned_user_id=busy.id, assigned_by=manager.id))
+    db.session.commit()
+    url = '/api/caregiver/availability'
+    days = {'start_date': DAY.isoformat(), 'end_date': NEXT_DAY.isoformat()}
+
+    response = client.get(url, headers=manager_headers, query_string=days)
+    assert response.status_code == 200
+    caregivers = {c['caregiver_id']: c['days'] for c in response.get_json()['caregivers']}
+    assert set(caregivers) == {busy.id, free.id}
+    assert [d['available_minutes'] for d in caregivers[busy.id]] == [0, 480]
+    # Days first read here are stored for later reads
+    assert _workload(free.id, NEXT_DAY)['available_minutes'] == 480
+
+    response = client.get(url, headers=manager_headers, query_string={**days, 'min_available_minutes': 60})
+    caregivers = {c['caregiver_id']: c['days'] for c in response.get_json()['caregivers']}
+    assert [d['date'] for d in caregivers[busy.id]] == [NEXT_DAY.isoformat()]
+
+    # Caregivers only ever see themselves, whatever they ask for
+    response = client.get(url, headers=busy_headers, query_string={**days, 'caregiver_id': free.id})
+    assert [c['caregiver_id'] for c in response.get_json()['caregivers']] == [busy.id]
+
+    assert client.get(url, headers=manager_headers, query_string={'start_date': 'soon'}).status_code == 400
+    assert client.get(url, headers=manager_headers, query_string={**days, 'period': 'night'}).status_code == 400
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the visit scheduling heuristic
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.task.visit_scheduler import VisitScheduler, format_minutes, parse_minutes
+
+def make_visit(visit_id, latitude, penalties, earliest=420, latest=1140, duration=30, **extra):
+    return {
+        'id': visit_id,
+        'latitude': latitude,
+        'longitude': -74.0,
+        'duration': duration,
+        'earliest': earliest,
+        'latest': latest,
+        'priority': 'medium',
+        'penalties': penalties,
+        **extra
+    }
+
+def make_caregiver(caregiver_id, start=420, end=1200, max_minutes=480):
+    return {'id': caregiver_id, 'start': start, 'end': end, 'max_minutes': max_minutes}
+
+def planned(result):
+    return {route['caregiver_id']: [visit['visit_id'] for visit in route['visits']] for route in result['routes']}
+
+def test_visits_go_to_primary_caregivers_in_travel_order():
+    visits = [
+        make_visit('a3', 40.72, {'ann': 0, 'bob': 2000}),
+        make_visit('a1', 40.70, {'ann': 0, 'bob': 2000}),
+        make_visit('a2', 40.71, {'ann': 0, 'bob': 2000}),
+        make_visit('b1', 40.90, {'bob': 0, 'ann': 2000}),
+        make_visit('b2', 40.91, {'bob': 0, 'ann': 2000})
+    ]
+    result = VisitScheduler(visits, [make_caregiver('ann'), make_caregiver('bob')], time_limit_seconds=1).solve()
+
+    routes = planned(result)
+    assert routes['ann'] in (['a1', 'a2', 'a3'], ['a3', 'a2', 'a1'])
+    assert sorted(routes['bob']) == ['b1', 'b2']
+    assert result['unassigned'] == []
+    assert result['metrics']['continuity_penalty'] == 0
+
+def test_time_windows_and_shift_length_are_respected():
+    visits = [
+        make_visit('late', 40.70, {'ann': 0}, earliest=900, latest=930, target=900),
+        make_visit('early', 40.70, {'ann': 0}, earliest=480, latest=510, target=480),
+        make_visit('noon', 40.70, {'ann': 0}, earliest=720, latest=750, target=720)
+    ]
+    result = VisitScheduler(visits, [make_caregiver('ann', max_minutes=300)], time_limit_seconds=1).solve()
+
+    # 08:00 to 15:30 does not fit a five hour shift, so one visit is left over
+    assert result['metrics']['assigned'] == 2
+    assert result['unassigned'][0]['reason'] == 'no_capacity'
+    route = result['routes'][0]['visits']
+    assert [visit['start'] for visit in route] == sorted(visit['start'] for visit in route)
+    assert route[0]['start'] in (480, 720)
+
+def test_visits_without_eligible_caregivers_are_reported():
+    visits = [
+        make_visit('orphan', 40.70, {}),
+        make_visit('off_roster', 40.70, {'someone_else': 0}),
+        make_visit('bad_window', 40.70, {'ann': 0}, earliest=600, latest=500)
+    ]
+    result = VisitScheduler(visits, [make_caregiver('ann')], time_limit_seconds=1).solve()
+
+    assert result['routes'] == []
+    assert [item['reason'] for item in result['unassigned']] == [
+        'no_eligible_caregiver', 'no_eligible_caregiver', 'invalid_time_window'
+    ]
+
+def test_minutes_helpers():
+    assert parse_minutes('08:30') == 510
+    assert format_minutes(510) == '08:30'
+    assert format_minutes(65.4) == '01:05'
+
+def test_schedule_route_rejects_malformed_options(app, client, make_user):
+    _, headers = make_user('admin')
+    
+    for options in [{'time_limit_seconds': 'abc'}, {'time_limit_seconds': [1]}, {'time_limit_seconds': 'nan'},
+                    {'time_limit_seconds': -1}, {'caregiver_ids': 'abc'}, {'shifts': ['09:00']},
+                    {'shifts': {'caregiver-1': '09:00'}}]:
+        response = client.post('/api/task/schedule', headers=headers, json={'date': '2026-10-19', **options})
+        assert response.status_code == 400, options
+    
+    response = client.post('/api/task/schedule', headers=headers, json={'date': '2026-10-19', 'time_limit_seconds': '0.5'})
+    assert response.status_code == 200
@@ -92,6 +92,9 @@ const Clients = () => {
         const response = await api.post('/client', clientData);
         if (response.data.geofence_created) {
           toast.success('Client created successfully! Home geofence also created.');
+        } else if (response.data.geocoding_status === 'pending') {
+          toast.success('Client created successfully! Locating address for home geofence...');
+          pollGeocodingStatus(response.data.client.id);
         } else {
           toast.success('Client created successfully! (No geofence - address required)');
         }
@@ -107,6 +110,26 @@ const Clients = () => {
     }
   };
 
+  const pollGeocodingStatus = (clientId, attempt = 0) => {
+    // Geocoding runs in the background; check back until it settles
+    setTimeout(async () => {
+      try {
+        const response = await api.get(`/client/${clientId}/geocoding-status`);
+        const status = response.data.geocoding_status;
+        if (status === 'completed') {
+          toast.success('Home geofence created.');
+          fetchClients();
+        } else if (status === 'failed') {
+          toast.error('Could not locate client address - no geofence created');
+        } else if (attempt < 30) {
+          pollGeocodingStatus(clientId, attempt + 1);
+        }
+      } catch (error) {
+        console.error('Error checking geocoding status:', error);
+      }
+    }, 2000);
+  };
+
   const handleEdit = (client) => {
     setEditingClient(client);
     setFormData({
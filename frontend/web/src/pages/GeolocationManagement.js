@@ -57,7 +57,9 @@ const GeolocationManagement = () => {
 
   const fetchClients = async () => {
     try {
-      const response = await api.get('/client');
+      const response = await api.get('/client', {
+        params: { fields: 'id,first_name,last_name,address,latitude,longitude' }
+      });
       setClients(response.data.clients);
     } catch (error) {
       console.error('Error fetching clients:', error);
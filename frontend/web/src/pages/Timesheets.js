@@ -374,7 +374,9 @@ const Timesheets = () => {
           clientsResponse = await api.get('/client/assigned');
         } else {
           // Admin and managers can see all clients
-          clientsResponse = await api.get('/client');
+          clientsResponse = await api.get('/client', {
+            params: { fields: 'id,first_name,last_name,address,latitude,longitude' }
+          });
         }
         console.log('Clients response:', clientsResponse.data);
         setClients(clientsResponse.data.clients || []);